@@ -16,6 +16,9 @@ class Settings(BaseSettings):
     # Local storage / DB
     local_docs_dir: str = "./app/data/documents"
     sqlite_path: str = "./app/data/app.db"
+    # Pooled SQLite connections: concurrent reader connections and busy timeout for lock waits.
+    sqlite_reader_connections: int = 4
+    sqlite_busy_timeout_ms: int = 5000
 
     # MinerU
     mineru_base_url: str = "https://mineru.net"
@@ -24,14 +27,32 @@ class Settings(BaseSettings):
     mineru_is_ocr: bool = False
     mineru_poll_interval_sec: float = 1.0
     mineru_max_wait_sec: float = 300.0
+    # Concurrent extract requests arriving within this window are submitted as one MinerU batch.
+    mineru_batch_window_sec: float = 0.5
+    mineru_batch_max_files: int = 20
+    # Polling backs off from mineru_poll_interval_sec up to this cap; all MinerU polls share this request rate.
+    mineru_poll_max_interval_sec: float = 10.0
+    mineru_poll_rate_per_sec: float = 5.0
     mineru_cache_artifacts: bool = True
     mineru_cache_dir: str = "./app/data/mineru"
+    # Reuse cached result zips for known documents (needs mineru_cache_artifacts); LRU size cap for the cache dir.
+    mineru_parse_cache_enabled: bool = True
+    mineru_parse_cache_max_bytes: int = 2 * 1024 * 1024 * 1024
+    # Cache hits are validated by zip size + mtime; the full sha256 is re-checked in the background
+    # at most this often per entry.
+    mineru_parse_cache_verify_interval_sec: float = 24 * 3600
     # MinerU bbox coordinate assumptions
     # Most MinerU JSON outputs use image-like coordinates with origin at top-left.
     mineru_bbox_origin: str = "top-left"  # "top-left" or "bottom-left"
     mineru_bbox_units: str = "auto"  # "auto", "px", "pt"
     mineru_bbox_content_coverage: float = 0.92  # used to infer full-page bbox canvas size from content extents
 
+    # Outbound HTTP (shared pooled client for MinerU). HTTP/2 is used when the `h2` package is installed.
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry_sec: float = 30.0
+    http_http2: bool = True
+
     # PaddleOCR (online jobs API)
     paddleocr_enabled: bool = False
     paddleocr_job_url: str = ""
@@ -39,14 +60,104 @@ class Settings(BaseSettings):
     paddleocr_model: str = "PaddleOCR-VL-1.5"
     paddleocr_poll_interval_sec: float = 2.0
     paddleocr_max_wait_sec: float = 180.0
+    paddleocr_poll_max_interval_sec: float = 10.0
+    paddleocr_poll_rate_per_sec: float = 5.0
+
+    # Remote job polling (MinerU, PaddleOCR): fast polls during the first seconds of a job, then
+    # exponential backoff with jitter.
+    job_poll_initial_sec: float = 0.25
+    job_poll_fast_phase_sec: float = 2.0
+    job_poll_backoff: float = 1.5
+    job_poll_jitter: float = 0.2
 
     # LLM (DeepSeek via LangChain)
     deepseek_api_key: str = ""
     deepseek_base_url: str = "https://api.deepseek.com/v1"
     deepseek_model: str = "chatdeepseek"
+    # LLM gateway shared by every review in the process: concurrent requests, tokens per minute
+    # (prompt plus `llm_output_tokens_reserve` per request, settled against reported usage;
+    # 0 = unlimited), retries with backoff on 429/5xx/timeouts, and a circuit breaker that fails
+    # fast for `llm_breaker_cooldown_sec` after that many consecutive upstream failures.
+    llm_max_concurrency: int = 8
+    llm_tokens_per_minute: int = 0
+    llm_output_tokens_reserve: int = 1024
+    llm_request_timeout_sec: float = 120.0
+    llm_max_attempts: int = 4
+    llm_retry_base_sec: float = 1.0
+    llm_retry_max_sec: float = 30.0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_cooldown_sec: float = 30.0
+    # Hedged requests: a review request still outstanding after the provider's
+    # `llm_hedge_percentile` latency (from its recent latency histogram, never below
+    # `llm_hedge_min_delay_sec`; `llm_hedge_initial_delay_sec` until `llm_hedge_min_samples`
+    # calls were seen) is duplicated, and the first usable answer wins. The delay counts from when
+    # the request was actually sent (not from queueing in the gateway); no hedge is sent to a
+    # provider whose gateway is saturated, and at most `llm_hedge_max_ratio` of requests are hedged.
+    llm_hedge_enabled: bool = True
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_min_delay_sec: float = 5.0
+    llm_hedge_initial_delay_sec: float = 30.0
+    llm_hedge_min_samples: int = 20
+    llm_hedge_max_ratio: float = 0.1
+    # Optional second OpenAI-compatible endpoint: receives hedges, and requests the primary
+    # failed. Disabled while base URL or model is empty.
+    llm_fallback_base_url: str = ""
+    llm_fallback_api_key: str = ""
+    llm_fallback_model: str = ""
+
+    # LLM response cache (content-addressed, per review chunk)
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "./app/data/llm_cache.db"
+    llm_cache_max_bytes: int = 256 * 1024 * 1024
+    # Cache hits only read; their access times are written in one batch at most this often.
+    llm_cache_access_flush_sec: float = 5.0
 
     # Streaming / batching
+    # Max paragraphs per review chunk (-1 = the whole document in one chunk).
     pagination: int = 32
+    # How paragraphs are grouped into chunks: "tokens" packs paragraphs up to
+    # `review_chunk_token_budget` estimated prompt tokens (system prompt, guidance and output
+    # format included) and splits oversized tables on row boundaries; "paragraphs" slices by
+    # `pagination` alone.
+    review_chunk_strategy: str = "tokens"
+    review_chunk_token_budget: int = 6000
+    # Max number of chunks sent to the LLM concurrently within one review.
+    review_chunk_concurrency: int = 4
+    # Order in which chunk results are yielded: "completion" or "document".
+    review_chunk_order: str = "completion"
+    # Drop paragraphs with nothing to review (bare numbering, blank placeholders, checkbox
+    # lines, separators) before chunking, so they are never sent to the LLM.
+    review_prefilter_enabled: bool = True
+    # Send each chunk only the custom rules whose wording it shares (top-K by keyword/n-gram
+    # overlap with the rule's name, description and examples), plus universal and exclusion rules.
+    review_rule_routing_enabled: bool = True
+    review_rule_routing_top_k: int = 8
+    # Rules with a `local_check` (regexes, lexicon, capital/figure amount consistency) are
+    # evaluated deterministically in one pass over the document and left out of LLM prompts.
+    review_local_rules_enabled: bool = True
+    # When a document was already reviewed and only the rule set changed, run the LLM for the
+    # added/modified rules only and carry over the previous run's issues for everything else.
+    review_incremental_rules: bool = True
+    # When an uploaded document is a new revision of one reviewed before (same owner, subtype and
+    # file name once version markers are stripped), only changed/new paragraphs go to the LLM;
+    # issues on unchanged paragraphs are carried over and re-anchored on the new file.
+    review_revision_enabled: bool = True
+    # Unchanged paragraphs sent along on each side of a changed one, as context only.
+    review_revision_context_paragraphs: int = 1
+    # Review job queue. "inline": the web process runs a worker; "external": only
+    # scripts/run_review_worker.py processes execute jobs.
+    review_worker_mode: str = "inline"
+    review_worker_concurrency: int = 2
+    review_job_lease_sec: float = 60.0
+    review_job_heartbeat_sec: float = 10.0
+    review_job_poll_sec: float = 1.0
+    review_job_max_attempts: int = 3
+    # SSE issue streams are pushed from the in-process event bus; while idle, resync from the DB this often.
+    review_sse_resync_sec: float = 15.0
+    # With review_worker_mode="external" no events reach the web process; SSE polls the DB this often.
+    review_sse_poll_sec: float = 0.5
+    # Worker threads for PyMuPDF/layout anchoring (0 = run on the event loop).
+    anchor_worker_threads: int = 2
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
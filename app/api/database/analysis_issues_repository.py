@@ -1,6 +1,6 @@
 from common.logger import get_logger
+from common import json_codec
 from datetime import datetime, timezone
-import json
 from typing import Any, Dict, List
 from uuid import uuid4
 
@@ -30,7 +30,16 @@ class AnalysisIssuesRepository:
         )
         return [dict(r) for r in rows]
 
+    async def delete_by_run_id(self, run_id: str) -> int:
+        return await self.db_client.delete_items_by_values("analysis_issues", {"run_id": run_id})
+
     async def store_issues(self, run_id: str, issues: List[Issue]) -> List[Dict[str, Any]]:
+        out = self.build_rows(run_id, issues)
+        await self.db_client.store_items("analysis_issues", out)
+        return out
+
+    def build_rows(self, run_id: str, issues: List[Issue]) -> List[Dict[str, Any]]:
+        """Canonical analysis_issues rows for `issues`, ready for `SQLiteClient.store_items`."""
         now = datetime.now(timezone.utc).isoformat()
         out: List[Dict[str, Any]] = []
         for issue in issues:
@@ -43,7 +52,7 @@ class AnalysisIssuesRepository:
                 "explanation": issue.explanation,
                 "suggested_fix": issue.suggested_fix,
                 "risk_level": risk_level,
-                "location_json": json.dumps(issue.location.model_dump(), ensure_ascii=False)
+                "location_json": json_codec.dumps(issue.location.model_dump())
                 if issue.location is not None
                 else None,
                 "location_type": (
@@ -54,6 +63,5 @@ class AnalysisIssuesRepository:
                 "para_index": (issue.location.para_index if issue.location is not None else None),
                 "created_at_utc": now,
             }
-            await self.db_client.store_item("analysis_issues", row)
             out.append(row)
         return out
@@ -1,5 +1,5 @@
 from common.logger import get_logger
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Set
 from database.db_client import SQLiteClient
 
 logging = get_logger(__name__)
@@ -37,6 +37,39 @@ class AnalysisRunsRepository:
         )
         return dict(rows[0]) if rows else None
 
+    async def get_latest_completed(
+        self,
+        *,
+        owner_id: str,
+        sha256: str,
+        pipeline_version: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Most recent completed run for the same input and pipeline (forced re-runs included), any rule set."""
+        rows = await self.db_client.execute_query(
+            """
+            SELECT *
+            FROM analysis_runs
+            WHERE owner_id = ? AND sha256 = ? AND status = 'completed'
+              AND (pipeline_version = ? OR instr(pipeline_version, ? || '|force:') = 1)
+            ORDER BY created_at_utc DESC
+            LIMIT 1
+            """,
+            (owner_id, sha256, pipeline_version, pipeline_version),
+        )
+        return dict(rows[0]) if rows else None
+
+    async def store_paragraph_hashes(self, run_id: str, hashes: Iterable[str]) -> int:
+        """Record the paragraph content hashes a run covered, so a later revision can diff against it."""
+        rows = [{"run_id": run_id, "para_hash": h} for h in dict.fromkeys(hashes) if h]
+        return await self.db_client.store_items("analysis_run_paragraphs", rows)
+
+    async def get_paragraph_hashes(self, run_id: str) -> Set[str]:
+        rows = await self.db_client.execute_query(
+            "SELECT para_hash FROM analysis_run_paragraphs WHERE run_id = ?",
+            (run_id,),
+        )
+        return {r["para_hash"] for r in rows}
+
     async def create(self, row: Dict[str, Any]) -> Dict[str, Any]:
         await self.db_client.store_item("analysis_runs", row)
         logging.info(f"Created analysis_run: {row.get('id')}")
@@ -9,9 +9,11 @@ except ModuleNotFoundError:
     sys.modules['sqlite3'] = sqlite3
 
 import aiosqlite
-from typing import Any, Dict, List, Optional, Sequence
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from pathlib import Path
 from config.config import settings
+from database.sqlite_pool import SQLiteConnectionPool
 from datetime import datetime, timezone
 from uuid import uuid4
 
@@ -164,6 +166,15 @@ CREATE TABLE IF NOT EXISTS analysis_issues (
 );
 """
 
+CREATE_ANALYSIS_RUN_PARAGRAPHS_TABLE = """
+CREATE TABLE IF NOT EXISTS analysis_run_paragraphs (
+    run_id TEXT NOT NULL,
+    para_hash TEXT NOT NULL,
+    PRIMARY KEY (run_id, para_hash),
+    FOREIGN KEY (run_id) REFERENCES analysis_runs(id)
+);
+"""
+
 CREATE_DOCUMENT_ASSETS_TABLE = """
 CREATE TABLE IF NOT EXISTS document_assets (
     id TEXT PRIMARY KEY,
@@ -195,6 +206,7 @@ CREATE TABLE IF NOT EXISTS rules (
     source TEXT NOT NULL DEFAULT 'custom',
     status TEXT NOT NULL DEFAULT 'active',
     is_universal INTEGER NOT NULL DEFAULT 0,
+    local_check TEXT,
     created_at TEXT NOT NULL,
     updated_at TEXT
 );
@@ -262,6 +274,27 @@ CREATE TABLE IF NOT EXISTS rule_type_relations (
 );
 """
 
+CREATE_REVIEW_JOBS_TABLE = """
+CREATE TABLE IF NOT EXISTS review_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner_id TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    payload_json TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    heartbeat_at REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    created_at_utc TEXT NOT NULL,
+    updated_at_utc TEXT NOT NULL
+);
+"""
+
 CREATE_SCHEMA_MIGRATIONS_TABLE = """
 CREATE TABLE IF NOT EXISTS schema_migrations (
     name TEXT PRIMARY KEY,
@@ -363,13 +396,59 @@ async def _apply_doc_ir_migration(db: aiosqlite.Connection) -> None:
     await _mark_migration_applied(db, name)
 
 
+async def _apply_rule_local_check_migration(db: aiosqlite.Connection) -> None:
+    name = "20261017_add_rule_local_check"
+    if await _migration_applied(db, name):
+        return
+    await _add_column_if_missing(db, "rules", "local_check", "TEXT")
+    await _mark_migration_applied(db, name)
+
+
+_READ_PREFIXES = ("SELECT", "WITH", "VALUES", "EXPLAIN")
+# Keywords that make a statement a write even when it starts like a read (e.g. `WITH ... INSERT`).
+_WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER|VACUUM|REINDEX|ATTACH|DETACH)\b")
+# String literals, quoted identifiers and comments, which must not be scanned for keywords.
+_SQL_NOISE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def _is_read_query(query: str) -> bool:
+    """Whether `query` is safe on a read-only connection; unsure cases count as writes."""
+    sql = _SQL_NOISE.sub(" ", query).strip().upper()
+    if sql.startswith("PRAGMA"):
+        # `PRAGMA name` / `PRAGMA name(arg)` read; `PRAGMA name = value` sets.
+        return "=" not in sql
+    return sql.startswith(_READ_PREFIXES) and not _WRITE_KEYWORDS.search(sql)
+
+
 class SQLiteClient:
+    """
+    Async SQLite access for the repositories.
+
+    All calls go through a `SQLiteConnectionPool` (one WAL writer, several readers) owned by this
+    client, so share one client per database file rather than creating one per repository.
+    """
+
     def __init__(self, db_path: str | None = None) -> None:
         self.db_path = db_path or settings.sqlite_path
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.pool = SQLiteConnectionPool(
+            self.db_path,
+            readers=settings.sqlite_reader_connections,
+            busy_timeout_ms=settings.sqlite_busy_timeout_ms,
+        )
+        self._initialized = False
+
+    async def close(self) -> None:
+        await self.pool.close()
 
     async def init_db(self) -> None:
-        async with aiosqlite.connect(self.db_path) as db:
+        if self._initialized:
+            return
+        await self._init_schema()
+        self._initialized = True
+
+    async def _init_schema(self) -> None:
+        async with self.pool.write() as db:
             await db.execute(CREATE_ISSUES_TABLE)
             await db.execute("CREATE INDEX IF NOT EXISTS ix_issues_owner_doc ON issues(owner_id, document_id)")
             await db.execute("CREATE INDEX IF NOT EXISTS ix_issues_source_run ON issues(source_run_id)")
@@ -378,10 +457,14 @@ class SQLiteClient:
             await db.execute("CREATE INDEX IF NOT EXISTS ix_analysis_runs_owner_sha ON analysis_runs(owner_id, sha256)")
             await db.execute(CREATE_ANALYSIS_ISSUES_TABLE)
             await db.execute("CREATE INDEX IF NOT EXISTS ix_analysis_issues_run ON analysis_issues(run_id)")
+            await db.execute(CREATE_ANALYSIS_RUN_PARAGRAPHS_TABLE)
             await db.execute(CREATE_RULES_TABLE)
             await db.execute(CREATE_DOCUMENTS_TABLE)
             await db.execute("CREATE INDEX IF NOT EXISTS ix_documents_owner ON documents(owner_id)")
             await db.execute("CREATE INDEX IF NOT EXISTS ix_documents_owner_sha ON documents(owner_id, sha256)")
+            await db.execute(CREATE_REVIEW_JOBS_TABLE)
+            await db.execute("CREATE INDEX IF NOT EXISTS ix_review_jobs_status ON review_jobs(status, created_at_utc)")
+            await db.execute("CREATE INDEX IF NOT EXISTS ix_review_jobs_doc ON review_jobs(owner_id, document_id)")
             await db.execute(CREATE_SCHEMA_MIGRATIONS_TABLE)
             await db.execute(CREATE_DOCUMENT_TYPES_TABLE)
             await db.execute(CREATE_DOCUMENT_SUBTYPES_TABLE)
@@ -390,6 +473,7 @@ class SQLiteClient:
             await db.commit()
 
             await _apply_doc_ir_migration(db)
+            await _apply_rule_local_check_migration(db)
             await db.commit()
 
             await _validate_or_raise(db)
@@ -502,20 +586,50 @@ class SQLiteClient:
                 logging.warning(f"Migration: Failed to backfill rule scopes: {e}")
 
 
+    def transaction(self):
+        """Async context manager yielding the writer connection for a multi-statement transaction."""
+        return self.pool.write()
+
+    async def execute_write(self, query: str, params: tuple = ()) -> int:
+        """Run one write statement in its own transaction and return the affected row count."""
+        async with self.pool.write() as db:
+            cursor = await db.execute(query, params)
+            return cursor.rowcount or 0
+
     async def store_item(self, table: str, item: Dict[str, Any]) -> None:
         columns = ", ".join(item.keys())
         placeholders = ", ".join(["?"] * len(item))
         values = list(item.values())
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.write() as db:
             await db.execute(
                 f"REPLACE INTO {table} ({columns}) VALUES ({placeholders})",
                 values,
             )
-            await db.commit()
+
+    async def store_items(self, table: str, items: Sequence[Dict[str, Any]]) -> int:
+        """REPLACE many rows into one table in a single transaction. Returns the number of rows written."""
+        return await self.store_item_groups([(table, items)])
+
+    async def store_item_groups(self, groups: Sequence[Tuple[str, Sequence[Dict[str, Any]]]]) -> int:
+        """
+        REPLACE rows into several tables in a single transaction using `executemany`.
+        Rows of a table are grouped by column set, so items with differing keys are still supported.
+        """
+        total = 0
+        async with self.pool.write() as db:
+            for table, items in groups:
+                by_columns: Dict[Tuple[str, ...], List[List[Any]]] = {}
+                for item in items:
+                    by_columns.setdefault(tuple(item.keys()), []).append(list(item.values()))
+                for cols, rows in by_columns.items():
+                    columns = ", ".join(cols)
+                    placeholders = ", ".join(["?"] * len(cols))
+                    await db.executemany(f"REPLACE INTO {table} ({columns}) VALUES ({placeholders})", rows)
+                    total += len(rows)
+        return total
 
     async def retrieve_item_by_id(self, table: str, item_id: str) -> Optional[Dict[str, Any]]:
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.pool.read() as db:
             cursor = await db.execute(f"SELECT * FROM {table} WHERE id = ?", (item_id,))
             row = await cursor.fetchone()
             return dict(row) if row else None
@@ -530,16 +644,14 @@ class SQLiteClient:
             params = list(filters.values())
 
         query = f"SELECT * FROM {table} {where}"
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.pool.read() as db:
             cursor = await db.execute(query, params)
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
 
     async def delete_item(self, table: str, item_id: str) -> None:
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.write() as db:
             await db.execute(f"DELETE FROM {table} WHERE id = ?", (item_id,))
-            await db.commit()
 
     async def delete_items_by_values(self, table: str, filters: Dict[str, Any]) -> int:
         if not filters:
@@ -547,14 +659,17 @@ class SQLiteClient:
         clauses = [f"{col} = ?" for col in filters.keys()]
         where = " AND ".join(clauses)
         params = list(filters.values())
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.write() as db:
             cursor = await db.execute(f"DELETE FROM {table} WHERE {where}", params)
-            await db.commit()
             return cursor.rowcount or 0
 
-    async def execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+    async def execute_query(
+        self, query: str, params: tuple = (), *, write: bool | None = None
+    ) -> List[Dict[str, Any]]:
+        # Reads go to the reader connections; anything else must take the writer. Callers that
+        # know better (e.g. a SELECT calling a function with side effects) can pass `write`.
+        is_read = not write if write is not None else _is_read_query(query)
+        async with (self.pool.read() if is_read else self.pool.write()) as db:
             cursor = await db.execute(query, params)
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
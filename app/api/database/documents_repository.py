@@ -58,6 +58,19 @@ class DocumentsRepository:
         )
         return dict(rows[0]) if rows else None
 
+    async def list_reviewed_by_subtype(self, *, owner_id: str, subtype_id: str, exclude_id: str) -> List[dict]:
+        """Other reviewed documents of the owner in a subtype, newest first (revision baseline candidates)."""
+        rows = await self.db_client.execute_query(
+            """
+            SELECT *
+            FROM documents
+            WHERE owner_id = ? AND subtype_id = ? AND id != ? AND last_run_id IS NOT NULL
+            ORDER BY created_at_utc DESC
+            """,
+            (owner_id, subtype_id, exclude_id),
+        )
+        return [dict(r) for r in rows]
+
     async def update_last_run_id(self, doc_id: str, *, owner_id: str, last_run_id: str | None) -> None:
         rows = await self.db_client.execute_query(
             "SELECT * FROM documents WHERE id = ? AND owner_id = ?",
@@ -1,4 +1,5 @@
 from common.logger import get_logger
+from common import json_codec
 from typing import Any, Dict, List, Optional, Tuple
 from common.models import Issue
 from database.db_client import SQLiteClient
@@ -34,10 +35,13 @@ class IssuesRepository:
 
     async def store_issues(self, issues: List[Issue]) -> None:
         logging.info(f"Storing {len(issues)} issues in the database.")
-        for issue in issues:
-            await self.db_client.store_item("issues", self._serialize_issue(issue))
+        await self.db_client.store_items("issues", self.serialize_issues(issues))
         logging.info("Issues stored successfully.")
 
+    def serialize_issues(self, issues: List[Issue]) -> List[Dict[str, Any]]:
+        """Rows for `issues`, ready for `SQLiteClient.store_items`."""
+        return [self._serialize_issue(issue) for issue in issues]
+
     async def update_issue(self, issue_id: str, *, owner_id: str, fields: Dict[str, Any]) -> Issue:
         logging.info(f"Updating issue {issue_id}")
         rows = await self.db_client.execute_query(
@@ -60,18 +64,15 @@ class IssuesRepository:
         - Keep primitive fields as-is.
         - JSON-encode nested dict/list fields into TEXT columns.
         """
-        import json
-
         out = dict(item)
         for key in ["location", "modified_fields", "dismissal_feedback", "feedback"]:
             if key not in out or out[key] is None:
                 continue
             if isinstance(out[key], (dict, list)):
-                out[key] = json.dumps(out[key], ensure_ascii=False)
+                out[key] = json_codec.dumps(out[key])
         return out
 
     def _serialize_issue(self, issue: Issue) -> Dict[str, Any]:
-        import json
         data = issue.model_dump()
         if "doc_id" in data:
             data["document_id"] = data.pop("doc_id")
@@ -86,7 +87,7 @@ class IssuesRepository:
         # Flatten nested objects to JSON strings for SQLite storage
         for key in ["location", "modified_fields", "dismissal_feedback", "feedback"]:
             if key in data and data[key] is not None:
-                data[key] = json.dumps(data[key])
+                data[key] = json_codec.dumps(data[key])
         return data
 
     def _deserialize_issue_row(self, item: Dict[str, Any]) -> Dict[str, Any]:
@@ -96,11 +97,10 @@ class IssuesRepository:
         return out
 
     def _deserialize_issue(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        import json
         for key in ["location", "modified_fields", "dismissal_feedback", "feedback"]:
             if key in item and item[key] and isinstance(item[key], str):
                 try:
-                    item[key] = json.loads(item[key])
+                    item[key] = json_codec.loads(item[key])
                 except Exception:
                     pass
         return item
@@ -115,6 +115,13 @@ class IssuesRepository:
         logging.info(f"Deleted {count} issues for document {doc_id}")
         return count
 
+    async def delete_issues_by_run(self, run_id: str, *, owner_id: str, doc_id: str) -> int:
+        """Delete the issues a review run stored for a document. Returns number of deleted items."""
+        return await self.db_client.delete_items_by_values(
+            "issues",
+            {"source_run_id": run_id, "document_id": doc_id, "owner_id": owner_id},
+        )
+
     async def any_issues_exist_for_doc(self, doc_id: str, *, owner_id: str) -> bool:
         rows = await self.db_client.execute_query(
             "SELECT 1 FROM issues WHERE document_id = ? AND owner_id = ? LIMIT 1",
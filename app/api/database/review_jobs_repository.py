@@ -0,0 +1,228 @@
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from common.logger import get_logger
+from database.db_client import SQLiteClient
+
+logging = get_logger(__name__)
+
+
+class ReviewJobsRepository:
+    """
+    Durable review job queue stored in the `review_jobs` table.
+
+    A job is `queued` until a worker claims it, which sets `leased` with a `lease_owner` and an
+    expiry that the worker extends by heartbeating. A lease that expires (the worker crashed or
+    hung) makes the job claimable again until `max_attempts` is reached. Claims are conditional
+    UPDATEs, so workers in separate processes can share one database file safely.
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_LEASED = "leased"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    STATUS_CANCELLED = "cancelled"
+
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_LEASED)
+
+    def __init__(self, db_client: SQLiteClient) -> None:
+        self.db_client = db_client
+
+    async def init(self) -> None:
+        await self.db_client.init_db()
+
+    async def enqueue(
+        self,
+        *,
+        kind: str,
+        owner_id: str,
+        document_id: str,
+        run_id: str,
+        payload: Dict[str, Any],
+        max_attempts: int = 3,
+    ) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc).isoformat()
+        row = {
+            "id": str(uuid4()),
+            "kind": kind,
+            "owner_id": owner_id,
+            "document_id": document_id,
+            "run_id": run_id,
+            "payload_json": json.dumps(payload, ensure_ascii=False),
+            "status": self.STATUS_QUEUED,
+            "attempts": 0,
+            "max_attempts": max(1, int(max_attempts)),
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "heartbeat_at": None,
+            "cancel_requested": 0,
+            "error_message": None,
+            "created_at_utc": now,
+            "updated_at_utc": now,
+        }
+        await self.db_client.store_item("review_jobs", row)
+        logging.info(f"Enqueued review job {row['id']} ({kind}) for document {document_id}")
+        return row
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.db_client.retrieve_item_by_id("review_jobs", job_id)
+
+    async def claim(self, *, worker_id: str, lease_sec: float) -> Optional[Dict[str, Any]]:
+        """Lease the oldest runnable job (queued, or leased with an expired lease) to `worker_id`."""
+        now = time.time()
+        async with self.db_client.transaction() as db:
+            cursor = await db.execute(
+                """
+                SELECT * FROM review_jobs
+                WHERE cancel_requested = 0
+                  AND attempts < max_attempts
+                  AND (status = ? OR (status = ? AND lease_expires_at < ?))
+                ORDER BY created_at_utc ASC
+                LIMIT 1
+                """,
+                (self.STATUS_QUEUED, self.STATUS_LEASED, now),
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+            cursor = await db.execute(
+                """
+                UPDATE review_jobs
+                SET status = ?, lease_owner = ?, lease_expires_at = ?, heartbeat_at = ?,
+                    attempts = attempts + 1, updated_at_utc = ?
+                WHERE id = ? AND (status = ? OR (status = ? AND lease_expires_at < ?))
+                """,
+                (
+                    self.STATUS_LEASED,
+                    worker_id,
+                    now + lease_sec,
+                    now,
+                    datetime.now(timezone.utc).isoformat(),
+                    job["id"],
+                    self.STATUS_QUEUED,
+                    self.STATUS_LEASED,
+                    now,
+                ),
+            )
+            if not cursor.rowcount:
+                return None
+        if job["status"] == self.STATUS_LEASED:
+            logging.warning(f"Recovered review job {job['id']} from expired lease of {job.get('lease_owner')}")
+        job.update(
+            status=self.STATUS_LEASED,
+            lease_owner=worker_id,
+            lease_expires_at=now + lease_sec,
+            heartbeat_at=now,
+            attempts=int(job["attempts"]) + 1,
+        )
+        return job
+
+    async def heartbeat(self, job_id: str, *, worker_id: str, lease_sec: float) -> Optional[bool]:
+        """
+        Extend the lease held by `worker_id`.
+        Returns the job's `cancel_requested` flag, or None if the lease is no longer held.
+        """
+        now = time.time()
+        async with self.db_client.transaction() as db:
+            cursor = await db.execute(
+                """
+                UPDATE review_jobs SET lease_expires_at = ?, heartbeat_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = ?
+                """,
+                (now + lease_sec, now, job_id, worker_id, self.STATUS_LEASED),
+            )
+            if not cursor.rowcount:
+                return None
+            cursor = await db.execute("SELECT cancel_requested FROM review_jobs WHERE id = ?", (job_id,))
+            row = await cursor.fetchone()
+        return bool(row and row[0])
+
+    async def finish(
+        self, job_id: str, *, worker_id: str, status: str, error_message: Optional[str] = None
+    ) -> bool:
+        count = await self.db_client.execute_write(
+            """
+            UPDATE review_jobs
+            SET status = ?, error_message = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at_utc = ?
+            WHERE id = ? AND lease_owner = ? AND status = ?
+            """,
+            (status, error_message, datetime.now(timezone.utc).isoformat(), job_id, worker_id, self.STATUS_LEASED),
+        )
+        return bool(count)
+
+    async def release(self, job_id: str, *, worker_id: str) -> bool:
+        """Give a leased job back to the queue (e.g. on worker shutdown) without consuming an attempt."""
+        count = await self.db_client.execute_write(
+            """
+            UPDATE review_jobs
+            SET status = CASE WHEN cancel_requested = 1 THEN ? ELSE ? END,
+                attempts = MAX(attempts - 1, 0), lease_owner = NULL, lease_expires_at = NULL, updated_at_utc = ?
+            WHERE id = ? AND lease_owner = ? AND status = ?
+            """,
+            (
+                self.STATUS_CANCELLED,
+                self.STATUS_QUEUED,
+                datetime.now(timezone.utc).isoformat(),
+                job_id,
+                worker_id,
+                self.STATUS_LEASED,
+            ),
+        )
+        return bool(count)
+
+    async def request_cancel(self, *, owner_id: str, document_id: str) -> List[Dict[str, Any]]:
+        """
+        Flag active jobs of a document for cancellation.
+        Queued jobs are cancelled immediately and returned; leased jobs are stopped by their worker.
+        """
+        now_iso = datetime.now(timezone.utc).isoformat()
+        async with self.db_client.transaction() as db:
+            cursor = await db.execute(
+                "SELECT * FROM review_jobs WHERE owner_id = ? AND document_id = ? AND status IN (?, ?)",
+                (owner_id, document_id, *self.ACTIVE_STATUSES),
+            )
+            active = [dict(r) for r in await cursor.fetchall()]
+            await db.execute(
+                "UPDATE review_jobs SET cancel_requested = 1, updated_at_utc = ? WHERE owner_id = ? AND document_id = ? AND status IN (?, ?)",
+                (now_iso, owner_id, document_id, *self.ACTIVE_STATUSES),
+            )
+            await db.execute(
+                "UPDATE review_jobs SET status = ?, updated_at_utc = ? WHERE owner_id = ? AND document_id = ? AND status = ?",
+                (self.STATUS_CANCELLED, now_iso, owner_id, document_id, self.STATUS_QUEUED),
+            )
+        return [j for j in active if j["status"] == self.STATUS_QUEUED]
+
+    async def reap_exhausted(self) -> List[Dict[str, Any]]:
+        """
+        Fail jobs whose lease expired after their last allowed attempt, and cancel flagged jobs
+        whose worker disappeared. Returns the affected rows with their new status.
+        """
+        now = time.time()
+        now_iso = datetime.now(timezone.utc).isoformat()
+        async with self.db_client.transaction() as db:
+            cursor = await db.execute(
+                """
+                SELECT * FROM review_jobs
+                WHERE status = ? AND lease_expires_at < ? AND (attempts >= max_attempts OR cancel_requested = 1)
+                """,
+                (self.STATUS_LEASED, now),
+            )
+            rows = [dict(r) for r in await cursor.fetchall()]
+            for row in rows:
+                if row["cancel_requested"]:
+                    row["status"], row["error_message"] = self.STATUS_CANCELLED, "任务已取消"
+                else:
+                    row["status"], row["error_message"] = self.STATUS_FAILED, "任务中断：处理进程多次异常退出"
+                await db.execute(
+                    """
+                    UPDATE review_jobs
+                    SET status = ?, error_message = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at_utc = ?
+                    WHERE id = ? AND status = ? AND lease_expires_at < ?
+                    """,
+                    (row["status"], row["error_message"], now_iso, row["id"], self.STATUS_LEASED, now),
+                )
+        return rows
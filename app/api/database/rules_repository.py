@@ -255,6 +255,8 @@ class RulesRepository:
         data = rule.model_dump()
         if "examples" in data and data["examples"] is not None:
             data["examples"] = json.dumps(data["examples"], ensure_ascii=False)
+        if data.get("local_check") is not None:
+            data["local_check"] = json.dumps(data["local_check"], ensure_ascii=False)
         # subtype_ids is stored in a separate relation table, not in rules table
         data.pop("type_ids", None)
         data.pop("subtype_ids", None)
@@ -265,6 +267,8 @@ class RulesRepository:
         if "examples" in out and out["examples"] is not None:
             if isinstance(out["examples"], (list, dict)):
                 out["examples"] = json.dumps(out["examples"], ensure_ascii=False)
+        if isinstance(out.get("local_check"), dict):
+            out["local_check"] = json.dumps(out["local_check"], ensure_ascii=False)
         out.pop("type_ids", None)
         out.pop("subtype_ids", None)
         return out
@@ -275,6 +279,11 @@ class RulesRepository:
                 item["examples"] = json.loads(item["examples"])
             except Exception:
                 item["examples"] = []
+        if item.get("local_check") and isinstance(item["local_check"], str):
+            try:
+                item["local_check"] = json.loads(item["local_check"])
+            except Exception:
+                item["local_check"] = None
         # Provide default values for new fields if missing (migration compatibility)
         if "rule_type" not in item or item["rule_type"] is None:
             item["rule_type"] = "applicable"
@@ -0,0 +1,146 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+import aiosqlite
+
+from common.logger import get_logger
+
+logging = get_logger(__name__)
+
+
+class SQLiteConnectionPool:
+    """
+    Long-lived aiosqlite connections for one database file.
+
+    A single writer connection is shared behind a lock, so each `write()` block is one serialized
+    transaction. The lock is reentrant per task: a `write()` nested inside another one in the same
+    task reuses the connection under a savepoint (an error rolls back only the nested block) and the
+    outer block commits. Tasks spawned inside a `write()` block are not owners and wait for it. Up to `readers` read-only connections serve `read()` concurrently; with WAL
+    journaling they never block the writer. Connections are opened lazily and configured with
+    `journal_mode=WAL`, `synchronous=NORMAL` and a busy timeout.
+
+    Connections are tied to the event loop that opened them; if the pool is used from a different
+    loop (e.g. sync helpers running `asyncio.run`), it is transparently reopened.
+    """
+
+    def __init__(self, db_path: str, *, readers: int = 4, busy_timeout_ms: int = 5000) -> None:
+        self.db_path = db_path
+        self.readers = max(1, int(readers))
+        self.busy_timeout_ms = max(0, int(busy_timeout_ms))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._idle_readers: List[aiosqlite.Connection] = []
+        self._write_lock = asyncio.Lock()
+        self._write_owner: Optional[asyncio.Task] = None
+        self._write_depth = 0
+        self._reader_slots = asyncio.Semaphore(self.readers)
+
+    async def _connect(self, *, read_only: bool) -> aiosqlite.Connection:
+        conn = aiosqlite.connect(self.db_path, timeout=self.busy_timeout_ms / 1000)
+        # Pooled connections live for the whole process; don't let their threads block interpreter exit.
+        conn.daemon = True
+        db = await conn
+        db.row_factory = aiosqlite.Row
+        await db.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+        if not read_only:
+            await db.execute("PRAGMA journal_mode = WAL")
+        await db.execute("PRAGMA synchronous = NORMAL")
+        if read_only:
+            await db.execute("PRAGMA query_only = ON")
+        return db
+
+    async def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            await self._close_connections()
+            self._write_lock = asyncio.Lock()
+            self._write_owner = None
+            self._write_depth = 0
+            self._reader_slots = asyncio.Semaphore(self.readers)
+        self._loop = loop
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Serialized write transaction; commits on success and rolls back on error."""
+        await self._bind_loop()
+        task = asyncio.current_task()
+        if task is not None and self._write_owner is task and self._writer is not None:
+            async with self._nested_write(self._writer) as db:
+                yield db
+            return
+        async with self._write_lock:
+            if self._writer is None:
+                self._writer = await self._connect(read_only=False)
+            db = self._writer
+            self._write_owner = task
+            try:
+                yield db
+                await db.commit()
+            except BaseException:
+                try:
+                    await db.rollback()
+                except Exception as e:
+                    logging.warning(f"SQLite rollback failed: {e}")
+                raise
+            finally:
+                self._write_owner = None
+
+    @asynccontextmanager
+    async def _nested_write(self, db: aiosqlite.Connection) -> AsyncIterator[aiosqlite.Connection]:
+        if not db.in_transaction:
+            # Otherwise releasing the savepoint would commit on its own, ahead of the outer block.
+            await db.execute("BEGIN")
+        self._write_depth += 1
+        savepoint = f"pool_write_{self._write_depth}"
+        await db.execute(f"SAVEPOINT {savepoint}")
+        try:
+            yield db
+        except BaseException:
+            try:
+                await db.execute(f"ROLLBACK TO {savepoint}")
+                await db.execute(f"RELEASE {savepoint}")
+            except Exception as e:
+                logging.warning(f"SQLite savepoint rollback failed: {e}")
+            raise
+        else:
+            await db.execute(f"RELEASE {savepoint}")
+        finally:
+            self._write_depth -= 1
+
+    @asynccontextmanager
+    async def read(self) -> AsyncIterator[aiosqlite.Connection]:
+        await self._bind_loop()
+        async with self._reader_slots:
+            if self._idle_readers:
+                db = self._idle_readers.pop()
+            else:
+                db = await self._connect(read_only=True)
+            try:
+                yield db
+            except BaseException:
+                # Don't return a connection in an unknown state to the pool.
+                await _close_quietly(db)
+                raise
+            self._idle_readers.append(db)
+
+    async def _close_connections(self) -> None:
+        readers, self._idle_readers = self._idle_readers, []
+        writer, self._writer = self._writer, None
+        for db in readers:
+            await _close_quietly(db)
+        if writer is not None:
+            await _close_quietly(writer)
+
+    async def close(self) -> None:
+        await self._close_connections()
+        self._loop = None
+
+
+async def _close_quietly(db: aiosqlite.Connection) -> None:
+    try:
+        await db.close()
+    except Exception as e:
+        logging.warning(f"Failed to close SQLite connection: {e}")
@@ -1,5 +1,6 @@
 import asyncio
 
+from config.config import settings
 from services.issues_service import IssuesService
 from services.rules_service import RulesService
 from services.documents_service import DocumentsService
@@ -26,6 +27,42 @@ _documents_service_lock = asyncio.Lock()
 _storage_provider: LocalStorageProvider | None = None
 _storage_provider_lock = asyncio.Lock()
 
+_db_client: SQLiteClient | None = None
+
+
+def get_db_client() -> SQLiteClient:
+    """
+    Returns the process-wide SQLiteClient.
+
+    All repositories share it so they share one connection pool (single WAL writer plus readers)
+    instead of racing separate connections for the database lock.
+    """
+    global _db_client
+    if _db_client is None:
+        _db_client = SQLiteClient()
+    return _db_client
+
+
+async def close_db_client() -> None:
+    global _db_client
+    if _db_client is not None:
+        await _db_client.close()
+        _db_client = None
+
+
+async def startup_services() -> None:
+    """Start the embedded review worker so jobs left by a previous process resume right away."""
+    if settings.review_worker_mode == "inline":
+        (await get_issues_service()).start_worker()
+
+
+async def shutdown_services() -> None:
+    """Stop the embedded review worker, then release pooled HTTP and SQLite connections."""
+    if _issues_service is not None:
+        await _issues_service.stop_worker()
+        await _issues_service.pipeline.aclose()
+    await close_db_client()
+
 
 async def get_issues_service() -> IssuesService:
     """
@@ -43,7 +80,7 @@ async def get_issues_service() -> IssuesService:
         if _issues_service is not None:
             return _issues_service
 
-        db_client = SQLiteClient()
+        db_client = get_db_client()
         issues_repo = IssuesRepository(db_client)
         analysis_runs_repo = AnalysisRunsRepository(db_client)
         analysis_issues_repo = AnalysisIssuesRepository(db_client)
@@ -70,7 +107,7 @@ async def get_rules_service() -> RulesService:
         if _rules_service is not None:
             return _rules_service
 
-        db_client = SQLiteClient()
+        db_client = get_db_client()
         repo = RulesRepository(db_client)
         await repo.init()
         _rules_service = RulesService(repo)
@@ -90,7 +127,7 @@ async def get_documents_service() -> DocumentsService:
         if _documents_service is not None:
             return _documents_service
 
-        db_client = SQLiteClient()
+        db_client = get_db_client()
         repo = DocumentsRepository(db_client)
         assets_repo = DocumentAssetsRepository(db_client)
         await repo.init()
@@ -18,6 +18,7 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from middleware.logging import LoggingMiddleware
 from config.config import settings
+from dependencies import shutdown_services, startup_services
 from middleware.logging import LoggingMiddleware, setup_logging
 from routers import issues, files, rules
 from spa_staticfiles import SPAStaticFiles
@@ -53,6 +54,20 @@ app.include_router(files.router)
 app.include_router(rules.router)
 
 
+@app.on_event("startup")
+async def startup() -> None:
+    try:
+        await startup_services()
+    except Exception as e:
+        # Reviews are still queued; the worker starts with the next enqueue.
+        logging.error(f"Failed to start the review worker: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await shutdown_services()
+
+
 # Health check endpoint
 @app.get(
     "/api/health",
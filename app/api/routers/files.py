@@ -9,9 +9,8 @@ from security.auth import validate_authenticated
 from dependencies import get_documents_service, get_issues_service, get_storage_provider
 from services.issues_service import IssuesService
 import asyncio
-import json
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from services.ir_build_service import build_ir_in_background
 import hashlib
 
@@ -187,7 +186,8 @@ async def get_document_ir(
         raise HTTPException(status_code=404, detail="IR 不存在")
     path = storage.open(asset["storage_key"])
     data = path.read_bytes()
-    return JSONResponse(content=json.loads(data.decode("utf-8")))
+    # The stored IR asset is already JSON; serve it as-is instead of parsing and re-encoding it.
+    return Response(content=data, media_type="application/json")
 
 
 @router.get("/api/v1/documents/{doc_id}/issues")
@@ -3,12 +3,14 @@ from http import HTTPStatus
 from uuid import uuid4
 from dependencies import get_documents_service, get_issues_service, get_rules_service, get_storage_provider
 from common.logger import get_logger
+from common import json_codec
 import json
-import asyncio
 from typing import Any, Dict, List, Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException, Header, Query
 from services.documents_service import DocumentsService
+from services.chunking import uses_token_budget
 from services.issues_service import IssuesService
+from services.job_poller import poller_stats
 from services.rules_service import RulesService
 from fastapi.responses import StreamingResponse
 from security.auth import validate_authenticated
@@ -27,7 +29,7 @@ logging = get_logger(__name__)
 
 def issues_event(issues: list[Issue]) -> str:
     issue_objs = [issue.model_dump() for issue in issues]
-    return f"event: issues\n" + (f"data: {json.dumps(issue_objs)}\n" if issues else "") + "\n"
+    return f"event: issues\n" + (f"data: {json_codec.dumps(issue_objs)}\n" if issues else "") + "\n"
 
 def error_event(message: str) -> str:
     return f"event: error\n" + (f"data: {message}\n" if message else "") + "\n"
@@ -109,6 +111,13 @@ async def start_review(
     doc_id: str,
     force: bool = Query(False, description="Force re-review even if issues exist"),
     rule_ids: Optional[List[str]] = Query(None, description="List of rule IDs to apply"),
+    incremental: Optional[bool] = Query(
+        None,
+        description=(
+            "Reuse earlier reviews: if only the rules changed, review just the added/modified rules; "
+            "for a new revision of a reviewed document, review just the changed paragraphs (default: server settings)"
+        ),
+    ),
     user=Depends(validate_authenticated),
     issues_service: IssuesService = Depends(get_issues_service),
     rules_service: RulesService = Depends(get_rules_service),
@@ -148,7 +157,7 @@ async def start_review(
         asset = await documents_service.assets_repository.get_by_id(ir_asset_id)
         if not asset:
             raise HTTPException(status_code=404, detail="IR 不存在")
-        ir_data = json.loads(storage.open(asset["storage_key"]).read_text(encoding="utf-8"))
+        ir_data = json_codec.loads(storage.open(asset["storage_key"]).read_bytes())
         ir = DocumentIR(**ir_data)
 
     custom_rules = None
@@ -164,11 +173,18 @@ async def start_review(
     snapshot_items = build_review_rules_snapshot_items(custom_rules or [])
     snapshot_fingerprint = compute_review_rules_fingerprint(custom_rules or [])
     rules_snapshot_json = json.dumps(snapshot_items, ensure_ascii=False, separators=(",", ":"))
+    chunking = f"pagination:{settings.pagination}"
+    if uses_token_budget(settings.review_chunk_strategy, settings.pagination):
+        chunking = f"{chunking}|tokens:{settings.review_chunk_token_budget}"
+    if settings.review_rule_routing_enabled:
+        chunking = f"{chunking}|rules_top_k:{settings.review_rule_routing_top_k}"
+    if not settings.review_local_rules_enabled and any(r.local_check for r in custom_rules or []):
+        chunking = f"{chunking}|local_rules:off"
     if is_pdf:
-        pipeline_version = f"deepseek:{settings.deepseek_model}|mineru:{settings.mineru_model_version}|pagination:{settings.pagination}"
+        pipeline_version = f"deepseek:{settings.deepseek_model}|mineru:{settings.mineru_model_version}|{chunking}"
     else:
         ir_driver_version = (row.get("ir_driver_version") if isinstance(row, dict) else None) or "ir:v1"
-        pipeline_version = f"deepseek:{settings.deepseek_model}|driver:{ir_driver_version}|pagination:{settings.pagination}"
+        pipeline_version = f"deepseek:{settings.deepseek_model}|driver:{ir_driver_version}|{chunking}"
     if force:
         pipeline_version = f"{pipeline_version}|force:{uuid4()}"
 
@@ -186,6 +202,7 @@ async def start_review(
             mineru_cache_key=document.sha256,
             force=force,
             custom_rules=custom_rules,
+            incremental=incremental,
         )
     else:
         status = await issues_service.start_ir_review_in_background(
@@ -201,10 +218,48 @@ async def start_review(
             input_fingerprint=document.sha256,
             force=force,
             custom_rules=custom_rules,
+            incremental=incremental,
         )
     return ReviewStatusResponse(**status)
 
 
+@router.get(
+    "/api/v1/review/llm-cache/stats",
+    summary="Get LLM response cache hit/miss counters",
+)
+async def get_llm_cache_stats(
+    user=Depends(validate_authenticated),
+    issues_service: IssuesService = Depends(get_issues_service),
+) -> Dict[str, Any]:
+    cache = getattr(issues_service.pipeline, "llm_cache", None)
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get(
+    "/api/v1/review/mineru-cache/stats",
+    summary="Get MinerU parse-result cache hit/miss counters",
+)
+async def get_mineru_cache_stats(
+    user=Depends(validate_authenticated),
+    issues_service: IssuesService = Depends(get_issues_service),
+) -> Dict[str, Any]:
+    mineru = getattr(issues_service.pipeline, "mineru", None)
+    cache = getattr(mineru, "parse_cache", None)
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get(
+    "/api/v1/review/pollers/stats",
+    summary="Get MinerU/PaddleOCR job polling counters and time-to-done",
+)
+async def get_poller_stats(user=Depends(validate_authenticated)) -> Dict[str, Any]:
+    return poller_stats()
+
+
 @router.get(
     "/api/v1/review/{doc_id}/rules-state",
     summary="Get review-time rules snapshot and latest rule change state",
@@ -271,6 +326,13 @@ async def get_pdf_issues(
     doc_id: str,
     force: bool = Query(False, description="Force re-review even if issues exist"),
     rule_ids: Optional[List[str]] = Query(None, description="List of rule IDs to apply"),
+    incremental: Optional[bool] = Query(
+        None,
+        description=(
+            "Reuse earlier reviews: if only the rules changed, review just the added/modified rules; "
+            "for a new revision of a reviewed document, review just the changed paragraphs (default: server settings)"
+        ),
+    ),
     user=Depends(validate_authenticated),
     issues_service: IssuesService = Depends(get_issues_service),
     rules_service: RulesService = Depends(get_rules_service),
@@ -296,6 +358,7 @@ async def get_pdf_issues(
                 doc_id=doc_id,
                 force=force,
                 rule_ids=rule_ids,
+                incremental=incremental,
                 user=user,
                 issues_service=issues_service,
                 rules_service=rules_service,
@@ -304,25 +367,21 @@ async def get_pdf_issues(
             )
 
         async def issues_events():
-            since_rowid = 0
-            while True:
-                batch, since_rowid = await issues_service.issues_repository.get_issues_since_rowid(
-                    doc_id, owner_id=user.oid, since_rowid=since_rowid
-                )
-                if batch:
-                    yield issues_event(batch)
-                    continue
-
-                status = await issues_service.get_review_status(doc_id, owner_id=user.oid)
-                st = status.get("status")
-                if st == IssuesService.STATUS_COMPLETED:
+            async for kind, payload in issues_service.watch_review(
+                doc_id,
+                owner_id=user.oid,
+                resync_sec=settings.review_sse_resync_sec,
+                # Jobs run by external workers publish no events here; follow the database instead.
+                poll_sec=settings.review_sse_poll_sec if settings.review_worker_mode != "inline" else None,
+            ):
+                if kind == "issues":
+                    yield issues_event(payload)
+                elif kind == "keepalive":
+                    yield ": keepalive\n\n"
+                elif kind == "complete":
                     yield "event: complete\n\n"
-                    return
-                if st in (IssuesService.STATUS_FAILED, IssuesService.STATUS_CANCELLED):
-                    msg = status.get("error_message") or "任务中断"
-                    yield error_event(msg)
-                    return
-                await asyncio.sleep(0.5)
+                elif kind == "error":
+                    yield error_event(payload)
 
         return StreamingResponse(issues_events(), media_type="text/event-stream")
 
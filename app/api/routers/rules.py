@@ -5,7 +5,7 @@ from pydantic import BaseModel
 
 from common.logger import get_logger
 from common.models import (
-    ReviewRule, RiskLevel, RuleExample,
+    ReviewRule, RiskLevel, RuleExample, RuleLocalCheck,
     RuleTypeEnum, RuleSourceEnum, DocumentType, DocumentSubtype
 )
 from services.rules_service import RulesService, RuleValidationError
@@ -27,6 +27,7 @@ class CreateRuleRequest(BaseModel):
     is_universal: Optional[bool] = None
     type_ids: Optional[List[str]] = None
     subtype_ids: Optional[List[str]] = None
+    local_check: Optional[RuleLocalCheck] = None
 
 
 class UpdateRuleRequest(BaseModel):
@@ -40,6 +41,7 @@ class UpdateRuleRequest(BaseModel):
     is_universal: Optional[bool] = None
     type_ids: Optional[List[str]] = None
     subtype_ids: Optional[List[str]] = None
+    local_check: Optional[RuleLocalCheck] = None
 
 
 class CreateSubtypeRequest(BaseModel):
@@ -98,6 +100,7 @@ async def create_rule(
             is_universal=body.is_universal,
             type_ids=body.type_ids,
             subtype_ids=body.subtype_ids,
+            local_check=body.local_check,
         )
     except RuleValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -140,6 +143,9 @@ async def update_rule(
     """Update a rule."""
     try:
         fields = body.model_dump(exclude_none=True)
+        if "local_check" in body.model_fields_set and body.local_check is None:
+            # An explicit null removes the local check and sends the rule back to the LLM.
+            fields["local_check"] = None
         if not fields:
             raise HTTPException(status_code=400, detail="No fields to update")
         return await rules_service.update_rule(rule_id, fields)
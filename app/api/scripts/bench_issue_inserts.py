@@ -0,0 +1,116 @@
+"""
+Benchmark issue persistence: per-row writes vs. the bulk `store_item_groups` path.
+
+Modes: `connect-per-row` (a fresh connection and commit per row, the original behaviour),
+`per-row` (pooled connection, one commit per row) and `bulk` (one transaction per chunk).
+
+Usage: python app/api/scripts/bench_issue_inserts.py [--chunks 50] [--per-chunk 20]
+Each chunk writes its issues to both `issues` and `analysis_issues`, as the review pipeline does.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+
+def _ensure_api_on_path() -> None:
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+    api_root = os.path.join(repo_root, "app", "api")
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+    if api_root not in sys.path:
+        sys.path.insert(0, api_root)
+
+
+def _make_issues(n: int):
+    from common.models import Issue, IssueStatusEnum, Location
+
+    return [
+        Issue(
+            id=str(uuid4()),
+            doc_id="bench-doc",
+            text=f"问题文本 {i}",
+            type="Grammar & Spelling",
+            status=IssueStatusEnum.not_reviewed,
+            suggested_fix="修改建议",
+            explanation="说明",
+            location=Location(source_sentence="原句" * 20, page_num=1, bounding_box=[0.0] * 8, para_index=i),
+            review_initiated_by="bench",
+            review_initiated_at_UTC="2026-01-01T00:00:00+00:00",
+            owner_id="bench",
+            source_run_id="bench-run",
+        )
+        for i in range(n)
+    ]
+
+
+async def _bench(mode: str, chunks: int, per_chunk: int) -> float:
+    from database.analysis_issues_repository import AnalysisIssuesRepository
+    from database.db_client import SQLiteClient
+    from database.issues_repository import IssuesRepository
+
+    with tempfile.TemporaryDirectory() as td:
+        db_client = SQLiteClient(db_path=os.path.join(td, "bench.db"))
+        issues_repo = IssuesRepository(db_client)
+        analysis_repo = AnalysisIssuesRepository(db_client)
+        await issues_repo.init()
+        batches = [_make_issues(per_chunk) for _ in range(chunks)]
+
+        started = time.perf_counter()
+        for issues in batches:
+            if mode == "connect-per-row":
+                import aiosqlite
+
+                groups = [
+                    ("issues", issues_repo.serialize_issues(issues)),
+                    ("analysis_issues", analysis_repo.build_rows("bench-run", issues)),
+                ]
+                for table, rows in groups:
+                    for row in rows:
+                        async with aiosqlite.connect(db_client.db_path) as db:
+                            cols = ", ".join(row.keys())
+                            placeholders = ", ".join(["?"] * len(row))
+                            await db.execute(f"REPLACE INTO {table} ({cols}) VALUES ({placeholders})", list(row.values()))
+                            await db.commit()
+            elif mode == "per-row":
+                for row in issues_repo.serialize_issues(issues):
+                    await db_client.store_item("issues", row)
+                for row in analysis_repo.build_rows("bench-run", issues):
+                    await db_client.store_item("analysis_issues", row)
+            else:
+                await db_client.store_item_groups(
+                    [
+                        ("issues", issues_repo.serialize_issues(issues)),
+                        ("analysis_issues", analysis_repo.build_rows("bench-run", issues)),
+                    ]
+                )
+        elapsed = time.perf_counter() - started
+        await db_client.close()
+    return elapsed
+
+
+async def _run(chunks: int, per_chunk: int) -> None:
+    _ensure_api_on_path()
+    rows = chunks * per_chunk * 2
+    results = {}
+    for mode in ("connect-per-row", "per-row", "bulk"):
+        elapsed = await _bench(mode, chunks, per_chunk)
+        results[mode] = elapsed
+        print(f"{mode:>15}: {rows} rows in {elapsed:.3f}s -> {rows / elapsed:,.0f} rows/sec")
+    print(f"{'speedup':>15}: {results['connect-per-row'] / results['bulk']:.1f}x vs connect-per-row")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=50)
+    parser.add_argument("--per-chunk", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(_run(args.chunks, args.per_chunk))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark the JSON codec (`common.json_codec`) against the stdlib on review-sized payloads.
+
+Payloads: a synthetic MinerU `middle.json` for an N-page document (decode, as in zip parsing and
+layout loading), the matching IR asset (encode + decode), and issue rows (`location_json` per issue
+and one SSE `issues` event per chunk).
+
+Usage: python app/api/scripts/bench_json_codec.py [--pages 300] [--issues 600] [--repeat 5]
+Set JSON_CODEC=stdlib|orjson|msgspec to pin the backend under test (default: best installed).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def _ensure_api_on_path() -> None:
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+    api_root = os.path.join(repo_root, "app", "api")
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+    if api_root not in sys.path:
+        sys.path.insert(0, api_root)
+
+
+def _middle_json(pages: int) -> dict:
+    text = "第十二条 乙方应当按照约定的期限和方式支付劳动报酬，不得无故拖欠。"
+    pdf_info = []
+    for p in range(pages):
+        blocks = []
+        for b in range(12):
+            lines = []
+            for ln in range(4):
+                y = 80.0 + b * 50 + ln * 12
+                spans = [
+                    {"bbox": [72.0 + s * 110, y, 180.5 + s * 110, y + 11.5], "content": text[s * 8 : s * 8 + 8], "type": "text", "score": 0.98}
+                    for s in range(4)
+                ]
+                lines.append({"bbox": [72.0, y, 520.0, y + 11.5], "spans": spans})
+            blocks.append({"type": "text", "bbox": [72.0, 80.0 + b * 50, 520.0, 128.0 + b * 50], "lines": lines, "index": b})
+        pdf_info.append({"page_idx": p, "page_size": [1224, 1584], "para_blocks": blocks, "preproc_blocks": blocks})
+    return {"pdf_info": pdf_info, "_backend": "vlm", "_version_name": "2.5.4"}
+
+
+def _ir(pages: int) -> dict:
+    blocks = [
+        {"block_id": f"b{i}", "type": "paragraph", "text": "甲方：某某科技有限公司 地址：北京市海淀区" * 3, "style": {"bold": i % 7 == 0}}
+        for i in range(pages * 12)
+    ]
+    return {"doc_id": "bench", "version": 1, "blocks": blocks, "meta": {"source": "docx"}}
+
+
+def _issue_rows(n: int) -> list:
+    return [
+        {
+            "id": f"issue-{i}",
+            "type": "Legal Risk",
+            "text": "违约金条款约定过高",
+            "explanation": "约定的违约金明显高于实际损失，可能被法院调整。" * 2,
+            "suggested_fix": "建议将违约金调整为不超过实际损失的百分之三十。",
+            "risk_level": "高",
+            "location": {
+                "source_sentence": "乙方逾期交付的，应按日支付合同总价款百分之五的违约金。",
+                "page_num": 1 + i % 300,
+                "para_index": i,
+                "bounding_box": [72.0, 100.0, 520.0, 100.0, 520.0, 112.0, 72.0, 112.0],
+                "type": "pdf_quadpoints",
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--issues", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    _ensure_api_on_path()
+    from common import json_codec
+
+    middle = _middle_json(args.pages)
+    middle_bytes = json.dumps(middle, ensure_ascii=False).encode("utf-8")
+    ir = _ir(args.pages)
+    issues = _issue_rows(args.issues)
+    chunks = [issues[i : i + 20] for i in range(0, len(issues), 20)]
+
+    ir_bytes = json.dumps(ir, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def stdlib_cases():
+        return {
+            "middle.json decode": lambda: json.loads(middle_bytes.decode("utf-8")),
+            "IR encode": lambda: json.dumps(ir, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            "IR decode": lambda: json.loads(ir_bytes.decode("utf-8")),
+            "location_json x issues": lambda: [json.dumps(r["location"], ensure_ascii=False) for r in issues],
+            "SSE events": lambda: [json.dumps(c) for c in chunks],
+        }
+
+    def codec_cases():
+        return {
+            "middle.json decode": lambda: json_codec.loads(middle_bytes),
+            "IR encode": lambda: json_codec.dumps_bytes(ir),
+            "IR decode": lambda: json_codec.loads(ir_bytes),
+            "location_json x issues": lambda: [json_codec.dumps(r["location"]) for r in issues],
+            "SSE events": lambda: [json_codec.dumps(c) for c in chunks],
+        }
+
+    print(f"pages={args.pages} issues={args.issues} middle.json={len(middle_bytes) / 1e6:.1f} MB backend={json_codec.BACKEND}")
+    print(f"{'case':<26}{'stdlib ms':>12}{json_codec.BACKEND + ' ms':>14}{'speedup':>10}")
+    base, fast = stdlib_cases(), codec_cases()
+    for name in base:
+        t_std = _time(base[name], args.repeat)
+        t_fast = _time(fast[name], args.repeat)
+        print(f"{name:<26}{t_std * 1000:>12.1f}{t_fast * 1000:>14.1f}{t_std / t_fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Run review workers that execute jobs from the durable `review_jobs` queue.
+
+Usage: python app/api/scripts/run_review_worker.py [--processes 4] [--concurrency 2]
+
+Each process opens its own connections to the configured SQLite database and claims jobs with
+leases, so any number of processes (on this host) can run side by side with the web app. Set
+REVIEW_WORKER_MODE=external for the web app to stop running jobs itself.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+
+
+def _ensure_api_on_path() -> None:
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+    api_root = os.path.join(repo_root, "app", "api")
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+    if api_root not in sys.path:
+        sys.path.insert(0, api_root)
+
+
+async def _run(concurrency: int | None) -> None:
+    _ensure_api_on_path()
+
+    from dependencies import get_issues_service, shutdown_services
+    from services.review_worker import ReviewWorker
+
+    issues_service = await get_issues_service()
+    worker = ReviewWorker(issues_service, issues_service.review_jobs_repository, concurrency=concurrency)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    try:
+        await worker.run(stop)
+    finally:
+        await shutdown_services()
+
+
+def _process_main(concurrency: int | None) -> None:
+    asyncio.run(_run(concurrency))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--concurrency", type=int, default=None, help="jobs per process (default: settings)")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _process_main(args.concurrency)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_process_main, args=(args.concurrency,), daemon=False) for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import math
+import re
+from typing import Any, Dict, List
+
+# CJK ideographs, kana, hangul and full-width punctuation: roughly one token each.
+_WIDE = "\u2e80-\u9fff\u3000-\u303f\uac00-\ud7af\uf900-\ufaff\uff00-\uffef"
+_WIDE_CHAR = re.compile(f"[{_WIDE}]")
+_NARROW_RUN = re.compile(rf"[^\s{_WIDE}]+")
+
+# Per-paragraph framing in the prompt ("[12]" + newline).
+PARAGRAPH_OVERHEAD_TOKENS = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap, tokenizer-free token estimate: one token per CJK character and about four characters
+    per token for other runs. Errs on the high side for Chinese so budgets are not overrun.
+    """
+    if not text:
+        return 0
+    wide = len(_WIDE_CHAR.findall(text))
+    narrow = sum(math.ceil(len(m) / 4) for m in _NARROW_RUN.findall(text))
+    return wide + narrow
+
+
+def split_paragraph(para: Dict[str, Any], max_tokens: int) -> List[Dict[str, Any]]:
+    """
+    Split a paragraph that does not fit in `max_tokens` into parts on line boundaries (table rows
+    and list items are one line each); a single line that is still too long is cut by characters.
+    Each part copies the paragraph's fields (`global_index`, `node_id`, page, bbox, ...) and records
+    `content_offset`, the part's start within the original content.
+    """
+    content = str(para.get("content") or "")
+    if estimate_tokens(content) + PARAGRAPH_OVERHEAD_TOKENS <= max_tokens:
+        return [para]
+    budget = max(1, max_tokens - PARAGRAPH_OVERHEAD_TOKENS)
+    base = int(para.get("content_offset") or 0)
+
+    pieces: List[tuple[int, str]] = []
+    offset = 0
+    for line in content.splitlines(keepends=True):
+        if estimate_tokens(line) <= budget:
+            pieces.append((offset, line))
+        else:
+            # One token per character at worst, so `budget` characters always fit.
+            for i in range(0, len(line), budget):
+                pieces.append((offset + i, line[i : i + budget]))
+        offset += len(line)
+
+    parts: List[Dict[str, Any]] = []
+    start, text, tokens = 0, "", 0
+    for piece_offset, piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if text and tokens + piece_tokens > budget:
+            parts.append({**para, "content": text.rstrip("\n"), "content_offset": base + start})
+            text, tokens = "", 0
+        if not text:
+            start = piece_offset
+        text += piece
+        tokens += piece_tokens
+    if text:
+        parts.append({**para, "content": text.rstrip("\n"), "content_offset": base + start})
+    return parts
+
+
+def uses_token_budget(strategy: str | None, pagination: int) -> bool:
+    """
+    Whether review chunks are packed with `chunk_by_token_budget` for the `review_chunk_strategy`
+    and `pagination` settings (-1 sends the whole document as one chunk).
+    """
+    return pagination != -1 and str(strategy or "").strip().lower() == "tokens"
+
+
+def chunk_by_token_budget(
+    paragraphs: List[Dict[str, Any]],
+    *,
+    budget_tokens: int,
+    overhead_tokens: int,
+    max_paragraphs: int = -1,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Pack consecutive paragraphs into chunks whose estimated prompt size (`overhead_tokens` for the
+    fixed instructions plus the paragraphs) stays within `budget_tokens`. Oversized paragraphs are
+    split with `split_paragraph`; `max_paragraphs` (> 0) additionally caps paragraphs per chunk.
+    """
+    available = max(64, int(budget_tokens) - int(overhead_tokens))
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    used = 0
+    for para in paragraphs:
+        for part in split_paragraph(para, available):
+            cost = estimate_tokens(str(part.get("content") or "")) + PARAGRAPH_OVERHEAD_TOKENS
+            full = max_paragraphs > 0 and len(current) >= max_paragraphs
+            if current and (used + cost > available or full):
+                chunks.append(current)
+                current, used = [], 0
+            current.append(part)
+            used += cost
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,80 @@
+import asyncio
+from typing import Optional
+
+import httpx
+
+from common.logger import get_logger
+from config.config import settings
+
+logging = get_logger(__name__)
+
+try:  # HTTP/2 needs the optional `h2` package (httpx[http2]).
+    import h2  # noqa: F401
+
+    _HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    _HTTP2_AVAILABLE = False
+
+
+class SharedHttpClient:
+    """
+    Long-lived pooled `httpx.AsyncClient` shared by the external API clients of one pipeline.
+
+    Connections are kept alive between requests, so consecutive MinerU calls (upload URL, upload,
+    polling, download) reuse TCP/TLS sessions instead of handshaking per step. Per-request timeouts
+    are passed by callers.
+
+    Like `SQLiteConnectionPool`, the client is tied to the event loop that created it and is
+    transparently recreated if used from another loop.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int | None = None,
+        max_keepalive_connections: int | None = None,
+        keepalive_expiry_sec: float | None = None,
+        http2: bool | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.limits = httpx.Limits(
+            max_connections=int(max_connections if max_connections is not None else settings.http_max_connections),
+            max_keepalive_connections=int(
+                max_keepalive_connections
+                if max_keepalive_connections is not None
+                else settings.http_max_keepalive_connections
+            ),
+            keepalive_expiry=float(
+                keepalive_expiry_sec if keepalive_expiry_sec is not None else settings.http_keepalive_expiry_sec
+            ),
+        )
+        self.http2 = bool(settings.http_http2 if http2 is None else http2) and _HTTP2_AVAILABLE
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop and not self._client.is_closed:
+            return self._client
+        # A client from another (possibly closed) loop can't be closed from here; drop it.
+        self._client = httpx.AsyncClient(
+            limits=self.limits,
+            http2=self.http2,
+            timeout=60,
+            transport=self._transport,
+        )
+        self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        loop, self._loop = self._loop, None
+        if client is None or client.is_closed:
+            return
+        if loop is not asyncio.get_running_loop():
+            return
+        try:
+            await client.aclose()
+        except Exception as e:
+            logging.warning(f"Failed to close HTTP client: {e}")
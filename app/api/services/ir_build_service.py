@@ -1,8 +1,8 @@
-import json
 from datetime import datetime, timezone
 from uuid import uuid4
 
 from common.models import DocumentIR
+from common import json_codec
 from services.document_ir import build_docx_ir, build_txt_ir
 from services.storage_provider import LocalStorageProvider
 from services.documents_service import DocumentsService
@@ -39,7 +39,7 @@ async def build_ir_in_background(
                 raise RuntimeError("暂不支持 .doc 格式，请转换为 .docx 后上传。")
             ir, fingerprint = build_docx_ir(docx_path)
 
-        payload = json.dumps(ir.model_dump(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        payload = json_codec.dumps_bytes(ir.model_dump())
         stored = storage.put_object(storage_key=f"objects/{doc_id}.ir.json", mime_type="application/json", data=payload)
         asset_id = str(uuid4())
         now = datetime.now(timezone.utc).isoformat()
@@ -1,7 +1,8 @@
 from common.logger import get_logger
+from common import json_codec
 from datetime import datetime, timezone
 import json
-from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+from typing import Any, AsyncGenerator, Dict, List, Optional, Set, Tuple
 from uuid import uuid4
 
 import asyncio
@@ -10,9 +11,15 @@ from database.analysis_issues_repository import AnalysisIssuesRepository
 from database.analysis_runs_repository import AnalysisRunsRepository
 from database.documents_repository import DocumentsRepository
 from database.issues_repository import IssuesRepository
+from database.review_jobs_repository import ReviewJobsRepository
 from security.auth import User
 from services.lc_pipeline import LangChainPipeline
 from services.hitl_agent import HitlIssuesAgent
+from services.review_events import ReviewEventBus
+from services.review_revision import RevisionContext, filename_lineage
+from services.review_worker import ReviewWorker
+from services.rules_fingerprint import diff_review_rules_snapshots
+from config.config import settings
 
 logging = get_logger(__name__)
 
@@ -32,8 +39,11 @@ class IssuesService:
         analysis_issues_repository: AnalysisIssuesRepository,
         documents_repository: DocumentsRepository,
         pipeline: LangChainPipeline,
+        events: ReviewEventBus | None = None,
+        review_jobs_repository: ReviewJobsRepository | None = None,
     ) -> None:
         self.pipeline = pipeline
+        self.events = events or ReviewEventBus()
         self.issues_repository = issues_repository
         self.analysis_runs_repository = analysis_runs_repository
         self.analysis_issues_repository = analysis_issues_repository
@@ -43,8 +53,10 @@ class IssuesService:
             if hasattr(self.pipeline, "llm")
             else None
         )
-        self._review_tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.review_jobs_repository = review_jobs_repository or ReviewJobsRepository(issues_repository.db_client)
         self._review_tasks_lock = asyncio.Lock()
+        self._worker: ReviewWorker | None = None
+        self._worker_task: asyncio.Task | None = None
 
     async def get_issues_data(self, doc_id: str, *, owner_id: str) -> List[Issue]:
         try:
@@ -81,6 +93,74 @@ class IssuesService:
             "error_message": row.get("error_message"),
         }
 
+    async def watch_review(
+        self, document_id: str, *, owner_id: str, resync_sec: float = 15.0, poll_sec: float | None = None
+    ) -> AsyncGenerator[Tuple[str, Any], None]:
+        """
+        Follow a document's review until it reaches a terminal state.
+
+        Yields ("issues", List[Issue]), ("keepalive", None), then finally ("complete", None) or
+        ("error", message). Issues already in the database are read once on connect; after that
+        updates arrive from the event bus. The database is re-read only when a terminal status
+        is announced, when the subscription overflowed, or after `resync_sec` without events.
+
+        Runs executed by another process never reach this process's event bus; pass `poll_sec` to
+        re-read new issues and the run status that often instead (keepalives still follow `resync_sec`).
+        """
+        terminal_error = (self.STATUS_FAILED, self.STATUS_CANCELLED)
+        sent: set[str] = set()
+        since_rowid = 0
+
+        def unsent(issues: List[Issue]) -> List[Issue]:
+            fresh = [i for i in issues if i.id not in sent]
+            sent.update(i.id for i in fresh)
+            return fresh
+
+        loop = asyncio.get_running_loop()
+        wait_sec = min(resync_sec, poll_sec) if poll_sec and poll_sec > 0 else resync_sec
+        with self.events.subscribe(owner_id, document_id) as sub:
+            resync = True
+            last_sent = loop.time()
+            while True:
+                if resync:
+                    sub.overflowed = False
+                    while True:
+                        batch, since_rowid = await self.issues_repository.get_issues_since_rowid(
+                            document_id, owner_id=owner_id, since_rowid=since_rowid
+                        )
+                        if not batch:
+                            break
+                        fresh = unsent(batch)
+                        if fresh:
+                            last_sent = loop.time()
+                            yield ("issues", fresh)
+                    status = await self.get_review_status(document_id, owner_id=owner_id)
+                    st = status.get("status")
+                    if st == self.STATUS_COMPLETED:
+                        yield ("complete", None)
+                        return
+                    if st in terminal_error:
+                        yield ("error", status.get("error_message") or "任务中断")
+                        return
+                    resync = False
+
+                event = await sub.get(timeout=wait_sec)
+                if event is None:
+                    if loop.time() - last_sent >= resync_sec:
+                        last_sent = loop.time()
+                        yield ("keepalive", None)
+                    resync = True
+                elif sub.overflowed:
+                    resync = True
+                elif event.kind == "issues":
+                    fresh = unsent(event.issues)
+                    if fresh:
+                        last_sent = loop.time()
+                        yield ("issues", fresh)
+                elif event.kind == "status" and event.status in (self.STATUS_COMPLETED, *terminal_error):
+                    # Confirm against the database: the event may belong to a superseded run.
+                    resync = True
+
     async def start_review_in_background(
         self,
         *,
@@ -96,6 +176,7 @@ class IssuesService:
         mineru_cache_key: str,
         force: bool = False,
         custom_rules: List[ReviewRule] | None = None,
+        incremental: bool | None = None,
     ) -> Dict[str, Any]:
         timestamp_iso = time_stamp.isoformat() if isinstance(time_stamp, datetime) else str(time_stamp)
 
@@ -111,7 +192,10 @@ class IssuesService:
             if existing_run_id and existing_status in (self.STATUS_RUNNING, self.STATUS_CANCEL_REQUESTED):
                 return status
 
-            if not force:
+            if not force and existing_status in (self.STATUS_FAILED, self.STATUS_CANCELLED):
+                # Issues of an incomplete run (e.g. failed chunks) must not pass for a finished review.
+                await self.issues_repository.delete_issues_by_doc(document_id, owner_id=owner_id)
+            elif not force:
                 existing_issues = await self.issues_repository.get_issues(document_id, owner_id=owner_id)
                 if existing_issues:
                     return {
@@ -145,11 +229,48 @@ class IssuesService:
                     "error_message": None,
                 }
 
+            job_payload = {
+                "pdf_path": pdf_path,
+                "user": user.model_dump(),
+                "timestamp_iso": timestamp_iso,
+                "mineru_cache_key": mineru_cache_key,
+                "custom_rules": [r.model_dump(mode="json") for r in custom_rules or []],
+            }
+            if cached is None and (settings.review_incremental_rules if incremental is None else incremental):
+                started = await self._start_incremental_review(
+                    kind="pdf",
+                    document_id=document_id,
+                    owner_id=owner_id,
+                    subtype_id=subtype_id,
+                    sha256=mineru_cache_key,
+                    user=user,
+                    timestamp_iso=timestamp_iso,
+                    rules_snapshot_json=rules_snapshot_json,
+                    rules_fingerprint=rules_fingerprint,
+                    pipeline_version=pipeline_version,
+                    custom_rules=custom_rules,
+                    job_payload=job_payload,
+                )
+                if started is not None:
+                    return started
+            if cached is None and (settings.review_revision_enabled if incremental is None else incremental):
+                baseline = await self._find_revision_baseline(
+                    document_id=document_id,
+                    owner_id=owner_id,
+                    subtype_id=subtype_id,
+                    sha256=mineru_cache_key,
+                    rules_fingerprint=rules_fingerprint,
+                    pipeline_version=pipeline_version,
+                )
+                if baseline is not None:
+                    job_payload["revision_base_run_id"] = baseline["id"]
+
             if cached and cached.get("status") != self.STATUS_COMPLETED and not force:
                 run_id = cached["id"]
-                await self.analysis_runs_repository.update(
+                await self._update_run(
                     run_id,
                     owner_id=owner_id,
+                    document_id=document_id,
                     fields={
                         "subtype_id": subtype_id,
                         "rules_snapshot_json": rules_snapshot_json,
@@ -177,15 +298,8 @@ class IssuesService:
                 )
 
             await self.documents_repository.update_last_run_id(document_id, owner_id=owner_id, last_run_id=run_id)
-            self._spawn_review_task(
-                owner_id=owner_id,
-                document_id=document_id,
-                run_id=run_id,
-                pdf_path=pdf_path,
-                user=user,
-                timestamp_iso=timestamp_iso,
-                mineru_cache_key=mineru_cache_key,
-                custom_rules=custom_rules,
+            await self._enqueue_review_job(
+                kind="pdf", owner_id=owner_id, document_id=document_id, run_id=run_id, payload=job_payload
             )
             return {"doc_id": document_id, "run_id": run_id, "status": self.STATUS_RUNNING, "error_message": None}
 
@@ -204,6 +318,7 @@ class IssuesService:
         input_fingerprint: str,
         force: bool = False,
         custom_rules: List[ReviewRule] | None = None,
+        incremental: bool | None = None,
     ) -> Dict[str, Any]:
         timestamp_iso = time_stamp.isoformat() if isinstance(time_stamp, datetime) else str(time_stamp)
 
@@ -219,7 +334,10 @@ class IssuesService:
             if existing_run_id and existing_status in (self.STATUS_RUNNING, self.STATUS_CANCEL_REQUESTED):
                 return status
 
-            if not force:
+            if not force and existing_status in (self.STATUS_FAILED, self.STATUS_CANCELLED):
+                # Issues of an incomplete run (e.g. failed chunks) must not pass for a finished review.
+                await self.issues_repository.delete_issues_by_doc(document_id, owner_id=owner_id)
+            elif not force:
                 existing_issues = await self.issues_repository.get_issues(document_id, owner_id=owner_id)
                 if existing_issues:
                     return {
@@ -246,11 +364,48 @@ class IssuesService:
                 )
                 return {"doc_id": document_id, "run_id": cached["id"], "status": self.STATUS_COMPLETED, "error_message": None}
 
+            job_payload = {
+                "ir": ir.model_dump(mode="json"),
+                "user": user.model_dump(),
+                "timestamp_iso": timestamp_iso,
+                "input_fingerprint": input_fingerprint,
+                "custom_rules": [r.model_dump(mode="json") for r in custom_rules or []],
+            }
+            if cached is None and (settings.review_incremental_rules if incremental is None else incremental):
+                started = await self._start_incremental_review(
+                    kind="ir",
+                    document_id=document_id,
+                    owner_id=owner_id,
+                    subtype_id=subtype_id,
+                    sha256=input_fingerprint,
+                    user=user,
+                    timestamp_iso=timestamp_iso,
+                    rules_snapshot_json=rules_snapshot_json,
+                    rules_fingerprint=rules_fingerprint,
+                    pipeline_version=pipeline_version,
+                    custom_rules=custom_rules,
+                    job_payload=job_payload,
+                )
+                if started is not None:
+                    return started
+            if cached is None and (settings.review_revision_enabled if incremental is None else incremental):
+                baseline = await self._find_revision_baseline(
+                    document_id=document_id,
+                    owner_id=owner_id,
+                    subtype_id=subtype_id,
+                    sha256=input_fingerprint,
+                    rules_fingerprint=rules_fingerprint,
+                    pipeline_version=pipeline_version,
+                )
+                if baseline is not None:
+                    job_payload["revision_base_run_id"] = baseline["id"]
+
             if cached and cached.get("status") != self.STATUS_COMPLETED and not force:
                 run_id = cached["id"]
-                await self.analysis_runs_repository.update(
+                await self._update_run(
                     run_id,
                     owner_id=owner_id,
+                    document_id=document_id,
                     fields={
                         "subtype_id": subtype_id,
                         "rules_snapshot_json": rules_snapshot_json,
@@ -278,15 +433,8 @@ class IssuesService:
                 )
 
             await self.documents_repository.update_last_run_id(document_id, owner_id=owner_id, last_run_id=run_id)
-            self._spawn_ir_review_task(
-                owner_id=owner_id,
-                document_id=document_id,
-                run_id=run_id,
-                ir=ir,
-                user=user,
-                timestamp_iso=timestamp_iso,
-                input_fingerprint=input_fingerprint,
-                custom_rules=custom_rules,
+            await self._enqueue_review_job(
+                kind="ir", owner_id=owner_id, document_id=document_id, run_id=run_id, payload=job_payload
             )
             return {"doc_id": document_id, "run_id": run_id, "status": self.STATUS_RUNNING, "error_message": None}
 
@@ -295,17 +443,18 @@ class IssuesService:
         if run_id:
             row = await self.analysis_runs_repository.get_by_id(run_id, owner_id=owner_id)
             if row and row.get("status") == self.STATUS_RUNNING:
-                await self.analysis_runs_repository.update(
+                await self._update_run(
                     run_id,
                     owner_id=owner_id,
+                    document_id=document_id,
                     fields={"status": self.STATUS_CANCEL_REQUESTED, "error_message": "任务取消中"},
                 )
 
-        key = (owner_id, document_id)
-        async with self._review_tasks_lock:
-            task = self._review_tasks.get(key)
-            if task and not task.done():
-                task.cancel()
+        for job in await self.review_jobs_repository.request_cancel(owner_id=owner_id, document_id=document_id):
+            # Never picked up by a worker: nothing else will move the run out of cancel_requested.
+            await self.finish_review_job(job, status=self.STATUS_CANCELLED, error_message="任务已取消")
+        if self._worker is not None:
+            self._worker.cancel_local(owner_id, document_id)
 
         status = await self.get_review_status(document_id, owner_id=owner_id)
         if status.get("status") == self.STATUS_NOT_STARTED and run_id:
@@ -323,123 +472,419 @@ class IssuesService:
         review_initiated_at_utc: str,
     ) -> List[Issue]:
         canonical = await self.analysis_issues_repository.list_by_run_id(run_id, owner_id=owner_id)
-        issues: List[Issue] = []
-        for c in canonical:
-            location = None
-            try:
-                raw = c.get("location_json")
-                location = json.loads(raw) if raw else None
-            except Exception:
-                location = None
-
-            issues.append(
-                Issue(
-                    id=str(uuid4()),
-                    doc_id=document_id,
-                    owner_id=owner_id,
-                    source_run_id=run_id,
-                    source_issue_id=c.get("id"),
-                    text=c.get("text") or "",
-                    type=c.get("type") or "",
-                    status=IssueStatusEnum.not_reviewed,
-                    suggested_fix=c.get("suggested_fix") or "",
-                    explanation=c.get("explanation") or "",
-                    risk_level=c.get("risk_level"),
-                    location=location,
-                    review_initiated_by=review_initiated_by,
-                    review_initiated_at_UTC=review_initiated_at_utc,
-                )
+        issues = [
+            self._issue_from_canonical(
+                c,
+                document_id=document_id,
+                owner_id=owner_id,
+                source_run_id=run_id,
+                source_issue_id=c.get("id"),
+                review_initiated_by=review_initiated_by,
+                review_initiated_at_utc=review_initiated_at_utc,
             )
+            for c in canonical
+        ]
 
         await self.issues_repository.store_issues(issues)
+        self.events.publish_issues(owner_id, document_id, issues)
         return issues
 
-    async def _get_run_id_for_doc(self, document_id: str, *, owner_id: str) -> Optional[str]:
-        doc_rows = await self.documents_repository.db_client.execute_query(
-            "SELECT last_run_id FROM documents WHERE id = ? AND owner_id = ?",
-            (document_id, owner_id),
+    @staticmethod
+    def _issue_from_canonical(
+        c: Dict[str, Any],
+        *,
+        document_id: str,
+        owner_id: str,
+        source_run_id: str,
+        source_issue_id: Optional[str],
+        review_initiated_by: str,
+        review_initiated_at_utc: str,
+    ) -> Issue:
+        location = None
+        try:
+            raw = c.get("location_json")
+            location = json_codec.loads(raw) if raw else None
+        except Exception:
+            location = None
+
+        return Issue(
+            id=str(uuid4()),
+            doc_id=document_id,
+            owner_id=owner_id,
+            source_run_id=source_run_id,
+            source_issue_id=source_issue_id,
+            text=c.get("text") or "",
+            type=c.get("type") or "",
+            status=IssueStatusEnum.not_reviewed,
+            suggested_fix=c.get("suggested_fix") or "",
+            explanation=c.get("explanation") or "",
+            risk_level=c.get("risk_level"),
+            location=location,
+            review_initiated_by=review_initiated_by,
+            review_initiated_at_UTC=review_initiated_at_utc,
         )
-        if doc_rows:
-            run_id = doc_rows[0].get("last_run_id")
-            if run_id:
-                return run_id
-        return await self.issues_repository.get_distinct_source_run_id_for_doc(document_id, owner_id=owner_id)
 
-    def _spawn_review_task(
+    async def _start_incremental_review(
         self,
         *,
-        owner_id: str,
+        kind: str,
         document_id: str,
-        run_id: str,
-        pdf_path: str,
+        owner_id: str,
+        subtype_id: str,
+        sha256: str,
         user: User,
         timestamp_iso: str,
-        mineru_cache_key: str,
+        rules_snapshot_json: str,
+        rules_fingerprint: str,
+        pipeline_version: str,
         custom_rules: List[ReviewRule] | None,
-    ) -> None:
-        key = (owner_id, document_id)
+        job_payload: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Start a run that builds on the latest completed run of the same input whose rule set differs.
 
-        async def runner():
-            await self._run_review_pipeline(
-                owner_id=owner_id,
+        Only added or modified rules go to the LLM (`rules_only` job); the previous run's issues are
+        carried over except those of modified or removed rules. Returns None when there is no such run.
+        """
+        previous = await self.analysis_runs_repository.get_latest_completed(
+            owner_id=owner_id, sha256=sha256, pipeline_version=pipeline_version.split("|force:", 1)[0]
+        )
+        if not previous or previous.get("rules_fingerprint") == rules_fingerprint:
+            return None
+        try:
+            previous_items = json.loads(previous.get("rules_snapshot_json") or "[]")
+            current_items = json.loads(rules_snapshot_json or "[]")
+        except ValueError:
+            return None
+        diff = diff_review_rules_snapshots(previous_items, current_items)
+        previous_names = {str(p.get("id")): p.get("name") for p in previous_items if isinstance(p, dict)}
+        stale_types = {previous_names.get(str(i.get("id"))) for i in diff["modified"] + diff["removed"]}
+        rerun_ids = {str(i.get("id")) for i in diff["added"] + diff["modified"]}
+        rules = [r for r in custom_rules or [] if r.id in rerun_ids]
+
+        run_id = str(uuid4())
+        await self.analysis_runs_repository.create(
+            {
+                "id": run_id,
+                "owner_id": owner_id,
+                "sha256": sha256,
+                "subtype_id": subtype_id,
+                "rules_fingerprint": rules_fingerprint,
+                "rules_snapshot_json": rules_snapshot_json,
+                "pipeline_version": pipeline_version,
+                "mineru_cache_key": sha256,
+                "created_at_utc": timestamp_iso,
+                "status": self.STATUS_RUNNING,
+                "error_message": None,
+            }
+        )
+        await self.documents_repository.update_last_run_id(document_id, owner_id=owner_id, last_run_id=run_id)
+
+        logging.info(
+            f"Incremental review {run_id} for document {document_id} from run {previous['id']}: "
+            f"added={len(diff['added'])} modified={len(diff['modified'])} removed={len(diff['removed'])} "
+            f"unchanged={len(diff['unchanged'])}"
+        )
+
+        if not rules:
+            await self._carry_over_issues(
+                run_id,
+                previous_run_id=previous["id"],
+                stale_types=stale_types,
                 document_id=document_id,
-                run_id=run_id,
-                pdf_path=pdf_path,
+                owner_id=owner_id,
                 user=user,
                 timestamp_iso=timestamp_iso,
-                mineru_cache_key=mineru_cache_key,
-                custom_rules=custom_rules,
             )
+            await self.analysis_runs_repository.store_paragraph_hashes(
+                run_id, await self.analysis_runs_repository.get_paragraph_hashes(previous["id"])
+            )
+            await self._update_run(
+                run_id,
+                owner_id=owner_id,
+                document_id=document_id,
+                fields={"status": self.STATUS_COMPLETED, "error_message": None},
+            )
+            return {"doc_id": document_id, "run_id": run_id, "status": self.STATUS_COMPLETED, "error_message": None}
 
-        task = asyncio.create_task(runner())
-        self._review_tasks[key] = task
-
-        def _cleanup(_t: asyncio.Task) -> None:
-            try:
-                if self._review_tasks.get(key) is _t:
-                    self._review_tasks.pop(key, None)
-            except Exception:
-                pass
-
-        task.add_done_callback(_cleanup)
+        await self._enqueue_review_job(
+            kind=kind,
+            owner_id=owner_id,
+            document_id=document_id,
+            run_id=run_id,
+            payload={
+                **job_payload,
+                "custom_rules": [r.model_dump(mode="json") for r in rules],
+                "rules_only": True,
+                # Carried over by the job itself, so a retried job rebuilds the run from scratch.
+                "carry_over": {"run_id": previous["id"], "stale_types": sorted(t for t in stale_types if t)},
+            },
+        )
+        return {"doc_id": document_id, "run_id": run_id, "status": self.STATUS_RUNNING, "error_message": None}
 
-    def _spawn_ir_review_task(
+    async def _carry_over_issues(
         self,
+        run_id: str,
         *,
-        owner_id: str,
+        previous_run_id: str,
+        stale_types: Set[str],
         document_id: str,
-        run_id: str,
-        ir: DocumentIR,
+        owner_id: str,
         user: User,
         timestamp_iso: str,
-        input_fingerprint: str,
-        custom_rules: List[ReviewRule] | None,
     ) -> None:
-        key = (owner_id, document_id)
-
-        async def runner():
-            await self._run_ir_review_pipeline(
-                owner_id=owner_id,
+        """Copy the previous run's issues into `run_id`, except those of modified or removed rules."""
+        canonical = await self.analysis_issues_repository.list_by_run_id(previous_run_id, owner_id=owner_id)
+        carried = [
+            self._issue_from_canonical(
+                c,
                 document_id=document_id,
-                run_id=run_id,
-                ir=ir,
-                user=user,
-                timestamp_iso=timestamp_iso,
-                input_fingerprint=input_fingerprint,
-                custom_rules=custom_rules,
+                owner_id=owner_id,
+                source_run_id=run_id,
+                source_issue_id=None,
+                review_initiated_by=user.oid,
+                review_initiated_at_utc=timestamp_iso,
             )
+            for c in canonical
+            if c.get("type") not in stale_types
+        ]
+        await self._store_run_issues(run_id, carried)
+        logging.info(f"Run {run_id}: carried over {len(carried)}/{len(canonical)} issues from run {previous_run_id}")
+
+    async def _find_revision_baseline(
+        self,
+        *,
+        document_id: str,
+        owner_id: str,
+        subtype_id: str,
+        sha256: str,
+        rules_fingerprint: str,
+        pipeline_version: str,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Latest completed run of an earlier revision of this document, to diff paragraphs against.
 
-        task = asyncio.create_task(runner())
-        self._review_tasks[key] = task
+        A revision is another document of the owner in the same subtype whose file name has the same
+        lineage (see `filename_lineage`), reviewed with the same rule set and pipeline.
+        """
+        doc = await self.documents_repository.get_row_by_id(document_id, owner_id=owner_id)
+        lineage = filename_lineage((doc or {}).get("original_filename") or "")
+        if not lineage:
+            return None
+        base_version = pipeline_version.split("|force:", 1)[0]
+        candidates = await self.documents_repository.list_reviewed_by_subtype(
+            owner_id=owner_id, subtype_id=subtype_id, exclude_id=document_id
+        )
+        for cand in candidates:
+            if cand.get("sha256") == doc.get("sha256") or filename_lineage(cand.get("original_filename") or "") != lineage:
+                continue
+            run = await self.analysis_runs_repository.get_by_id(cand["last_run_id"], owner_id=owner_id)
+            if (
+                not run
+                or run.get("status") != self.STATUS_COMPLETED
+                or run.get("sha256") == sha256
+                or run.get("rules_fingerprint") != rules_fingerprint
+                or str(run.get("pipeline_version") or "").split("|force:", 1)[0] != base_version
+            ):
+                continue
+            if not await self.analysis_runs_repository.get_paragraph_hashes(run["id"]):
+                continue
+            logging.info(f"Revision review for document {document_id}: baseline run {run['id']} (document {cand['id']})")
+            return run
+        return None
 
-        def _cleanup(_t: asyncio.Task) -> None:
+    async def _load_revision_context(self, base_run_id: Optional[str], *, owner_id: str) -> RevisionContext:
+        revision = RevisionContext(context_paragraphs=settings.review_revision_context_paragraphs)
+        if not base_run_id:
+            return revision
+        revision.base_run_id = base_run_id
+        revision.base_hashes = await self.analysis_runs_repository.get_paragraph_hashes(base_run_id)
+        for c in await self.analysis_issues_repository.list_by_run_id(base_run_id, owner_id=owner_id):
             try:
-                if self._review_tasks.get(key) is _t:
-                    self._review_tasks.pop(key, None)
+                location = json_codec.loads(c["location_json"]) if c.get("location_json") else None
             except Exception:
-                pass
+                location = None
+            revision.base_issues.append({**c, "location": location})
+        return revision
+
+    async def _update_run(
+        self, run_id: str, *, owner_id: str, document_id: str, fields: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Update an analysis run and announce status transitions to SSE subscribers."""
+        row = await self.analysis_runs_repository.update(run_id, owner_id=owner_id, fields=fields)
+        if "status" in fields:
+            self.events.publish_status(
+                owner_id,
+                document_id,
+                str(row.get("status")),
+                run_id=run_id,
+                error_message=row.get("error_message"),
+            )
+        return row
+
+    async def _store_run_issues(self, run_id: str, issues: List[Issue]) -> None:
+        """Persist a batch of review issues and their canonical analysis rows in one transaction."""
+        if not issues:
+            return
+        db_client = self.issues_repository.db_client
+        if db_client is not self.analysis_issues_repository.db_client:
+            await self.issues_repository.store_issues(issues)
+            await self.analysis_issues_repository.store_issues(run_id, issues)
+        else:
+            await db_client.store_item_groups(
+                [
+                    ("issues", self.issues_repository.serialize_issues(issues)),
+                    ("analysis_issues", self.analysis_issues_repository.build_rows(run_id, issues)),
+                ]
+            )
+        first = issues[0]
+        if first.owner_id and first.doc_id:
+            self.events.publish_issues(first.owner_id, first.doc_id, issues)
+
+    async def _delete_run_issues(self, run_id: str, *, owner_id: str, document_id: str) -> None:
+        """Remove what an earlier attempt of the run stored, before the run is reviewed again."""
+        deleted = await self.issues_repository.delete_issues_by_run(run_id, owner_id=owner_id, doc_id=document_id)
+        deleted_canonical = await self.analysis_issues_repository.delete_by_run_id(run_id)
+        if deleted or deleted_canonical:
+            logging.info(f"Run {run_id}: removed {deleted} issues left by an earlier attempt")
+
+    async def _get_run_id_for_doc(self, document_id: str, *, owner_id: str) -> Optional[str]:
+        doc_rows = await self.documents_repository.db_client.execute_query(
+            "SELECT last_run_id FROM documents WHERE id = ? AND owner_id = ?",
+            (document_id, owner_id),
+        )
+        if doc_rows:
+            run_id = doc_rows[0].get("last_run_id")
+            if run_id:
+                return run_id
+        return await self.issues_repository.get_distinct_source_run_id_for_doc(document_id, owner_id=owner_id)
+
+    async def _enqueue_review_job(
+        self, *, kind: str, owner_id: str, document_id: str, run_id: str, payload: Dict[str, Any]
+    ) -> None:
+        await self.review_jobs_repository.enqueue(
+            kind=kind,
+            owner_id=owner_id,
+            document_id=document_id,
+            run_id=run_id,
+            payload=payload,
+            max_attempts=settings.review_job_max_attempts,
+        )
+        if settings.review_worker_mode == "inline":
+            self._ensure_inline_worker().wake()
+
+    def start_worker(self) -> ReviewWorker:
+        """
+        Start the embedded worker without waiting for the first enqueue, so jobs a previous process
+        left queued or leased resume (and exhausted ones are reaped) as soon as the app is up.
+        """
+        return self._ensure_inline_worker()
+
+    def _ensure_inline_worker(self) -> ReviewWorker:
+        """Start (or restart on a new event loop) the worker embedded in this process."""
+        loop = asyncio.get_running_loop()
+        task = self._worker_task
+        if self._worker is None or task is None or task.done() or task.get_loop() is not loop:
+            self._worker = ReviewWorker(self, self.review_jobs_repository)
+            self._worker_task = asyncio.create_task(self._worker.run())
+        return self._worker
+
+    async def stop_worker(self) -> None:
+        """Stop the embedded worker; its running jobs are released back to the queue."""
+        task, self._worker_task = self._worker_task, None
+        self._worker = None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def run_review_job(self, job: Dict[str, Any]) -> str:
+        """Execute a claimed review job and return the resulting job status."""
+        payload = json.loads(job["payload_json"])
+        owner_id, document_id, run_id = job["owner_id"], job["document_id"], job["run_id"]
+        user = User(**(payload.get("user") or {}))
+        custom_rules = [ReviewRule(**r) for r in payload.get("custom_rules") or []] or None
+        if int(job.get("attempts") or 1) > 1:
+            logging.info(f"Resuming review job {job['id']} (attempt {job['attempts']}) for document {document_id}")
+        # A previous owner may have left the run cancelled/failed (it lost its lease or was stopped)
+        # and stored part of its issues; start this attempt from a clean run.
+        row = await self.analysis_runs_repository.get_by_id(run_id, owner_id=owner_id)
+        if row and row.get("status") not in (self.STATUS_RUNNING, self.STATUS_CANCEL_REQUESTED):
+            await self._update_run(
+                run_id,
+                owner_id=owner_id,
+                document_id=document_id,
+                fields={"status": self.STATUS_RUNNING, "error_message": None},
+            )
+        await self._delete_run_issues(run_id, owner_id=owner_id, document_id=document_id)
+        carry_over = payload.get("carry_over")
+        if carry_over:
+            await self._carry_over_issues(
+                run_id,
+                previous_run_id=carry_over["run_id"],
+                stale_types=set(carry_over.get("stale_types") or []),
+                document_id=document_id,
+                owner_id=owner_id,
+                user=user,
+                timestamp_iso=payload["timestamp_iso"],
+            )
+        revision = await self._load_revision_context(payload.get("revision_base_run_id"), owner_id=owner_id)
+        try:
+            if job["kind"] == "ir":
+                await self._run_ir_review_pipeline(
+                    owner_id=owner_id,
+                    document_id=document_id,
+                    run_id=run_id,
+                    ir=DocumentIR(**payload["ir"]),
+                    user=user,
+                    timestamp_iso=payload["timestamp_iso"],
+                    input_fingerprint=payload["input_fingerprint"],
+                    custom_rules=custom_rules,
+                    rules_only=bool(payload.get("rules_only")),
+                    revision=revision,
+                )
+            else:
+                await self._run_review_pipeline(
+                    owner_id=owner_id,
+                    document_id=document_id,
+                    run_id=run_id,
+                    pdf_path=payload["pdf_path"],
+                    user=user,
+                    timestamp_iso=payload["timestamp_iso"],
+                    mineru_cache_key=payload["mineru_cache_key"],
+                    custom_rules=custom_rules,
+                    rules_only=bool(payload.get("rules_only")),
+                    revision=revision,
+                )
+        except asyncio.CancelledError:
+            # Interrupted jobs (lease lost, worker shutdown) are resumed by another worker and keep
+            # their run as it is; only a requested cancellation ends the run.
+            if not job.get("interrupted"):
+                await self.finish_review_job(job, status=ReviewJobsRepository.STATUS_CANCELLED, error_message="任务已取消")
+            raise
+        row = await self.analysis_runs_repository.get_by_id(run_id, owner_id=owner_id)
+        st = (row or {}).get("status")
+        if st == self.STATUS_COMPLETED:
+            return ReviewJobsRepository.STATUS_COMPLETED
+        if st in (self.STATUS_CANCELLED, self.STATUS_CANCEL_REQUESTED):
+            return ReviewJobsRepository.STATUS_CANCELLED
+        return ReviewJobsRepository.STATUS_FAILED
 
-        task.add_done_callback(_cleanup)
+    async def finish_review_job(self, job: Dict[str, Any], *, status: str, error_message: Optional[str]) -> None:
+        """Record a job that ended outside the pipeline (crash, exhausted retries, cancelled while queued) on its run."""
+        run_status = self.STATUS_CANCELLED if status == ReviewJobsRepository.STATUS_CANCELLED else self.STATUS_FAILED
+        try:
+            await self._update_run(
+                job["run_id"],
+                owner_id=job["owner_id"],
+                document_id=job["document_id"],
+                fields={"status": run_status, "error_message": error_message},
+            )
+        except Exception as e:
+            logging.warning(f"Failed to record review job {job.get('id')} outcome on run {job.get('run_id')}: {e}")
 
     async def _run_ir_review_pipeline(
         self,
@@ -452,6 +897,8 @@ class IssuesService:
         timestamp_iso: str,
         input_fingerprint: str,
         custom_rules: List[ReviewRule] | None,
+        rules_only: bool = False,
+        revision: RevisionContext | None = None,
     ) -> None:
         try:
             stream_data = self.pipeline.stream_ir_issues(
@@ -460,13 +907,16 @@ class IssuesService:
                 user_id=user.oid,
                 timestamp_iso=timestamp_iso,
                 custom_rules=custom_rules,
+                rules_only=rules_only,
+                revision=revision,
             )
             async for issues in stream_data:
                 row = await self.analysis_runs_repository.get_by_id(run_id, owner_id=owner_id)
                 if row and row.get("status") == self.STATUS_CANCEL_REQUESTED:
-                    await self.analysis_runs_repository.update(
+                    await self._update_run(
                         run_id,
                         owner_id=owner_id,
+                        document_id=document_id,
                         fields={"status": self.STATUS_CANCELLED, "error_message": "任务已取消"},
                     )
                     return
@@ -475,30 +925,23 @@ class IssuesService:
                     issue.owner_id = owner_id
                     issue.source_run_id = run_id
                     issue.source_issue_id = None
-                await self.issues_repository.store_issues(issues)
-                await self.analysis_issues_repository.store_issues(run_id, issues)
+                await self._store_run_issues(run_id, issues)
 
-            await self.analysis_runs_repository.update(
+            if revision is not None:
+                await self.analysis_runs_repository.store_paragraph_hashes(run_id, revision.paragraph_hashes)
+            await self._update_run(
                 run_id,
                 owner_id=owner_id,
+                document_id=document_id,
                 fields={"status": self.STATUS_COMPLETED, "error_message": None},
             )
-        except asyncio.CancelledError:
-            try:
-                await self.analysis_runs_repository.update(
-                    run_id,
-                    owner_id=owner_id,
-                    fields={"status": self.STATUS_CANCELLED, "error_message": "任务已取消"},
-                )
-            except Exception:
-                pass
-            return
         except Exception as e:
             logging.error(f"Error initiating IR review for document {document_id}: {str(e)}")
             try:
-                await self.analysis_runs_repository.update(
+                await self._update_run(
                     run_id,
                     owner_id=owner_id,
+                    document_id=document_id,
                     fields={"status": self.STATUS_FAILED, "error_message": str(e)},
                 )
             except Exception:
@@ -515,6 +958,8 @@ class IssuesService:
         timestamp_iso: str,
         mineru_cache_key: str,
         custom_rules: List[ReviewRule] | None,
+        rules_only: bool = False,
+        revision: RevisionContext | None = None,
     ) -> None:
         try:
             stream_data = self.pipeline.stream_issues(
@@ -524,13 +969,16 @@ class IssuesService:
                 timestamp_iso=timestamp_iso,
                 custom_rules=custom_rules,
                 cache_key=mineru_cache_key,
+                rules_only=rules_only,
+                revision=revision,
             )
             async for issues in stream_data:
                 row = await self.analysis_runs_repository.get_by_id(run_id, owner_id=owner_id)
                 if row and row.get("status") == self.STATUS_CANCEL_REQUESTED:
-                    await self.analysis_runs_repository.update(
+                    await self._update_run(
                         run_id,
                         owner_id=owner_id,
+                        document_id=document_id,
                         fields={"status": self.STATUS_CANCELLED, "error_message": "任务已取消"},
                     )
                     return
@@ -539,30 +987,23 @@ class IssuesService:
                     issue.owner_id = owner_id
                     issue.source_run_id = run_id
                     issue.source_issue_id = None
-                await self.issues_repository.store_issues(issues)
-                await self.analysis_issues_repository.store_issues(run_id, issues)
+                await self._store_run_issues(run_id, issues)
 
-            await self.analysis_runs_repository.update(
+            if revision is not None:
+                await self.analysis_runs_repository.store_paragraph_hashes(run_id, revision.paragraph_hashes)
+            await self._update_run(
                 run_id,
                 owner_id=owner_id,
+                document_id=document_id,
                 fields={"status": self.STATUS_COMPLETED, "error_message": None},
             )
-        except asyncio.CancelledError:
-            try:
-                await self.analysis_runs_repository.update(
-                    run_id,
-                    owner_id=owner_id,
-                    fields={"status": self.STATUS_CANCELLED, "error_message": "任务已取消"},
-                )
-            except Exception:
-                pass
-            return
         except TimeoutError as e:
             logging.error(f"MinerU processing timed out for document {pdf_path}: {e}")
             try:
-                await self.analysis_runs_repository.update(
+                await self._update_run(
                     run_id,
                     owner_id=owner_id,
+                    document_id=document_id,
                     fields={"status": self.STATUS_FAILED, "error_message": "任务中断：文档解析超时 (MinerU Timeout)"},
                 )
             except Exception:
@@ -570,9 +1011,10 @@ class IssuesService:
         except Exception as e:
             logging.error(f"Error initiating review for document {pdf_path}: {str(e)}")
             try:
-                await self.analysis_runs_repository.update(
+                await self._update_run(
                     run_id,
                     owner_id=owner_id,
+                    document_id=document_id,
                     fields={"status": self.STATUS_FAILED, "error_message": str(e)},
                 )
             except Exception:
@@ -628,9 +1070,10 @@ class IssuesService:
 
             if cached and cached.get("status") != "completed":
                 run_id = cached["id"]
-                await self.analysis_runs_repository.update(
+                await self._update_run(
                     run_id,
                     owner_id=owner_id,
+                    document_id=document_id,
                     fields={
                         "subtype_id": subtype_id,
                         "rules_snapshot_json": rules_snapshot_json,
@@ -671,22 +1114,23 @@ class IssuesService:
                     issue.owner_id = owner_id
                     issue.source_run_id = run_id
                     issue.source_issue_id = None
-                await self.issues_repository.store_issues(issues)
-                await self.analysis_issues_repository.store_issues(run_id, issues)
+                await self._store_run_issues(run_id, issues)
                 yield issues
 
-            await self.analysis_runs_repository.update(
+            await self._update_run(
                 run_id,
                 owner_id=owner_id,
+                document_id=document_id,
                 fields={"status": "completed"},
             )
         except asyncio.CancelledError:
             logging.warning(f"Review task cancelled for document {pdf_path}")
             try:
                 if run_id:
-                    await self.analysis_runs_repository.update(
+                    await self._update_run(
                         run_id,
                         owner_id=owner_id,
+                        document_id=document_id,
                         fields={"status": "failed", "error_message": "任务中断：客户端连接断开或请求被取消"},
                     )
             except Exception:
@@ -696,9 +1140,10 @@ class IssuesService:
             logging.error(f"MinerU processing timed out for document {pdf_path}: {e}")
             try:
                 if run_id:
-                    await self.analysis_runs_repository.update(
+                    await self._update_run(
                         run_id,
                         owner_id=owner_id,
+                        document_id=document_id,
                         fields={"status": "failed", "error_message": "任务中断：文档解析超时 (MinerU Timeout)"},
                     )
             except Exception:
@@ -708,9 +1153,10 @@ class IssuesService:
             logging.error(f"Error initiating review for document {pdf_path}: {str(e)}")
             try:
                 if run_id:
-                    await self.analysis_runs_repository.update(
+                    await self._update_run(
                         run_id,
                         owner_id=owner_id,
+                        document_id=document_id,
                         fields={"status": "failed", "error_message": str(e)},
                     )
             except Exception:
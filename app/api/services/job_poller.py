@@ -0,0 +1,220 @@
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import httpx
+
+from common.logger import get_logger
+from config.config import settings
+
+logging = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class PollRetry(Exception):
+    """Raised by a poll check when the server asked us to back off (e.g. 429 with `Retry-After`)."""
+
+    def __init__(self, retry_after_sec: float | None = None, message: str = "") -> None:
+        super().__init__(message or f"retry after {retry_after_sec}s")
+        self.retry_after_sec = retry_after_sec
+
+
+def retry_after_seconds(resp: httpx.Response) -> float | None:
+    """Parse a `Retry-After` header (delta seconds or HTTP date)."""
+    value = resp.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def raise_for_poll_status(resp: httpx.Response) -> None:
+    """Turn throttling/unavailable responses into `PollRetry`; raise for other HTTP errors."""
+    if resp.status_code in (429, 503):
+        raise PollRetry(retry_after_seconds(resp), f"HTTP {resp.status_code} from {resp.request.url.host}")
+    resp.raise_for_status()
+
+
+class AsyncRateLimiter:
+    """
+    Request rate limit shared by every job of one upstream API (GCRA / leaky bucket).
+
+    `acquire` reserves the next slot without holding a lock across awaits, so it works from any
+    event loop and concurrent callers are spaced evenly at `rate_per_sec` after an initial `burst`.
+    """
+
+    def __init__(self, rate_per_sec: float, *, burst: int = 1) -> None:
+        self.rate_per_sec = float(rate_per_sec)
+        self.burst = max(1, int(burst))
+        self._tat = 0.0  # theoretical arrival time of the next request
+
+    async def acquire(self) -> None:
+        if self.rate_per_sec <= 0:
+            return
+        interval = 1.0 / self.rate_per_sec
+        now = time.monotonic()
+        tat = max(self._tat, now)
+        wait = tat - now - (self.burst - 1) * interval
+        self._tat = tat + interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class PollerMetrics:
+    """Counters and recent time-to-done samples for one poller."""
+
+    def __init__(self, *, window: int = 200) -> None:
+        self.jobs = 0
+        self.polls = 0
+        self.done = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.throttled = 0
+        self._time_to_done: Deque[float] = deque(maxlen=window)
+
+    def observe_done(self, elapsed_sec: float) -> None:
+        self.done += 1
+        self._time_to_done.append(elapsed_sec)
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._time_to_done)
+
+        def pct(p: float) -> float | None:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 3)
+
+        return {
+            "jobs": self.jobs,
+            "polls": self.polls,
+            "done": self.done,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "polls_per_job": round(self.polls / self.jobs, 2) if self.jobs else 0.0,
+            "time_to_done_p50_sec": pct(0.5),
+            "time_to_done_p95_sec": pct(0.95),
+        }
+
+
+class JobPoller:
+    """
+    Polls a remote job until a check reports it done.
+
+    Schedule: every `initial_sec` during the first `fast_phase_sec` (short jobs finish with little
+    added latency), then from `interval_sec` growing by `backoff` per poll up to `max_interval_sec`,
+    each delay randomised by +/- `jitter` so concurrent jobs don't poll in lockstep. Every poll first
+    takes a slot from the shared `rate_limiter`. A check raising `PollRetry` (server throttling)
+    waits at least the server's `Retry-After` before the next poll.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        interval_sec: float,
+        max_interval_sec: float,
+        rate_limiter: AsyncRateLimiter | None = None,
+        initial_sec: float | None = None,
+        fast_phase_sec: float | None = None,
+        backoff: float | None = None,
+        jitter: float | None = None,
+    ) -> None:
+        self.name = name
+        self.interval_sec = max(0.0, float(interval_sec))
+        self.max_interval_sec = max(self.interval_sec, float(max_interval_sec))
+        self.initial_sec = max(0.0, float(initial_sec if initial_sec is not None else settings.job_poll_initial_sec))
+        self.fast_phase_sec = max(
+            0.0, float(fast_phase_sec if fast_phase_sec is not None else settings.job_poll_fast_phase_sec)
+        )
+        self.backoff = max(1.0, float(backoff if backoff is not None else settings.job_poll_backoff))
+        self.jitter = min(1.0, max(0.0, float(jitter if jitter is not None else settings.job_poll_jitter)))
+        self.rate_limiter = rate_limiter
+        self.metrics = poller_metrics(name)
+
+    def _jittered(self, delay: float) -> float:
+        if not self.jitter or delay <= 0:
+            return delay
+        return delay * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+    async def poll(
+        self,
+        check: Callable[[], Awaitable[Optional[T]]],
+        *,
+        max_wait_sec: float,
+        timeout_message: str,
+    ) -> T:
+        """
+        Call `check` until it returns a non-None value and return that value.
+        Raises `TimeoutError(timeout_message)` once `max_wait_sec` has passed.
+        """
+        self.metrics.jobs += 1
+        started = time.monotonic()
+        deadline = started + max_wait_sec
+        interval = self.interval_sec
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            self.metrics.polls += 1
+            hint: float | None = None
+            try:
+                result = await check()
+            except PollRetry as e:
+                self.metrics.throttled += 1
+                result, hint = None, e.retry_after_sec
+                logging.info(f"{self.name} poll throttled; retry after {hint}s")
+            except Exception:
+                self.metrics.errors += 1
+                raise
+            now = time.monotonic()
+            if result is not None:
+                self.metrics.observe_done(now - started)
+                return result
+            if now >= deadline:
+                self.metrics.timeouts += 1
+                raise TimeoutError(timeout_message)
+
+            if now - started < self.fast_phase_sec:
+                delay = min(self.initial_sec, self.interval_sec)
+            else:
+                delay = interval
+                interval = min(self.max_interval_sec, interval * self.backoff)
+            delay = self._jittered(delay)
+            if hint is not None:
+                delay = max(delay, hint)
+            await asyncio.sleep(max(0.0, min(delay, deadline - now)))
+
+
+_rate_limiters: Dict[str, AsyncRateLimiter] = {}
+_metrics: Dict[str, PollerMetrics] = {}
+
+
+def poller_metrics(name: str) -> PollerMetrics:
+    """Process-wide metrics per poller name, so short-lived clients still accumulate stats."""
+    metrics = _metrics.get(name)
+    if metrics is None:
+        metrics = _metrics[name] = PollerMetrics()
+    return metrics
+
+
+def poller_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: m.stats() for name, m in sorted(_metrics.items())}
+
+
+def shared_rate_limiter(name: str, rate_per_sec: float, *, burst: int = 1) -> AsyncRateLimiter:
+    """Process-wide limiter per upstream API, shared by all client instances and concurrent jobs."""
+    limiter = _rate_limiters.get(name)
+    if limiter is None or limiter.rate_per_sec != float(rate_per_sec) or limiter.burst != max(1, int(burst)):
+        limiter = AsyncRateLimiter(rate_per_sec, burst=burst)
+        _rate_limiters[name] = limiter
+    return limiter
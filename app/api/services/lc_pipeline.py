@@ -1,5 +1,12 @@
+import asyncio
+import bisect
+import threading
 import uuid
-from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import json
 from difflib import SequenceMatcher
@@ -17,11 +24,23 @@ from typing import Literal
 import fitz
 
 from common.logger import get_logger
+from common import json_codec
 from common.models import DocumentIR, Issue, IssueStatusEnum, IssueType, Location, LocationAnchor, LocationTypeEnum, ReviewRule, RiskLevel
 from config.config import settings
 from services.bbox import bbox_to_quadpoints
+from services.chunking import chunk_by_token_budget, estimate_tokens, uses_token_budget
+from services.llm_cache import LLMResponseCache, compute_llm_cache_key
+from services.llm_gateway import LLMGateway, LLMGatewayError
+from services.llm_router import HedgedLLMRouter, LLMProvider
+from services.local_rules import LocalRuleEngine, LocalRuleHit, split_local_rules
+from services.http_client import SharedHttpClient
 from services.mineru_client import MinerUClient
+from services.paragraph_prefilter import prefilter_paragraphs
 from services.paddleocr_client import PaddleOCRJobsClient
+from services.pdf_session import PdfDocumentSession
+from services.review_revision import RevisionContext, paragraph_hash, select_revised_paragraphs
+from services.rule_routing import RuleRouter
+from services.rules_fingerprint import compute_review_rules_fingerprint
 
 logging = get_logger(__name__)
 
@@ -60,6 +79,116 @@ class ReviewOutput(BaseModel):
     issues: List[ReviewIssue]
 
 
+class ChunkReviewError(RuntimeError):
+    """Some chunks of a review got no LLM answer; the review is incomplete."""
+
+    def __init__(self, failed: int, total: int, error: BaseException) -> None:
+        super().__init__(f"{failed}/{total} 个分块的 LLM 审核失败，审核结果不完整：{error}")
+        self.failed = failed
+        self.total = total
+
+
+_FORMAT_INSTRUCTIONS: str | None = None
+
+
+def _format_instructions() -> str:
+    global _FORMAT_INSTRUCTIONS
+    if _FORMAT_INSTRUCTIONS is None:
+        _FORMAT_INSTRUCTIONS = PydanticOutputParser(pydantic_object=ReviewOutput).get_format_instructions()
+    return _FORMAT_INSTRUCTIONS
+
+
+def _request_prefix(guidance: str) -> str:
+    """
+    Static head of the user message. Everything up to the paragraphs is identical for every chunk
+    reviewed with the same rules, so the provider can serve it from its prompt-prefix cache.
+    """
+    return f"{guidance}\n\n{_format_instructions()}\n\nReturn issues; if none, return an empty list."
+
+
+@dataclass(frozen=True)
+class _ReviewPrompt:
+    """The part of a review request that depends only on the rule set, shared by all its chunks."""
+
+    system_prompt: str
+    guidance: str
+    # Estimated tokens of the whole request minus the paragraphs.
+    overhead_tokens: int
+
+
+_REVIEW_PROMPTS: "OrderedDict[Tuple[str, Tuple[str, ...], bool], _ReviewPrompt]" = OrderedDict()
+_REVIEW_PROMPTS_MAX = 256
+
+
+def _review_prompt(custom_rules: List[ReviewRule] | None = None, *, builtin_types: bool = True) -> _ReviewPrompt:
+    """System prompt and guidance for a rule set, memoized by rules fingerprint (and rule order)."""
+    rules = list(custom_rules or [])
+    key = (compute_review_rules_fingerprint(rules) if rules else "", tuple(r.id for r in rules), builtin_types)
+    prompt = _REVIEW_PROMPTS.get(key)
+    if prompt is not None:
+        _REVIEW_PROMPTS.move_to_end(key)
+        return prompt
+    system_prompt = _build_system_prompt(rules, builtin_types=builtin_types)
+    guidance = _build_guidance(rules, builtin_types=builtin_types)
+    prompt = _ReviewPrompt(
+        system_prompt=system_prompt,
+        guidance=guidance,
+        # plus the fixed "Paragraphs with indices" wording
+        overhead_tokens=estimate_tokens(system_prompt) + estimate_tokens(_request_prefix(guidance)) + 16,
+    )
+    _REVIEW_PROMPTS[key] = prompt
+    while len(_REVIEW_PROMPTS) > _REVIEW_PROMPTS_MAX:
+        _REVIEW_PROMPTS.popitem(last=False)
+    return prompt
+
+
+def _prompt_overhead_tokens(custom_rules: List[ReviewRule] | None = None) -> int:
+    """Estimated tokens of everything in a review request except the paragraphs themselves."""
+    return _review_prompt(custom_rules).overhead_tokens
+
+
+def _prompt_token_usage(resp: Any) -> Tuple[int, int]:
+    """`(prompt_tokens, cached_prompt_tokens)` reported with an LLM response; zeros when absent."""
+    usage = getattr(resp, "usage_metadata", None) or {}
+    prompt_tokens = int(usage.get("input_tokens") or 0)
+    cached = int((usage.get("input_token_details") or {}).get("cache_read") or 0)
+    token_usage = (getattr(resp, "response_metadata", None) or {}).get("token_usage") or {}
+    if not prompt_tokens:
+        prompt_tokens = int(token_usage.get("prompt_tokens") or 0)
+    if not cached:
+        # DeepSeek reports prompt_cache_hit_tokens; OpenAI-compatible APIs prompt_tokens_details.cached_tokens.
+        cached = int(
+            token_usage.get("prompt_cache_hit_tokens")
+            or (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+            or 0
+        )
+    return prompt_tokens, cached
+
+
+class PromptCacheUsage:
+    """Running totals of prompt tokens sent and how many the provider served from its prefix cache."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, resp: Any) -> Tuple[int, int]:
+        prompt_tokens, cached = _prompt_token_usage(resp)
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached
+        return prompt_tokens, cached
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "hit_rate": round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+        }
+
+
 def _parse_review_output_best_effort(parser: PydanticOutputParser, content: str) -> List[ReviewIssue]:
     try:
         out = parser.parse(str(content))
@@ -97,6 +226,14 @@ def _parse_review_output_best_effort(parser: PydanticOutputParser, content: str)
     return parsed
 
 
+def _is_valid_review_output(parser: PydanticOutputParser, content: str) -> bool:
+    try:
+        parser.parse(str(content))
+        return True
+    except Exception:
+        return False
+
+
 SYSTEM_PROMPT = """You are an expert document reviewer.
 Identify issues in the provided text.
 Issue types allowed:
@@ -109,9 +246,9 @@ Return structured output that matches the requested schema.
 """
 
 
-def _build_system_prompt(custom_rules: List[ReviewRule] | None = None) -> str:
-    """Build system prompt with custom rules if provided."""
-    issue_types = ["- Grammar & Spelling", "- Definitive Language"]
+def _build_system_prompt(custom_rules: List[ReviewRule] | None = None, *, builtin_types: bool = True) -> str:
+    """Build system prompt with custom rules if provided (and only those when `builtin_types` is False)."""
+    issue_types = ["- Grammar & Spelling", "- Definitive Language"] if builtin_types else []
 
     if custom_rules:
         for rule in custom_rules:
@@ -155,12 +292,15 @@ def _build_system_prompt(custom_rules: List[ReviewRule] | None = None) -> str:
 """
 
 
-def _build_guidance(custom_rules: List[ReviewRule] | None = None) -> str:
+def _build_guidance(custom_rules: List[ReviewRule] | None = None, *, builtin_types: bool = True) -> str:
     """Build guidance section with custom rules."""
-    lines = [
-        "审核指南：",
-        "- Grammar & Spelling (语法与拼写): 真正的语病、错别字、标点错误、语法错误。",
-        "- Definitive Language (绝对化表述): 在正式承诺或保证语境中使用'必须/保证/一定/完全/绝对'等过度确定措辞。",
+    lines = ["审核指南："]
+    if builtin_types:
+        lines += [
+            "- Grammar & Spelling (语法与拼写): 真正的语病、错别字、标点错误、语法错误。",
+            "- Definitive Language (绝对化表述): 在正式承诺或保证语境中使用'必须/保证/一定/完全/绝对'等过度确定措辞。",
+        ]
+    lines += [
         "",
         "⚠️ 再次强调：以下不是错误，请跳过：",
         "- 序号（1、2、(1)、(2)、①、②、一、二 等）",
@@ -186,13 +326,89 @@ def _build_guidance(custom_rules: List[ReviewRule] | None = None) -> str:
     return "\n".join(lines)
 
 
+def _response_text(resp: Any) -> str:
+    content = resp.content if hasattr(resp, "content") else resp
+    if isinstance(content, list):
+        content = "".join([c.get("text", "") if isinstance(c, dict) else str(c) for c in content])
+    return str(content)
+
+
+def _only_rule_issues(raw_issues: List[ReviewIssue], custom_rules: List[ReviewRule] | None) -> List[ReviewIssue]:
+    """Drop issues of types outside `custom_rules` (the model may still report built-in types)."""
+    names = {r.name for r in custom_rules or []}
+    return [raw for raw in raw_issues or [] if isinstance(raw, ReviewIssue) and raw.type in names]
+
+
+def _reused_issue(
+    row: Dict[str, Any], location: Location, *, doc_id: str, user_id: str, timestamp_iso: str
+) -> Issue:
+    """Issue carried over from a baseline run's canonical row, anchored at `location` in this revision."""
+    return Issue(
+        id=str(uuid.uuid4()),
+        doc_id=doc_id,
+        text=row.get("text") or "",
+        type=row.get("type") or "",
+        status=IssueStatusEnum.not_reviewed,
+        suggested_fix=row.get("suggested_fix") or "",
+        explanation=row.get("explanation") or "",
+        risk_level=row.get("risk_level"),
+        location=location,
+        review_initiated_by=user_id,
+        review_initiated_at_UTC=timestamp_iso,
+    )
+
+
+def _local_rule_issue(
+    hit: LocalRuleHit, location: Location, *, doc_id: str, user_id: str, timestamp_iso: str
+) -> Issue:
+    return Issue(
+        id=str(uuid.uuid4()),
+        doc_id=doc_id,
+        text=hit.text,
+        type=hit.rule.name,
+        status=IssueStatusEnum.not_reviewed,
+        suggested_fix=hit.suggested_fix,
+        explanation=hit.explanation,
+        risk_level=hit.rule.risk_level,
+        location=location,
+        review_initiated_by=user_id,
+        review_initiated_at_UTC=timestamp_iso,
+    )
+
+
+def _chunking_label() -> str:
+    if uses_token_budget(settings.review_chunk_strategy, settings.pagination):
+        return f"token_budget={settings.review_chunk_token_budget}, max_paragraphs={settings.pagination}"
+    return f"pagination={settings.pagination}"
+
+
 class LangChainPipeline:
     def __init__(self) -> None:
         # Prefer LangChain v1 provider-based initialization for DeepSeek.
         # This avoids OpenAI "response_format" structured output features that DeepSeek may not support.
         self.llm = _init_deepseek_model()
+        # Review requests go through LLMGateway, which owns retries and timeouts; `self.llm` (used by
+        # the HITL agent outside the gateway) keeps the client's own retries.
+        self.review_llm = _init_deepseek_model(gateway_managed=True)
         self.parser = PydanticOutputParser(pydantic_object=ReviewOutput)
-        self.mineru = MinerUClient()
+        # One pooled HTTP client for the pipeline's lifetime: keep-alive across reviews instead of a
+        # fresh TCP/TLS handshake for every MinerU request.
+        self.http = SharedHttpClient()
+        self.mineru = MinerUClient(http=self.http)
+        self.llm_cache = LLMResponseCache() if settings.llm_cache_enabled else None
+        self.prompt_usage = PromptCacheUsage()
+        self.llm_gateway = LLMGateway()
+        providers = [LLMProvider("deepseek", str(settings.deepseek_model or ""), self.review_llm, self.llm_gateway)]
+        fallback = _init_fallback_model()
+        if fallback is not None:
+            providers.append(LLMProvider("fallback", settings.llm_fallback_model, fallback, LLMGateway()))
+        self.llm_router = HedgedLLMRouter(providers)
+
+    async def aclose(self) -> None:
+        await self.mineru.aclose()
+        if self.llm_cache is not None:
+            await self.llm_cache.aclose()
+        await self.http.aclose()
 
     async def stream_issues(
         self,
@@ -203,8 +419,15 @@ class LangChainPipeline:
         timestamp_iso: str,
         cache_key: str,
         custom_rules: List[ReviewRule] | None = None,
+        rules_only: bool = False,
+        revision: RevisionContext | None = None,
     ) -> AsyncGenerator[List[Issue], None]:
-        """End-to-end: MinerU parse -> chunk -> LLM -> yield Issue list per chunk."""
+        """
+        End-to-end: MinerU parse -> chunk -> LLM -> yield Issue list per chunk.
+        With `rules_only`, only `custom_rules` are checked (no built-in issue types).
+        With a `revision` baseline, only changed paragraphs are reviewed; the baseline's issues on
+        unchanged paragraphs are re-anchored on this PDF and yielded first.
+        """
         payload = await self.mineru.extract(Path(pdf_path), data_id=doc_id, cache_key=cache_key)
         meta = payload.get("meta") if isinstance(payload, dict) else None
         paragraphs = self.mineru.to_paragraphs(payload)
@@ -216,30 +439,128 @@ class LangChainPipeline:
             logging.debug(f"MinerU paragraph sample: {paragraphs[0].get('content', '')[:200]}")
         if not paragraphs:
             raise RuntimeError("MinerU 解析结果中未提取到段落文本（可能是返回 JSON 结构变化或解析字段不匹配）。")
+        # Document-order numbers, as IR paragraphs have: they survive pre-filtering and revision
+        # selection, so issues found outside the LLM chunks point at the document paragraph.
+        for i, para in enumerate(paragraphs):
+            para.setdefault("global_index", i)
 
-        page_sizes = _get_pdf_page_sizes(pdf_path)
-        page_bbox_space = _get_page_bbox_space(paragraphs)
-        layout = _load_mineru_layout(meta, cache_key)
-
-        chunks = self._chunk_paragraphs(paragraphs, settings.pagination)
-        logging.info(f"Chunk count: {len(chunks)} (pagination={settings.pagination})")
-        for chunk_index, chunk in enumerate(chunks):
-            issues = await self._process_chunk(
-                chunk,
-                chunk_index,
-                user_id,
-                timestamp_iso,
-                doc_id,
-                doc_name,
-                pdf_path,
-                cache_key,
-                page_sizes,
-                page_bbox_space,
-                layout,
-                custom_rules,
+        pdf_session = PdfDocumentSession(pdf_path)
+        try:
+            page_sizes = await _run_anchor_job(lambda: _get_pdf_page_sizes(pdf_session))
+            page_bbox_space = _get_page_bbox_space(paragraphs)
+            layout = payload.get("layout") if isinstance(payload, dict) else None
+            if layout is None:
+                layout = _load_mineru_layout(meta, cache_key)
+            layout_index = await _run_anchor_job(lambda: _LayoutIndex(layout)) if layout else None
+
+            to_review, reused = self._select_revision_paragraphs(
+                self._prefilter_paragraphs(paragraphs, doc_name), revision, doc_name
             )
-            if issues:
-                yield issues
+            if reused:
+                resolved = await _locate_issue_locations(
+                    [
+                        {"para": para, "para_index": int(para.get("global_index") or 0), "needle": row.get("text")}
+                        for row, para in reused
+                    ],
+                    pdf_session=pdf_session,
+                    cache_key=cache_key,
+                    page_sizes=page_sizes,
+                    page_bbox_space=page_bbox_space,
+                    layout=layout,
+                    layout_index=layout_index,
+                )
+                yield [
+                    _reused_issue(
+                        row,
+                        Location(
+                            source_sentence=para["content"],
+                            page_num=page_num,
+                            bounding_box=bbox,
+                            para_index=int(para.get("global_index") or 0),
+                            anchors=anchors,
+                        ),
+                        doc_id=doc_id,
+                        user_id=user_id,
+                        timestamp_iso=timestamp_iso,
+                    )
+                    for (row, para), (page_num, bbox, anchors) in zip(reused, resolved)
+                ]
+
+            local_engine, llm_rules = self._split_local_rules(custom_rules)
+            local_hits = self._local_rule_hits(local_engine, to_review)
+            if local_hits:
+                resolved = await _locate_issue_locations(
+                    [
+                        {"para": para, "para_index": int(para.get("global_index") or 0), "needle": hit.text}
+                        for hit, para in local_hits
+                    ],
+                    pdf_session=pdf_session,
+                    cache_key=cache_key,
+                    page_sizes=page_sizes,
+                    page_bbox_space=page_bbox_space,
+                    layout=layout,
+                    layout_index=layout_index,
+                )
+                yield [
+                    _local_rule_issue(
+                        hit,
+                        Location(
+                            source_sentence=para["content"],
+                            page_num=page_num,
+                            bounding_box=bbox,
+                            para_index=int(para.get("global_index") or 0),
+                            anchors=anchors,
+                        ),
+                        doc_id=doc_id,
+                        user_id=user_id,
+                        timestamp_iso=timestamp_iso,
+                    )
+                    for (hit, para), (page_num, bbox, anchors) in zip(local_hits, resolved)
+                ]
+
+            router = self._rule_router(llm_rules)
+            chunks = (
+                self._chunk_paragraphs(to_review, settings.pagination, router.budget_rules() if router else llm_rules)
+                if to_review and (llm_rules or not rules_only)
+                else []
+            )
+            logging.info(f"Chunk count: {len(chunks)} ({_chunking_label()})")
+
+            def make_job(
+                chunk_index: int, chunk: List[Dict[str, Any]], chunk_rules: List[ReviewRule] | None
+            ) -> Callable[[], Awaitable[List[Issue]]]:
+                return lambda: self._process_chunk(
+                    chunk,
+                    chunk_index,
+                    user_id,
+                    timestamp_iso,
+                    doc_id,
+                    doc_name,
+                    pdf_path,
+                    cache_key,
+                    page_sizes,
+                    page_bbox_space,
+                    layout,
+                    chunk_rules,
+                    pdf_session=pdf_session,
+                    layout_index=layout_index,
+                    rules_only=rules_only,
+                )
+
+            jobs = [
+                make_job(i, c, rules)
+                for i, c in enumerate(chunks)
+                for rules in [self._route_chunk_rules(router, c, i, llm_rules)]
+                if rules or not rules_only
+            ]
+            async with aclosing(self._run_chunks(jobs)) as results:
+                async for issues in results:
+                    if issues:
+                        yield issues
+        finally:
+            await _run_anchor_job(pdf_session.close)
+        if self.llm_cache is not None:
+            logging.info(f"LLM cache stats: {self.llm_cache.stats()}")
 
     async def stream_ir_issues(
         self,
@@ -249,24 +570,128 @@ class LangChainPipeline:
         user_id: str,
         timestamp_iso: str,
         custom_rules: List[ReviewRule] | None = None,
+        rules_only: bool = False,
+        revision: RevisionContext | None = None,
     ) -> AsyncGenerator[List[Issue], None]:
         paragraphs = self._ir_to_paragraphs(ir)
         if not paragraphs:
             raise RuntimeError("IR 解析结果中未提取到段落文本。")
 
-        chunks = self._chunk_paragraphs(paragraphs, settings.pagination)
-        logging.info(f"IR chunk count: {len(chunks)} (pagination={settings.pagination})")
-        for chunk_index, chunk in enumerate(chunks):
-            issues = await self._process_ir_chunk(
+        to_review, reused = self._select_revision_paragraphs(
+            self._prefilter_paragraphs(paragraphs, doc_id), revision, doc_id
+        )
+        if reused:
+            carried: List[Issue] = []
+            for row, para in reused:
+                node_id, path, start, end = self._locate_ir_anchor_location(para=para, needle=row.get("text"))
+                location = Location(
+                    type=LocationTypeEnum.ir_anchor,
+                    source_sentence=para.get("content"),
+                    para_index=int(para.get("global_index") or 0),
+                    node_id=node_id,
+                    path=path,
+                    start_offset=start,
+                    end_offset=end,
+                )
+                carried.append(
+                    _reused_issue(row, location, doc_id=doc_id, user_id=user_id, timestamp_iso=timestamp_iso)
+                )
+            yield carried
+
+        local_engine, llm_rules = self._split_local_rules(custom_rules)
+        local_hits = self._local_rule_hits(local_engine, to_review)
+        if local_hits:
+            found: List[Issue] = []
+            for hit, para in local_hits:
+                node_id, path, start, end = self._locate_ir_anchor_location(para=para, needle=hit.text)
+                location = Location(
+                    type=LocationTypeEnum.ir_anchor,
+                    source_sentence=para.get("content"),
+                    para_index=int(para.get("global_index") or 0),
+                    node_id=node_id,
+                    path=path,
+                    start_offset=start,
+                    end_offset=end,
+                )
+                found.append(
+                    _local_rule_issue(hit, location, doc_id=doc_id, user_id=user_id, timestamp_iso=timestamp_iso)
+                )
+            yield found
+
+        router = self._rule_router(llm_rules)
+        chunks = (
+            self._chunk_paragraphs(to_review, settings.pagination, router.budget_rules() if router else llm_rules)
+            if to_review and (llm_rules or not rules_only)
+            else []
+        )
+        logging.info(f"IR chunk count: {len(chunks)} ({_chunking_label()})")
+
+        def make_job(
+            chunk_index: int, chunk: List[Dict[str, Any]], chunk_rules: List[ReviewRule] | None
+        ) -> Callable[[], Awaitable[List[Issue]]]:
+            return lambda: self._process_ir_chunk(
                 chunk=chunk,
                 chunk_index=chunk_index,
                 user_id=user_id,
                 timestamp_iso=timestamp_iso,
                 doc_id=doc_id,
-                custom_rules=custom_rules,
+                custom_rules=chunk_rules,
+                rules_only=rules_only,
             )
-            if issues:
-                yield issues
+
+        jobs = [
+            make_job(i, c, rules)
+            for i, c in enumerate(chunks)
+            for rules in [self._route_chunk_rules(router, c, i, llm_rules)]
+            if rules or not rules_only
+        ]
+        async with aclosing(self._run_chunks(jobs)) as results:
+            async for issues in results:
+                if issues:
+                    yield issues
+        if self.llm_cache is not None:
+            logging.info(f"LLM cache stats: {self.llm_cache.stats()}")
+
+    async def _run_chunks(
+        self, jobs: List[Callable[[], Awaitable[List[Issue]]]]
+    ) -> AsyncGenerator[List[Issue], None]:
+        """
+        Run chunk jobs concurrently (bounded by `review_chunk_concurrency`) and yield each result
+        as soon as it is available, in completion order or document order (`review_chunk_order`).
+        Pending jobs are cancelled if the consumer stops early. Chunks whose LLM request failed do
+        not stop the others; once all are done, `ChunkReviewError` reports them.
+        """
+        if not jobs:
+            return
+        limit = max(1, int(settings.review_chunk_concurrency or 1))
+        in_document_order = str(settings.review_chunk_order or "").strip().lower() == "document"
+        sem = asyncio.Semaphore(limit)
+        failures: List[LLMGatewayError] = []
+
+        async def run(index: int, job: Callable[[], Awaitable[List[Issue]]]) -> List[Issue]:
+            async with sem:
+                try:
+                    return await job()
+                except LLMGatewayError as e:
+                    logging.error(f"Review chunk {index} failed: {e}")
+                    failures.append(e)
+                    return []
+
+        tasks = [asyncio.create_task(run(i, job)) for i, job in enumerate(jobs)]
+        try:
+            if in_document_order:
+                for task in tasks:
+                    yield await task
+            else:
+                for fut in asyncio.as_completed(tasks):
+                    yield await fut
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if failures:
+            raise ChunkReviewError(len(failures), len(jobs), failures[0])
 
     async def _process_ir_chunk(
         self,
@@ -277,33 +702,26 @@ class LangChainPipeline:
         timestamp_iso: str,
         doc_id: str,
         custom_rules: List[ReviewRule] | None = None,
+        rules_only: bool = False,
     ) -> List[Issue]:
         prepared = "\n".join([f"[{i}]{p['content']}" for i, p in enumerate(chunk)])
 
-        system_prompt = _build_system_prompt(custom_rules)
-        guidance = _build_guidance(custom_rules)
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(
-                content=(
-                    f"Chunk {chunk_index}. Paragraphs with indices:\n{prepared}\n\n"
-                    f"{guidance}\n"
-                    "Return issues; if none, return an empty list.\n\n"
-                    f"{self.parser.get_format_instructions()}"
-                )
-            ),
-        ]
+        prompt = _review_prompt(custom_rules, builtin_types=not rules_only)
 
         try:
-            resp = await self.llm.ainvoke(messages)
-            content = resp.content if hasattr(resp, "content") else resp
-            if isinstance(content, list):
-                content = "".join([c.get("text", "") if isinstance(c, dict) else str(c) for c in content])
-            raw_issues = _parse_review_output_best_effort(self.parser, str(content))
+            raw_issues = await self._review_chunk_with_llm(
+                chunk_index=chunk_index,
+                prepared=prepared,
+                system_prompt=prompt.system_prompt,
+                guidance=prompt.guidance,
+            )
+        except LLMGatewayError:
+            raise
         except Exception as e:
             logging.error(f"LLM output parse failed: {e}")
             return []
+        if rules_only:
+            raw_issues = _only_rule_issues(raw_issues, custom_rules)
 
         issues: List[Issue] = []
         seen: set[tuple[int, str, str]] = set()
@@ -312,6 +730,8 @@ class LangChainPipeline:
             risk_level = self._get_risk_level_for_type(issue_type, custom_rules)
             local_index = raw.para_index if isinstance(raw, ReviewIssue) else 0
             para = chunk[local_index] if 0 <= local_index < len(chunk) else chunk[0]
+            if para.get("context_only"):
+                continue
             if "global_index" in para:
                 global_index = int(para.get("global_index") or 0)
             else:
@@ -359,9 +779,134 @@ class LangChainPipeline:
 
         return issues
 
-    def _chunk_paragraphs(self, paragraphs: List[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+    async def _review_chunk_with_llm(
+        self,
+        *,
+        chunk_index: int,
+        prepared: str,
+        system_prompt: str,
+        guidance: str,
+    ) -> List[ReviewIssue]:
+        """
+        Ask the LLM for issues in one prepared chunk, consulting the response cache first.
+        Only responses from the primary model that parse into the review schema are written back
+        to the cache; a hedge or fallback answer must not be replayed as the primary model's.
+        """
+        primary = self.llm_router.primary
+        cache_key = None
+        if self.llm_cache is not None:
+            cache_key = compute_llm_cache_key(
+                prepared=prepared,
+                system_prompt=system_prompt,
+                guidance=guidance,
+                model=primary.model,
+            )
+            cached = await self.llm_cache.get(cache_key)
+            if cached is not None:
+                return _parse_review_output_best_effort(self.parser, cached)
+
+        # Static prefix first, paragraphs last: only the tail differs between chunks.
+        human = f"{_request_prefix(guidance)}\n\nParagraphs with indices:\n{prepared}"
+        messages = [SystemMessage(content=system_prompt), HumanMessage(content=human)]
+        resp, provider = await self.llm_router.invoke(
+            messages,
+            estimated_tokens=estimate_tokens(system_prompt) + estimate_tokens(human) + settings.llm_output_tokens_reserve,
+            accept=lambda r: self._is_usable_review_response(_response_text(r)),
+        )
+        prompt_tokens, cached_tokens = self.prompt_usage.record(resp)
+        logging.info(
+            f"LLM chunk {chunk_index} ({provider.name}): prompt tokens {prompt_tokens}, cached {cached_tokens}; "
+            f"prompt cache {self.prompt_usage.stats()}"
+        )
+        content = _response_text(resp)
+        raw_issues = _parse_review_output_best_effort(self.parser, content)
+
+        if (
+            cache_key is not None
+            and provider is primary
+            and (raw_issues or _is_valid_review_output(self.parser, content))
+        ):
+            await self.llm_cache.put(cache_key, model=provider.model, response=content)
+        return raw_issues
+
+    def _is_usable_review_response(self, content: str) -> bool:
+        return bool(_parse_review_output_best_effort(self.parser, content)) or _is_valid_review_output(self.parser, content)
+
+    def _prefilter_paragraphs(self, paragraphs: List[Dict[str, Any]], label: str) -> List[Dict[str, Any]]:
+        """Skip paragraphs the LLM would be told to ignore anyway (see `paragraph_prefilter`)."""
+        if not settings.review_prefilter_enabled:
+            return paragraphs
+        kept, stats = prefilter_paragraphs(paragraphs)
+        logging.info(f"Pre-filter for {label}: {stats}")
+        return kept
+
+    def _select_revision_paragraphs(
+        self, paragraphs: List[Dict[str, Any]], revision: RevisionContext | None, label: str
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+        """Paragraphs to send to the LLM and baseline issues to reuse (see `review_revision`)."""
+        if revision is None:
+            return paragraphs, []
+        if not revision.has_baseline:
+            revision.paragraph_hashes = list(dict.fromkeys(paragraph_hash(p.get("content") or "") for p in paragraphs))
+            return paragraphs, []
+        to_review, reused = select_revised_paragraphs(paragraphs, revision)
+        logging.info(f"Revision diff for {label} against run {revision.base_run_id}: {revision.stats}")
+        return to_review, reused
+
+    def _split_local_rules(
+        self, custom_rules: List[ReviewRule] | None
+    ) -> Tuple[LocalRuleEngine | None, List[ReviewRule] | None]:
+        """Engine for the rules with a local check, and the rules left for the LLM prompts."""
+        if not settings.review_local_rules_enabled or not custom_rules:
+            return None, custom_rules
+        local, llm = split_local_rules(custom_rules)
+        if not local:
+            return None, custom_rules
+        logging.info(f"Local rules (checked without the LLM): {[r.name for r in local]}")
+        return LocalRuleEngine(local), llm or None
+
+    def _local_rule_hits(
+        self, engine: LocalRuleEngine | None, paragraphs: List[Dict[str, Any]]
+    ) -> List[Tuple[LocalRuleHit, Dict[str, Any]]]:
+        if engine is None:
+            return []
+        targets = [p for p in paragraphs if not p.get("context_only")]
+        hits = engine.check([str(p.get("content") or "") for p in targets])
+        logging.info(f"Local rule hits: {len(hits)} in {len(targets)} paragraphs")
+        return [(hit, targets[hit.index]) for hit in hits]
+
+    def _rule_router(self, custom_rules: List[ReviewRule] | None) -> RuleRouter | None:
+        if not settings.review_rule_routing_enabled or not custom_rules:
+            return None
+        router = RuleRouter(custom_rules, top_k=settings.review_rule_routing_top_k)
+        return router if router.active else None
+
+    def _route_chunk_rules(
+        self,
+        router: RuleRouter | None,
+        chunk: List[Dict[str, Any]],
+        chunk_index: int,
+        custom_rules: List[ReviewRule] | None,
+    ) -> List[ReviewRule] | None:
+        """Custom rules to put in one chunk's prompt; all of them unless routing is on."""
+        if router is None:
+            return custom_rules
+        selected, matched = router.select(str(p.get("content") or "") for p in chunk)
+        logging.info(f"Rule routing chunk {chunk_index}: {len(selected)}/{len(custom_rules or [])} rules, matched {matched}")
+        return selected
+
+    def _chunk_paragraphs(
+        self, paragraphs: List[Dict[str, Any]], size: int, custom_rules: List[ReviewRule] | None = None
+    ) -> List[List[Dict[str, Any]]]:
         if size == -1:
             return [paragraphs]
+        if uses_token_budget(settings.review_chunk_strategy, size):
+            return chunk_by_token_budget(
+                paragraphs,
+                budget_tokens=settings.review_chunk_token_budget,
+                overhead_tokens=_prompt_overhead_tokens(custom_rules),
+                max_paragraphs=size,
+            )
         return [paragraphs[i : i + size] for i in range(0, len(paragraphs), size)]
 
     def _ir_to_paragraphs(self, ir: DocumentIR) -> List[Dict[str, Any]]:
@@ -393,6 +938,14 @@ class LangChainPipeline:
 
     def _locate_ir_anchor_location(
         self, *, para: Dict[str, Any], needle: Optional[str]
+    ) -> tuple[str | None, list[str] | None, int, int]:
+        node_id, path, start, end = self._locate_in_content(para=para, needle=needle)
+        # Parts of a split paragraph carry their offset into the original node text.
+        offset = int(para.get("content_offset") or 0)
+        return node_id, path, start + offset, end + offset
+
+    def _locate_in_content(
+        self, *, para: Dict[str, Any], needle: Optional[str]
     ) -> tuple[str | None, list[str] | None, int, int]:
         node_id = para.get("node_id")
         path = para.get("path")
@@ -466,48 +1019,41 @@ class LangChainPipeline:
         page_bbox_space: Dict[int, Dict[str, Any]],
         layout: Dict[str, Any] | None,
         custom_rules: List[ReviewRule] | None = None,
+        *,
+        pdf_session: PdfDocumentSession | None = None,
+        layout_index: "_LayoutIndex | None" = None,
+        rules_only: bool = False,
     ) -> List[Issue]:
         prepared = "\n".join([f"[{i}]{p['content']}" for i, p in enumerate(chunk)])
 
-        # Build dynamic prompts with custom rules
-        system_prompt = _build_system_prompt(custom_rules)
-        guidance = _build_guidance(custom_rules)
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(
-                content=(
-                    f"Chunk {chunk_index}. Paragraphs with indices:\n{prepared}\n\n"
-                    f"{guidance}\n"
-                    "Return issues; if none, return an empty list.\n\n"
-                    f"{self.parser.get_format_instructions()}"
-                )
-            ),
-        ]
+        # Prompts for this chunk's rules (memoized per rule set)
+        prompt = _review_prompt(custom_rules, builtin_types=not rules_only)
 
         try:
-            resp = await self.llm.ainvoke(messages)
-            content = resp.content if hasattr(resp, "content") else resp
-            if isinstance(content, list):
-                content = "".join(
-                    [c.get("text", "") if isinstance(c, dict) else str(c) for c in content]
-                )
-            raw_issues = _parse_review_output_best_effort(self.parser, str(content))
+            raw_issues = await self._review_chunk_with_llm(
+                chunk_index=chunk_index,
+                prepared=prepared,
+                system_prompt=prompt.system_prompt,
+                guidance=prompt.guidance,
+            )
+        except LLMGatewayError:
+            raise
         except Exception as e:
             logging.error(f"LLM output parse failed: {e}")
             return []
+        if rules_only:
+            raw_issues = _only_rule_issues(raw_issues, custom_rules)
 
-        issues: List[Issue] = []
+        picked: List[tuple[Any, str, int, Dict[str, Any], Optional[str]]] = []
         seen: set[tuple[int, str, str]] = set()
         for raw in raw_issues or []:
             # Use the type directly - it can be a built-in type or custom rule name
             issue_type = raw.type if isinstance(raw, ReviewIssue) else IssueType.GrammarSpelling.value
 
-            # Determine risk level based on issue type
-            risk_level = self._get_risk_level_for_type(issue_type, custom_rules)
-
             para_index = raw.para_index if isinstance(raw, ReviewIssue) else 0
             para = chunk[para_index] if 0 <= para_index < len(chunk) else chunk[0]
+            if para.get("context_only"):
+                continue
 
             needle_text = raw.text if isinstance(raw, ReviewIssue) else None
             key = (
@@ -518,17 +1064,32 @@ class LangChainPipeline:
             if key in seen:
                 continue
             seen.add(key)
+            picked.append((raw, issue_type, para_index, para, needle_text))
 
-            page_num, bbox, anchors = await _locate_issue_location(
-                pdf_path=pdf_path,
-                para=para,
-                para_index=para_index,
+        if not picked:
+            return []
+
+        # Anchor the whole chunk in one batch so PDF/layout lookups run as single worker-pool jobs.
+        session = pdf_session or PdfDocumentSession(pdf_path)
+        try:
+            resolved = await _locate_issue_locations(
+                [{"para": para, "para_index": para_index, "needle": needle} for _, _, para_index, para, needle in picked],
+                pdf_session=session,
                 cache_key=cache_key,
                 page_sizes=page_sizes,
                 page_bbox_space=page_bbox_space,
                 layout=layout,
-                needle=needle_text,
+                layout_index=layout_index,
             )
+        finally:
+            if pdf_session is None:
+                await _run_anchor_job(session.close)
+
+        issues: List[Issue] = []
+        for (raw, issue_type, para_index, para, needle_text), (page_num, bbox, anchors) in zip(picked, resolved):
+            # Determine risk level based on issue type
+            risk_level = self._get_risk_level_for_type(issue_type, custom_rules)
+
             location = Location(
                 source_sentence=para["content"],
                 page_num=page_num,
@@ -567,57 +1128,95 @@ class LangChainPipeline:
         return issues
 
 
-async def _locate_issue_location(
-    *,
-    pdf_path: str,
-    para: Dict[str, Any],
-    para_index: int,
-    cache_key: str,
-    page_sizes: Dict[int, tuple[float, float]],
-    page_bbox_space: Dict[int, Dict[str, Any]],
-    layout: Dict[str, Any] | None,
-    needle: Optional[str],
-) -> Tuple[int, List[float], Optional[List[LocationAnchor]]]:
-    para_page = int(para.get("page_num", 1) or 1)
-    bt = str(para.get("block_type") or "").lower()
-    is_table = bt in ("table", "table_body")
-    page_count = max(page_sizes.keys()) if page_sizes else para_page
-    search_radius = 24 if is_table else 0
-    anchor_text = (needle or "").strip() or None
-    fallback_sentence = str(para.get("content") or "").strip() or None
+class _IssueLocator:
+    """
+    Anchor resolution state for a single issue.
 
-    anchors: list[tuple[float, LocationAnchor]] = []
-    attempts: list[dict[str, Any]] = []
+    Resolution runs in stages: PDF text layer, PaddleOCR (tables only), MinerU layout, and finally
+    the paragraph bbox. The PDF and layout stages are synchronous, CPU-bound lookups and are meant
+    to be executed off the event loop (see `_locate_issue_locations`); the PaddleOCR stage is async.
+    """
 
+    def __init__(
+        self,
+        *,
+        pdf_session: PdfDocumentSession,
+        para: Dict[str, Any],
+        para_index: int,
+        cache_key: str,
+        page_sizes: Dict[int, tuple[float, float]],
+        page_bbox_space: Dict[int, Dict[str, Any]],
+        layout: Dict[str, Any] | None,
+        layout_index: "_LayoutIndex | None",
+        needle: Optional[str],
+    ) -> None:
+        self.pdf_session = pdf_session
+        self.para = para
+        self.para_index = para_index
+        self.cache_key = cache_key
+        self.page_sizes = page_sizes
+        self.page_bbox_space = page_bbox_space
+        self.layout = layout
+        self.layout_index = layout_index
+        self.para_page = int(para.get("page_num", 1) or 1)
+        bt = str(para.get("block_type") or "").lower()
+        self.is_table = bt in ("table", "table_body")
+        page_count = max(page_sizes.keys()) if page_sizes else self.para_page
+        self.window = _page_window(self.para_page, page_count, 24 if self.is_table else 0)
+        self.anchor_text = (needle or "").strip() or None
+        self.fallback_sentence = str(para.get("content") or "").strip() or None
+        self.anchors: list[tuple[float, LocationAnchor]] = []
+        self.attempts: list[dict[str, Any]] = []
+
+    @staticmethod
     def _sig(s: str | None) -> dict[str, Any]:
         if not s:
             return {"len": 0, "sha256": "", "head": ""}
         t = str(s)
         return {"len": len(t), "sha256": hashlib.sha256(t.encode("utf-8")).hexdigest()[:12], "head": t[:24]}
 
-    def add_pdf_anchors(page_num: int, score: float) -> bool:
-        if not anchor_text and not fallback_sentence:
+    def _score(self, base: float, page_num: int) -> float:
+        return base - 0.001 * abs(page_num - self.para_page)
+
+    def pdf_pass(self) -> None:
+        for pn in self.window:
+            if self._add_pdf_anchors(pn, score=self._score(1.0, pn)):
+                break
+
+    def layout_pass(self) -> None:
+        for pn in self.window:
+            if self._add_layout_anchor(pn, score=self._score(0.8, pn)):
+                break
+
+    async def paddleocr_pass(self) -> None:
+        for pn in self.window:
+            if await self._add_paddleocr_anchor(pn, score=self._score(0.9, pn)):
+                break
+
+    def _add_pdf_anchors(self, page_num: int, score: float) -> bool:
+        anchor_text = self.anchor_text
+        if not anchor_text and not self.fallback_sentence:
             return False
         text_len = None
         if settings.debug:
             try:
-                text_len = _pdf_text_len(pdf_path, page_num)
+                text_len = _pdf_text_len(self.pdf_session, page_num)
             except Exception:
                 text_len = None
-        rects = _find_pdf_rects(pdf_path, page_num, needle=anchor_text, fallback_sentence=fallback_sentence)
+        rects = _find_pdf_rects(self.pdf_session, page_num, needle=anchor_text, fallback_sentence=self.fallback_sentence)
         if settings.debug:
-            attempts.append(
+            self.attempts.append(
                 {
                     "page_num": page_num,
                     "kind": "pdf",
                     "rects": len(rects or []),
                     "text_len": text_len,
-                    "needle": _sig(anchor_text),
+                    "needle": self._sig(anchor_text),
                 }
             )
         if not rects:
             return False
-        page_h = float(page_sizes.get(page_num, (0.0, 0.0))[1] or 0.0)
+        page_h = float(self.page_sizes.get(page_num, (0.0, 0.0))[1] or 0.0)
         if page_h <= 0:
             return False
         rect_quads: list[list[float]] = []
@@ -637,53 +1236,56 @@ async def _locate_issue_location(
         if not rect_quads:
             return False
         if len(rect_quads) == 1:
-            anchors.append((score, LocationAnchor(page_num=page_num, bounding_box=rect_quads[0], source_text=anchor_text)))
+            self.anchors.append((score, LocationAnchor(page_num=page_num, bounding_box=rect_quads[0], source_text=anchor_text)))
             return True
         combined: list[float] = []
         for q in rect_quads:
             combined.extend(q)
-        anchors.append((score + 0.01, LocationAnchor(page_num=page_num, bounding_box=combined, source_text=anchor_text)))
+        self.anchors.append((score + 0.01, LocationAnchor(page_num=page_num, bounding_box=combined, source_text=anchor_text)))
         for q in rect_quads:
-            anchors.append((score, LocationAnchor(page_num=page_num, bounding_box=q, source_text=anchor_text)))
+            self.anchors.append((score, LocationAnchor(page_num=page_num, bounding_box=q, source_text=anchor_text)))
         return True
 
-    def add_layout_anchor(page_num: int, score: float) -> bool:
+    def _add_layout_anchor(self, page_num: int, score: float) -> bool:
         bbox = _find_layout_quadpoints(
-            layout,
+            self.layout,
             page_num,
-            page_size_points=page_sizes.get(page_num),
-            needle=anchor_text,
-            fallback_sentence=fallback_sentence,
+            page_size_points=self.page_sizes.get(page_num),
+            needle=self.anchor_text,
+            fallback_sentence=self.fallback_sentence,
+            index=self.layout_index,
         )
         if settings.debug:
-            attempts.append(
+            self.attempts.append(
                 {
                     "page_num": page_num,
                     "kind": "layout",
                     "hit": bool(bbox),
-                    "needle": _sig(anchor_text),
+                    "needle": self._sig(self.anchor_text),
                 }
             )
         if not bbox:
             return False
-        anchors.append((score, LocationAnchor(page_num=page_num, bounding_box=bbox, source_text=anchor_text)))
+        self.anchors.append((score, LocationAnchor(page_num=page_num, bounding_box=bbox, source_text=self.anchor_text)))
         return True
 
-    async def add_paddleocr_anchor(page_num: int, score: float) -> bool:
-        if not is_table:
+    async def _add_paddleocr_anchor(self, page_num: int, score: float) -> bool:
+        if not self.is_table:
             return False
         if not settings.paddleocr_enabled or not settings.paddleocr_job_url or not settings.paddleocr_token:
             return False
-        queries = [q for q in [anchor_text, fallback_sentence] if q and str(q).strip()]
+        anchor_text = self.anchor_text
+        attempts = self.attempts
+        queries = [q for q in [anchor_text, self.fallback_sentence] if q and str(q).strip()]
         if not queries:
             return False
-        picked = _pick_layout_table_image(layout, page_num, queries)
+        picked = _pick_layout_table_image(self.layout, page_num, queries)
         if not picked:
             if settings.debug:
                 attempts.append({"page_num": page_num, "kind": "paddleocr", "hit": False, "reason": "no_table_image"})
             return False
         image_path, table_bbox, observed_max = picked
-        img_bytes = _read_mineru_cached_image_bytes(cache_key, image_path)
+        img_bytes = _read_mineru_cached_image_bytes(self.cache_key, image_path)
         if not img_bytes:
             if settings.debug:
                 attempts.append({"page_num": page_num, "kind": "paddleocr", "hit": False, "reason": "zip_missing"})
@@ -704,7 +1306,7 @@ async def _locate_issue_location(
             )
             raw = await client.parse_image(img_bytes)
             pruned = _extract_first_pruned_result(raw)
-            page_size_points = page_sizes.get(page_num)
+            page_size_points = self.page_sizes.get(page_num)
             if not page_size_points or page_size_points[0] <= 0 or page_size_points[1] <= 0:
                 return False
             page_w, page_h = float(page_size_points[0]), float(page_size_points[1])
@@ -744,13 +1346,13 @@ async def _locate_issue_location(
                 )
             if not quad:
                 return False
-            anchors.append((score + 0.05 * float(best_score), LocationAnchor(page_num=page_num, bounding_box=quad, source_text=anchor_text)))
+            self.anchors.append((score + 0.05 * float(best_score), LocationAnchor(page_num=page_num, bounding_box=quad, source_text=anchor_text)))
             logging.info(
                 json.dumps(
                     {
                         "event": "paddleocr_anchor",
                         "page_num": page_num,
-                        "para_index": para_index,
+                        "para_index": self.para_index,
                         "score": round(float(best_score), 3),
                         "image": str(Path(image_path).name),
                     },
@@ -773,70 +1375,177 @@ async def _locate_issue_location(
                 attempts.append({"page_num": page_num, "kind": "paddleocr", "hit": False, "error": str(e)[:120]})
             return False
 
-    for pn in _page_window(para_page, page_count, search_radius):
-        if add_pdf_anchors(pn, score=1.0 - 0.001 * abs(pn - para_page)):
-            break
-
-    if not anchors:
-        for pn in _page_window(para_page, page_count, search_radius):
-            if await add_paddleocr_anchor(pn, score=0.9 - 0.001 * abs(pn - para_page)):
-                break
-
-    if not anchors:
-        for pn in _page_window(para_page, page_count, search_radius):
-            if add_layout_anchor(pn, score=0.8 - 0.001 * abs(pn - para_page)):
-                break
-
-    if anchors:
-        anchors.sort(key=lambda x: x[0], reverse=True)
-        best = anchors[0][1]
+    def result(self) -> Tuple[int, List[float], Optional[List[LocationAnchor]]]:
+        para = self.para
+        para_page = self.para_page
+        if self.anchors:
+            anchors = sorted(self.anchors, key=lambda x: x[0], reverse=True)
+            best = anchors[0][1]
+            if settings.debug:
+                logging.debug(
+                    json.dumps(
+                        {
+                            "event": "locate_issue_location",
+                            "para_index": self.para_index,
+                            "para_page": para_page,
+                            "is_table": self.is_table,
+                            "resolved_page": best.page_num,
+                            "anchors": len(anchors),
+                            "attempts": self.attempts[:16],
+                        },
+                        ensure_ascii=False,
+                    )
+                )
+            return best.page_num, best.bounding_box, [a for _, a in anchors]
+
+        space = self.page_bbox_space.get(para_page) or {}
+        observed_max = space.get("observed_max")
+        coverage = 1.0 if space.get("is_canvas") else settings.mineru_bbox_content_coverage
+        bbox = bbox_to_quadpoints(
+            para.get("bbox"),
+            self.page_sizes.get(para_page),
+            origin=settings.mineru_bbox_origin,
+            units=settings.mineru_bbox_units,
+            observed_max=observed_max,
+            content_coverage=coverage,
+        )
+        if not bbox:
+            bbox = [0, 0, 0, 0, 0, 0, 0, 0]
         if settings.debug:
             logging.debug(
                 json.dumps(
                     {
                         "event": "locate_issue_location",
-                        "para_index": para_index,
+                        "para_index": self.para_index,
                         "para_page": para_page,
-                        "is_table": is_table,
-                        "resolved_page": best.page_num,
-                        "anchors": len(anchors),
-                        "attempts": attempts[:16],
+                        "is_table": self.is_table,
+                        "resolved_page": para_page,
+                        "anchors": 0,
+                        "fallback": "para_bbox",
+                        "attempts": self.attempts[:16],
                     },
                     ensure_ascii=False,
                 )
             )
-        return best.page_num, best.bounding_box, [a for _, a in anchors]
-
-    space = page_bbox_space.get(para_page) or {}
-    observed_max = space.get("observed_max")
-    coverage = 1.0 if space.get("is_canvas") else settings.mineru_bbox_content_coverage
-    bbox = bbox_to_quadpoints(
-        para.get("bbox"),
-        page_sizes.get(para_page),
-        origin=settings.mineru_bbox_origin,
-        units=settings.mineru_bbox_units,
-        observed_max=observed_max,
-        content_coverage=coverage,
-    )
-    if not bbox:
-        bbox = [0, 0, 0, 0, 0, 0, 0, 0]
-    if settings.debug:
-        logging.debug(
-            json.dumps(
-                {
-                    "event": "locate_issue_location",
-                    "para_index": para_index,
-                    "para_page": para_page,
-                    "is_table": is_table,
-                    "resolved_page": para_page,
-                    "anchors": 0,
-                    "fallback": "para_bbox",
-                    "attempts": attempts[:16],
-                },
-                ensure_ascii=False,
-            )
+        return para_page, bbox, None
+
+
+_anchor_executor_instance: ThreadPoolExecutor | None = None
+_anchor_executor_lock = threading.Lock()
+
+
+def _anchor_executor() -> ThreadPoolExecutor | None:
+    """Shared worker pool for CPU-bound anchoring; None when `anchor_worker_threads` <= 0 (run inline)."""
+    global _anchor_executor_instance
+    workers = int(settings.anchor_worker_threads or 0)
+    if workers <= 0:
+        return None
+    if _anchor_executor_instance is None:
+        with _anchor_executor_lock:
+            if _anchor_executor_instance is None:
+                _anchor_executor_instance = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="anchor")
+    return _anchor_executor_instance
+
+
+async def _run_anchor_job(fn: Callable[[], Any]) -> Any:
+    executor = _anchor_executor()
+    if executor is None:
+        return fn()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, fn)
+
+
+async def _locate_issue_locations(
+    requests: List[Dict[str, Any]],
+    *,
+    pdf_session: PdfDocumentSession,
+    cache_key: str,
+    page_sizes: Dict[int, tuple[float, float]],
+    page_bbox_space: Dict[int, Dict[str, Any]],
+    layout: Dict[str, Any] | None,
+    layout_index: "_LayoutIndex | None" = None,
+) -> List[Tuple[int, List[float], Optional[List[LocationAnchor]]]]:
+    """
+    Resolve locations for a batch of issues (typically one chunk).
+    Each request is a dict with `para`, `para_index` and `needle`. The PDF and layout stages for the
+    whole batch each run as a single job on the anchor worker pool, holding the session lock.
+    `layout_index` should be built once per review; without it the layout is indexed for this batch.
+    """
+    locators = [
+        _IssueLocator(
+            pdf_session=pdf_session,
+            para=r["para"],
+            para_index=r["para_index"],
+            cache_key=cache_key,
+            page_sizes=page_sizes,
+            page_bbox_space=page_bbox_space,
+            layout=layout,
+            layout_index=layout_index,
+            needle=r.get("needle"),
         )
-    return para_page, bbox, None
+        for r in requests
+    ]
+    if not locators:
+        return []
+
+    def pdf_stage() -> None:
+        with pdf_session.lock:
+            for loc in locators:
+                loc.pdf_pass()
+
+    await _run_anchor_job(pdf_stage)
+
+    for loc in locators:
+        if not loc.anchors:
+            await loc.paddleocr_pass()
+
+    pending = [loc for loc in locators if not loc.anchors]
+    if pending:
+
+        def layout_stage() -> None:
+            if layout_index is None and layout:
+                index = _LayoutIndex(layout)
+                for loc in pending:
+                    loc.layout_index = index
+            for loc in pending:
+                loc.layout_pass()
+
+        await _run_anchor_job(layout_stage)
+
+    return [loc.result() for loc in locators]
+
+
+async def _locate_issue_location(
+    *,
+    pdf_path: str,
+    para: Dict[str, Any],
+    para_index: int,
+    cache_key: str,
+    page_sizes: Dict[int, tuple[float, float]],
+    page_bbox_space: Dict[int, Dict[str, Any]],
+    layout: Dict[str, Any] | None,
+    needle: Optional[str],
+    pdf_session: PdfDocumentSession | None = None,
+) -> Tuple[int, List[float], Optional[List[LocationAnchor]]]:
+    """
+    Resolve page and highlight quadpoints for one issue.
+    PDF text lookups go through `pdf_session`; without one, a temporary session is opened
+    for this call only.
+    """
+    session = pdf_session or PdfDocumentSession(pdf_path)
+    try:
+        results = await _locate_issue_locations(
+            [{"para": para, "para_index": para_index, "needle": needle}],
+            pdf_session=session,
+            cache_key=cache_key,
+            page_sizes=page_sizes,
+            page_bbox_space=page_bbox_space,
+            layout=layout,
+        )
+        return results[0]
+    finally:
+        if pdf_session is None:
+            await _run_anchor_job(session.close)
 
 
 def _page_window(center: int, page_count: int, radius: int) -> List[int]:
@@ -1159,18 +1868,16 @@ def _map_bbox_from_crop_to_page(bbox_img: list[float], image_size: tuple[int, in
 
 
 def _find_pdf_rects(
-    pdf_path: str,
+    pdf: PdfDocumentSession,
     page_num: int,
     *,
     needle: str | None,
     fallback_sentence: str | None,
 ) -> List[fitz.Rect]:
     try:
-        doc = fitz.open(pdf_path)
-        if page_num < 1 or page_num > doc.page_count:
-            doc.close()
+        page = pdf.page(page_num)
+        if page is None:
             return []
-        page = doc.load_page(page_num - 1)
 
         candidates: list[str] = []
         if needle:
@@ -1192,68 +1899,30 @@ def _find_pdf_rects(
             if len(short) > 12:
                 rects = page.search_for(short[:12])
         if not rects and needle:
-            rects = _find_pdf_rects_fuzzy(page, needle.strip())
+            rects = _find_pdf_rects_fuzzy(pdf, page_num, needle.strip())
 
-        doc.close()
         return rects or []
     except Exception:
         return []
 
 
-def _find_pdf_rects_fuzzy(page: fitz.Page, needle: str) -> List[fitz.Rect]:
+def _find_pdf_rects_fuzzy(pdf: PdfDocumentSession, page_num: int, needle: str) -> List[fitz.Rect]:
     if not needle:
         return []
     needle_norm = _normalize_for_match(needle).replace(" ", "")
+    needle_norm = "".join(ch for ch in needle_norm if not ch.isspace())
     if not needle_norm:
         return []
     try:
-        raw = page.get_text("rawdict")
+        index = pdf.char_index(page_num)
     except Exception:
         return []
-    if not isinstance(raw, dict):
-        return []
-
-    chars: list[tuple[str, tuple[float, float, float, float]]] = []
-    for b in raw.get("blocks") or []:
-        if not isinstance(b, dict):
-            continue
-        for ln in b.get("lines") or []:
-            if not isinstance(ln, dict):
-                continue
-            for sp in ln.get("spans") or []:
-                if not isinstance(sp, dict):
-                    continue
-                for ch in sp.get("chars") or []:
-                    if not isinstance(ch, dict):
-                        continue
-                    c = str(ch.get("c", ""))
-                    bbox = ch.get("bbox")
-                    if not c or not isinstance(bbox, list) or len(bbox) != 4:
-                        continue
-                    c2 = _normalize_for_match(c).replace(" ", "")
-                    if not c2:
-                        continue
-                    x0, y0, x1, y1 = [float(v) for v in bbox]
-                    chars.append((c2, (x0, y0, x1, y1)))
-
-    if not chars:
-        return []
-
-    text = "".join([c for c, _ in chars])
-    if not text:
+    if not index:
         return []
 
     rects: list[fitz.Rect] = []
-    start = 0
-    while True:
-        idx = text.find(needle_norm, start)
-        if idx < 0:
-            break
-        end = idx + len(needle_norm)
-        boxes = [bb for _, bb in chars[idx:end] if bb]
-        if boxes:
-            rects.extend(_cluster_bboxes_to_rects(boxes))
-        start = idx + 1
+    for boxes in index.find(needle_norm, limit=6):
+        rects.extend(_cluster_bboxes_to_rects(boxes))
         if len(rects) >= 6:
             break
     return rects[:6]
@@ -1287,32 +1956,13 @@ def _cluster_bboxes_to_rects(boxes: List[tuple[float, float, float, float]]) ->
     return out
 
 
-def _pdf_text_len(pdf_path: str, page_num: int) -> int:
-    doc = fitz.open(pdf_path)
-    if page_num < 1 or page_num > doc.page_count:
-        doc.close()
-        return 0
-    page = doc.load_page(page_num - 1)
-    try:
-        txt = page.get_text("text") or ""
-        return len(str(txt).strip())
-    finally:
-        doc.close()
+def _pdf_text_len(pdf: PdfDocumentSession, page_num: int) -> int:
+    return pdf.text_len(page_num)
 
 
-def _get_pdf_page_sizes(pdf_path: str) -> Dict[int, tuple[float, float]]:
+def _get_pdf_page_sizes(pdf: PdfDocumentSession) -> Dict[int, tuple[float, float]]:
     """Returns PDF page (width,height) in points, keyed by 1-based page number."""
-    sizes: Dict[int, tuple[float, float]] = {}
-    try:
-        doc = fitz.open(pdf_path)
-        for i in range(doc.page_count):
-            page = doc.load_page(i)
-            rect = page.rect
-            sizes[i + 1] = (float(rect.width), float(rect.height))
-        doc.close()
-    except Exception as e:
-        logging.warning(f"Unable to read PDF page sizes for bbox conversion: {e}")
-    return sizes
+    return pdf.page_sizes()
 
 
 def _get_page_bbox_space(paragraphs: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
@@ -1428,11 +2078,17 @@ def _find_pdf_quadpoints(
         return None
 
 
-def _init_deepseek_model():
+def _init_deepseek_model(*, gateway_managed: bool = False):
     """
     Initialize DeepSeek chat model using LangChain v1 init_chat_model provider API.
     Falls back to OpenAI-compatible ChatOpenAI with custom base_url if provider package isn't available.
+
+    `gateway_managed` models leave retries to LLMGateway (client-side retries would multiply its
+    attempts) and time out after `llm_request_timeout_sec`.
     """
+    client_kwargs: Dict[str, Any] = (
+        {"max_retries": 0, "timeout": settings.llm_request_timeout_sec} if gateway_managed else {}
+    )
     try:
         from langchain.chat_models import init_chat_model
 
@@ -1442,7 +2098,7 @@ def _init_deepseek_model():
 
             os.environ.setdefault("DEEPSEEK_API_KEY", settings.deepseek_api_key)
         model_name = settings.deepseek_model or "deepseek-chat"
-        return init_chat_model(model_name, model_provider="deepseek", temperature=0.2)
+        return init_chat_model(model_name, model_provider="deepseek", temperature=0.2, **client_kwargs)
     except Exception as e:
         logging.warning(f"init_chat_model(deepseek) unavailable, falling back to ChatOpenAI: {e}")
         return ChatOpenAI(
@@ -1450,9 +2106,24 @@ def _init_deepseek_model():
             base_url=settings.deepseek_base_url,
             model=settings.deepseek_model,
             temperature=0.2,
+            **client_kwargs,
         )
 
 
+def _init_fallback_model():
+    """Second OpenAI-compatible chat model for hedged/fallback requests, if one is configured."""
+    if not (settings.llm_fallback_base_url and settings.llm_fallback_model):
+        return None
+    return ChatOpenAI(
+        api_key=settings.llm_fallback_api_key or "unused",
+        base_url=settings.llm_fallback_base_url,
+        model=settings.llm_fallback_model,
+        temperature=0.2,
+        max_retries=0,
+        timeout=settings.llm_request_timeout_sec,
+    )
+
+
 def _load_mineru_layout(meta: Dict[str, Any] | None, cache_key: str) -> Dict[str, Any] | None:
     """
     Load MinerU layout.json (line/span-level bboxes) for better highlights on PDFs without text layer.
@@ -1468,7 +2139,7 @@ def _load_mineru_layout(meta: Dict[str, Any] | None, cache_key: str) -> Dict[str
             layout_path = Path(settings.mineru_cache_dir) / f"{cache_key}.layout.json"
         if not layout_path.exists():
             return None
-        return json.loads(layout_path.read_text(encoding="utf-8"))
+        return json_codec.loads(layout_path.read_bytes())
     except Exception as e:
         logging.warning(f"Failed to load MinerU layout: {e}")
         return None
@@ -1534,40 +2205,145 @@ def _substring_bbox_from_line(line_text: str, line_bbox: list[float], start: int
     return [round(sx0, 2), round(y0, 2), round(sx1, 2), round(y1, 2)]
 
 
-def _find_span_match(
-    spans: list[dict],
-    needle: str,
-    line_bbox: list[float],
-) -> tuple[list[float] | None, float]:
+def _whitespace_free(text: str) -> str:
+    return "".join(text.split())
+
+
+class _LayoutLine:
+    """One MinerU layout line with span text pre-normalized for matching."""
+
+    __slots__ = ("bbox", "direct", "text", "norm", "spans", "full_norm", "span_ranges", "has_html")
+
+    def __init__(self, spans: list[Any], bbox: Any, *, direct: bool) -> None:
+        self.bbox = bbox
+        self.direct = direct
+        self.text = "".join([str(s.get("content", "")) for s in spans if isinstance(s, dict)])
+        self.norm = _normalize_for_match(self.text)
+        # (content_norm, bbox, html) for spans with a usable bbox, in reading order.
+        self.spans: list[tuple[str, list[float], str | None]] = []
+        self.has_html = False
+        full_text = ""
+        span_ranges: list[tuple[int, int, list[float]]] = []
+        for span in spans:
+            if not isinstance(span, dict):
+                continue
+            span_bbox = span.get("bbox")
+            if not isinstance(span_bbox, list) or len(span_bbox) != 4:
+                continue
+            content_raw = span.get("content")
+            content = str(content_raw) if isinstance(content_raw, str) else ""
+            html_raw = span.get("html")
+            html_str = html_raw if not content and isinstance(html_raw, str) and html_raw.strip() else None
+            self.has_html = self.has_html or html_str is not None
+            self.spans.append((_normalize_for_match(content) if content else "", span_bbox, html_str))
+            content_all = str(span.get("content", ""))
+            if content_all:
+                start = len(full_text)
+                full_text += content_all
+                span_ranges.append((start, len(full_text), span_bbox))
+        self.full_norm = _normalize_for_match(full_text)
+        self.span_ranges = span_ranges
+
+
+class _LayoutPage:
+    """Lines of one layout page plus a whitespace-free concatenation used to pre-select candidate lines."""
+
+    __slots__ = ("observed_max", "lines", "key_text", "offsets", "html_lines")
+
+    def __init__(self, observed_max: tuple[float, float], lines: list[_LayoutLine]) -> None:
+        self.observed_max = observed_max
+        self.lines = lines
+        keys = [_whitespace_free(ln.text) for ln in lines]
+        self.offsets: list[int] = []
+        pos = 0
+        for k in keys:
+            self.offsets.append(pos)
+            pos += len(k) + 1
+        self.key_text = "\x00".join(keys)
+        self.html_lines = [i for i, ln in enumerate(lines) if ln.has_html]
+
+    def candidate_lines(self, queries: list[str]) -> list[int]:
+        """
+        Indexes of lines whose whitespace-free text contains any query (plus lines with HTML spans),
+        in reading order. Every exact, substring or no-space match implies this containment.
+        """
+        hits: set[int] = set(self.html_lines)
+        for q in queries:
+            key = _whitespace_free(q)
+            if not key:
+                return list(range(len(self.lines)))
+            start = 0
+            while True:
+                idx = self.key_text.find(key, start)
+                if idx < 0:
+                    break
+                line_no = bisect.bisect_right(self.offsets, idx) - 1
+                hits.add(line_no)
+                start = self.offsets[line_no + 1] if line_no + 1 < len(self.offsets) else len(self.key_text)
+        return sorted(hits)
+
+
+class _LayoutIndex:
     """
-    在 spans 中查找精确匹配，返回 (bbox, score)。
-    优先匹配单个 span，然后尝试跨 span 匹配。
+    MinerU `layout.json` indexed once per review: pages by 1-based number, each with a flattened
+    line table (normalized text, span bboxes and span offsets) so anchoring does not rescan `pdf_info`.
     """
-    if not spans or not needle:
-        return None, 0.0
 
-    needle_norm = _normalize_for_match(needle)
-    needle_ns = needle_norm.replace(" ", "")
+    def __init__(self, layout: Dict[str, Any] | None) -> None:
+        self.pages: Dict[int, _LayoutPage] = {}
+        pdf_info = layout.get("pdf_info") if isinstance(layout, dict) else None
+        if not isinstance(pdf_info, list):
+            return
+        for p in pdf_info:
+            if not isinstance(p, dict):
+                continue
+            page_num = int(p.get("page_idx", -1)) + 1
+            if page_num < 1 or page_num in self.pages:
+                continue
+            page_size_px = p.get("page_size")
+            if not isinstance(page_size_px, (list, tuple)) or len(page_size_px) != 2:
+                continue
+            blocks = p.get("para_blocks") or []
+            if not isinstance(blocks, list):
+                continue
+            lines: list[_LayoutLine] = []
+            for b in blocks:
+                if not isinstance(b, dict):
+                    continue
+                groups: list[tuple[Any, bool]] = [(b.get("lines") or [], True)]
+                children = b.get("blocks") or []
+                if isinstance(children, list):
+                    groups.extend([(ch.get("lines") or [], False) for ch in children if isinstance(ch, dict)])
+                for group, direct in groups:
+                    if not isinstance(group, list):
+                        continue
+                    for ln in group:
+                        if not isinstance(ln, dict):
+                            continue
+                        spans = ln.get("spans") or []
+                        if not isinstance(spans, list):
+                            continue
+                        lines.append(_LayoutLine(spans, ln.get("bbox") or b.get("bbox"), direct=direct))
+            self.pages[page_num] = _LayoutPage((float(page_size_px[0]), float(page_size_px[1])), lines)
+
+    def page(self, page_num: int) -> _LayoutPage | None:
+        return self.pages.get(page_num)
+
 
+def _match_layout_line(line: _LayoutLine, needle_norm: str, needle_ns: str) -> tuple[list[float] | None, float]:
+    """
+    Match a needle against one indexed line, returning (bbox, score).
+    Single spans are tried first, then the concatenation of all spans.
+    """
     # 1. 尝试在单个 span 中精确匹配
-    for span in spans:
-        if not isinstance(span, dict):
-            continue
-        content_raw = span.get("content")
-        content = str(content_raw) if isinstance(content_raw, str) else ""
-        span_bbox = span.get("bbox")
-        if not isinstance(span_bbox, list) or len(span_bbox) != 4:
-            continue
-        if not content:
-            html_raw = span.get("html")
-            if isinstance(html_raw, str) and html_raw.strip():
-                bbox = _table_html_guess_bbox(html_raw, span_bbox, needle_norm)
+    for content_norm, span_bbox, html_str in line.spans:
+        if not content_norm:
+            if html_str:
+                bbox = _table_html_guess_bbox(html_str, span_bbox, needle_norm)
                 if bbox:
                     return bbox, 0.7
             continue
 
-        content_norm = _normalize_for_match(content)
-
         # 完全匹配
         if content_norm == needle_norm:
             return span_bbox, 1.0
@@ -1579,34 +2355,15 @@ def _find_span_match(
             return sub_bbox or span_bbox, 0.95
 
         # 无空格匹配
-        content_ns = content_norm.replace(" ", "")
-        if needle_ns in content_ns:
+        if needle_ns in content_norm.replace(" ", ""):
             return span_bbox, 0.9
 
-    # 2. 尝试跨 span 匹配 - 拼接所有 span 内容
-    full_text = ""
-    span_ranges = []  # [(start, end, span_bbox), ...]
-    for span in spans:
-        if not isinstance(span, dict):
-            continue
-        content = str(span.get("content", ""))
-        span_bbox = span.get("bbox")
-        if content and isinstance(span_bbox, list) and len(span_bbox) == 4:
-            start = len(full_text)
-            full_text += content
-            span_ranges.append((start, len(full_text), span_bbox))
-
-    full_norm = _normalize_for_match(full_text)
-    idx = full_norm.find(needle_norm)
+    # 2. 尝试跨 span 匹配
+    idx = line.full_norm.find(needle_norm)
     if idx >= 0:
-        # 找到匹配，计算覆盖的 span 范围
         match_end = idx + len(needle_norm)
-        covered_bboxes = []
-        for start, end, bbox in span_ranges:
-            if start < match_end and end > idx:
-                covered_bboxes.append(bbox)
+        covered_bboxes = [bbox for start, end, bbox in line.span_ranges if start < match_end and end > idx]
         if covered_bboxes:
-            # 合并覆盖的 bbox
             min_x = min(b[0] for b in covered_bboxes)
             min_y = min(b[1] for b in covered_bboxes)
             max_x = max(b[2] for b in covered_bboxes)
@@ -1616,6 +2373,21 @@ def _find_span_match(
     return None, 0.0
 
 
+def _find_span_match(
+    spans: list[dict],
+    needle: str,
+    line_bbox: list[float],
+) -> tuple[list[float] | None, float]:
+    """
+    在 spans 中查找精确匹配，返回 (bbox, score)。
+    优先匹配单个 span，然后尝试跨 span 匹配。
+    """
+    if not spans or not needle:
+        return None, 0.0
+    needle_norm = _normalize_for_match(needle)
+    return _match_layout_line(_LayoutLine(spans, line_bbox, direct=True), needle_norm, needle_norm.replace(" ", ""))
+
+
 def _strip_html_text(s: str) -> str:
     t = html.unescape(s or "")
     t = re.sub(r"(?is)<\s*br\s*/?\s*>", "\n", t)
@@ -1762,28 +2534,21 @@ def _find_layout_quadpoints(
     page_size_points: tuple[float, float] | None,
     needle: str | None,
     fallback_sentence: str | None,
+    index: _LayoutIndex | None = None,
 ) -> List[float] | None:
     """
     使用 MinerU layout.json 的 span 级别 bbox 生成精确的 quadpoints。
     优先在 span 级别匹配，然后回退到行级别。
+    Pass a prebuilt `index` (see `_LayoutIndex`) to avoid re-indexing the layout on every call.
     """
-    if not layout or not isinstance(layout, dict) or not page_size_points:
-        return None
-    pdf_info = layout.get("pdf_info")
-    if not isinstance(pdf_info, list) or page_num < 1:
-        return None
-
-    page_obj = next((p for p in pdf_info if isinstance(p, dict) and int(p.get("page_idx", -1)) == page_num - 1), None)
-    if not page_obj:
-        return None
-
-    page_size_px = page_obj.get("page_size")
-    if not isinstance(page_size_px, (list, tuple)) or len(page_size_px) != 2:
+    if not page_size_points or page_num < 1:
         return None
-    observed_max = (float(page_size_px[0]), float(page_size_px[1]))
-
-    blocks = page_obj.get("para_blocks") or []
-    if not isinstance(blocks, list):
+    if index is None:
+        if not layout or not isinstance(layout, dict):
+            return None
+        index = _LayoutIndex(layout)
+    page = index.page(page_num)
+    if page is None:
         return None
 
     candidates = []
@@ -1797,42 +2562,20 @@ def _find_layout_quadpoints(
 
     best_bbox = None
     best_score = 0.0
-
-    def iter_lines(block: dict) -> list[dict[str, Any]]:
-        out: list[dict[str, Any]] = []
-        direct = block.get("lines") or []
-        if isinstance(direct, list):
-            out.extend([ln for ln in direct if isinstance(ln, dict)])
-        children = block.get("blocks") or []
-        if isinstance(children, list):
-            for ch in children:
-                if not isinstance(ch, dict):
-                    continue
-                cl = ch.get("lines") or []
-                if isinstance(cl, list):
-                    out.extend([ln for ln in cl if isinstance(ln, dict)])
-        return out
+    lines = page.lines
 
     # 1. 优先在 span 级别精确匹配
     for cand in candidates:
-        for b in blocks:
-            if not isinstance(b, dict):
+        cand_norm = _normalize_for_match(cand)
+        cand_ns = cand_norm.replace(" ", "")
+        for i in page.candidate_lines([cand]):
+            line = lines[i]
+            if not line.bbox:
                 continue
-            for ln in iter_lines(b):
-                if not isinstance(ln, dict):
-                    continue
-                spans = ln.get("spans") or []
-                line_bbox = ln.get("bbox") or b.get("bbox")
-                if not isinstance(spans, list) or not line_bbox:
-                    continue
-
-                bbox, score = _find_span_match(spans, cand, line_bbox)
-                if score > best_score:
-                    best_score = score
-                    best_bbox = bbox
-
-                if best_score >= 0.95:
-                    break
+            bbox, score = _match_layout_line(line, cand_norm, cand_ns)
+            if score > best_score:
+                best_score = score
+                best_bbox = bbox
             if best_score >= 0.95:
                 break
         if best_score >= 0.95:
@@ -1840,29 +2583,15 @@ def _find_layout_quadpoints(
 
     # 2. 如果 span 匹配不够好，回退到行级别匹配
     if best_score < 0.7:
-        lines: list[dict[str, Any]] = []
-        for b in blocks:
-            if not isinstance(b, dict):
-                continue
-            for ln in iter_lines(b):
-                if not isinstance(ln, dict):
-                    continue
-                spans = ln.get("spans") or []
-                if not isinstance(spans, list):
-                    continue
-                text = "".join([str(s.get("content", "")) for s in spans if isinstance(s, dict)])
-                bbox = ln.get("bbox") or b.get("bbox")
-                if not text or not isinstance(bbox, list) or len(bbox) != 4:
-                    continue
-                lines.append({"text": text, "bbox": bbox})
-
         for cand in candidates:
             cand_norm = _normalize_for_match(cand)
             cand_norm_ns = cand_norm.replace(" ", "")
-            for line in lines:
-                line_text = str(line["text"])
-                line_bbox = line["bbox"]
-                line_norm = _normalize_for_match(line_text)
+            for i in page.candidate_lines([cand]):
+                line = lines[i]
+                line_bbox = line.bbox
+                if not line.text or not isinstance(line_bbox, list) or len(line_bbox) != 4:
+                    continue
+                line_norm = line.norm
 
                 # 精确子串匹配
                 idx = line_norm.find(cand_norm)
@@ -1874,8 +2603,7 @@ def _find_layout_quadpoints(
                     break
 
                 # 无空格匹配
-                line_ns = line_norm.replace(" ", "")
-                if cand_norm_ns in line_ns:
+                if cand_norm_ns in line_norm.replace(" ", ""):
                     if 0.75 > best_score:
                         best_bbox = line_bbox
                         best_score = 0.75
@@ -1886,26 +2614,20 @@ def _find_layout_quadpoints(
 
     # 3. 模糊匹配回退
     if best_score < 0.55 and needle:
-        lines = []
-        for b in blocks:
-            if not isinstance(b, dict):
-                continue
-            for ln in b.get("lines") or []:
-                if not isinstance(ln, dict):
-                    continue
-                spans = ln.get("spans") or []
-                text = "".join([str(s.get("content", "")) for s in spans if isinstance(s, dict)])
-                bbox = ln.get("bbox") or b.get("bbox")
-                if text and isinstance(bbox, list) and len(bbox) == 4:
-                    lines.append({"text": text, "bbox": bbox})
-
         cand_norm = _normalize_for_match(str(needle))
         for line in lines:
-            line_norm = _normalize_for_match(str(line["text"]))
-            ratio = SequenceMatcher(a=cand_norm, b=line_norm).ratio() if cand_norm and line_norm else 0.0
+            if not line.direct or not line.text or not isinstance(line.bbox, list) or len(line.bbox) != 4:
+                continue
+            if not cand_norm or not line.norm:
+                continue
+            sm = SequenceMatcher(a=cand_norm, b=line.norm)
+            # real_quick_ratio/quick_ratio are cheap upper bounds on ratio().
+            if sm.real_quick_ratio() <= best_score or sm.quick_ratio() <= best_score:
+                continue
+            ratio = sm.ratio()
             if ratio > best_score:
                 best_score = ratio
-                best_bbox = line["bbox"]
+                best_bbox = line.bbox
 
         if best_score < 0.55:
             best_bbox = None
@@ -1921,6 +2643,6 @@ def _find_layout_quadpoints(
         page_size_points,
         origin="top-left",
         units="px",
-        observed_max=observed_max,
+        observed_max=page.observed_max,
         content_coverage=1.0,
     )
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiosqlite
+
+from common.logger import get_logger
+from config.config import settings
+from database.sqlite_pool import SQLiteConnectionPool
+
+logging = get_logger(__name__)
+
+
+CREATE_LLM_CACHE_TABLE = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at_utc TEXT NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def compute_llm_cache_key(*, prepared: str, system_prompt: str, guidance: str, model: str) -> str:
+    payload = json.dumps(
+        {"prepared": prepared, "system_prompt": system_prompt, "guidance": guidance, "model": model},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of raw LLM responses for review chunks.
+
+    Entries are keyed by `compute_llm_cache_key` and stored in a dedicated SQLite file, accessed
+    through a `SQLiteConnectionPool`. Hits only read; their access times and hit counts are
+    collected in memory and written in one batch at most every `access_flush_sec` (and before
+    eviction or on `aclose`). When the total stored size exceeds `max_bytes`, least recently used
+    entries are evicted. Cache failures never fail a review; they are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        *,
+        max_bytes: int | None = None,
+        access_flush_sec: float | None = None,
+    ) -> None:
+        self.db_path = db_path or settings.llm_cache_path
+        self.max_bytes = int(max_bytes if max_bytes is not None else settings.llm_cache_max_bytes)
+        self.access_flush_sec = float(
+            access_flush_sec if access_flush_sec is not None else settings.llm_cache_access_flush_sec
+        )
+        self.pool = SQLiteConnectionPool(self.db_path, readers=2, busy_timeout_ms=settings.sqlite_busy_timeout_ms)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        # key -> [last_access, hits not yet written]
+        self._pending_access: Dict[str, List[float]] = {}
+        self._last_flush = time.monotonic()
+
+    async def _ensure_init(self) -> None:
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            async with self.pool.write() as db:
+                await db.execute(CREATE_LLM_CACHE_TABLE)
+                await db.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache(last_access)")
+            self._initialized = True
+
+    async def aclose(self) -> None:
+        try:
+            if self._pending_access:
+                async with self.pool.write() as db:
+                    await self._write_access(db)
+        except Exception as e:
+            logging.warning(f"LLM cache access flush failed: {e}")
+        await self.pool.close()
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            await self._ensure_init()
+            async with self.pool.read() as db:
+                cursor = await db.execute("SELECT response FROM llm_cache WHERE key = ?", (key,))
+                row = await cursor.fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            pending = self._pending_access.setdefault(key, [0.0, 0])
+            pending[0] = time.time()
+            pending[1] += 1
+            if time.monotonic() - self._last_flush >= self.access_flush_sec:
+                try:
+                    async with self.pool.write() as db:
+                        await self._write_access(db)
+                except Exception as e:
+                    logging.warning(f"LLM cache access flush failed: {e}")
+            return str(row[0])
+        except Exception as e:
+            logging.warning(f"LLM cache read failed: {e}")
+            self.misses += 1
+            return None
+
+    async def put(self, key: str, *, model: str, response: str) -> None:
+        try:
+            await self._ensure_init()
+            size = len(response.encode("utf-8"))
+            if self.max_bytes > 0 and size > self.max_bytes:
+                return
+            async with self.pool.write() as db:
+                # Eviction orders by last_access, so write pending accesses first.
+                await self._write_access(db)
+                await db.execute(
+                    """
+                    REPLACE INTO llm_cache (key, model, response, size_bytes, created_at_utc, last_access, hits)
+                    VALUES (?, ?, ?, ?, ?, ?, 0)
+                    """,
+                    (key, model, response, size, datetime.now(timezone.utc).isoformat(), time.time()),
+                )
+                self._pending_access.pop(key, None)
+                self.stores += 1
+                if self.max_bytes > 0:
+                    await self._evict(db)
+        except Exception as e:
+            logging.warning(f"LLM cache write failed: {e}")
+
+    async def _write_access(self, db: aiosqlite.Connection) -> None:
+        """Write the collected access times and hit counts inside the caller's write transaction."""
+        pending, self._pending_access = self._pending_access, {}
+        self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            await db.executemany(
+                "UPDATE llm_cache SET last_access = MAX(last_access, ?), hits = hits + ? WHERE key = ?",
+                [(last_access, int(hits), key) for key, (last_access, hits) in pending.items()],
+            )
+        except BaseException:
+            # Keep them for the next flush; newer accesses recorded meanwhile win.
+            for key, (last_access, hits) in pending.items():
+                entry = self._pending_access.setdefault(key, [0.0, 0])
+                entry[0] = max(entry[0], last_access)
+                entry[1] += hits
+            raise
+
+    async def _evict(self, db: aiosqlite.Connection) -> None:
+        cursor = await db.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM llm_cache")
+        total = int((await cursor.fetchone())[0] or 0)
+        if total <= self.max_bytes:
+            return
+        cursor = await db.execute("SELECT key, size_bytes FROM llm_cache ORDER BY last_access ASC")
+        victims: list[str] = []
+        async for key, size in cursor:
+            if total <= self.max_bytes:
+                break
+            victims.append(key)
+            total -= int(size or 0)
+        for key in victims:
+            await db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,299 @@
+import asyncio
+import random
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import httpx
+
+from common.logger import get_logger
+from config.config import settings
+from services.job_poller import retry_after_seconds
+
+logging = get_logger(__name__)
+
+
+class LLMGatewayError(RuntimeError):
+    """An LLM request that did not produce a response."""
+
+
+class LLMCallError(LLMGatewayError):
+    """The request failed permanently, or kept failing until attempts ran out."""
+
+    def __init__(self, message: str, *, status_code: int | None = None, attempts: int = 1) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.attempts = attempts
+
+
+class LLMUnavailableError(LLMGatewayError):
+    """The circuit breaker is open: the provider failed repeatedly and is being given time to recover."""
+
+    def __init__(self, retry_after_sec: float) -> None:
+        super().__init__(f"LLM circuit breaker open, retry in {retry_after_sec:.1f}s")
+        self.retry_after_sec = retry_after_sec
+
+
+# Error classes (by name, to stay independent of the provider SDK) that mean the request never got
+# a response and may be retried.
+_TRANSIENT_ERRORS = frozenset({"APIConnectionError", "APITimeoutError", "TimeoutException", "TransportError"})
+
+
+def classify_llm_error(e: BaseException) -> Tuple[bool, Optional[int], Optional[float]]:
+    """`(retryable, status_code, retry_after_sec)` for an exception raised by a chat model call."""
+    response = getattr(e, "response", None)
+    response = response if isinstance(response, httpx.Response) else None
+    status = getattr(e, "status_code", None)
+    if not isinstance(status, int) and response is not None:
+        status = response.status_code
+    retry_after = retry_after_seconds(response) if response is not None else None
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500, status, retry_after
+    transient = isinstance(e, (TimeoutError, ConnectionError)) or any(
+        c.__name__ in _TRANSIENT_ERRORS for c in type(e).__mro__
+    )
+    return transient, None, retry_after
+
+
+def response_total_tokens(resp: Any) -> int:
+    """Prompt + completion tokens reported with a chat model response; 0 when absent."""
+    usage = getattr(resp, "usage_metadata", None) or {}
+    total = int(usage.get("total_tokens") or 0)
+    if not total:
+        token_usage = (getattr(resp, "response_metadata", None) or {}).get("token_usage") or {}
+        total = int(token_usage.get("total_tokens") or 0)
+    return total
+
+
+class TokenBudget:
+    """
+    Tokens-per-minute budget shared by all requests (token bucket that may go into debt).
+
+    `acquire` reserves tokens immediately and sleeps until the bucket is back out of debt, so
+    waiters are served in arrival order. Reservations are estimates; `settle` corrects the
+    balance once the provider reports actual usage.
+    """
+
+    def __init__(self, tokens_per_minute: int) -> None:
+        self.capacity = max(0, int(tokens_per_minute))
+        self.rate_per_sec = self.capacity / 60.0
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_sec)
+        self._updated = now
+
+    async def acquire(self, tokens: int) -> None:
+        if self.capacity <= 0:
+            return
+        tokens = min(max(0, int(tokens)), self.capacity)
+        self._refill()
+        self._tokens -= tokens
+        if self._tokens < 0:
+            try:
+                await asyncio.sleep(-self._tokens / self.rate_per_sec)
+            except asyncio.CancelledError:
+                self._tokens += tokens
+                raise
+
+    def settle(self, reserved: int, actual: int) -> None:
+        if self.capacity <= 0:
+            return
+        self._refill()
+        self._tokens += min(max(0, int(reserved)), self.capacity) - max(0, int(actual))
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive upstream failures; open -> half-open after
+    `cooldown_sec`, when a single probe request is let through. The probe closes the circuit on
+    success and reopens it on failure.
+    """
+
+    def __init__(self, *, failure_threshold: int, cooldown_sec: float) -> None:
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_sec = max(0.0, float(cooldown_sec))
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> None:
+        if self.state == "open":
+            remaining = self._opened_at + self.cooldown_sec - time.monotonic()
+            if remaining > 0:
+                raise LLMUnavailableError(remaining)
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open":
+            if self._probing:
+                raise LLMUnavailableError(min(1.0, self.cooldown_sec) or 0.1)
+            self._probing = True
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logging.info("LLM circuit breaker closed")
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.trips += 1
+                logging.warning(f"LLM circuit breaker open after {self.failures} failures; cooling down {self.cooldown_sec}s")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """A call ended without telling anything about provider health (cancelled, bad request)."""
+        self._probing = False
+
+
+class LLMGateway:
+    """
+    Single path for chat model requests in this process.
+
+    Caps concurrent requests (`llm_max_concurrency`) and tokens per minute (`llm_tokens_per_minute`)
+    across all reviews, retries throttling/5xx/timeouts with exponential backoff and jitter (honoring
+    `Retry-After`), and opens a circuit breaker after consecutive upstream failures so requests fail
+    fast instead of piling onto a provider that is down. Failures surface as `LLMGatewayError`.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int | None = None,
+        tokens_per_minute: int | None = None,
+        max_attempts: int | None = None,
+        retry_base_sec: float | None = None,
+        retry_max_sec: float | None = None,
+        breaker_failure_threshold: int | None = None,
+        breaker_cooldown_sec: float | None = None,
+    ) -> None:
+        self.max_concurrency = max(1, int(max_concurrency if max_concurrency is not None else settings.llm_max_concurrency))
+        self.max_attempts = max(1, int(max_attempts if max_attempts is not None else settings.llm_max_attempts))
+        self.retry_base_sec = float(retry_base_sec if retry_base_sec is not None else settings.llm_retry_base_sec)
+        self.retry_max_sec = float(retry_max_sec if retry_max_sec is not None else settings.llm_retry_max_sec)
+        self.budget = TokenBudget(tokens_per_minute if tokens_per_minute is not None else settings.llm_tokens_per_minute)
+        self.breaker = CircuitBreaker(
+            failure_threshold=(
+                breaker_failure_threshold if breaker_failure_threshold is not None else settings.llm_breaker_failure_threshold
+            ),
+            cooldown_sec=breaker_cooldown_sec if breaker_cooldown_sec is not None else settings.llm_breaker_cooldown_sec,
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    @property
+    def saturated(self) -> bool:
+        """True when another request would have to queue for a concurrency slot."""
+        return self.in_flight + self.waiting >= self.max_concurrency
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        delay = min(self.retry_max_sec, self.retry_base_sec * (2 ** (attempt - 1)))
+        delay = random.uniform(delay / 2, delay)
+        if retry_after is not None:
+            delay = max(delay, min(self.retry_max_sec, retry_after))
+        return delay
+
+    async def invoke(
+        self,
+        llm: Any,
+        messages: Sequence[Any],
+        *,
+        estimated_tokens: int = 0,
+        on_attempt: Callable[[bool], None] | None = None,
+    ) -> Any:
+        """
+        `llm.ainvoke(messages)` under the gateway's limits; raises `LLMGatewayError` on failure.
+        `on_attempt(True)` is called when an attempt is actually sent (after the gateway's waits) and
+        `on_attempt(False)` when it ends.
+        """
+        self.requests += 1
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.breaker.before_call()
+            except LLMUnavailableError as e:
+                self.short_circuited += 1
+                if attempt == self.max_attempts:
+                    self.failures += 1
+                    raise
+                await asyncio.sleep(e.retry_after_sec)
+                continue
+
+            try:
+                self.waiting += 1
+                try:
+                    await self.budget.acquire(estimated_tokens)
+                    await self._semaphore.acquire()
+                finally:
+                    self.waiting -= 1
+                try:
+                    self.attempts += 1
+                    self.in_flight += 1
+                    if on_attempt is not None:
+                        on_attempt(True)
+                    try:
+                        resp = await llm.ainvoke(messages)
+                    finally:
+                        self.in_flight -= 1
+                        if on_attempt is not None:
+                            on_attempt(False)
+                finally:
+                    self._semaphore.release()
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                self.budget.settle(estimated_tokens, 0)
+                retryable, status, retry_after = classify_llm_error(e)
+                if status == 429:
+                    self.throttled += 1
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release()
+                if not retryable or attempt == self.max_attempts:
+                    self.failures += 1
+                    raise LLMCallError(
+                        f"LLM 请求失败（{attempt} 次尝试）：{type(e).__name__}: {e}", status_code=status, attempts=attempt
+                    ) from e
+                delay = self._backoff(attempt, retry_after)
+                self.retries += 1
+                logging.warning(
+                    f"LLM request attempt {attempt}/{self.max_attempts} failed ({type(e).__name__}, status={status}); "
+                    f"retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            self.budget.settle(estimated_tokens, response_total_tokens(resp) or estimated_tokens)
+            return resp
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "breaker_state": self.breaker.state,
+            "breaker_trips": self.breaker.trips,
+        }
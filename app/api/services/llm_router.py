@@ -0,0 +1,262 @@
+import asyncio
+import bisect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from common.logger import get_logger
+from config.config import settings
+from services.llm_gateway import LLMGateway, LLMGatewayError
+
+logging = get_logger(__name__)
+
+# Bucket upper bounds: 50ms growing by 25% per bucket, up to ~20 minutes.
+_LATENCY_BOUNDS = [0.05 * 1.25**i for i in range(46)]
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with exponential decay (weights halve every `half_life`
+    observations), so percentiles follow recent behaviour of the provider.
+    """
+
+    def __init__(self, *, half_life: int = 500) -> None:
+        self.counts = [0.0] * (len(_LATENCY_BOUNDS) + 1)
+        self.total = 0.0
+        self.samples = 0
+        self._decay = 0.5 ** (1.0 / max(1, int(half_life)))
+
+    def observe(self, seconds: float) -> None:
+        self.counts = [c * self._decay for c in self.counts]
+        self.counts[bisect.bisect_left(_LATENCY_BOUNDS, max(0.0, seconds))] += 1.0
+        self.total = self.total * self._decay + 1.0
+        self.samples += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the `p` quantile (0..1); None without samples."""
+        if self.total <= 0:
+            return None
+        target = min(1.0, max(0.0, p)) * self.total
+        cumulative = 0.0
+        for i, c in enumerate(self.counts):
+            cumulative += c
+            if cumulative >= target and c > 0:
+                return _LATENCY_BOUNDS[min(i, len(_LATENCY_BOUNDS) - 1)]
+        return _LATENCY_BOUNDS[-1]
+
+
+@dataclass
+class LLMProvider:
+    name: str
+    model: str
+    llm: Any
+    # Each provider has its own limits and circuit breaker: one endpoint failing must not block the other.
+    gateway: LLMGateway
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+
+class HedgedLLMRouter:
+    """
+    Send a chat request to the primary provider and, if it is still outstanding after the
+    provider's `percentile` latency (adapted from its own histogram), send a hedged duplicate to
+    the fallback provider (or the primary again when there is none). The first response `accept`
+    approves wins and the other request is cancelled. When the primary fails or returns something
+    unusable before the hedge is due, the fallback is asked right away.
+
+    Latency and the hedge delay are measured from when the gateway actually sends the request, so
+    time spent queueing for a concurrency slot or token budget never triggers a hedge. A hedge is
+    skipped when its provider's gateway is saturated (it would only queue behind the same backlog)
+    and once hedges exceed `max_ratio` of requests.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[LLMProvider],
+        *,
+        hedge_enabled: bool | None = None,
+        percentile: float | None = None,
+        min_delay_sec: float | None = None,
+        initial_delay_sec: float | None = None,
+        min_samples: int | None = None,
+        max_ratio: float | None = None,
+    ) -> None:
+        if not providers:
+            raise ValueError("HedgedLLMRouter needs at least one provider")
+        self.providers: List[LLMProvider] = list(providers)
+        self.hedge_enabled = bool(settings.llm_hedge_enabled if hedge_enabled is None else hedge_enabled)
+        self.percentile = float(percentile if percentile is not None else settings.llm_hedge_percentile)
+        self.min_delay_sec = float(min_delay_sec if min_delay_sec is not None else settings.llm_hedge_min_delay_sec)
+        self.initial_delay_sec = float(
+            initial_delay_sec if initial_delay_sec is not None else settings.llm_hedge_initial_delay_sec
+        )
+        self.min_samples = int(min_samples if min_samples is not None else settings.llm_hedge_min_samples)
+        self.max_ratio = float(max_ratio if max_ratio is not None else settings.llm_hedge_max_ratio)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+        self.fallbacks = 0
+
+    @property
+    def primary(self) -> LLMProvider:
+        return self.providers[0]
+
+    @property
+    def fallback(self) -> LLMProvider | None:
+        return self.providers[1] if len(self.providers) > 1 else None
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        """Seconds to wait for `provider` before hedging."""
+        observed = provider.latency.percentile(self.percentile)
+        if observed is None or provider.latency.samples < self.min_samples:
+            return self.initial_delay_sec
+        return max(self.min_delay_sec, observed)
+
+    def _may_hedge(self, provider: LLMProvider) -> bool:
+        if provider.gateway.saturated or self.max_ratio <= 0:
+            return False
+        return self.hedges < max(1.0, self.max_ratio * self.requests)
+
+    async def _timed(
+        self,
+        provider: LLMProvider,
+        messages: Sequence[Any],
+        estimated_tokens: int,
+        on_attempt: Callable[[bool], None] | None = None,
+    ) -> Any:
+        sent_at: float | None = None
+
+        def attempt(started: bool) -> None:
+            nonlocal sent_at
+            if started:
+                sent_at = time.monotonic()
+            if on_attempt is not None:
+                on_attempt(started)
+
+        resp = await provider.gateway.invoke(
+            provider.llm, messages, estimated_tokens=estimated_tokens, on_attempt=attempt
+        )
+        if sent_at is not None:
+            provider.latency.observe(time.monotonic() - sent_at)
+        return resp
+
+    async def invoke(
+        self,
+        messages: Sequence[Any],
+        *,
+        estimated_tokens: int = 0,
+        accept: Callable[[Any], bool] | None = None,
+    ) -> Tuple[Any, LLMProvider]:
+        """
+        `(response, provider)` of the winning request. If every response was rejected by `accept`,
+        the last one is returned; if every request failed, the last `LLMGatewayError` is raised.
+        """
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        tasks: Dict[asyncio.Task, LLMProvider] = {}
+        spare = self.fallback or (self.primary if self.hedge_enabled else None)
+        hedge_open = self.hedge_enabled and spare is not None
+        hedge_at: float | None = None
+        last_error: LLMGatewayError | None = None
+        rejected: Tuple[Any, LLMProvider] | None = None
+        hedge_task: asyncio.Task | None = None
+        # The hedge timer runs only while an attempt of the primary request is on the wire: it is
+        # (re)started when the gateway sends one and stopped while it queues or backs off.
+        primary_sending = False
+        attempt_changed = asyncio.Event()
+
+        def on_primary_attempt(started: bool) -> None:
+            nonlocal primary_sending
+            primary_sending = started
+            attempt_changed.set()
+
+        def launch(provider: LLMProvider, on_attempt: Callable[[bool], None] | None = None) -> asyncio.Task:
+            task = asyncio.create_task(self._timed(provider, messages, estimated_tokens, on_attempt))
+            tasks[task] = provider
+            return task
+
+        launch(self.primary, on_primary_attempt if hedge_open else None)
+        try:
+            while tasks:
+                waiter: asyncio.Future | None = None
+                if hedge_open:
+                    if attempt_changed.is_set():
+                        attempt_changed.clear()
+                        hedge_at = loop.time() + self.hedge_delay(self.primary) if primary_sending else None
+                    waiter = asyncio.ensure_future(attempt_changed.wait())
+                timeout = None if hedge_at is None else max(0.0, hedge_at - loop.time())
+                try:
+                    done, _ = await asyncio.wait(
+                        set(tasks) | ({waiter} if waiter is not None else set()),
+                        timeout=timeout,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                finally:
+                    if waiter is not None:
+                        waiter.cancel()
+                done.discard(waiter)
+                if not done:
+                    if hedge_at is None or loop.time() < hedge_at:
+                        continue
+                    hedge_open, hedge_at = False, None
+                    if self._may_hedge(spare):
+                        self.hedges += 1
+                        logging.info(f"Hedging slow {self.primary.name} request to {spare.name}")
+                        hedge_task = launch(spare)
+                        spare = None
+                    else:
+                        self.hedges_skipped += 1
+                        logging.info(f"Not hedging slow {self.primary.name} request: {spare.name} is saturated or hedge budget spent")
+                    continue
+                for task in done:
+                    provider = tasks.pop(task)
+                    try:
+                        resp = task.result()
+                    except LLMGatewayError as e:
+                        logging.warning(f"LLM request to {provider.name} failed: {e}")
+                        last_error = e
+                        continue
+                    if accept is None or accept(resp):
+                        if task is hedge_task:
+                            self.hedge_wins += 1
+                        return resp, provider
+                    logging.warning(f"Unusable LLM response from {provider.name}")
+                    rejected = (resp, provider)
+                if not tasks and self.fallback is not None and spare is self.fallback:
+                    # The primary gave up before the hedge was due: ask the fallback now.
+                    self.fallbacks += 1
+                    hedge_open, hedge_at = False, None
+                    launch(spare)
+                    spare = None
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        if rejected is not None:
+            return rejected
+        assert last_error is not None
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+            "fallbacks": self.fallbacks,
+            "providers": {
+                p.name: {
+                    "samples": p.latency.samples,
+                    "p50_sec": _rounded(p.latency.percentile(0.5)),
+                    "p95_sec": _rounded(p.latency.percentile(0.95)),
+                    "hedge_delay_sec": round(self.hedge_delay(p), 3),
+                    "gateway": p.gateway.stats(),
+                }
+                for p in self.providers
+            },
+        }
+
+
+def _rounded(value: float | None) -> float | None:
+    return round(value, 3) if value is not None else None
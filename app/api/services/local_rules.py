@@ -0,0 +1,236 @@
+"""
+Deterministic checks for rules that carry a `local_check` (regex patterns, a lexicon of
+forbidden terms, capital/figure amount consistency). Such rules never reach the LLM: they are
+evaluated here in one pass over the document and produce issues like any other rule.
+
+Lexicon terms of all rules are matched together with an Aho-Corasick automaton when
+`pyahocorasick` is installed, otherwise with one compiled alternation of all terms.
+"""
+
+import bisect
+import re
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from common.logger import get_logger
+from common.models import ReviewRule
+
+logging = get_logger(__name__)
+
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
+
+def is_local_rule(rule: ReviewRule) -> bool:
+    check = rule.local_check
+    return check is not None and bool(check.patterns or check.lexicon or check.amount_consistency)
+
+
+def split_local_rules(rules: Optional[Sequence[ReviewRule]]) -> Tuple[List[ReviewRule], List[ReviewRule]]:
+    """`(local, llm)`: rules the engine checks and rules that still go to the LLM, order kept."""
+    local, llm = [], []
+    for rule in rules or []:
+        (local if is_local_rule(rule) else llm).append(rule)
+    return local, llm
+
+
+# ---------- amounts ----------
+
+_CAPITAL_DIGITS = {
+    "零": 0, "〇": 0, "壹": 1, "贰": 2, "貳": 2, "叁": 3, "參": 3, "肆": 4,
+    "伍": 5, "陆": 6, "陸": 6, "柒": 7, "捌": 8, "玖": 9,
+}
+_CAPITAL_UNITS = {"拾": 10, "佰": 100, "仟": 1000}
+_CAPITAL_SECTIONS = {"万": 10**4, "萬": 10**4, "亿": 10**8, "億": 10**8}
+# A capital amount always names its currency unit (元/圆), which keeps ordinary text out.
+_CAPITAL_AMOUNT = re.compile(
+    "[零〇壹贰貳叁參肆伍陆陸柒捌玖拾佰仟万萬亿億]+[元圆](?:[零〇壹贰貳叁參肆伍陆陸柒捌玖][角分])*[整正]?"
+)
+_FIGURE_AMOUNT = re.compile(
+    r"(?:[¥￥]\s*(?P<a>\d[\d,，]*(?:\.\d+)?)(?:\s*(?P<au>万)?元)?)|(?:(?P<b>\d[\d,，]*(?:\.\d+)?)\s*(?P<bu>万)?元)"
+)
+
+
+def parse_capital_amount(text: str) -> Optional[Decimal]:
+    """Value of an amount written in Chinese capitals ("壹万贰仟元伍角"), or None if malformed."""
+    m = re.fullmatch("(.*?)[元圆](.*)", text)
+    if m is None:
+        return None
+    integer, fraction = m.groups()
+    if not any(ch in _CAPITAL_DIGITS or ch in _CAPITAL_UNITS for ch in integer):
+        return None
+    total, section, number = 0, 0, 0
+    for ch in integer:
+        if ch in _CAPITAL_DIGITS:
+            number = _CAPITAL_DIGITS[ch]
+        elif ch in _CAPITAL_UNITS:
+            # "拾元" is ten: a leading unit stands for one of itself.
+            section += (number or 1) * _CAPITAL_UNITS[ch]
+            number = 0
+        elif ch in _CAPITAL_SECTIONS:
+            section += number
+            if _CAPITAL_SECTIONS[ch] == 10**8:
+                total = (total + section) * 10**8
+            else:
+                total += section * 10**4
+            section, number = 0, 0
+        else:
+            return None
+    value = Decimal(total + section + number)
+    for digit, unit in re.findall("([零〇壹贰貳叁參肆伍陆陸柒捌玖])([角分])", fraction):
+        value += Decimal(_CAPITAL_DIGITS[digit]) * (Decimal("0.1") if unit == "角" else Decimal("0.01"))
+    return value
+
+
+def _figure_amounts(text: str) -> List[Decimal]:
+    out = []
+    for m in _FIGURE_AMOUNT.finditer(text):
+        raw = m.group("a") or m.group("b")
+        try:
+            value = Decimal(re.sub("[,，]", "", raw))
+        except InvalidOperation:
+            continue
+        if m.group("au") or m.group("bu"):
+            value *= 10**4
+        out.append(value)
+    return out
+
+
+def _format_amount(value: Decimal) -> str:
+    return f"{value:,.2f}"
+
+
+# ---------- engine ----------
+
+
+@dataclass
+class LocalRuleHit:
+    rule: ReviewRule
+    # Index into the paragraph list given to `LocalRuleEngine.check`.
+    index: int
+    text: str
+    explanation: str
+    suggested_fix: str = ""
+
+
+class LocalRuleEngine:
+    """
+    Evaluate the local checks of `rules` over a list of paragraphs.
+
+    Paragraphs are joined into one text and every pattern (and the combined lexicon) is run over it
+    once; matches are mapped back to their paragraph and dropped if they cross a paragraph
+    boundary. Each rule reports a given snippet at most once per paragraph.
+    """
+
+    _SEPARATOR = "\n"
+
+    def __init__(self, rules: Sequence[ReviewRule]) -> None:
+        self.rules = [r for r in rules if is_local_rule(r)]
+        self._patterns: List[Tuple[ReviewRule, re.Pattern]] = []
+        self._terms: Dict[str, List[ReviewRule]] = {}
+        self._amount_rules: List[ReviewRule] = []
+        for rule in self.rules:
+            check = rule.local_check
+            for pattern in check.patterns:
+                try:
+                    self._patterns.append((rule, re.compile(pattern)))
+                except re.error as e:
+                    logging.warning(f"Skipping invalid pattern {pattern!r} of rule {rule.name}: {e}")
+            for term in check.lexicon:
+                term = term.strip().lower()
+                if term and rule not in self._terms.setdefault(term, []):
+                    self._terms[term].append(rule)
+            if check.amount_consistency:
+                self._amount_rules.append(rule)
+        self._automaton = self._build_automaton(list(self._terms)) if self._terms else None
+
+    @staticmethod
+    def _build_automaton(terms: List[str]) -> Any:
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for term in terms:
+                automaton.add_word(term, term)
+            automaton.make_automaton()
+            return automaton
+        # Longest first so the alternation prefers the longest term at each position, like `iter_long`.
+        return re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+
+    def _lexicon_matches(self, text: str) -> List[Tuple[int, int, str]]:
+        if self._automaton is None:
+            return []
+        if isinstance(self._automaton, re.Pattern):
+            return [(m.start(), m.end(), m.group(0).lower()) for m in self._automaton.finditer(text)]
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Lower-casing changed offsets (rare non-ASCII letters): match case-sensitively instead.
+            lowered = text
+        return [(end - len(term) + 1, end + 1, term) for end, term in self._automaton.iter_long(lowered)]
+
+    def check(self, texts: Sequence[str]) -> List[LocalRuleHit]:
+        if not self.rules:
+            return []
+        starts: List[int] = []
+        pos = 0
+        for t in texts:
+            starts.append(pos)
+            pos += len(t) + len(self._SEPARATOR)
+        joined = self._SEPARATOR.join(texts)
+
+        hits: List[LocalRuleHit] = []
+        seen = set()
+
+        def add(rule: ReviewRule, start: int, end: int, explanation: str, suggested_fix: str = "") -> None:
+            if end <= start:
+                return
+            index = bisect.bisect_right(starts, start) - 1
+            if end > starts[index] + len(texts[index]):
+                return
+            snippet = joined[start:end]
+            key = (rule.id, index, snippet)
+            if key in seen:
+                return
+            seen.add(key)
+            hits.append(LocalRuleHit(rule=rule, index=index, text=snippet, explanation=explanation, suggested_fix=suggested_fix))
+
+        for rule, pattern in self._patterns:
+            for m in pattern.finditer(joined):
+                add(rule, m.start(), m.end(), rule.description)
+        for start, end, term in self._lexicon_matches(joined):
+            for rule in self._terms.get(term, []):
+                add(rule, start, end, f"{rule.description}（命中词条：{joined[start:end]}）")
+        if self._amount_rules:
+            for index, text in enumerate(texts):
+                for start, end, explanation, fix in self._amount_mismatches(text):
+                    for rule in self._amount_rules:
+                        add(rule, starts[index] + start, starts[index] + end, f"{rule.description}（{explanation}）", fix)
+
+        hits.sort(key=lambda h: h.index)
+        return hits
+
+    @staticmethod
+    def _amount_mismatches(text: str) -> List[Tuple[int, int, str, str]]:
+        """Capital amounts in `text` that no figure amount in the same paragraph agrees with."""
+        capitals = [(m, parse_capital_amount(m.group(0))) for m in _CAPITAL_AMOUNT.finditer(text)]
+        capitals = [(m, v) for m, v in capitals if v is not None]
+        if not capitals:
+            return []
+        figures = _figure_amounts(text)
+        if not figures:
+            return []
+        out = []
+        for m, value in capitals:
+            if any(f == value for f in figures):
+                continue
+            shown = "、".join(_format_amount(f) for f in figures)
+            out.append(
+                (
+                    m.start(),
+                    m.end(),
+                    f"大写金额 {m.group(0)}（{_format_amount(value)} 元）与小写金额 {shown} 不一致",
+                    f"核对金额，使大写与小写一致（大写对应 {_format_amount(value)} 元）",
+                )
+            )
+        return out
@@ -0,0 +1,269 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from common.logger import get_logger
+from config.config import settings
+from database.sqlite_pool import SQLiteConnectionPool
+
+logging = get_logger(__name__)
+
+
+CREATE_MINERU_CACHE_TABLE = """
+CREATE TABLE IF NOT EXISTS mineru_cache (
+    cache_key TEXT PRIMARY KEY,
+    model_version TEXT NOT NULL,
+    is_ocr INTEGER NOT NULL,
+    zip_url TEXT,
+    zip_sha256 TEXT NOT NULL,
+    zip_bytes INTEGER NOT NULL,
+    zip_mtime_ns INTEGER,
+    verified_at REAL,
+    size_bytes INTEGER NOT NULL,
+    created_at_utc TEXT NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class MinerUParseCache:
+    """
+    Index of MinerU result zips kept in `mineru_cache_dir`, keyed by `cache_key` (the document sha256).
+
+    `lookup` returns a cached zip only if its index entry matches the requested MinerU options and
+    the file still has the recorded size and modification time; anything else is dropped and treated
+    as a miss. The recorded sha256 is re-checked in the background at most every
+    `mineru_parse_cache_verify_interval_sec`, so a hit never reads the whole zip. Zips without an
+    index entry (e.g. from before the index existed) have unknown MinerU options and are misses.
+    The index lives in `<mineru_cache_dir>/index.db`; when the artifacts it tracks (zip plus derived
+    `<cache_key>.*` files) exceed `max_bytes`, least recently used entries are deleted.
+    Cache failures never fail a review; they are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        *,
+        max_bytes: int | None = None,
+        verify_interval_sec: float | None = None,
+    ) -> None:
+        self.cache_dir = Path(cache_dir or settings.mineru_cache_dir)
+        self.db_path = self.cache_dir / "index.db"
+        self.max_bytes = int(max_bytes if max_bytes is not None else settings.mineru_parse_cache_max_bytes)
+        self.verify_interval_sec = float(
+            verify_interval_sec if verify_interval_sec is not None else settings.mineru_parse_cache_verify_interval_sec
+        )
+        self.pool = SQLiteConnectionPool(
+            str(self.db_path), readers=2, busy_timeout_ms=settings.sqlite_busy_timeout_ms
+        )
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalid = 0
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._verifying: Set[str] = set()
+        self._verify_tasks: Set[asyncio.Task] = set()
+
+    async def _ensure_init(self) -> None:
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            async with self.pool.write() as db:
+                await db.execute(CREATE_MINERU_CACHE_TABLE)
+                await db.execute("CREATE INDEX IF NOT EXISTS ix_mineru_cache_last_access ON mineru_cache(last_access)")
+                cursor = await db.execute("PRAGMA table_info(mineru_cache)")
+                columns = {row[1] for row in await cursor.fetchall()}
+                for column, ddl in (("zip_mtime_ns", "INTEGER"), ("verified_at", "REAL")):
+                    if column not in columns:
+                        await db.execute(f"ALTER TABLE mineru_cache ADD COLUMN {column} {ddl}")
+            self._initialized = True
+
+    async def aclose(self) -> None:
+        for task in list(self._verify_tasks):
+            task.cancel()
+        if self._verify_tasks:
+            await asyncio.gather(*self._verify_tasks, return_exceptions=True)
+        await self.pool.close()
+
+    def zip_path(self, cache_key: str) -> Path:
+        return self.cache_dir / f"{cache_key}.zip"
+
+    async def lookup(self, cache_key: str, *, model_version: str, is_ocr: bool) -> Optional[Dict[str, Any]]:
+        """Return {"zip_path", "zip_url"} for a cached result whose zip is unchanged on disk, or None."""
+        try:
+            await self._ensure_init()
+            zip_path = self.zip_path(cache_key)
+            async with self.pool.read() as db:
+                cursor = await db.execute("SELECT * FROM mineru_cache WHERE cache_key = ?", (cache_key,))
+                row = await cursor.fetchone()
+
+            if row is None or row["model_version"] != model_version or bool(row["is_ocr"]) != bool(is_ocr):
+                self.misses += 1
+                return None
+
+            try:
+                st = zip_path.stat()
+            except FileNotFoundError:
+                st = None
+            if row["zip_mtime_ns"] is None and st is not None and st.st_size == int(row["zip_bytes"]):
+                # Indexed before modification times were recorded: hash once, then trust size + mtime.
+                valid = await asyncio.to_thread(_sha256_file, zip_path) == row["zip_sha256"]
+                if valid:
+                    await self._mark_verified(cache_key, st.st_mtime_ns)
+            else:
+                valid = st is not None and st.st_size == int(row["zip_bytes"]) and st.st_mtime_ns == row["zip_mtime_ns"]
+            if not valid:
+                logging.warning(f"MinerU parse cache entry {cache_key} changed on disk; discarding")
+                self.invalid += 1
+                self.misses += 1
+                await self._delete(cache_key)
+                return None
+
+            if time.time() - float(row["verified_at"] or 0) >= self.verify_interval_sec:
+                self._verify_in_background(cache_key, row["zip_sha256"])
+            async with self.pool.write() as db:
+                await db.execute(
+                    "UPDATE mineru_cache SET last_access = ?, hits = hits + 1 WHERE cache_key = ?",
+                    (time.time(), cache_key),
+                )
+            self.hits += 1
+            return {"zip_path": zip_path, "zip_url": row["zip_url"]}
+        except Exception as e:
+            logging.warning(f"MinerU parse cache read failed: {e}")
+            self.misses += 1
+            return None
+
+    def _verify_in_background(self, cache_key: str, zip_sha256: str) -> None:
+        if cache_key in self._verifying:
+            return
+        self._verifying.add(cache_key)
+        task = asyncio.create_task(self._verify(cache_key, zip_sha256))
+        self._verify_tasks.add(task)
+        task.add_done_callback(self._verify_tasks.discard)
+
+    async def _verify(self, cache_key: str, zip_sha256: str) -> None:
+        """Full sha256 check of a cached zip; drops the entry if it no longer matches."""
+        try:
+            zip_path = self.zip_path(cache_key)
+            mtime_ns = zip_path.stat().st_mtime_ns
+            if await asyncio.to_thread(_sha256_file, zip_path) == zip_sha256:
+                await self._mark_verified(cache_key, mtime_ns)
+                return
+            logging.warning(f"MinerU parse cache entry {cache_key} failed integrity check; discarding")
+            self.invalid += 1
+            await self._delete(cache_key)
+        except Exception as e:
+            logging.warning(f"MinerU parse cache verification of {cache_key} failed: {e}")
+        finally:
+            self._verifying.discard(cache_key)
+
+    async def _mark_verified(self, cache_key: str, mtime_ns: int) -> None:
+        async with self.pool.write() as db:
+            await db.execute(
+                "UPDATE mineru_cache SET zip_mtime_ns = ?, verified_at = ? WHERE cache_key = ?",
+                (mtime_ns, time.time(), cache_key),
+            )
+
+    async def record(self, cache_key: str, *, zip_url: str | None, model_version: str, is_ocr: bool) -> None:
+        """Index the artifacts just written for `cache_key` and evict old entries past the size cap."""
+        try:
+            await self._ensure_init()
+            zip_path = self.zip_path(cache_key)
+            if not zip_path.exists():
+                return
+            zip_sha256 = await asyncio.to_thread(_sha256_file, zip_path)
+            st = zip_path.stat()
+            size = sum(p.stat().st_size for p in self._artifacts(cache_key))
+            now = time.time()
+            async with self.pool.write() as db:
+                await db.execute(
+                    """
+                    REPLACE INTO mineru_cache
+                        (cache_key, model_version, is_ocr, zip_url, zip_sha256, zip_bytes, zip_mtime_ns,
+                         verified_at, size_bytes, created_at_utc, last_access, hits)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+                    """,
+                    (
+                        cache_key,
+                        model_version,
+                        1 if is_ocr else 0,
+                        zip_url,
+                        zip_sha256,
+                        st.st_size,
+                        st.st_mtime_ns,
+                        now,
+                        size,
+                        datetime.now(timezone.utc).isoformat(),
+                        now,
+                    ),
+                )
+            self.stores += 1
+            if self.max_bytes > 0:
+                await self._evict(keep=cache_key)
+        except Exception as e:
+            logging.warning(f"MinerU parse cache write failed: {e}")
+
+    def _artifacts(self, cache_key: str) -> list[Path]:
+        return [p for p in self.cache_dir.glob(f"{cache_key}.*") if p.is_file() and not p.name.endswith(".part")]
+
+    async def _delete(self, cache_key: str) -> None:
+        for p in self._artifacts(cache_key):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning(f"Failed to delete MinerU cache artifact {p}: {e}")
+        async with self.pool.write() as db:
+            await db.execute("DELETE FROM mineru_cache WHERE cache_key = ?", (cache_key,))
+
+    async def _evict(self, *, keep: str) -> None:
+        async with self.pool.read() as db:
+            cursor = await db.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM mineru_cache")
+            total = int((await cursor.fetchone())[0] or 0)
+            if total <= self.max_bytes:
+                return
+            cursor = await db.execute(
+                "SELECT cache_key, size_bytes FROM mineru_cache WHERE cache_key != ? ORDER BY last_access ASC",
+                (keep,),
+            )
+            victims: list[str] = []
+            async for key, size in cursor:
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= int(size or 0)
+        for key in victims:
+            await self._delete(key)
+        self.evictions += len(victims)
+        if victims:
+            logging.info(f"Evicted {len(victims)} MinerU parse cache entr{'y' if len(victims) == 1 else 'ies'}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalid": self.invalid,
+            "max_bytes": self.max_bytes,
+        }
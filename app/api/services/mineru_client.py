@@ -1,16 +1,20 @@
-import httpx
-import io
 import json
 import asyncio
-import time
+import os
+import tempfile
 import zipfile
 import re
 import html
 from pathlib import Path
-from typing import Any, Dict, List
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
 
 from common.logger import get_logger
+from common import json_codec
 from config.config import settings
+from services.http_client import SharedHttpClient
+from services.job_poller import JobPoller, raise_for_poll_status, shared_rate_limiter
+from services.mineru_cache import MinerUParseCache
 
 logging = get_logger(__name__)
 
@@ -26,28 +30,76 @@ class MinerUClient:
         2) PUT file bytes to the upload URL
         3) Poll /api/v4/extract-results/batch/{batch_id} for state=done
         4) Download `full_zip_url` and parse a JSON artifact inside
+
+    All requests go through one pooled `SharedHttpClient` (normally owned by the pipeline). The PDF
+    is streamed from disk on upload and the result zip is streamed to a file on download, so large
+    documents are never held in memory as a whole.
+
+    Concurrent `extract` calls are coalesced by `_ExtractBatcher` into multi-file batches (steps 1-3
+    are shared per batch); each caller then downloads its own zip.
+
+    Result zips of known documents are served from `MinerUParseCache` without contacting MinerU.
     """
 
-    def __init__(self) -> None:
+    UPLOAD_CHUNK_BYTES = 1024 * 1024
+    DOWNLOAD_CHUNK_BYTES = 256 * 1024
+
+    def __init__(self, *, http: SharedHttpClient | None = None) -> None:
+        self.http = http or SharedHttpClient()
         self.base_url = settings.mineru_base_url.rstrip("/")
         self.api_key = settings.mineru_api_key
         self.model_version = settings.mineru_model_version
         self.poll_interval_sec = float(settings.mineru_poll_interval_sec)
         self.max_wait_sec = float(settings.mineru_max_wait_sec)
+        rate = float(settings.mineru_poll_rate_per_sec)
+        self.poller = JobPoller(
+            "mineru",
+            interval_sec=self.poll_interval_sec,
+            max_interval_sec=float(settings.mineru_poll_max_interval_sec),
+            rate_limiter=shared_rate_limiter("mineru", rate, burst=max(1, int(rate))),
+        )
+        self.batcher = _ExtractBatcher(
+            self,
+            window_sec=float(settings.mineru_batch_window_sec),
+            max_files=int(settings.mineru_batch_max_files),
+        )
+        self.parse_cache = (
+            MinerUParseCache()
+            if settings.mineru_parse_cache_enabled and settings.mineru_cache_artifacts
+            else None
+        )
+
+    async def aclose(self) -> None:
+        if self.parse_cache is not None:
+            await self.parse_cache.aclose()
 
     async def extract(self, file_path: Path, *, data_id: str, cache_key: str) -> Dict[str, Any]:
-        if not self.api_key:
-            raise ValueError("MINERU_API_KEY is required.")
+        is_ocr = bool(getattr(settings, "mineru_is_ocr", False))
+        cached = None
+        if self.parse_cache is not None:
+            cached = await self.parse_cache.lookup(cache_key, model_version=self.model_version, is_ocr=is_ocr)
+
+        if cached is not None:
+            logging.info(f"Using cached MinerU result for {file_path.name} ({cache_key})")
+            meta = {"zip_url": cached["zip_url"], "zip_path": str(cached["zip_path"]), "parse_cache_hit": True}
+            payload, meta, layout = await asyncio.to_thread(
+                _parse_result_zip, cached["zip_path"], meta=meta, cache_key=cache_key
+            )
+        else:
+            if not self.api_key:
+                raise ValueError("MINERU_API_KEY is required.")
 
-        if not file_path.exists():
-            raise FileNotFoundError(str(file_path))
+            if not file_path.exists():
+                raise FileNotFoundError(str(file_path))
 
-        logging.info(f"Calling MinerU (v4) for file: {file_path}")
+            logging.info(f"Calling MinerU (v4) for file: {file_path}")
 
-        batch_id, upload_url = await self._request_upload_url(file_path.name, data_id=data_id)
-        await self._upload_file(upload_url, file_path)
-        full_zip_url = await self._poll_batch_until_done(batch_id, file_path.name)
-        payload, meta = await self._download_and_parse_zip(full_zip_url, cache_key)
+            full_zip_url = await self.batcher.submit(file_path, data_id=data_id)
+            payload, meta, layout = await self._download_and_parse_zip(full_zip_url, cache_key)
+            if self.parse_cache is not None and meta.get("zip_path"):
+                await self.parse_cache.record(
+                    cache_key, zip_url=full_zip_url, model_version=self.model_version, is_ocr=is_ocr
+                )
         if settings.debug:
             try:
                 out_dir = Path(settings.mineru_cache_dir)
@@ -60,25 +112,30 @@ class MinerUClient:
             except Exception as e:
                 logging.warning(f"Failed to save MinerU debug JSON: {e}")
         meta["cache_key"] = cache_key
-        # Return both content and meta so downstream can do precise bbox mapping.
-        return {"content": payload, "meta": meta}
+        # Return content and meta so downstream can do precise bbox mapping, plus the decoded
+        # layout (line/span bboxes) so the pipeline doesn't load it again.
+        return {"content": payload, "meta": meta, "layout": layout}
 
-    async def _request_upload_url(self, file_name: str, *, data_id: str) -> tuple[str, str]:
+    async def _request_upload_urls(self, files: List[tuple[str, str]]) -> tuple[str, List[str]]:
+        """Open one batch for `files` [(file_name, data_id)]; returns (batch_id, upload URLs in order)."""
         url = f"{self.base_url}/api/v4/file-urls/batch"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "Accept": "*/*",
         }
-        file_obj: Dict[str, Any] = {"name": file_name, "data_id": data_id}
-        if bool(getattr(settings, "mineru_is_ocr", False)):
-            file_obj["is_ocr"] = True
-        body = {"files": [file_obj], "model_version": self.model_version}
-
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(url, headers=headers, json=body)
-            resp.raise_for_status()
-            payload = resp.json()
+        is_ocr = bool(getattr(settings, "mineru_is_ocr", False))
+        file_objs: List[Dict[str, Any]] = []
+        for file_name, data_id in files:
+            file_obj: Dict[str, Any] = {"name": file_name, "data_id": data_id}
+            if is_ocr:
+                file_obj["is_ocr"] = True
+            file_objs.append(file_obj)
+        body = {"files": file_objs, "model_version": self.model_version}
+
+        resp = await self.http.get().post(url, headers=headers, json=body, timeout=60)
+        resp.raise_for_status()
+        payload = resp.json()
 
         if payload.get("code") != 0:
             raise RuntimeError(f"MinerU upload-url request failed: {payload.get('msg')} ({payload})")
@@ -86,151 +143,117 @@ class MinerUClient:
         data = payload.get("data") or {}
         batch_id = data.get("batch_id")
         file_urls = data.get("file_urls") or data.get("files") or []
-        if not batch_id or not file_urls:
+        if not batch_id or len(file_urls) < len(files):
             raise RuntimeError(f"MinerU response missing batch_id/file_urls: {payload}")
 
-        return batch_id, file_urls[0]
+        return batch_id, list(file_urls[: len(files)])
 
     async def _upload_file(self, upload_url: str, file_path: Path) -> None:
-        async with httpx.AsyncClient(timeout=300) as client:
-            with file_path.open("rb") as f:
-                resp = await client.put(upload_url, content=f.read())
-                resp.raise_for_status()
+        # An explicit Content-Length keeps the streamed body a plain (non-chunked) PUT, which
+        # pre-signed object storage URLs require.
+        size = file_path.stat().st_size
+        resp = await self.http.get().put(
+            upload_url,
+            content=_iter_file(file_path, self.UPLOAD_CHUNK_BYTES),
+            headers={"Content-Length": str(size)},
+            timeout=300,
+        )
+        resp.raise_for_status()
 
-    async def _poll_batch_until_done(self, batch_id: str, file_name: str) -> str:
+    async def _poll_batch_until_done(self, batch_id: str, waiters: Dict[str, "_ExtractRequest"]) -> None:
+        """
+        Poll a batch until every request in `waiters` (keyed by data_id) is resolved. Each request's
+        future gets its `full_zip_url` as soon as that file is done, so fast files don't wait for the
+        slowest one in the batch. Poll timing (backoff, jitter, rate limit) comes from `self.poller`.
+        """
         url = f"{self.base_url}/api/v4/extract-results/batch/{batch_id}"
         headers = {"Authorization": f"Bearer {self.api_key}", "Accept": "*/*"}
-        deadline = time.time() + self.max_wait_sec
-
-        async with httpx.AsyncClient(timeout=60) as client:
-            while True:
-                resp = await client.get(url, headers=headers)
-                resp.raise_for_status()
-                payload = resp.json()
-
-                if payload.get("code") != 0:
-                    raise RuntimeError(f"MinerU poll failed: {payload.get('msg')} ({payload})")
-
-                data = payload.get("data") or {}
-                results = data.get("extract_result") or data.get("extract_results") or []
-                matched = next((r for r in results if r.get("file_name") == file_name), None)
-
-                if matched:
-                    state = matched.get("state")
-                    if state == "done":
-                        full_zip_url = matched.get("full_zip_url")
-                        if not full_zip_url:
-                            raise RuntimeError(f"MinerU done but missing full_zip_url: {matched}")
-                        return full_zip_url
-                    if state == "failed":
-                        raise RuntimeError(f"MinerU extract failed: {matched.get('err_msg')}")
-
-                if time.time() > deadline:
-                    raise TimeoutError(f"Timed out waiting for MinerU result for {file_name} (batch_id={batch_id})")
-
-                await asyncio.sleep(self.poll_interval_sec)
-
-    async def _download_and_parse_zip(self, full_zip_url: str, cache_key: str) -> tuple[Dict[str, Any] | List[Any], Dict[str, Any]]:
-        async with httpx.AsyncClient(timeout=300) as client:
-            resp = await client.get(full_zip_url)
-            resp.raise_for_status()
-            zip_bytes = resp.content
-
-        meta: Dict[str, Any] = {"zip_url": full_zip_url}
-        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
-            json_names = [n for n in zf.namelist() if n.lower().endswith(".json")]
-            if not json_names:
-                raise RuntimeError("MinerU zip did not contain any JSON files.")
-
-            meta["zip_files"] = zf.namelist()
-
-            if settings.mineru_cache_artifacts:
-                try:
-                    out_dir = Path(settings.mineru_cache_dir)
-                    out_dir.mkdir(parents=True, exist_ok=True)
-                    zip_path = out_dir / f"{cache_key}.zip"
-                    zip_path.write_bytes(zip_bytes)
-                    meta["zip_path"] = str(zip_path)
-                except Exception as e:
-                    logging.warning(f"Failed to save MinerU zip: {e}")
-
-            # Extract page image sizes (if images are present) for accurate pixel->point mapping.
-            page_canvas_sizes = _extract_page_canvas_sizes(zf)
-            if page_canvas_sizes:
-                meta["page_canvas_sizes"] = page_canvas_sizes
-
-            # Also try to derive canvas sizes from layout.json (works when zip has no rendered images).
-            layout_raw = None
-            layout_file = None
-
-            middle_name = next((n for n in zf.namelist() if n.lower().endswith("middle.json")), None)
-            if middle_name:
-                try:
-                    layout_raw = zf.read(middle_name)
-                    layout_file = middle_name
-                except Exception as e:
-                    logging.warning(f"Failed to read MinerU middle.json: {e}")
-
-            if layout_raw is None:
-                layout_name = next((n for n in zf.namelist() if n.lower().endswith("layout.json")), None)
-                if layout_name:
-                    try:
-                        layout_raw = zf.read(layout_name)
-                        layout_file = layout_name
-                    except Exception as e:
-                        logging.warning(f"Failed to read MinerU layout.json: {e}")
-
-            if layout_raw is not None and layout_file:
-                try:
-                    layout = json.loads(layout_raw.decode("utf-8"))
-                    sizes = _extract_page_canvas_sizes_from_layout(layout)
-                    if sizes:
-                        meta["page_canvas_sizes"] = {**meta.get("page_canvas_sizes", {}), **sizes}
-                    if settings.mineru_cache_artifacts:
-                        out_dir = Path(settings.mineru_cache_dir)
-                        out_dir.mkdir(parents=True, exist_ok=True)
-                        layout_path = out_dir / f"{cache_key}.layout.json"
-                        layout_path.write_bytes(layout_raw)
-                        meta["layout_path"] = str(layout_path)
-                        meta["layout_file"] = layout_file
-                except Exception as e:
-                    logging.warning(f"Failed to parse/cache MinerU layout-like JSON: {e}")
+        client = self.http.get()
+        pending = dict(waiters)
+        by_name = {req.file_name: req for req in pending.values()}
 
-            # Prefer likely structured outputs
-            preferred = []
-            for n in json_names:
-                ln = n.lower()
-                if any(k in ln for k in ("layout", "extract", "result", "content")):
-                    preferred.append(n)
-            candidates = preferred or sorted(json_names)
+        async def check() -> bool | None:
+            resp = await client.get(url, headers=headers, timeout=60)
+            raise_for_poll_status(resp)
+            payload = resp.json()
 
-            best_name = None
-            best_score = -1
-            best_data: Any = None
+            if payload.get("code") != 0:
+                raise RuntimeError(f"MinerU poll failed: {payload.get('msg')} ({payload})")
 
-            for name in candidates:
-                try:
-                    with zf.open(name) as f:
-                        raw = f.read()
-                    data = json.loads(raw.decode("utf-8"))
-                    score = _score_extraction_json(data)
-                    if score > best_score:
-                        best_score = score
-                        best_name = name
-                        best_data = data
-                except Exception:
+            data = payload.get("data") or {}
+            results = data.get("extract_result") or data.get("extract_results") or []
+            for matched in results:
+                req = pending.get(matched.get("data_id")) or by_name.get(matched.get("file_name"))
+                if req is None or req.data_id not in pending:
                     continue
+                state = matched.get("state")
+                if state == "done":
+                    full_zip_url = matched.get("full_zip_url")
+                    if full_zip_url:
+                        req.resolve(full_zip_url)
+                    else:
+                        req.fail(RuntimeError(f"MinerU done but missing full_zip_url: {matched}"))
+                    pending.pop(req.data_id, None)
+                elif state == "failed":
+                    req.fail(RuntimeError(f"MinerU extract failed: {matched.get('err_msg')}"))
+                    pending.pop(req.data_id, None)
+            return True if not pending else None
 
-            if best_name is None:
-                # Fallback to first JSON
-                with zf.open(candidates[0]) as f:
-                    best_name = candidates[0]
-                    best_data = json.loads(f.read().decode("utf-8"))
+        try:
+            await self.poller.poll(
+                check,
+                max_wait_sec=self.max_wait_sec,
+                timeout_message=f"Timed out waiting for MinerU result (batch_id={batch_id})",
+            )
+        except TimeoutError:
+            for req in pending.values():
+                req.fail(TimeoutError(f"Timed out waiting for MinerU result for {req.file_name} (batch_id={batch_id})"))
+
+    async def _download_and_parse_zip(
+        self, full_zip_url: str, cache_key: str
+    ) -> tuple[Dict[str, Any] | List[Any], Dict[str, Any], Dict[str, Any] | None]:
+        zip_path, cached = await self._download_zip(full_zip_url, cache_key)
+        meta: Dict[str, Any] = {"zip_url": full_zip_url}
+        if cached:
+            meta["zip_path"] = str(zip_path)
+        try:
+            return await asyncio.to_thread(_parse_result_zip, zip_path, meta=meta, cache_key=cache_key)
+        finally:
+            if not cached:
+                zip_path.unlink(missing_ok=True)
 
-            meta["selected_json"] = best_name
-            meta["selected_score"] = best_score
-            meta["cache_key"] = cache_key
-            return best_data, meta
+    async def _download_zip(self, full_zip_url: str, cache_key: str) -> tuple[Path, bool]:
+        """
+        Stream the result zip to disk. With `mineru_cache_artifacts` it lands at
+        `<mineru_cache_dir>/<cache_key>.zip` (written via a temp file and renamed, so readers never see
+        a partial zip); otherwise it goes to a temp file the caller deletes. Returns (path, cached).
+        """
+        out_dir: Path | None = None
+        if settings.mineru_cache_artifacts:
+            try:
+                out_dir = Path(settings.mineru_cache_dir)
+                out_dir.mkdir(parents=True, exist_ok=True)
+            except Exception as e:
+                logging.warning(f"Failed to save MinerU zip: {e}")
+                out_dir = None
+
+        fd, tmp_name = tempfile.mkstemp(suffix=".zip.part", dir=str(out_dir) if out_dir else None)
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async with self.http.get().stream("GET", full_zip_url, timeout=300) as resp:
+                    resp.raise_for_status()
+                    async for chunk in resp.aiter_bytes(self.DOWNLOAD_CHUNK_BYTES):
+                        # Disk writes can stall (slow or network volumes); keep them off the event loop.
+                        await asyncio.to_thread(f.write, chunk)
+            if out_dir is None:
+                return tmp_path, False
+            zip_path = out_dir / f"{cache_key}.zip"
+            os.replace(tmp_path, zip_path)
+            return zip_path, True
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
     @staticmethod
     def to_paragraphs(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -307,6 +330,237 @@ class MinerUClient:
         return paragraphs
 
 
+@dataclass
+class _ExtractRequest:
+    file_path: Path
+    data_id: str
+    future: asyncio.Future = field(repr=False)
+
+    @property
+    def file_name(self) -> str:
+        return self.file_path.name
+
+    def resolve(self, full_zip_url: str) -> None:
+        if not self.future.done():
+            self.future.set_result(full_zip_url)
+
+    def fail(self, exc: BaseException) -> None:
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+class _ExtractBatcher:
+    """
+    Coalesces concurrent `MinerUClient.extract` calls into multi-file MinerU batches.
+
+    Requests arriving within `window_sec` of the first pending one (up to `max_files`) share one
+    upload-URL request and one polling loop; uploads run concurrently. Each caller awaits the
+    `full_zip_url` of its own file, matched by `data_id`. Callers asking for a `data_id` that is
+    already pending share that request. A failure (upload, MinerU error, timeout) only affects the
+    requests it concerns unless the whole batch could not be created.
+    """
+
+    def __init__(self, client: MinerUClient, *, window_sec: float, max_files: int) -> None:
+        self.client = client
+        self.window_sec = max(0.0, window_sec)
+        self.max_files = max(1, max_files)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, _ExtractRequest] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, file_path: Path, *, data_id: str) -> str:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._pending, self._timer = loop, {}, None
+
+        req = self._pending.get(data_id)
+        if req is None:
+            req = _ExtractRequest(file_path=file_path, data_id=data_id, future=loop.create_future())
+            # Mark failures as retrieved even if every caller was cancelled meanwhile.
+            req.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._pending[data_id] = req
+            if len(self._pending) >= self.max_files or self.window_sec == 0:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window_sec, self._flush)
+        # Shield so one cancelled caller (e.g. a cancelled review) doesn't fail others sharing the request.
+        return await asyncio.shield(req.future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        requests, self._pending = list(self._pending.values()), {}
+        task = asyncio.get_running_loop().create_task(self._run_batch(requests))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, requests: List[_ExtractRequest]) -> None:
+        client = self.client
+        try:
+            batch_id, upload_urls = await client._request_upload_urls([(r.file_name, r.data_id) for r in requests])
+            logging.info(f"MinerU batch {batch_id}: {len(requests)} file(s)")
+
+            async def upload(req: _ExtractRequest, upload_url: str) -> bool:
+                try:
+                    await client._upload_file(upload_url, req.file_path)
+                    return True
+                except Exception as e:
+                    req.fail(e)
+                    return False
+
+            uploaded = await asyncio.gather(*[upload(r, u) for r, u in zip(requests, upload_urls)])
+            waiters = {r.data_id: r for r, ok in zip(requests, uploaded) if ok}
+            if waiters:
+                await client._poll_batch_until_done(batch_id, waiters)
+        except BaseException as e:
+            for req in requests:
+                req.fail(e if isinstance(e, Exception) else RuntimeError("MinerU batch was cancelled"))
+            if not isinstance(e, Exception):
+                raise
+
+
+def _parse_result_zip(
+    zip_path: Path, *, meta: Dict[str, Any], cache_key: str
+) -> tuple[Dict[str, Any] | List[Any], Dict[str, Any], Dict[str, Any] | None]:
+    """
+    Read a downloaded MinerU zip (runs in a worker thread). Returns (content, meta, layout).
+
+    The member index is built once. The layout JSON (`*middle.json`, else `*layout.json`) is decoded
+    once and returned so the pipeline doesn't re-read the cached copy. The content artifact is chosen
+    by name first (`*content_list.json`, largest first) and only falls back to decoding and scoring
+    every candidate when that doesn't yield per-block text. Image headers are read only for pages the
+    content references that the layout has no canvas size for.
+    """
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = {info.filename: info for info in zf.infolist() if not info.is_dir()}
+        names = list(infos)
+        json_names = [n for n in names if n.lower().endswith(".json")]
+        if not json_names:
+            raise RuntimeError("MinerU zip did not contain any JSON files.")
+
+        meta["zip_files"] = zf.namelist()
+
+        layout_file = next((n for n in names if n.lower().endswith("middle.json")), None) or next(
+            (n for n in names if n.lower().endswith("layout.json")), None
+        )
+        layout: Dict[str, Any] | None = None
+        layout_sizes: Dict[str, List[int]] = {}
+        if layout_file:
+            try:
+                layout_raw = zf.read(layout_file)
+                layout = json_codec.loads(layout_raw)
+                layout_sizes = _extract_page_canvas_sizes_from_layout(layout)
+                if settings.mineru_cache_artifacts:
+                    out_dir = Path(settings.mineru_cache_dir)
+                    out_dir.mkdir(parents=True, exist_ok=True)
+                    layout_path = out_dir / f"{cache_key}.layout.json"
+                    if not layout_path.exists() or layout_path.stat().st_size != len(layout_raw):
+                        layout_path.write_bytes(layout_raw)
+                    meta["layout_path"] = str(layout_path)
+                    meta["layout_file"] = layout_file
+                del layout_raw
+            except Exception as e:
+                logging.warning(f"Failed to parse/cache MinerU layout-like JSON: {e}")
+                layout = None
+
+        def decode(name: str) -> Any:
+            if name == layout_file and layout is not None:
+                return layout
+            with zf.open(name) as f:
+                return json_codec.loads(f.read())
+
+        # Prefer likely structured outputs
+        preferred = [n for n in json_names if any(k in n.lower() for k in ("layout", "extract", "result", "content"))]
+        candidates = preferred or sorted(json_names)
+
+        best_name = None
+        best_score = -1
+        best_data: Any = None
+
+        named = sorted(
+            (n for n in candidates if n.lower().endswith("content_list.json")),
+            key=lambda n: infos[n].file_size,
+            reverse=True,
+        )
+        for name in named:
+            try:
+                data = decode(name)
+            except Exception:
+                continue
+            score = _score_extraction_json(data)
+            if score > 0:
+                best_name, best_score, best_data = name, score, data
+                break
+
+        if best_name is None:
+            for name in candidates:
+                try:
+                    data = decode(name)
+                    score = _score_extraction_json(data)
+                    if score > best_score:
+                        best_score = score
+                        best_name = name
+                        best_data = data
+                except Exception:
+                    continue
+
+        if best_name is None:
+            # Fallback to first JSON
+            best_name = candidates[0]
+            best_data = decode(best_name)
+
+        # Image-derived canvas sizes only matter where the layout has none.
+        needed = _content_page_nums(best_data)
+        if needed is not None:
+            needed = {pn for pn in needed if str(pn) not in layout_sizes}
+        if needed is None or needed:
+            image_sizes = _extract_page_canvas_sizes(zf, pages=needed, skip=set(layout_sizes))
+        else:
+            image_sizes = {}
+        page_canvas_sizes = {**image_sizes, **layout_sizes}
+        if page_canvas_sizes:
+            meta["page_canvas_sizes"] = page_canvas_sizes
+
+        meta["selected_json"] = best_name
+        meta["selected_score"] = best_score
+        meta["cache_key"] = cache_key
+        return best_data, meta, layout
+
+
+def _content_page_nums(data: Any) -> set[int] | None:
+    """1-based page numbers referenced by a content artifact, or None if they can't be determined."""
+    pages: set[int] = set()
+    try:
+        if isinstance(data, list):
+            for item in data:
+                if not isinstance(item, dict):
+                    continue
+                page_idx = item.get("page_idx")
+                pages.add(int(page_idx) + 1 if page_idx is not None else int(item.get("page_num", 1)))
+            return pages
+        if isinstance(data, dict) and isinstance(data.get("pdf_info"), list):
+            for page in data["pdf_info"]:
+                if isinstance(page, dict) and page.get("page_idx") is not None:
+                    pages.add(int(page["page_idx"]) + 1)
+            return pages
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+async def _iter_file(path: Path, chunk_bytes: int) -> AsyncIterator[bytes]:
+    with path.open("rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_bytes)
+            if not chunk:
+                return
+            yield chunk
+
+
 def _paragraphs_from_middle_json(payload: Dict[str, Any], *, meta: Dict[str, Any] | None) -> List[Dict[str, Any]]:
     paragraphs: List[Dict[str, Any]] = []
     pdf_info = payload.get("pdf_info") or []
@@ -474,16 +728,25 @@ def _score_extraction_json(data: Any) -> int:
     return 0
 
 
-def _extract_page_canvas_sizes(zf: zipfile.ZipFile) -> Dict[str, List[int]]:
+def _extract_page_canvas_sizes(
+    zf: zipfile.ZipFile, *, pages: set[int] | None = None, skip: set[str] | None = None
+) -> Dict[str, List[int]]:
     """
     Try to infer per-page rendered image sizes from images in the zip.
-    Returns {page_num_str: [width, height]} if possible.
+    Returns {page_num_str: [width, height]} if possible. Only images whose file name maps to a page
+    in `pages` (all pages if None) and not in `skip` are opened, and only their headers are read.
     """
     sizes: Dict[str, List[int]] = {}
     for name in zf.namelist():
         lower = name.lower()
         if not (lower.endswith(".png") or lower.endswith(".jpg") or lower.endswith(".jpeg")):
             continue
+        # Heuristic: extract page index from filename like ".../page_1.png" or ".../0.png"
+        page_num = _infer_page_num_from_filename(name)
+        if page_num is None:
+            continue
+        if (pages is not None and page_num not in pages) or (skip and str(page_num) in skip):
+            continue
         try:
             with zf.open(name) as f:
                 head = f.read(4096)
@@ -495,10 +758,7 @@ def _extract_page_canvas_sizes(zf: zipfile.ZipFile) -> Dict[str, List[int]]:
             if not w_h:
                 continue
             w, h = w_h
-            # Heuristic: extract page index from filename like ".../page_1.png" or ".../0.png"
-            page_num = _infer_page_num_from_filename(name)
-            if page_num is not None:
-                sizes[str(page_num)] = [int(w), int(h)]
+            sizes[str(page_num)] = [int(w), int(h)]
         except Exception:
             continue
     return sizes
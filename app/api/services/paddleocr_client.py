@@ -1,10 +1,11 @@
 import json
-import asyncio
-import time
 from typing import Any
 
 import httpx
 
+from config.config import settings
+from services.job_poller import JobPoller, raise_for_poll_status, shared_rate_limiter
+
 
 class PaddleOCRJobsClient:
     def __init__(
@@ -21,6 +22,13 @@ class PaddleOCRJobsClient:
         self.model = (model or "").strip() or "PaddleOCR-VL-1.5"
         self.poll_interval_sec = float(poll_interval_sec)
         self.max_wait_sec = float(max_wait_sec)
+        rate = float(settings.paddleocr_poll_rate_per_sec)
+        self.poller = JobPoller(
+            "paddleocr",
+            interval_sec=self.poll_interval_sec,
+            max_interval_sec=float(settings.paddleocr_poll_max_interval_sec),
+            rate_limiter=shared_rate_limiter("paddleocr", rate, burst=max(1, int(rate))),
+        )
 
     async def parse_image(self, image_bytes: bytes) -> dict[str, Any]:
         if not self.job_url or not self.token:
@@ -39,27 +47,28 @@ class PaddleOCRJobsClient:
             if not job_id:
                 raise RuntimeError(f"PaddleOCR job create response missing jobId: {payload}")
 
-            deadline = time.time() + self.max_wait_sec
-            json_url = None
-            while True:
-                if time.time() > deadline:
-                    raise TimeoutError("PaddleOCR job timed out")
-                r2 = await client.get(f"{self.job_url}/{job_id}", headers=headers)
-                r2.raise_for_status()
+            status_url = f"{self.job_url}/{job_id}"
+
+            async def check() -> str | None:
+                r2 = await client.get(status_url, headers=headers)
+                raise_for_poll_status(r2)
                 p2 = r2.json()
                 d2 = p2.get("data") if isinstance(p2, dict) else None
                 state = d2.get("state") if isinstance(d2, dict) else None
                 if state == "done":
                     ru = d2.get("resultUrl") if isinstance(d2, dict) else None
-                    if isinstance(ru, dict):
-                        json_url = ru.get("jsonUrl") or ru.get("jsonlUrl")
+                    json_url = (ru.get("jsonUrl") or ru.get("jsonlUrl")) if isinstance(ru, dict) else None
                     if not json_url:
                         raise RuntimeError(f"PaddleOCR job done but missing resultUrl: {p2}")
-                    break
+                    return json_url
                 if state == "failed":
                     msg = d2.get("errorMsg") if isinstance(d2, dict) else None
                     raise RuntimeError(f"PaddleOCR job failed: {msg}")
-                await asyncio.sleep(self.poll_interval_sec)
+                return None
+
+            json_url = await self.poller.poll(
+                check, max_wait_sec=self.max_wait_sec, timeout_message="PaddleOCR job timed out"
+            )
 
             r3 = await client.get(json_url)
             r3.raise_for_status()
@@ -0,0 +1,89 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Leading ordinal markers: 1、 1.2 (1) （一） 一、 ① a) 第三条 ...
+_CN_NUM = "一二三四五六七八九十百千零〇两"
+_ORDINAL_PREFIX = re.compile(
+    rf"""^\s*(?:
+        第\s*[{_CN_NUM}\d]+\s*[条章节款项部分篇]
+      | [（(]\s*(?:[{_CN_NUM}]+|\d+|[a-zA-Z])\s*[)）]
+      | [{_CN_NUM}]+\s*[、.．]
+      | \d+(?:[.．]\d+)*\s*[、.．)）]?
+      | [①-⑳⑴-⒇⒈-⒛❶-❿]
+      | [a-zA-Z]\s*[.．)）、]
+      | [ivxIVX]+\s*[.．)）、]
+    )\s*""",
+    re.VERBOSE,
+)
+# Page markers left in the text layer: "- 3 -", "第 3 页 共 10 页", "3/10".
+_PAGE_MARKER = re.compile(
+    rf"^\s*(?:[-—–]\s*\d+\s*[-—–]|第\s*[{_CN_NUM}\d]+\s*页(?:\s*[,，]?\s*共\s*[{_CN_NUM}\d]+\s*页)?|\d+\s*/\s*\d+|page\s*\d+(?:\s*of\s*\d+)?)\s*$",
+    re.IGNORECASE,
+)
+# A bare number ("2024", "12.5") is a value, not an ordinal: ordinals end in a marker ("1、", "1.").
+_BARE_NUMBER = re.compile(r"^\d+(?:[.．]\d+)*$")
+_DIGIT = re.compile(r"\d")
+_SEPARATOR = re.compile(r"^[\s\-—–_＿=＝*＊~～·•.。…|/\\#＃]+$")
+# Blanks to be filled in: ______, （    ）, [ ], and empty 年/月/日/元 fields. A line with any digit
+# carries a filled-in value ("2024年1月1日", "1.5年") and is reviewed.
+_PLACEHOLDER_TOKEN = r"(?:[_＿]+|[年月日元]|[（(]\s*[)）]|\[\s*\]|[:：/\-.．,，]|\s)"
+_PLACEHOLDER_LINE = re.compile(rf"^{_PLACEHOLDER_TOKEN}+$")
+_PLACEHOLDER_MARK = re.compile(r"[_＿年月日]")
+# Form fields whose value is still blank: "甲方（盖章）：________  日期：____年__月__日".
+_BLANK_TOKEN = r"(?:[_＿]+|[年月日元]|[（(]\s*[)）]|\[\s*\]|[/\-.．]|\s)"
+_FIELD_LINE = re.compile(rf"^\s*(?:[^\s:：。；;，,_＿]{{1,12}}\s*[:：]\s*{_BLANK_TOKEN}*)+$")
+# Checkbox option lines: "□是 □否", "☑ 同意  ☐ 不同意". "口" is how OCR usually reads "□", so it
+# only counts as a glyph when followed by whitespace.
+_CHECKBOX = "□☐☑☒■◻◼○◯●"
+_CHECKBOX_LINE = re.compile(
+    rf"^\s*(?:(?:[{_CHECKBOX}]|口(?=\s))\s*[^\s{_CHECKBOX}]{{0,10}}\s*)+$"
+)
+
+CATEGORIES = ("empty", "numbering", "separator", "checkbox", "placeholder", "field")
+
+
+def classify_paragraph(text: str) -> Optional[str]:
+    """
+    Return why a paragraph carries nothing to review (one of `CATEGORIES`), or None to keep it.
+    These are the same ordinal markers, blanks, checkboxes and separators the system prompt
+    tells the model to ignore.
+    """
+    s = (text or "").strip()
+    if not s:
+        return "empty"
+    if _PAGE_MARKER.match(s):
+        return "numbering"
+    rest = _ORDINAL_PREFIX.sub("", s, count=1).strip()
+    if not rest:
+        return None if _BARE_NUMBER.match(s) else "numbering"
+    if _SEPARATOR.match(rest):
+        return "separator"
+    if _CHECKBOX_LINE.match(rest):
+        return "checkbox"
+    if _PLACEHOLDER_LINE.match(rest) and _PLACEHOLDER_MARK.search(rest) and not _DIGIT.search(s):
+        return "placeholder"
+    if _FIELD_LINE.match(rest):
+        return "field"
+    return None
+
+
+def prefilter_paragraphs(paragraphs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Drop paragraphs that `classify_paragraph` marks as non-reviewable.
+    The kept paragraph dicts are returned unchanged (same objects, same order), so anchoring and
+    `global_index` are unaffected. Also returns per-category counts for the run.
+    """
+    kept: List[Dict[str, Any]] = []
+    stats: Dict[str, int] = {"total": len(paragraphs), "kept": 0, "dropped": 0, "dropped_chars": 0}
+    stats.update({c: 0 for c in CATEGORIES})
+    for para in paragraphs:
+        content = str(para.get("content") or "")
+        category = classify_paragraph(content)
+        if category is None:
+            kept.append(para)
+            continue
+        stats[category] += 1
+        stats["dropped"] += 1
+        stats["dropped_chars"] += len(content)
+    stats["kept"] = len(kept)
+    return kept, stats
@@ -0,0 +1,218 @@
+import threading
+from array import array
+from typing import Any, Dict, List, Optional
+
+import fitz
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+from common.logger import get_logger
+
+logging = get_logger(__name__)
+
+# MuPDF is not thread-safe; every fitz call made through a session is serialized on this lock.
+_FITZ_LOCK = threading.RLock()
+
+
+class PageCharIndex:
+    """
+    Whitespace-free text of one PDF page with a parallel bbox per character.
+
+    `text[i]` was drawn inside `boxes[i]` as (x0, y0, x1, y1). Boxes are a float32 (N, 4)
+    NumPy array when NumPy is installed, otherwise a flat `array("f")`.
+    """
+
+    __slots__ = ("text", "boxes")
+
+    def __init__(self, text: str, boxes: Any) -> None:
+        self.text = text
+        self.boxes = boxes
+
+    @classmethod
+    def from_rawdict(cls, raw: Dict[str, Any] | None) -> "PageCharIndex":
+        parts: list[str] = []
+        flat = array("f")
+        for b in (raw or {}).get("blocks") or []:
+            if not isinstance(b, dict):
+                continue
+            for ln in b.get("lines") or []:
+                if not isinstance(ln, dict):
+                    continue
+                for sp in ln.get("spans") or []:
+                    if not isinstance(sp, dict):
+                        continue
+                    for ch in sp.get("chars") or []:
+                        if not isinstance(ch, dict):
+                            continue
+                        c = ch.get("c")
+                        bbox = ch.get("bbox")
+                        if not c or not isinstance(bbox, (list, tuple)) or len(bbox) != 4:
+                            continue
+                        for cp in str(c):
+                            if cp.isspace():
+                                continue
+                            parts.append(cp)
+                            flat.extend(bbox)
+        text = "".join(parts)
+        if np is not None:
+            return cls(text, np.frombuffer(flat, dtype=np.float32).reshape(-1, 4))
+        return cls(text, flat)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def box(self, i: int) -> tuple[float, float, float, float]:
+        if np is not None:
+            x0, y0, x1, y1 = self.boxes[i].tolist()
+        else:
+            x0, y0, x1, y1 = self.boxes[i * 4 : i * 4 + 4]
+        return (x0, y0, x1, y1)
+
+    def find(self, needle: str, *, limit: int = 6) -> List[List[tuple[float, float, float, float]]]:
+        """Returns per-occurrence character boxes for up to `limit` occurrences of `needle`."""
+        out: List[List[tuple[float, float, float, float]]] = []
+        if not needle:
+            return out
+        start = 0
+        while len(out) < limit:
+            idx = self.text.find(needle, start)
+            if idx < 0:
+                break
+            out.append([self.box(i) for i in range(idx, idx + len(needle))])
+            start = idx + 1
+        return out
+
+
+class PdfDocumentSession:
+    """
+    Per-review handle on a PDF used for issue anchoring.
+
+    The file is opened lazily on first use and kept open until `close()`.
+    Pages, `get_text("rawdict")` output, per-page character indexes, plain-text lengths and page sizes are cached,
+    so locating many issues on the same document parses each page at most once.
+    Page numbers are 1-based throughout.
+
+    Methods may be called from worker threads; they serialize on a process-wide lock
+    exposed as `lock`, which callers can also hold to batch several lookups.
+    """
+
+    lock = _FITZ_LOCK
+
+    def __init__(self, pdf_path: str) -> None:
+        self.pdf_path = str(pdf_path)
+        self._doc: Optional[fitz.Document] = None
+        self._open_error: Optional[Exception] = None
+        self._pages: Dict[int, fitz.Page] = {}
+        self._rawdicts: Dict[int, Dict[str, Any]] = {}
+        self._char_indexes: Dict[int, PageCharIndex] = {}
+        self._text_lens: Dict[int, int] = {}
+        self._page_sizes: Optional[Dict[int, tuple[float, float]]] = None
+        self._closed = False
+
+    def _document(self) -> fitz.Document:
+        if self._closed:
+            raise RuntimeError(f"PDF session already closed: {self.pdf_path}")
+        if self._doc is None:
+            if self._open_error is not None:
+                raise self._open_error
+            try:
+                self._doc = fitz.open(self.pdf_path)
+            except Exception as e:
+                self._open_error = e
+                raise
+        return self._doc
+
+    @property
+    def page_count(self) -> int:
+        with self.lock:
+            return int(self._document().page_count)
+
+    def page(self, page_num: int) -> Optional[fitz.Page]:
+        with self.lock:
+            page = self._pages.get(page_num)
+            if page is not None:
+                return page
+            doc = self._document()
+            if page_num < 1 or page_num > doc.page_count:
+                return None
+            page = doc.load_page(page_num - 1)
+            self._pages[page_num] = page
+            return page
+
+    def rawdict(self, page_num: int) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            if page_num in self._rawdicts:
+                return self._rawdicts[page_num]
+            page = self.page(page_num)
+            if page is None:
+                return None
+            raw = page.get_text("rawdict")
+            self._rawdicts[page_num] = raw if isinstance(raw, dict) else {}
+            return self._rawdicts[page_num]
+
+    def char_index(self, page_num: int) -> Optional[PageCharIndex]:
+        with self.lock:
+            index = self._char_indexes.get(page_num)
+            if index is not None:
+                return index
+            raw = self.rawdict(page_num)
+            if raw is None:
+                return None
+            index = PageCharIndex.from_rawdict(raw)
+            self._char_indexes[page_num] = index
+            # The index supersedes the rawdict for anchoring; drop it to bound memory.
+            self._rawdicts.pop(page_num, None)
+            return index
+
+    def text_len(self, page_num: int) -> int:
+        with self.lock:
+            if page_num in self._text_lens:
+                return self._text_lens[page_num]
+            page = self.page(page_num)
+            if page is None:
+                return 0
+            txt = page.get_text("text") or ""
+            self._text_lens[page_num] = len(str(txt).strip())
+            return self._text_lens[page_num]
+
+    def page_sizes(self) -> Dict[int, tuple[float, float]]:
+        """Returns PDF page (width,height) in points, keyed by 1-based page number."""
+        if self._page_sizes is not None:
+            return self._page_sizes
+        sizes: Dict[int, tuple[float, float]] = {}
+        try:
+            with self.lock:
+                for i in range(1, self.page_count + 1):
+                    page = self.page(i)
+                    if page is None:
+                        continue
+                    rect = page.rect
+                    sizes[i] = (float(rect.width), float(rect.height))
+        except Exception as e:
+            logging.warning(f"Unable to read PDF page sizes for bbox conversion: {e}")
+        self._page_sizes = sizes
+        return sizes
+
+    def close(self) -> None:
+        with self.lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._pages.clear()
+            self._rawdicts.clear()
+            self._char_indexes.clear()
+            if self._doc is not None:
+                try:
+                    self._doc.close()
+                except Exception:
+                    pass
+                self._doc = None
+
+    def __enter__(self) -> "PdfDocumentSession":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,110 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from common.logger import get_logger
+from common.models import Issue
+
+logging = get_logger(__name__)
+
+
+@dataclass
+class ReviewEvent:
+    """A review update for one (owner_id, document_id): either a batch of stored issues or a run status change."""
+
+    kind: str  # "issues" | "status"
+    issues: List[Issue] = field(default_factory=list)
+    status: Optional[str] = None
+    run_id: Optional[str] = None
+    error_message: Optional[str] = None
+
+
+class ReviewSubscription:
+    """
+    Bounded queue of events for one SSE client.
+
+    If the client falls behind and the queue fills up, further events are dropped and `overflowed`
+    is set; the consumer is expected to resynchronise from the database.
+    """
+
+    def __init__(self, bus: "ReviewEventBus", key: Tuple[str, str], max_queue: int) -> None:
+        self._bus = bus
+        self.key = key
+        self.queue: asyncio.Queue[ReviewEvent] = asyncio.Queue(maxsize=max(1, max_queue))
+        self.overflowed = False
+
+    def _offer(self, event: ReviewEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout: float | None = None) -> Optional[ReviewEvent]:
+        """Next event, or None if `timeout` elapses first."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self._bus._unsubscribe(self)
+
+    def __enter__(self) -> "ReviewSubscription":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class ReviewEventBus:
+    """
+    In-process pub/sub for review progress.
+
+    `IssuesService` publishes issue batches after they are stored and every run status transition;
+    SSE endpoints subscribe per document instead of polling SQLite. Events are only delivered to
+    subscribers in this process, so consumers still read the database on connect.
+    """
+
+    def __init__(self, *, max_queue: int = 256) -> None:
+        self.max_queue = max_queue
+        self._subscribers: Dict[Tuple[str, str], Set[ReviewSubscription]] = {}
+
+    def subscribe(self, owner_id: str, document_id: str) -> ReviewSubscription:
+        key = (owner_id, document_id)
+        sub = ReviewSubscription(self, key, self.max_queue)
+        self._subscribers.setdefault(key, set()).add(sub)
+        return sub
+
+    def _unsubscribe(self, sub: ReviewSubscription) -> None:
+        subs = self._subscribers.get(sub.key)
+        if not subs:
+            return
+        subs.discard(sub)
+        if not subs:
+            self._subscribers.pop(sub.key, None)
+
+    def subscriber_count(self, owner_id: str, document_id: str) -> int:
+        return len(self._subscribers.get((owner_id, document_id)) or ())
+
+    def publish(self, owner_id: str, document_id: str, event: ReviewEvent) -> None:
+        for sub in list(self._subscribers.get((owner_id, document_id)) or ()):
+            sub._offer(event)
+
+    def publish_issues(self, owner_id: str, document_id: str, issues: List[Issue]) -> None:
+        if issues:
+            self.publish(owner_id, document_id, ReviewEvent(kind="issues", issues=list(issues)))
+
+    def publish_status(
+        self,
+        owner_id: str,
+        document_id: str,
+        status: str,
+        *,
+        run_id: Optional[str] = None,
+        error_message: Optional[str] = None,
+    ) -> None:
+        self.publish(
+            owner_id,
+            document_id,
+            ReviewEvent(kind="status", status=status, run_id=run_id, error_message=error_message),
+        )
@@ -0,0 +1,134 @@
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import PurePath
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+# Revision markers people append to file names: "_v2", " rev3", "(1)", "-修订版", "_20240501", "副本" ...
+_OPEN, _CLOSE = r"[(（\[【]?\s*", r"\s*[)）\]】]?"
+_LINEAGE_SUFFIXES = [
+    re.compile(p + "$", re.IGNORECASE)
+    for p in (
+        rf"(?<![a-z])[\s_\-.]*{_OPEN}(?:v|ver|version|rev|r)\s*\d+(?:\.\d+)*{_CLOSE}",
+        rf"(?<![a-z])[\s_\-.]*{_OPEN}(?:copy|final|draft|clean|redline){_CLOSE}",
+        rf"[\s_\-.]*{_OPEN}(?:副本|修订版?|修改版?|修订稿|修改稿|终稿|定稿|最终版?|草稿|初稿|第[一二三四五六七八九十\d]+稿|新版|旧版){_CLOSE}",
+        rf"[\s_\-.]*{_OPEN}(?:19|20)\d{{2}}[\-_.]?\d{{2}}[\-_.]?\d{{2}}{_CLOSE}",
+        r"[\s_\-.]*[(（\[【]\s*\d{1,3}\s*[)）\]】]",
+    )
+]
+
+
+def normalize_paragraph(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", str(text or ""))).strip()
+
+
+def paragraph_hash(text: str) -> str:
+    """Content hash of a paragraph that ignores width variants and whitespace changes."""
+    return hashlib.sha256(normalize_paragraph(text).encode("utf-8")).hexdigest()[:32]
+
+
+def filename_lineage(filename: str) -> str:
+    """
+    Key shared by revisions of the same document: the file stem without version, date or copy
+    markers, e.g. "劳动合同_v2.pdf", "劳动合同（修订版）.pdf" and "劳动合同 (1).pdf" -> "劳动合同".
+    """
+    stem = unicodedata.normalize("NFKC", PurePath(str(filename or "")).stem).strip().lower()
+    previous = None
+    while previous != stem:
+        previous = stem
+        for pattern in _LINEAGE_SUFFIXES:
+            stem = pattern.sub("", stem).strip()
+    return _WHITESPACE.sub(" ", stem)
+
+
+@dataclass
+class RevisionContext:
+    """
+    Paragraph-level bookkeeping for one review run.
+
+    The pipeline always records the hashes of the paragraphs it covered in `paragraph_hashes`, so
+    the run can serve as the baseline for a later revision. When `base_hashes` is set (the run
+    reviews a new revision of an earlier document), paragraphs found there are not sent to the LLM
+    again; their issues from `base_issues` (canonical rows of the base run, with `location` decoded)
+    are re-anchored instead.
+    """
+
+    base_run_id: Optional[str] = None
+    base_hashes: Set[str] = field(default_factory=set)
+    base_issues: List[Dict[str, Any]] = field(default_factory=list)
+    context_paragraphs: int = 1
+    paragraph_hashes: List[str] = field(default_factory=list)
+    stats: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def has_baseline(self) -> bool:
+        return bool(self.base_hashes)
+
+
+def select_revised_paragraphs(
+    paragraphs: List[Dict[str, Any]], revision: RevisionContext
+) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """
+    Split a revision's paragraphs into those to send to the LLM and issues to reuse.
+
+    Returns `(to_review, reused)`. `to_review` holds changed/new paragraphs plus up to
+    `context_paragraphs` unchanged neighbours on each side; neighbours are shallow copies flagged
+    `context_only`, so issues the model reports on them are ignored (their reused issues stand).
+    `reused` pairs each base issue with the unchanged paragraph of this revision it belongs to.
+    """
+    hashes = [paragraph_hash(p.get("content") or "") for p in paragraphs]
+    revision.paragraph_hashes = list(dict.fromkeys(hashes))
+    changed = [h not in revision.base_hashes for h in hashes]
+
+    context = max(0, int(revision.context_paragraphs))
+    to_review: List[Dict[str, Any]] = []
+    n_context = 0
+    for i, para in enumerate(paragraphs):
+        if changed[i]:
+            to_review.append(para)
+        elif any(changed[j] for j in range(max(0, i - context), min(len(paragraphs), i + context + 1))):
+            to_review.append({**para, "context_only": True})
+            n_context += 1
+
+    by_hash: Dict[str, List[Dict[str, Any]]] = {}
+    for row in revision.base_issues:
+        by_hash.setdefault(paragraph_hash(_issue_source(row)), []).append(row)
+    first_para: Dict[str, Dict[str, Any]] = {}
+    for para, h, is_changed in zip(paragraphs, hashes, changed):
+        if not is_changed:
+            first_para.setdefault(h, para)
+
+    reused: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+    unmatched: List[Dict[str, Any]] = []
+    for h, rows in by_hash.items():
+        para = first_para.get(h)
+        if para is not None:
+            reused.extend((row, para) for row in rows)
+        else:
+            unmatched.extend(rows)
+    # Issues recorded against part of a paragraph (an oversized table split for the LLM).
+    for row in unmatched:
+        source = normalize_paragraph(_issue_source(row))
+        if not source:
+            continue
+        for h, para in first_para.items():
+            if source in normalize_paragraph(para.get("content") or ""):
+                reused.append((row, para))
+                break
+
+    revision.stats = {
+        "paragraphs": len(paragraphs),
+        "changed": sum(changed),
+        "context": n_context,
+        "reused_paragraphs": len(paragraphs) - sum(changed),
+        "reused_issues": len(reused),
+        "dropped_issues": len(revision.base_issues) - len(reused),
+    }
+    return to_review, reused
+
+
+def _issue_source(row: Dict[str, Any]) -> str:
+    location = row.get("location") if isinstance(row.get("location"), dict) else None
+    return str((location or {}).get("source_sentence") or "")
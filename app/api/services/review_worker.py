@@ -0,0 +1,173 @@
+import asyncio
+import os
+import socket
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set, Tuple
+from uuid import uuid4
+
+from common.logger import get_logger
+from config.config import settings
+from database.review_jobs_repository import ReviewJobsRepository
+
+if TYPE_CHECKING:
+    from services.issues_service import IssuesService
+
+logging = get_logger(__name__)
+
+
+class ReviewWorker:
+    """
+    Executes queued review jobs from `ReviewJobsRepository`.
+
+    Up to `concurrency` jobs run at once. Each running job heartbeats its lease; if the lease is
+    lost or cancellation is requested through the job row, the job's task is cancelled. Expired
+    leases left by crashed workers are picked up again by `claim`, and jobs that exhausted their
+    attempts are failed by `reap_exhausted`.
+
+    A job stopped because this worker no longer owns it (lease lost, or released on shutdown) is
+    flagged `interrupted` before its task is cancelled: the run is not finished, since another
+    worker resumes it. Only a requested cancellation ends the run as cancelled.
+
+    The web process embeds one worker (`review_worker_mode="inline"`); more can be started as
+    separate processes with `scripts/run_review_worker.py`.
+    """
+
+    def __init__(
+        self,
+        issues_service: "IssuesService",
+        jobs_repository: ReviewJobsRepository,
+        *,
+        worker_id: str | None = None,
+        concurrency: int | None = None,
+        lease_sec: float | None = None,
+        heartbeat_sec: float | None = None,
+        poll_sec: float | None = None,
+    ) -> None:
+        self.issues_service = issues_service
+        self.jobs_repository = jobs_repository
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.concurrency = max(1, int(concurrency if concurrency is not None else settings.review_worker_concurrency))
+        self.lease_sec = float(lease_sec if lease_sec is not None else settings.review_job_lease_sec)
+        self.heartbeat_sec = float(heartbeat_sec if heartbeat_sec is not None else settings.review_job_heartbeat_sec)
+        self.poll_sec = float(poll_sec if poll_sec is not None else settings.review_job_poll_sec)
+        self._running: Dict[str, Tuple[Dict[str, Any], asyncio.Task]] = {}
+        self._supervisors: Set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+
+    def wake(self) -> None:
+        """Skip the poll interval, e.g. right after a job was enqueued in this process."""
+        self._wake.set()
+
+    def cancel_local(self, owner_id: str, document_id: str) -> bool:
+        """Cancel running jobs for a document immediately instead of waiting for the next heartbeat."""
+        cancelled = False
+        for job, task in list(self._running.values()):
+            if job["owner_id"] == owner_id and job["document_id"] == document_id and not task.done():
+                task.cancel()
+                cancelled = True
+        return cancelled
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        logging.info(f"Review worker {self.worker_id} started (concurrency={self.concurrency})")
+        try:
+            while stop is None or not stop.is_set():
+                await self.run_once()
+                self._wake.clear()
+                # Not `wait_for`: before Python 3.12 it can swallow a cancellation that arrives just
+                # as the wake event is set, and the worker would then never stop.
+                waiter = asyncio.ensure_future(self._wake.wait())
+                try:
+                    await asyncio.wait({waiter}, timeout=self.poll_sec)
+                finally:
+                    waiter.cancel()
+        finally:
+            await self._shutdown()
+            logging.info(f"Review worker {self.worker_id} stopped")
+
+    async def run_once(self) -> int:
+        """Reap dead jobs and claim as many jobs as there is capacity for. Returns the number started."""
+        try:
+            for job in await self.jobs_repository.reap_exhausted():
+                await self.issues_service.finish_review_job(job, status=job["status"], error_message=job["error_message"])
+        except Exception as e:
+            logging.warning(f"Review worker {self.worker_id} failed to reap jobs: {e}")
+
+        started = 0
+        while len(self._running) < self.concurrency:
+            try:
+                job = await self.jobs_repository.claim(worker_id=self.worker_id, lease_sec=self.lease_sec)
+            except Exception as e:
+                logging.warning(f"Review worker {self.worker_id} failed to claim a job: {e}")
+                break
+            if job is None:
+                break
+            task = asyncio.create_task(self.issues_service.run_review_job(job))
+            self._running[job["id"]] = (job, task)
+            supervisor = asyncio.create_task(self._supervise(job, task))
+            self._supervisors.add(supervisor)
+            supervisor.add_done_callback(self._supervisors.discard)
+            started += 1
+        return started
+
+    @staticmethod
+    def _interrupt(job: Dict[str, Any], task: asyncio.Task) -> None:
+        """Stop a job this worker no longer owns, leaving its run for the next owner."""
+        job["interrupted"] = True
+        task.cancel()
+
+    async def _supervise(self, job: Dict[str, Any], task: asyncio.Task) -> None:
+        job_id = job["id"]
+        heartbeat = asyncio.create_task(self._heartbeat(job, task))
+        try:
+            try:
+                status = await task
+                error = None
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+                if job.get("interrupted"):
+                    return
+                status, error = ReviewJobsRepository.STATUS_CANCELLED, "任务已取消"
+            except Exception as e:
+                logging.error(f"Review job {job_id} failed: {e}")
+                status, error = ReviewJobsRepository.STATUS_FAILED, str(e)
+                await self.issues_service.finish_review_job(job, status=status, error_message=error)
+            await self.jobs_repository.finish(job_id, worker_id=self.worker_id, status=status, error_message=error)
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job_id, None)
+            self._wake.set()
+
+    async def _heartbeat(self, job: Dict[str, Any], task: asyncio.Task) -> None:
+        while not task.done():
+            await asyncio.sleep(self.heartbeat_sec)
+            try:
+                state = await self.jobs_repository.heartbeat(job["id"], worker_id=self.worker_id, lease_sec=self.lease_sec)
+            except Exception as e:
+                logging.warning(f"Heartbeat for review job {job['id']} failed: {e}")
+                continue
+            if state is None:
+                logging.warning(f"Review job {job['id']} lease lost; stopping local execution")
+                self._interrupt(job, task)
+                return
+            if state:
+                logging.info(f"Review job {job['id']} cancellation requested")
+                task.cancel()
+                return
+
+    async def _shutdown(self) -> None:
+        """Hand running jobs back to the queue so another worker can resume them."""
+        running = list(self._running.values())
+        for job, task in running:
+            self._interrupt(job, task)
+        for _, task in running:
+            try:
+                await task
+            except BaseException:
+                pass
+        # Let supervisors record the outcome before the caller closes the database.
+        if self._supervisors:
+            await asyncio.gather(*self._supervisors, return_exceptions=True)
+        # Release only once the tasks have stopped, so the next owner never overlaps with them.
+        for job, task in running:
+            if task.cancelled():
+                await self.jobs_repository.release(job["id"], worker_id=self.worker_id)
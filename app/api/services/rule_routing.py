@@ -0,0 +1,127 @@
+import math
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from common.models import ReviewRule, RuleTypeEnum
+from services.chunking import estimate_tokens
+
+_CJK_RUN = re.compile("[\u3400-\u9fff\uf900-\ufaff]{2,}")
+_WORD = re.compile(r"[a-z][a-z0-9_\-]{2,}")
+
+# Words of rule boilerplate ("检查合同是否约定…", "check whether the clause ...") that say nothing
+# about which text a rule applies to.
+_STOP_TERMS = frozenset(
+    {
+        "是否", "应当", "应该", "需要", "必须", "不得", "不能", "可以", "进行", "存在", "相关", "有关",
+        "内容", "问题", "检查", "审核", "审查", "规定", "约定", "条款", "合同", "文书", "文件",
+        "情况", "要求", "明确", "包括", "以及", "或者", "如果", "其他", "一方", "双方",
+        "the", "and", "for", "with", "that", "this", "are", "not", "any", "shall", "must", "should",
+        "whether", "check", "clause", "contract", "agreement", "document", "party", "parties",
+    }
+)
+
+# Term weights by where the term came from: the rule name is the most specific signal.
+_NAME_WEIGHT, _EXAMPLE_WEIGHT, _DESCRIPTION_WEIGHT = 2.0, 1.5, 1.0
+
+
+def extract_terms(text: str) -> Set[str]:
+    """CJK character bigrams and Latin words (3+ chars) of `text`, lower-cased and NFKC-normalized."""
+    s = unicodedata.normalize("NFKC", str(text or "")).lower()
+    terms: Set[str] = set()
+    for run in _CJK_RUN.findall(s):
+        terms.update(run[i : i + 2] for i in range(len(run) - 1))
+    terms.update(_WORD.findall(s))
+    return terms - _STOP_TERMS
+
+
+def _always_on(rule: ReviewRule) -> bool:
+    # Universal rules apply to every document; exclusion rules narrow what the model may report.
+    return bool(rule.is_universal) or rule.rule_type == RuleTypeEnum.exclusion.value
+
+
+def _rule_terms(rule: ReviewRule) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    sources = [(rule.name, _NAME_WEIGHT), (rule.description, _DESCRIPTION_WEIGHT)]
+    sources += [(ex.text, _EXAMPLE_WEIGHT) for ex in (rule.examples or [])[:3]]
+    for text, weight in sources:
+        for term in extract_terms(text):
+            weights[term] = max(weights.get(term, 0.0), weight)
+    return weights
+
+
+@dataclass
+class RuleSignature:
+    rule: ReviewRule
+    # term -> weight x IDF across the rule set
+    terms: Dict[str, float]
+    norm: float
+
+
+class RuleRouter:
+    """
+    Pick, for each chunk, the custom rules whose wording it shares.
+
+    Signatures are built once per review from each rule's name, description and first three
+    examples. A chunk gets the `top_k` best-scoring rules with any overlap, plus always-on rules
+    (universal and exclusion rules). Terms shared by many rules count for less (IDF), and scores
+    are normalized by signature size so long descriptions do not win by length alone.
+    """
+
+    def __init__(self, rules: Sequence[ReviewRule], *, top_k: int) -> None:
+        self.rules = list(rules)
+        self.top_k = max(0, int(top_k))
+        routed = [r for r in self.rules if not _always_on(r)]
+        raw = [_rule_terms(r) for r in routed]
+        df: Dict[str, int] = {}
+        for terms in raw:
+            for term in terms:
+                df[term] = df.get(term, 0) + 1
+        n = max(1, len(raw))
+        self.signatures: List[RuleSignature] = []
+        for rule, terms in zip(routed, raw):
+            weighted = {t: w * math.log(1 + n / df[t]) for t, w in terms.items()}
+            norm = math.sqrt(sum(v * v for v in weighted.values())) or 1.0
+            self.signatures.append(RuleSignature(rule=rule, terms=weighted, norm=norm))
+
+    @property
+    def active(self) -> bool:
+        """Routing only pays off when there are more routable rules than `top_k`."""
+        return 0 < self.top_k < len(self.signatures)
+
+    def score(self, text: str) -> List[Tuple[ReviewRule, float]]:
+        """Routable rules with a positive score for `text`, best first."""
+        chunk_terms = extract_terms(text)
+        scored = []
+        for sig in self.signatures:
+            matched = sum(v for t, v in sig.terms.items() if t in chunk_terms)
+            if matched > 0:
+                scored.append((sig.rule, matched / sig.norm))
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored
+
+    def select(self, texts: Iterable[str]) -> Tuple[List[ReviewRule], List[Tuple[str, float]]]:
+        """
+        Rules to send with a chunk made of `texts`, in rule-set order (so identical selections give
+        identical prompts), and the `(name, score)` of the routed ones for logging.
+        """
+        if not self.active:
+            return list(self.rules), []
+        top = self.score("\n".join(texts))[: self.top_k]
+        picked = {id(rule) for rule, _ in top}
+        selected = [r for r in self.rules if _always_on(r) or id(r) in picked]
+        return selected, [(rule.name, round(score, 3)) for rule, score in top]
+
+    def budget_rules(self) -> List[ReviewRule]:
+        """The largest rule set `select` can return, for sizing chunks against the prompt budget."""
+        if not self.active:
+            return list(self.rules)
+        largest = sorted(self.signatures, key=lambda s: _rule_prompt_tokens(s.rule), reverse=True)[: self.top_k]
+        picked = {id(s.rule) for s in largest}
+        return [r for r in self.rules if _always_on(r) or id(r) in picked]
+
+
+def _rule_prompt_tokens(rule: ReviewRule) -> int:
+    examples = " ".join(ex.text for ex in (rule.examples or [])[:3])
+    return estimate_tokens(f"{rule.name} {rule.description} {examples}")
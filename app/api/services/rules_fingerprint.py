@@ -5,6 +5,40 @@ from typing import Any, Dict, Iterable, List
 from common.models import ReviewRule
 
 
+def _canonical_rule_item(r: ReviewRule) -> Dict[str, Any]:
+    item = {
+        "id": r.id,
+        "name": r.name,
+        "description": r.description,
+        "risk_level": r.risk_level,
+        "examples": [e.model_dump() if hasattr(e, "model_dump") else e for e in r.examples or []],
+        "rule_type": r.rule_type,
+        "source": r.source,
+        "status": r.status,
+        "is_universal": r.is_universal,
+        "type_ids": sorted(list(r.type_ids or [])),
+        "subtype_ids": sorted(list(r.subtype_ids or [])),
+    }
+    # Only present when set, so fingerprints of rules without a local check stay as they were.
+    if r.local_check is not None:
+        item["local_check"] = r.local_check.model_dump()
+    return item
+
+
+def _fingerprint(payload: Any) -> str:
+    data = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def compute_review_rule_fingerprint(rule: ReviewRule) -> str:
+    """Fingerprint of a single rule; changes whenever anything that can affect its review output changes."""
+    item = _canonical_rule_item(rule)
+    # Where the rule applies does not change what it finds in a given document.
+    for k in ("type_ids", "subtype_ids", "is_universal", "status"):
+        item.pop(k)
+    return _fingerprint(item)
+
+
 def build_review_rules_snapshot_items(rules: Iterable[ReviewRule]) -> List[Dict[str, Any]]:
     items = []
     for r in rules:
@@ -14,6 +48,7 @@ def build_review_rules_snapshot_items(rules: Iterable[ReviewRule]) -> List[Dict[
                 "name": r.name,
                 "description": r.description,
                 "risk_level": r.risk_level,
+                "fingerprint": compute_review_rule_fingerprint(r),
             }
         )
     items.sort(key=lambda x: x["id"])
@@ -21,25 +56,33 @@ def build_review_rules_snapshot_items(rules: Iterable[ReviewRule]) -> List[Dict[
 
 
 def compute_review_rules_fingerprint(rules: Iterable[ReviewRule]) -> str:
-    canonical_items: List[Dict[str, Any]] = []
-    for r in rules:
-        canonical_items.append(
-            {
-                "id": r.id,
-                "name": r.name,
-                "description": r.description,
-                "risk_level": r.risk_level,
-                "examples": r.examples or [],
-                "rule_type": r.rule_type,
-                "source": r.source,
-                "status": r.status,
-                "is_universal": r.is_universal,
-                "type_ids": sorted(list(r.type_ids or [])),
-                "subtype_ids": sorted(list(r.subtype_ids or [])),
-            }
-        )
-
+    canonical_items: List[Dict[str, Any]] = [_canonical_rule_item(r) for r in rules]
     canonical_items.sort(key=lambda x: x["id"])
-    payload = json.dumps(canonical_items, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
-    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return _fingerprint(canonical_items)
+
 
+def diff_review_rules_snapshots(
+    previous: Iterable[Dict[str, Any]], current: Iterable[Dict[str, Any]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Compare two `build_review_rules_snapshot_items` lists by rule id.
+    Returns `added`/`modified`/`unchanged` items from `current` and `removed` items from `previous`.
+    Snapshots stored before per-rule fingerprints existed are compared on name, description and risk level.
+    """
+    prev_by_id = {str(p.get("id")): p for p in previous if isinstance(p, dict)}
+    out: Dict[str, List[Dict[str, Any]]] = {"added": [], "modified": [], "removed": [], "unchanged": []}
+    seen = set()
+    for item in current:
+        rule_id = str(item.get("id"))
+        seen.add(rule_id)
+        prev = prev_by_id.get(rule_id)
+        if prev is None:
+            out["added"].append(item)
+        elif prev.get("fingerprint") and item.get("fingerprint"):
+            out["unchanged" if prev["fingerprint"] == item["fingerprint"] else "modified"].append(item)
+        elif all(str(prev.get(k)) == str(item.get(k)) for k in ("name", "description", "risk_level")):
+            out["unchanged"].append(item)
+        else:
+            out["modified"].append(item)
+    out["removed"] = [p for rule_id, p in prev_by_id.items() if rule_id not in seen]
+    return out
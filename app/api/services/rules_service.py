@@ -1,10 +1,11 @@
+import re
 from common.logger import get_logger
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
 from common.models import (
-    ReviewRule, RiskLevel, RuleExample, RuleStatusEnum,
+    ReviewRule, RiskLevel, RuleExample, RuleLocalCheck, RuleStatusEnum,
     RuleTypeEnum, RuleSourceEnum, DocumentType, DocumentSubtype
 )
 from database.rules_repository import RulesRepository
@@ -15,6 +16,19 @@ class RuleValidationError(Exception):
     pass
 
 
+def _validate_local_check(local_check: RuleLocalCheck | Dict[str, Any] | None) -> None:
+    if local_check is None:
+        return
+    check = RuleLocalCheck.model_validate(local_check)
+    for pattern in check.patterns:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise RuleValidationError(f"本地检查正则表达式无效: {pattern} ({e})")
+    if not (check.patterns or any(t.strip() for t in check.lexicon) or check.amount_consistency):
+        raise RuleValidationError("本地检查至少需要一个正则表达式、词条或金额一致性检查")
+
+
 class RulesService:
     def __init__(self, rules_repository: RulesRepository) -> None:
         self.rules_repository = rules_repository
@@ -41,7 +55,9 @@ class RulesService:
         is_universal: Optional[bool] = None,
         type_ids: Optional[List[str]] = None,
         subtype_ids: Optional[List[str]] = None,
+        local_check: Optional[RuleLocalCheck] = None,
     ) -> ReviewRule:
+        _validate_local_check(local_check)
         resolved_type_ids = list(type_ids or [])
         resolved_subtype_ids = list(subtype_ids or [])
 
@@ -76,6 +92,7 @@ class RulesService:
             source=source,
             status=RuleStatusEnum.active,
             is_universal=is_universal,
+            local_check=local_check,
             created_at=datetime.now(timezone.utc).isoformat(),
             type_ids=resolved_type_ids,
             subtype_ids=resolved_subtype_ids,
@@ -89,6 +106,7 @@ class RulesService:
         return created_rule
 
     async def update_rule(self, rule_id: str, fields: Dict[str, Any]) -> ReviewRule:
+        _validate_local_check(fields.get("local_check"))
         fields["updated_at"] = datetime.now(timezone.utc).isoformat()
         subtype_ids = fields.pop("subtype_ids", None)
         type_ids = fields.pop("type_ids", None)
@@ -0,0 +1,95 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from uuid import uuid4
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from common.models import DocumentIR, IRParagraph, IRTextRun, Issue, IssueStatusEnum
+from config.config import settings
+from services.lc_pipeline import LangChainPipeline
+
+
+def _make_ir(n: int) -> DocumentIR:
+    return DocumentIR(
+        blocks=[IRParagraph(id=f"p{i}", runs=[IRTextRun(id=f"r{i}", text=f"段落{i}")]) for i in range(n)]
+    )
+
+
+class _FakeChunkPipeline(LangChainPipeline):
+    def __init__(self, delays: list[float]) -> None:
+        self.delays = delays
+        self.llm_cache = None
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _process_ir_chunk(self, *, chunk, chunk_index, user_id, timestamp_iso, doc_id, custom_rules=None, rules_only=False):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays[chunk_index])
+        finally:
+            self.in_flight -= 1
+        return [
+            Issue(
+                id=str(uuid4()),
+                doc_id=doc_id,
+                text=str(chunk_index),
+                type="Grammar & Spelling",
+                status=IssueStatusEnum.not_reviewed,
+                suggested_fix="",
+                explanation="",
+                review_initiated_by=user_id,
+                review_initiated_at_UTC=timestamp_iso,
+            )
+        ]
+
+
+class TestChunkConcurrency(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._orig = (settings.pagination, settings.review_chunk_concurrency, settings.review_chunk_order)
+        settings.pagination = 1
+
+    def tearDown(self):
+        settings.pagination, settings.review_chunk_concurrency, settings.review_chunk_order = self._orig
+
+    async def _collect(self, pipeline: LangChainPipeline, n: int) -> list[str]:
+        out: list[str] = []
+        async for issues in pipeline.stream_ir_issues(doc_id="d", ir=_make_ir(n), user_id="u", timestamp_iso="t"):
+            out.extend([i.text for i in issues])
+        return out
+
+    async def test_completion_order_respects_limit(self):
+        settings.review_chunk_concurrency = 2
+        settings.review_chunk_order = "completion"
+        pipeline = _FakeChunkPipeline([0.06, 0.01, 0.03, 0.01])
+        order = await self._collect(pipeline, 4)
+        self.assertEqual(sorted(order), ["0", "1", "2", "3"])
+        self.assertNotEqual(order[0], "0")
+        self.assertEqual(pipeline.max_in_flight, 2)
+
+    async def test_document_order(self):
+        settings.review_chunk_concurrency = 4
+        settings.review_chunk_order = "document"
+        pipeline = _FakeChunkPipeline([0.05, 0.01, 0.03, 0.0])
+        order = await self._collect(pipeline, 4)
+        self.assertEqual(order, ["0", "1", "2", "3"])
+        self.assertEqual(pipeline.max_in_flight, 4)
+
+    async def test_early_close_cancels_pending_chunks(self):
+        settings.review_chunk_concurrency = 2
+        settings.review_chunk_order = "completion"
+        pipeline = _FakeChunkPipeline([0.0, 5.0, 5.0, 5.0])
+        agen = pipeline.stream_ir_issues(doc_id="d", ir=_make_ir(4), user_id="u", timestamp_iso="t")
+        first = await agen.__anext__()
+        self.assertEqual([i.text for i in first], ["0"])
+        await asyncio.wait_for(agen.aclose(), timeout=1.0)
+        self.assertEqual(pipeline.in_flight, 0)
@@ -0,0 +1,104 @@
+import sys
+import unittest
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from config.config import settings
+from services.chunking import (
+    PARAGRAPH_OVERHEAD_TOKENS,
+    chunk_by_token_budget,
+    estimate_tokens,
+    split_paragraph,
+    uses_token_budget,
+)
+from services.lc_pipeline import LangChainPipeline, _prompt_overhead_tokens
+
+
+def _cost(chunk) -> int:
+    return sum(estimate_tokens(p["content"]) + PARAGRAPH_OVERHEAD_TOKENS for p in chunk)
+
+
+class TestTokenBudgetChunking(unittest.TestCase):
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("合同条款"), 4)
+        self.assertEqual(estimate_tokens("abcdefgh ab"), 3)
+
+    def test_packs_small_paragraphs_and_respects_budget(self):
+        paras = [{"content": "短句。", "global_index": i} for i in range(100)]
+        chunks = chunk_by_token_budget(paras, budget_tokens=200, overhead_tokens=100)
+        self.assertEqual([p["global_index"] for c in chunks for p in c], list(range(100)))
+        self.assertGreater(len(chunks[0]), 10)
+        for c in chunks:
+            self.assertLessEqual(_cost(c), 100)
+
+    def test_max_paragraphs_caps_chunks(self):
+        paras = [{"content": "短句。", "global_index": i} for i in range(10)]
+        chunks = chunk_by_token_budget(paras, budget_tokens=10_000, overhead_tokens=0, max_paragraphs=4)
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2])
+
+    def test_strategy_setting_is_normalized(self):
+        self.assertTrue(uses_token_budget("tokens", 30))
+        self.assertTrue(uses_token_budget(" Tokens\n", 30))
+        self.assertFalse(uses_token_budget("tokens", -1))
+        self.assertFalse(uses_token_budget("paragraphs", 30))
+        self.assertFalse(uses_token_budget(None, 30))
+
+    def test_oversized_table_split_on_rows(self):
+        rows = [f"第{i}行\t单元格内容{i}\t金额{i}元" for i in range(60)]
+        table = {"content": "\n".join(rows), "global_index": 7, "node_id": "t1", "block_type": "table"}
+        chunks = chunk_by_token_budget([table], budget_tokens=164, overhead_tokens=64)
+        self.assertGreater(len(chunks), 1)
+        parts = [p for c in chunks for p in c]
+        self.assertTrue(all(p["global_index"] == 7 and p["node_id"] == "t1" for p in parts))
+        # Every part is whole rows, and content_offset points back into the original text.
+        self.assertEqual("\n".join(p["content"] for p in parts), table["content"])
+        for p in parts:
+            offset = p["content_offset"]
+            self.assertEqual(table["content"][offset : offset + len(p["content"])], p["content"])
+            self.assertLessEqual(_cost([p]), 100)
+
+    def test_single_long_line_is_cut(self):
+        para = {"content": "很" * 500, "global_index": 0}
+        parts = split_paragraph(para, 103)
+        self.assertEqual("".join(p["content"] for p in parts), para["content"])
+        self.assertEqual([p["content_offset"] for p in parts], [0, 100, 200, 300, 400])
+
+
+class TestPipelineChunking(unittest.TestCase):
+    def setUp(self):
+        self._orig = (settings.pagination, settings.review_chunk_strategy, settings.review_chunk_token_budget)
+
+    def tearDown(self):
+        settings.pagination, settings.review_chunk_strategy, settings.review_chunk_token_budget = self._orig
+
+    def test_strategies(self):
+        pipeline = LangChainPipeline.__new__(LangChainPipeline)
+        paras = [{"content": "段落内容" * 50, "global_index": i} for i in range(40)]
+        settings.pagination = 32
+        settings.review_chunk_strategy = "paragraphs"
+        self.assertEqual([len(c) for c in pipeline._chunk_paragraphs(paras, 32)], [32, 8])
+
+        settings.review_chunk_strategy = "tokens"
+        settings.review_chunk_token_budget = _prompt_overhead_tokens() + 2_100
+        chunks = pipeline._chunk_paragraphs(paras, 32)
+        self.assertEqual([len(c) for c in chunks], [10, 10, 10, 10])
+        self.assertEqual(len(pipeline._chunk_paragraphs(paras, -1)), 1)
+
+    def test_ir_anchor_offset_for_split_parts(self):
+        pipeline = LangChainPipeline.__new__(LangChainPipeline)
+        part = {"content": "第二行错字", "node_id": "p1", "path": ["p1"], "content_offset": 10}
+        _, _, start, end = pipeline._locate_ir_anchor_location(para=part, needle="错字")
+        self.assertEqual((start, end), (13, 15))
+
+
+if __name__ == "__main__":
+    unittest.main()
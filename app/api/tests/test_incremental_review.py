@@ -0,0 +1,185 @@
+import asyncio
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from uuid import uuid4
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from common.models import Issue, IssueStatusEnum, ReviewRule
+from database.analysis_issues_repository import AnalysisIssuesRepository
+from database.analysis_runs_repository import AnalysisRunsRepository
+from database.db_client import SQLiteClient
+from database.documents_repository import DocumentsRepository
+from database.issues_repository import IssuesRepository
+from security.auth import User
+from services.issues_service import IssuesService
+from services.rules_fingerprint import (
+    build_review_rules_snapshot_items,
+    compute_review_rules_fingerprint,
+    diff_review_rules_snapshots,
+)
+
+
+def _rule(rule_id: str, name: str, description: str = "d") -> ReviewRule:
+    return ReviewRule(id=rule_id, name=name, description=description, risk_level="高", created_at="2024-01-01")
+
+
+class _RulePipeline:
+    """Reports one issue per requested rule, plus a built-in issue unless `rules_only`."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[list[str], bool]] = []
+
+    async def stream_issues(self, *, doc_id, pdf_path, user_id, timestamp_iso, cache_key, custom_rules=None, rules_only=False, revision=None):
+        self.calls.append(([r.name for r in custom_rules or []], rules_only))
+        types = [r.name for r in custom_rules or []]
+        if not rules_only:
+            types.append("Grammar & Spelling")
+        yield [
+            Issue(
+                id=str(uuid4()),
+                doc_id=doc_id,
+                text=f"{t}-{len(self.calls)}",
+                type=t,
+                status=IssueStatusEnum.not_reviewed,
+                suggested_fix="",
+                explanation="",
+                review_initiated_by=user_id,
+                review_initiated_at_UTC=timestamp_iso,
+            )
+            for t in types
+        ]
+
+
+class TestRulesSnapshotDiff(unittest.TestCase):
+    def test_diff(self):
+        prev = build_review_rules_snapshot_items([_rule("a", "A"), _rule("b", "B"), _rule("c", "C")])
+        cur = build_review_rules_snapshot_items([_rule("a", "A"), _rule("b", "B", "changed"), _rule("d", "D")])
+        diff = diff_review_rules_snapshots(prev, cur)
+        self.assertEqual([i["id"] for i in diff["unchanged"]], ["a"])
+        self.assertEqual([i["id"] for i in diff["modified"]], ["b"])
+        self.assertEqual([i["id"] for i in diff["added"]], ["d"])
+        self.assertEqual([i["id"] for i in diff["removed"]], ["c"])
+
+    def test_legacy_snapshot_without_fingerprints(self):
+        prev = [{"id": "a", "name": "A", "description": "d", "risk_level": "高"}]
+        cur = build_review_rules_snapshot_items([_rule("a", "A")])
+        self.assertEqual([i["id"] for i in diff_review_rules_snapshots(prev, cur)["unchanged"]], ["a"])
+
+
+class TestIncrementalReview(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_client = SQLiteClient(db_path=str(Path(self._tmp.name) / "app.db"))
+        self.pipeline = _RulePipeline()
+        self.service = IssuesService(
+            IssuesRepository(self.db_client),
+            AnalysisRunsRepository(self.db_client),
+            AnalysisIssuesRepository(self.db_client),
+            DocumentsRepository(self.db_client),
+            self.pipeline,
+        )
+        await self.db_client.init_db()
+        await self.db_client.store_item(
+            "documents",
+            {
+                "id": "doc1",
+                "owner_id": "u1",
+                "original_filename": "a.pdf",
+                "display_name": "a.pdf",
+                "subtype_id": "s1",
+                "storage_provider": "local",
+                "storage_key": "objects/doc1.pdf",
+                "mime_type": "application/pdf",
+                "size_bytes": 1,
+                "sha256": "sha",
+                "created_by": "u1",
+                "created_at_utc": "2024-01-01T00:00:00+00:00",
+            },
+        )
+
+    async def asyncTearDown(self):
+        await self.service.stop_worker()
+        await self.db_client.close()
+        self._tmp.cleanup()
+
+    async def _review(self, rules: list[ReviewRule], *, force: bool) -> dict:
+        status = await self.service.start_review_in_background(
+            document_id="doc1",
+            owner_id="u1",
+            subtype_id="s1",
+            pdf_path="unused",
+            user=User(oid="u1"),
+            time_stamp=f"2024-01-01T00:00:{len(self.pipeline.calls):02d}+00:00",
+            rules_snapshot_json=json.dumps(build_review_rules_snapshot_items(rules), ensure_ascii=False),
+            rules_fingerprint=compute_review_rules_fingerprint(rules),
+            pipeline_version="pv" + (f"|force:{uuid4()}" if force else ""),
+            mineru_cache_key="sha",
+            force=force,
+            custom_rules=rules,
+        )
+        for _ in range(500):
+            if status["status"] not in (IssuesService.STATUS_RUNNING,):
+                break
+            await asyncio.sleep(0.01)
+            status = await self.service.get_review_status("doc1", owner_id="u1")
+        self.assertEqual(status["status"], IssuesService.STATUS_COMPLETED)
+        return status
+
+    async def _issue_texts(self) -> list[str]:
+        issues = await self.service.get_issues_data("doc1", owner_id="u1")
+        return sorted(i.text for i in issues)
+
+    async def test_only_changed_rules_are_reviewed(self):
+        await self._review([_rule("a", "A"), _rule("b", "B")], force=False)
+        self.assertEqual(self.pipeline.calls, [(["A", "B"], False)])
+        self.assertEqual(await self._issue_texts(), ["A-1", "B-1", "Grammar & Spelling-1"])
+
+        # B modified, C added, A unchanged.
+        await self._review([_rule("a", "A"), _rule("b", "B", "new"), _rule("c", "C")], force=True)
+        self.assertEqual(self.pipeline.calls[-1], (["B", "C"], True))
+        self.assertEqual(await self._issue_texts(), ["A-1", "B-2", "C-2", "Grammar & Spelling-1"])
+
+        # Only a removal: nothing to send to the LLM.
+        status = await self._review([_rule("b", "B", "new"), _rule("c", "C")], force=True)
+        self.assertEqual(len(self.pipeline.calls), 2)
+        self.assertEqual(await self._issue_texts(), ["B-2", "C-2", "Grammar & Spelling-1"])
+        canonical = await self.service.analysis_issues_repository.list_by_run_id(status["run_id"], owner_id="u1")
+        self.assertEqual(len(canonical), 3)
+
+    async def test_disabled_runs_full_review(self):
+        await self._review([_rule("a", "A")], force=False)
+        await self.service.start_review_in_background(
+            document_id="doc1",
+            owner_id="u1",
+            subtype_id="s1",
+            pdf_path="unused",
+            user=User(oid="u1"),
+            time_stamp="2024-01-02T00:00:00+00:00",
+            rules_snapshot_json=json.dumps(build_review_rules_snapshot_items([_rule("b", "B")])),
+            rules_fingerprint=compute_review_rules_fingerprint([_rule("b", "B")]),
+            pipeline_version=f"pv|force:{uuid4()}",
+            mineru_cache_key="sha",
+            force=True,
+            custom_rules=[_rule("b", "B")],
+            incremental=False,
+        )
+        for _ in range(500):
+            if (await self.service.get_review_status("doc1", owner_id="u1"))["status"] == IssuesService.STATUS_COMPLETED:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.pipeline.calls[-1], (["B"], False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+import httpx
+
+from services import job_poller
+from services.job_poller import AsyncRateLimiter, JobPoller, PollRetry, retry_after_seconds
+
+
+class _FakeClock:
+    """Virtual time: `sleep` advances `monotonic` instantly and records the delays."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(round(delay, 3))
+        self.now += delay
+
+
+class TestJobPoller(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = _FakeClock()
+        self._patches = [
+            patch.object(job_poller, "time", SimpleNamespace(monotonic=self.clock.monotonic, time=time.time)),
+            patch.object(job_poller, "asyncio", SimpleNamespace(sleep=self.clock.sleep)),
+        ]
+        for p in self._patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self._patches:
+            p.stop()
+
+    def _poller(self, name: str, **kwargs) -> JobPoller:
+        job_poller._metrics.pop(name, None)
+        params = dict(interval_sec=1.0, max_interval_sec=4.0, initial_sec=0.25, fast_phase_sec=1.0, backoff=2.0, jitter=0.0)
+        params.update(kwargs)
+        return JobPoller(name, **params)
+
+    async def test_fast_phase_then_capped_exponential_backoff(self):
+        calls = 0
+
+        async def check():
+            nonlocal calls
+            calls += 1
+            return "done" if calls == 9 else None
+
+        poller = self._poller("t-backoff")
+        self.assertEqual(await poller.poll(check, max_wait_sec=100, timeout_message="late"), "done")
+        self.assertEqual(self.clock.sleeps, [0.25, 0.25, 0.25, 0.25, 1.0, 2.0, 4.0, 4.0])
+        stats = poller.metrics.stats()
+        self.assertEqual((stats["jobs"], stats["polls"], stats["done"]), (1, 9, 1))
+        self.assertEqual(stats["time_to_done_p50_sec"], 12.0)
+
+    async def test_jitter_stays_within_bounds(self):
+        calls = 0
+
+        async def check():
+            nonlocal calls
+            calls += 1
+            return True if calls == 30 else None
+
+        poller = self._poller("t-jitter", fast_phase_sec=0.0, backoff=1.0, jitter=0.2)
+        await poller.poll(check, max_wait_sec=1000, timeout_message="late")
+        self.assertTrue(all(0.8 <= d <= 1.2 for d in self.clock.sleeps))
+        self.assertGreater(len(set(self.clock.sleeps)), 1)
+
+    async def test_server_retry_after_is_respected(self):
+        calls = 0
+
+        async def check():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise PollRetry(7.0)
+            return True if calls == 3 else None
+
+        poller = self._poller("t-hint", fast_phase_sec=0.0)
+        await poller.poll(check, max_wait_sec=100, timeout_message="late")
+        self.assertEqual(self.clock.sleeps, [7.0, 2.0])
+        self.assertEqual(poller.metrics.throttled, 1)
+
+    async def test_timeout_and_errors_are_counted(self):
+        async def never():
+            return None
+
+        poller = self._poller("t-timeout")
+        with self.assertRaisesRegex(TimeoutError, "late"):
+            await poller.poll(never, max_wait_sec=10, timeout_message="late")
+        self.assertLessEqual(self.clock.now, 1010.0 + 1e-9)
+        self.assertEqual(poller.metrics.timeouts, 1)
+
+        async def boom():
+            raise RuntimeError("job failed")
+
+        with self.assertRaises(RuntimeError):
+            await poller.poll(boom, max_wait_sec=10, timeout_message="late")
+        self.assertEqual(poller.metrics.errors, 1)
+
+    async def test_rate_limiter_spaces_concurrent_polls(self):
+        waits: list[float] = []
+
+        async def record(delay: float) -> None:  # all six arrive at the same instant
+            waits.append(round(delay, 3))
+
+        limiter = AsyncRateLimiter(2.0, burst=2)
+        with patch.object(job_poller, "asyncio", SimpleNamespace(sleep=record)):
+            await asyncio.gather(*[limiter.acquire() for _ in range(6)])
+        # Two go immediately, the rest are spaced 0.5s apart.
+        self.assertEqual(waits, [0.5, 1.0, 1.5, 2.0])
+
+    def test_retry_after_header_parsing(self):
+        req = httpx.Request("GET", "https://x.test")
+        self.assertEqual(retry_after_seconds(httpx.Response(429, headers={"Retry-After": "3"}, request=req)), 3.0)
+        self.assertIsNone(retry_after_seconds(httpx.Response(429, request=req)))
+        date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 60))
+        hinted = retry_after_seconds(httpx.Response(503, headers={"Retry-After": date}, request=req))
+        self.assertTrue(55 <= hinted <= 61)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import math
+import sys
+import unittest
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from common import json_codec
+from common.models import Location, LocationTypeEnum
+
+
+class TestJsonCodec(unittest.TestCase):
+    def test_output_matches_compact_stdlib_encoding(self):
+        obj = {"b": [1, 2.5, None, True], "a": "第一条 合同", "c": {"z": 1, "y": "x"}}
+        expected = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        self.assertEqual(json_codec.dumps(obj), expected)
+        self.assertEqual(json_codec.dumps_bytes(obj), expected.encode("utf-8"))
+        self.assertEqual(
+            json_codec.dumps(obj, sort_keys=True),
+            json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True),
+        )
+
+    def test_loads_accepts_bytes_and_text(self):
+        self.assertEqual(json_codec.loads(b'{"k": ["\xe4\xb8\xad"]}'), {"k": ["中"]})
+        self.assertEqual(json_codec.loads('{"k": 1}'), {"k": 1})
+        self.assertEqual(json_codec.loads(memoryview(b"[1, 2]")), [1, 2])
+
+    def test_inputs_fast_backends_reject_fall_back_to_stdlib(self):
+        self.assertTrue(math.isnan(json_codec.loads(b'{"x": NaN}')["x"]))
+        self.assertEqual(json_codec.dumps({1: "a"}), '{"1":"a"}')
+        self.assertEqual(json_codec.dumps(2**70), str(2**70))
+        with self.assertRaises(ValueError):
+            json_codec.loads(b"{not json")
+        with self.assertRaises(TypeError):
+            json_codec.dumps({"x": object()})
+
+    def test_issue_location_round_trip(self):
+        loc = Location(source_sentence="原句", page_num=3, bounding_box=[1.0] * 8, para_index=2, type=LocationTypeEnum.pdf_quadpoints)
+        restored = Location(**json_codec.loads(json_codec.dumps(loc.model_dump())))
+        self.assertEqual(restored, loc)
+
+
+if __name__ == "__main__":
+    unittest.main()
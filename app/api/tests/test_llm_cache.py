@@ -0,0 +1,186 @@
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from langchain_core.output_parsers import PydanticOutputParser
+
+from common.models import ReviewRule
+from services.lc_pipeline import LangChainPipeline, PromptCacheUsage, ReviewOutput, _prompt_token_usage, _review_prompt
+from services.llm_cache import LLMResponseCache, compute_llm_cache_key
+from services.llm_gateway import LLMGateway
+from services.llm_router import HedgedLLMRouter, LLMProvider
+
+
+class _FakeLLM:
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        self.messages = messages
+        return type(
+            "R",
+            (),
+            {
+                "content": self.content,
+                "usage_metadata": {"input_tokens": 1000, "output_tokens": 10, "input_token_details": {"cache_read": 768}},
+            },
+        )()
+
+
+class TestLLMCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self._tmp.name) / "llm_cache.db")
+
+    async def asyncTearDown(self):
+        self._tmp.cleanup()
+
+    def test_key_depends_on_every_input(self):
+        base = dict(prepared="[0]甲", system_prompt="s", guidance="g", model="m")
+        k0 = compute_llm_cache_key(**base)
+        for field in base:
+            changed = dict(base, **{field: base[field] + "x"})
+            self.assertNotEqual(k0, compute_llm_cache_key(**changed), field)
+
+    async def test_lru_eviction_by_size(self):
+        cache = LLMResponseCache(self.db_path, max_bytes=25)
+        await cache.put("a", model="m", response="x" * 10)
+        await cache.put("b", model="m", response="y" * 10)
+        self.assertEqual(await cache.get("a"), "x" * 10)
+        await cache.put("c", model="m", response="z" * 10)
+
+        self.assertIsNone(await cache.get("b"))
+        self.assertEqual(await cache.get("a"), "x" * 10)
+        self.assertEqual(await cache.get("c"), "z" * 10)
+        stats = cache.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["hits"], 3)
+        self.assertEqual(stats["misses"], 1)
+        await cache.aclose()
+
+    async def test_hits_are_written_in_batches(self):
+        cache = LLMResponseCache(self.db_path, access_flush_sec=3600)
+        await cache.put("a", model="m", response="x")
+        for _ in range(3):
+            self.assertEqual(await cache.get("a"), "x")
+
+        def stored_hits() -> int:
+            with sqlite3.connect(self.db_path) as db:
+                return db.execute("SELECT hits FROM llm_cache WHERE key = 'a'").fetchone()[0]
+
+        self.assertEqual(stored_hits(), 0)
+        await cache.aclose()
+        self.assertEqual(stored_hits(), 3)
+
+    async def test_pipeline_reuses_cached_response(self):
+        pipeline = LangChainPipeline.__new__(LangChainPipeline)
+        pipeline.parser = PydanticOutputParser(pydantic_object=ReviewOutput)
+        pipeline.llm = _FakeLLM('{"issues": [{"type": "Grammar & Spelling", "text": "错字", "explanation": "e", "para_index": 0}]}')
+        pipeline.llm_cache = LLMResponseCache(self.db_path)
+        pipeline.prompt_usage = PromptCacheUsage()
+        pipeline.llm_router = HedgedLLMRouter([LLMProvider("deepseek", "m", pipeline.llm, LLMGateway())], hedge_enabled=False)
+
+        kwargs = dict(prepared="[0]有错字", system_prompt="s", guidance="g")
+        first = await pipeline._review_chunk_with_llm(chunk_index=0, **kwargs)
+        second = await pipeline._review_chunk_with_llm(chunk_index=7, **kwargs)
+
+        self.assertEqual(pipeline.llm.calls, 1)
+        self.assertEqual([i.text for i in first], ["错字"])
+        self.assertEqual([i.text for i in second], ["错字"])
+        self.assertEqual(pipeline.llm_cache.stats()["hits"], 1)
+        await pipeline.llm_cache.aclose()
+
+    async def test_fallback_answer_is_not_cached_for_primary(self):
+        class _DownOnce(_FakeLLM):
+            async def ainvoke(self, messages):
+                if self.calls == 0:
+                    self.calls += 1
+                    raise type("E", (Exception,), {"status_code": 503})("HTTP 503")
+                return await super().ainvoke(messages)
+
+        def gateway() -> LLMGateway:
+            return LLMGateway(max_attempts=1, tokens_per_minute=0, breaker_failure_threshold=10)
+
+        pipeline = LangChainPipeline.__new__(LangChainPipeline)
+        pipeline.parser = PydanticOutputParser(pydantic_object=ReviewOutput)
+        primary = _DownOnce('{"issues": [{"type": "Grammar & Spelling", "text": "primary", "explanation": "e", "para_index": 0}]}')
+        fallback = _FakeLLM('{"issues": [{"type": "Grammar & Spelling", "text": "fallback", "explanation": "e", "para_index": 0}]}')
+        pipeline.llm_cache = LLMResponseCache(self.db_path)
+        pipeline.prompt_usage = PromptCacheUsage()
+        pipeline.llm_router = HedgedLLMRouter(
+            [LLMProvider("deepseek", "m", primary, gateway()), LLMProvider("fallback", "f", fallback, gateway())],
+            hedge_enabled=False,
+        )
+
+        kwargs = dict(chunk_index=0, prepared="[0]有错字", system_prompt="s", guidance="g")
+        first = await pipeline._review_chunk_with_llm(**kwargs)
+        second = await pipeline._review_chunk_with_llm(**kwargs)
+        third = await pipeline._review_chunk_with_llm(**kwargs)
+
+        self.assertEqual([i.text for i in first], ["fallback"])
+        # The fallback's answer was not stored under the primary model's key.
+        self.assertEqual([i.text for i in second], ["primary"])
+        self.assertEqual([i.text for i in third], ["primary"])
+        self.assertEqual((primary.calls, fallback.calls), (2, 1))
+        stats = pipeline.llm_cache.stats()
+        self.assertEqual((stats["stores"], stats["hits"], stats["misses"]), (1, 1, 2))
+        await pipeline.llm_cache.aclose()
+
+    async def test_unparseable_response_is_not_cached(self):
+        pipeline = LangChainPipeline.__new__(LangChainPipeline)
+        pipeline.parser = PydanticOutputParser(pydantic_object=ReviewOutput)
+        pipeline.llm = _FakeLLM("sorry, I cannot help with that")
+        pipeline.llm_cache = LLMResponseCache(self.db_path)
+        pipeline.prompt_usage = PromptCacheUsage()
+        pipeline.llm_router = HedgedLLMRouter([LLMProvider("deepseek", "m", pipeline.llm, LLMGateway())], hedge_enabled=False)
+
+        for _ in range(2):
+            self.assertEqual(await pipeline._review_chunk_with_llm(chunk_index=0, prepared="p", system_prompt="s", guidance="g"), [])
+        self.assertEqual(pipeline.llm.calls, 2)
+        self.assertEqual(pipeline.llm_cache.stats()["stores"], 0)
+        await pipeline.llm_cache.aclose()
+
+
+class TestPromptPrefix(unittest.IsolatedAsyncioTestCase):
+    async def test_paragraphs_come_after_static_prefix(self):
+        pipeline = LangChainPipeline.__new__(LangChainPipeline)
+        pipeline.parser = PydanticOutputParser(pydantic_object=ReviewOutput)
+        pipeline.llm = _FakeLLM('{"issues": []}')
+        pipeline.llm_cache = None
+        pipeline.prompt_usage = PromptCacheUsage()
+        pipeline.llm_router = HedgedLLMRouter([LLMProvider("deepseek", "m", pipeline.llm, LLMGateway())], hedge_enabled=False)
+
+        human = []
+        for chunk_index, prepared in enumerate(["[0]第一段", "[0]第二段\n[1]第三段"]):
+            await pipeline._review_chunk_with_llm(chunk_index=chunk_index, prepared=prepared, system_prompt="s", guidance="g")
+            self.assertEqual(pipeline.llm.messages[0].content, "s")
+            human.append(pipeline.llm.messages[1].content)
+        self.assertTrue(all(h.endswith(p) for h, p in zip(human, ["[0]第一段", "[0]第二段\n[1]第三段"])))
+        self.assertEqual(human[0][: -len("[0]第一段")], human[1][: -len("[0]第二段\n[1]第三段")])
+        self.assertEqual(pipeline.prompt_usage.stats(), {"requests": 2, "prompt_tokens": 2000, "cached_tokens": 1536, "hit_rate": 0.768})
+
+    def test_review_prompt_memoized_per_rule_set(self):
+        rule = ReviewRule(id="r1", name="试用期", description="试用期不超过六个月", risk_level="中", created_at="2024-01-01")
+        first = _review_prompt([rule], builtin_types=False)
+        self.assertIs(_review_prompt([rule.model_copy()], builtin_types=False), first)
+        self.assertIsNot(_review_prompt([rule], builtin_types=True), first)
+        changed = _review_prompt([rule.model_copy(update={"description": "试用期不超过三个月"})], builtin_types=False)
+        self.assertIn("三个月", changed.guidance)
+
+    def test_token_usage_from_response_metadata(self):
+        deepseek = type("R", (), {"response_metadata": {"token_usage": {"prompt_tokens": 500, "prompt_cache_hit_tokens": 384}}})()
+        self.assertEqual(_prompt_token_usage(deepseek), (500, 384))
+        self.assertEqual(_prompt_token_usage(object()), (0, 0))
@@ -0,0 +1,276 @@
+import asyncio
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from common.models import DocumentIR, IRParagraph, IRTextRun, Issue, IssueStatusEnum, Location
+from config.config import settings
+from database.analysis_issues_repository import AnalysisIssuesRepository
+from database.analysis_runs_repository import AnalysisRunsRepository
+from database.db_client import SQLiteClient
+from database.documents_repository import DocumentsRepository
+from database.issues_repository import IssuesRepository
+from security.auth import User
+from services.issues_service import IssuesService
+from services.lc_pipeline import ChunkReviewError, LangChainPipeline
+from services.llm_gateway import LLMCallError, LLMGateway, LLMUnavailableError, TokenBudget, classify_llm_error
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class _ScriptedLLM:
+    """Raises or returns the scripted outcomes in order; tracks peak concurrency."""
+
+    def __init__(self, outcomes, *, delay: float = 0.0) -> None:
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+        finally:
+            self.active -= 1
+
+
+def _gateway(**kwargs) -> LLMGateway:
+    defaults = dict(max_concurrency=4, tokens_per_minute=0, max_attempts=3, retry_base_sec=0.0, retry_max_sec=0.0,
+                    breaker_failure_threshold=3, breaker_cooldown_sec=0.05)
+    defaults.update(kwargs)
+    return LLMGateway(**defaults)
+
+
+class TestLLMGateway(unittest.IsolatedAsyncioTestCase):
+    def test_classify(self):
+        self.assertEqual(classify_llm_error(_StatusError(429))[:2], (True, 429))
+        self.assertEqual(classify_llm_error(_StatusError(503))[:2], (True, 503))
+        self.assertEqual(classify_llm_error(_StatusError(400))[:2], (False, 400))
+        self.assertTrue(classify_llm_error(APIConnectionError())[0])
+        self.assertFalse(classify_llm_error(ValueError("bad"))[0])
+
+    async def test_retries_transient_errors(self):
+        llm = _ScriptedLLM([_StatusError(429), _StatusError(502), "done"])
+        gateway = _gateway()
+        self.assertEqual(await gateway.invoke(llm, []), "done")
+        self.assertEqual(llm.calls, 3)
+        self.assertEqual((gateway.retries, gateway.throttled, gateway.breaker.state), (2, 1, "closed"))
+
+    async def test_gives_up_and_does_not_retry_bad_requests(self):
+        gateway = _gateway()
+        with self.assertRaises(LLMCallError) as ctx:
+            await gateway.invoke(_ScriptedLLM([_StatusError(500)] * 3), [])
+        self.assertEqual((ctx.exception.status_code, ctx.exception.attempts), (500, 3))
+
+        llm = _ScriptedLLM([_StatusError(400)])
+        with self.assertRaises(LLMCallError):
+            await gateway.invoke(llm, [])
+        self.assertEqual(llm.calls, 1)
+
+    async def test_circuit_breaker_opens_and_recovers(self):
+        gateway = _gateway(max_attempts=1, breaker_failure_threshold=2)
+        llm = _ScriptedLLM([_StatusError(503), _StatusError(503)])
+        for _ in range(2):
+            with self.assertRaises(LLMCallError):
+                await gateway.invoke(llm, [])
+        self.assertEqual(gateway.breaker.state, "open")
+        with self.assertRaises(LLMUnavailableError):
+            await gateway.invoke(llm, [])
+        self.assertEqual(llm.calls, 2)
+
+        await asyncio.sleep(0.06)
+        self.assertEqual(await gateway.invoke(llm, []), "ok")
+        self.assertEqual((gateway.breaker.state, gateway.breaker.trips), ("closed", 1))
+
+    async def test_waits_out_open_breaker_when_attempts_remain(self):
+        gateway = _gateway(max_attempts=3, breaker_failure_threshold=1)
+        llm = _ScriptedLLM([_StatusError(503)])
+        self.assertEqual(await gateway.invoke(llm, []), "ok")
+        self.assertEqual(gateway.short_circuited, 1)
+
+    async def test_concurrency_cap(self):
+        gateway = _gateway(max_concurrency=2)
+        llm = _ScriptedLLM([], delay=0.01)
+        await asyncio.gather(*(gateway.invoke(llm, []) for _ in range(6)))
+        self.assertEqual(llm.peak, 2)
+
+    async def test_token_budget(self):
+        budget = TokenBudget(60_000)  # 1000 tokens/s
+        await budget.acquire(60_000)
+        started = time.monotonic()
+        await budget.acquire(100)
+        self.assertGreaterEqual(time.monotonic() - started, 0.08)
+        budget.settle(100, 0)
+        started = time.monotonic()
+        await budget.acquire(50)
+        self.assertLess(time.monotonic() - started, 0.05)
+
+
+class _FlakyIRPipeline(LangChainPipeline):
+    def __init__(self) -> None:
+        self.llm_cache = None
+
+    async def _process_ir_chunk(self, *, chunk, chunk_index, user_id, timestamp_iso, doc_id, custom_rules=None, rules_only=False):
+        if chunk[0]["node_id"] == "p1":
+            raise LLMCallError("LLM 请求失败", status_code=429, attempts=4)
+        return [
+            Issue(
+                id=chunk[0]["node_id"],
+                doc_id=doc_id,
+                text="t",
+                type="Grammar & Spelling",
+                status=IssueStatusEnum.not_reviewed,
+                suggested_fix="",
+                explanation="",
+                location=Location(source_sentence=chunk[0]["content"], page_num=1),
+                review_initiated_by=user_id,
+                review_initiated_at_UTC=timestamp_iso,
+            )
+        ]
+
+
+class TestChunkFailures(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._orig = (settings.pagination, settings.review_chunk_strategy, settings.review_prefilter_enabled)
+        settings.pagination = 1
+        settings.review_chunk_strategy = "paragraphs"
+        settings.review_prefilter_enabled = False
+
+    def tearDown(self):
+        settings.pagination, settings.review_chunk_strategy, settings.review_prefilter_enabled = self._orig
+
+    async def test_failed_chunk_fails_review_after_others_finish(self):
+        ir = DocumentIR(
+            blocks=[IRParagraph(id=f"p{i}", runs=[IRTextRun(id=f"r{i}", text=f"第{i}段。")]) for i in range(3)]
+        )
+        seen = []
+        with self.assertRaises(ChunkReviewError) as ctx:
+            async for issues in _FlakyIRPipeline().stream_ir_issues(doc_id="d", ir=ir, user_id="u", timestamp_iso="t"):
+                seen.extend(i.id for i in issues)
+        self.assertEqual(sorted(seen), ["p0", "p2"])
+        self.assertEqual((ctx.exception.failed, ctx.exception.total), (1, 3))
+        self.assertIn("1/3", str(ctx.exception))
+
+
+class _FailingOncePipeline:
+    """First review: one issue, then a failed chunk. Later reviews succeed."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def stream_issues(self, *, doc_id, pdf_path, user_id, timestamp_iso, cache_key, custom_rules=None, rules_only=False, revision=None):
+        self.calls += 1
+        yield [
+            Issue(
+                id=f"{self.calls}",
+                doc_id=doc_id,
+                text="t",
+                type="Grammar & Spelling",
+                status=IssueStatusEnum.not_reviewed,
+                suggested_fix="",
+                explanation="",
+                review_initiated_by=user_id,
+                review_initiated_at_UTC=timestamp_iso,
+            )
+        ]
+        if self.calls == 1:
+            raise ChunkReviewError(1, 2, LLMCallError("LLM 请求失败"))
+
+
+class TestFailedRunIsNotReused(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_client = SQLiteClient(db_path=str(Path(self._tmp.name) / "app.db"))
+        await self.db_client.init_db()
+        await self.db_client.store_item(
+            "documents",
+            {
+                "id": "d1",
+                "owner_id": "u1",
+                "original_filename": "a.pdf",
+                "display_name": "a.pdf",
+                "subtype_id": "s1",
+                "storage_provider": "local",
+                "storage_key": "objects/d1.pdf",
+                "mime_type": "application/pdf",
+                "size_bytes": 1,
+                "sha256": "sha",
+                "created_by": "u1",
+                "created_at_utc": "2024-01-01T00:00:00+00:00",
+            },
+        )
+        self.pipeline = _FailingOncePipeline()
+        self.service = IssuesService(
+            IssuesRepository(self.db_client),
+            AnalysisRunsRepository(self.db_client),
+            AnalysisIssuesRepository(self.db_client),
+            DocumentsRepository(self.db_client),
+            self.pipeline,
+        )
+
+    async def asyncTearDown(self):
+        await self.service.stop_worker()
+        await self.db_client.close()
+        self._tmp.cleanup()
+
+    async def _review(self) -> dict:
+        status = await self.service.start_review_in_background(
+            document_id="d1",
+            owner_id="u1",
+            subtype_id="s1",
+            pdf_path="unused",
+            user=User(oid="u1"),
+            time_stamp="2024-01-01T00:00:00+00:00",
+            rules_snapshot_json="[]",
+            rules_fingerprint="fp",
+            pipeline_version="pv",
+            mineru_cache_key="sha",
+        )
+        for _ in range(500):
+            if status["status"] != IssuesService.STATUS_RUNNING:
+                break
+            await asyncio.sleep(0.01)
+            status = await self.service.get_review_status("d1", owner_id="u1")
+        return status
+
+    async def test_start_after_failed_run_reviews_again(self):
+        failed = await self._review()
+        self.assertEqual(failed["status"], IssuesService.STATUS_FAILED)
+        self.assertIn("1/2", failed["error_message"])
+
+        retried = await self._review()
+        self.assertEqual(retried["status"], IssuesService.STATUS_COMPLETED)
+        self.assertEqual(self.pipeline.calls, 2)
+        issues = await self.service.get_issues_data("d1", owner_id="u1")
+        self.assertEqual([i.id for i in issues], ["2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from services.llm_gateway import LLMCallError, LLMGateway
+from services.llm_router import HedgedLLMRouter, LatencyHistogram, LLMProvider
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class _SlowLLM:
+    def __init__(self, answer, *, delay: float) -> None:
+        self.answer = answer
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(self.answer, BaseException):
+            raise self.answer
+        return self.answer
+
+
+def _provider(name: str, llm, *, max_concurrency: int = 8) -> LLMProvider:
+    gateway = LLMGateway(max_concurrency=max_concurrency, max_attempts=1, tokens_per_minute=0, breaker_failure_threshold=10)
+    return LLMProvider(name, name, llm, gateway)
+
+
+def _router(*providers, **kwargs) -> HedgedLLMRouter:
+    defaults = dict(
+        hedge_enabled=True, percentile=0.9, min_delay_sec=0.0, initial_delay_sec=0.05, min_samples=5, max_ratio=1.0
+    )
+    defaults.update(kwargs)
+    return HedgedLLMRouter(providers, **defaults)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        hist = LatencyHistogram()
+        self.assertIsNone(hist.percentile(0.5))
+        for _ in range(90):
+            hist.observe(1.0)
+        for _ in range(10):
+            hist.observe(60.0)
+        self.assertAlmostEqual(hist.percentile(0.5), 1.0, delta=0.3)
+        self.assertGreaterEqual(hist.percentile(0.95), 60.0)
+        self.assertLess(hist.percentile(0.95), 80.0)
+
+    def test_decay_follows_recent_latency(self):
+        hist = LatencyHistogram(half_life=10)
+        for _ in range(50):
+            hist.observe(10.0)
+        for _ in range(50):
+            hist.observe(0.5)
+        self.assertLess(hist.percentile(0.9), 1.0)
+
+
+class TestHedgedLLMRouter(unittest.IsolatedAsyncioTestCase):
+    async def test_fast_primary_is_not_hedged(self):
+        primary, fallback = _SlowLLM("p", delay=0.0), _SlowLLM("f", delay=0.0)
+        router = _router(_provider("primary", primary), _provider("fallback", fallback))
+        resp, provider = await router.invoke([])
+        self.assertEqual((resp, provider.name, fallback.calls, router.hedges), ("p", "primary", 0, 0))
+
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        primary, fallback = _SlowLLM("p", delay=5.0), _SlowLLM("f", delay=0.01)
+        router = _router(_provider("primary", primary), _provider("fallback", fallback))
+        resp, provider = await router.invoke([])
+        self.assertEqual((resp, provider.name), ("f", "fallback"))
+        self.assertEqual((router.hedges, router.hedge_wins, primary.cancelled), (1, 1, 1))
+
+    async def test_hedges_to_primary_without_fallback(self):
+        llm = _SlowLLM("p", delay=0.2)
+        router = _router(_provider("primary", llm), initial_delay_sec=0.05)
+        resp, _ = await router.invoke([])
+        self.assertEqual((resp, llm.calls, router.hedges), ("p", 2, 1))
+
+    async def test_falls_back_on_failure_or_unusable_answer(self):
+        fallback = _SlowLLM("good", delay=0.0)
+        router = _router(_provider("primary", _SlowLLM(_StatusError(503), delay=0.0)), _provider("fallback", fallback))
+        resp, provider = await router.invoke([])
+        self.assertEqual((resp, provider.name, router.fallbacks), ("good", "fallback", 1))
+
+        router = _router(_provider("primary", _SlowLLM("garbage", delay=0.0)), _provider("fallback", fallback), hedge_enabled=False)
+        resp, _ = await router.invoke([], accept=lambda r: r == "good")
+        self.assertEqual(resp, "good")
+
+        router = _router(_provider("primary", _SlowLLM(_StatusError(503), delay=0.0)))
+        with self.assertRaises(LLMCallError):
+            await router.invoke([])
+
+    async def test_time_queued_in_gateway_does_not_trigger_hedge(self):
+        primary, fallback = _SlowLLM("p", delay=0.01), _SlowLLM("f", delay=0.0)
+        provider = _provider("primary", primary, max_concurrency=1)
+        router = _router(provider, _provider("fallback", fallback))
+        blocker = asyncio.create_task(provider.gateway.invoke(_SlowLLM("x", delay=0.2), []))
+        await asyncio.sleep(0)
+        resp, winner = await router.invoke([])
+        await blocker
+        self.assertEqual((resp, winner.name, router.hedges, fallback.calls), ("p", "primary", 0, 0))
+        self.assertLess(provider.latency.percentile(0.5), 0.1)
+
+    async def test_no_hedge_to_saturated_gateway_or_over_ratio(self):
+        llm = _SlowLLM("p", delay=0.15)
+        router = _router(_provider("primary", llm, max_concurrency=1))
+        resp, _ = await router.invoke([])
+        self.assertEqual((resp, llm.calls, router.hedges, router.hedges_skipped), ("p", 1, 0, 1))
+
+        llm = _SlowLLM("p", delay=0.15)
+        router = _router(_provider("primary", llm), max_ratio=0.0)
+        await router.invoke([])
+        self.assertEqual((llm.calls, router.hedges), (1, 0))
+
+        llm = _SlowLLM("p", delay=0.1)
+        router = _router(_provider("primary", llm), max_ratio=0.5)
+        await asyncio.gather(*(router.invoke([]) for _ in range(4)))
+        self.assertEqual(router.hedges, 2)
+
+    async def test_hedge_delay_adapts(self):
+        provider = _provider("primary", _SlowLLM("p", delay=0.0))
+        router = _router(provider, initial_delay_sec=30.0, min_delay_sec=0.5)
+        self.assertEqual(router.hedge_delay(provider), 30.0)
+        for _ in range(5):
+            provider.latency.observe(2.0)
+        self.assertLess(router.hedge_delay(provider), 3.0)
+        self.assertGreaterEqual(router.hedge_delay(provider), 2.0)
+        self.assertIn("primary", router.stats()["providers"])
+
+
+if __name__ == "__main__":
+    unittest.main()
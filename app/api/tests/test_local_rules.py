@@ -0,0 +1,250 @@
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+import fitz
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from common.models import DocumentIR, IRParagraph, IRTextRun, ReviewRule, RuleLocalCheck
+from config.config import settings
+from database.db_client import SQLiteClient
+from database.rules_repository import RulesRepository
+from dependencies import get_rules_service
+from routers import rules as rules_router
+from services.lc_pipeline import LangChainPipeline
+from services.local_rules import LocalRuleEngine, parse_capital_amount, split_local_rules
+from services.rules_fingerprint import _canonical_rule_item, compute_review_rule_fingerprint
+from services.rules_service import RulesService, RuleValidationError
+
+
+def _rule(rule_id: str, name: str, local_check: RuleLocalCheck | None = None, **kwargs) -> ReviewRule:
+    return ReviewRule(
+        id=rule_id,
+        name=name,
+        description=kwargs.pop("description", name),
+        risk_level=kwargs.pop("risk_level", "中"),
+        created_at="2024-01-01",
+        local_check=local_check,
+        **kwargs,
+    )
+
+
+AMOUNTS = _rule("amounts", "金额大小写一致", RuleLocalCheck(amount_consistency=True), risk_level="高")
+ABSOLUTE = _rule("absolute", "绝对化用语", RuleLocalCheck(lexicon=["最终解释权", "Best"]))
+DEADLINE = _rule("deadline", "付款期限", RuleLocalCheck(patterns=[r"\d+个工作日内"]))
+LLM_RULE = _rule("llm", "违约责任", description="违约金不得过高")
+
+
+class TestLocalRuleEngine(unittest.TestCase):
+    def test_parse_capital_amount(self):
+        self.assertEqual(parse_capital_amount("壹万贰仟元伍角"), Decimal("12000.5"))
+        self.assertEqual(parse_capital_amount("壹亿贰仟万元整"), Decimal(120000000))
+        self.assertEqual(parse_capital_amount("伍佰零叁元零伍分"), Decimal("503.05"))
+        self.assertEqual(parse_capital_amount("拾元"), Decimal(10))
+        self.assertIsNone(parse_capital_amount("万元"))
+
+    def test_split_local_rules(self):
+        local, llm = split_local_rules([AMOUNTS, LLM_RULE, DEADLINE, _rule("empty", "空", RuleLocalCheck())])
+        self.assertEqual([r.id for r in local], ["amounts", "deadline"])
+        self.assertEqual([r.id for r in llm], ["llm", "empty"])
+
+    def test_lexicon_and_patterns(self):
+        hits = LocalRuleEngine([ABSOLUTE, DEADLINE]).check(
+            ["本公司保留最终解释权，提供BEST服务。", "乙方应在5个工作日内付款，最终解释权归甲方。", "无问题。"]
+        )
+        self.assertEqual(
+            [(h.rule.id, h.index, h.text) for h in hits],
+            [("absolute", 0, "最终解释权"), ("absolute", 0, "BEST"), ("deadline", 1, "5个工作日内"), ("absolute", 1, "最终解释权")],
+        )
+
+    def test_matches_do_not_cross_paragraphs(self):
+        engine = LocalRuleEngine([_rule("x", "跨段", RuleLocalCheck(patterns=[r"甲方\s*乙方"], lexicon=["甲方\n乙方"]))])
+        self.assertEqual(engine.check(["……甲方", "乙方……"]), [])
+
+    def test_amount_consistency(self):
+        hits = LocalRuleEngine([AMOUNTS]).check(
+            [
+                "合同总价人民币10,000元（大写：壹万元整）。",
+                "总价¥12,000.00（大写：壹万元整）。",
+                "租金为1.5万元（大写：壹万伍仟元整）。",
+                "违约金为合同总价的百分之二十（大写：贰拾元）。",
+            ]
+        )
+        self.assertEqual([(h.index, h.text) for h in hits], [(1, "壹万元整")])
+        self.assertIn("12,000.00", hits[0].explanation)
+
+
+class _FakeIRPipeline(LangChainPipeline):
+    def __init__(self) -> None:
+        self.llm_cache = None
+        self.calls = []
+
+    async def _process_ir_chunk(self, *, chunk, chunk_index, user_id, timestamp_iso, doc_id, custom_rules=None, rules_only=False):
+        self.calls.append([r.id for r in custom_rules or []])
+        return []
+
+
+class TestPipelineLocalRules(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._orig = (settings.pagination, settings.review_rule_routing_enabled, settings.review_local_rules_enabled)
+        settings.pagination = -1
+        settings.review_rule_routing_enabled = False
+
+    def tearDown(self):
+        settings.pagination, settings.review_rule_routing_enabled, settings.review_local_rules_enabled = self._orig
+
+    async def _run(self, rules, *, rules_only=False):
+        texts = ["合同总价¥12,000.00（大写：壹万元整）。", "甲方保留最终解释权。"]
+        ir = DocumentIR(
+            blocks=[IRParagraph(id=f"p{i}", runs=[IRTextRun(id=f"r{i}", text=t)]) for i, t in enumerate(texts)]
+        )
+        pipeline = _FakeIRPipeline()
+        issues = [
+            i
+            async for batch in pipeline.stream_ir_issues(
+                doc_id="d", ir=ir, user_id="u", timestamp_iso="t", custom_rules=rules, rules_only=rules_only
+            )
+            for i in batch
+        ]
+        return pipeline.calls, issues
+
+    async def test_local_rules_bypass_llm(self):
+        settings.review_local_rules_enabled = True
+        calls, issues = await self._run([AMOUNTS, LLM_RULE, ABSOLUTE])
+        self.assertEqual(calls, [["llm"]])
+        self.assertEqual(sorted((i.type, i.location.node_id) for i in issues), [("绝对化用语", "p1"), ("金额大小写一致", "p0")])
+        amount = next(i for i in issues if i.type == "金额大小写一致")
+        self.assertEqual(amount.risk_level, "高")
+        self.assertEqual((amount.location.start_offset, amount.location.end_offset), (18, 22))
+
+    async def test_rules_only_with_local_rules_only_skips_llm(self):
+        settings.review_local_rules_enabled = True
+        calls, issues = await self._run([AMOUNTS, ABSOLUTE], rules_only=True)
+        self.assertEqual(calls, [])
+        self.assertEqual(len(issues), 2)
+
+    async def test_disabled(self):
+        settings.review_local_rules_enabled = False
+        calls, issues = await self._run([AMOUNTS, LLM_RULE])
+        self.assertEqual(calls, [["amounts", "llm"]])
+        self.assertEqual(issues, [])
+
+
+class _FakeMinerU:
+    def __init__(self, texts) -> None:
+        self.texts = texts
+
+    async def extract(self, pdf_path, *, data_id, cache_key):
+        return {"layout": {}}
+
+    def to_paragraphs(self, payload):
+        return [{"content": t, "page_num": 1, "bbox": [0, 0, 10, 10]} for t in self.texts]
+
+
+class _FakePdfPipeline(LangChainPipeline):
+    def __init__(self, texts) -> None:
+        self.llm_cache = None
+        self.mineru = _FakeMinerU(texts)
+
+
+class TestPdfPipelineLocalRules(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._orig = (settings.review_prefilter_enabled, settings.review_local_rules_enabled)
+        settings.review_prefilter_enabled = True
+        settings.review_local_rules_enabled = True
+
+    def tearDown(self):
+        settings.review_prefilter_enabled, settings.review_local_rules_enabled = self._orig
+
+    async def test_local_rule_hits_keep_document_paragraph_index(self):
+        # The numbering-only paragraph is pre-filtered, so the hits sit at 0 and 1 of the reviewed list.
+        texts = ["1、", "合同总价¥12,000.00（大写：壹万元整）。", "甲方保留最终解释权。"]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pdf_path = str(Path(tmpdir) / "t.pdf")
+            doc = fitz.open()
+            doc.new_page(width=200, height=300)
+            doc.save(pdf_path)
+            doc.close()
+
+            pipeline = _FakePdfPipeline(texts)
+            issues = [
+                i
+                async for batch in pipeline.stream_issues(
+                    doc_id="d",
+                    pdf_path=pdf_path,
+                    user_id="u",
+                    timestamp_iso="t",
+                    cache_key="k",
+                    custom_rules=[AMOUNTS, ABSOLUTE],
+                    rules_only=True,
+                )
+                for i in batch
+            ]
+
+        self.assertEqual(sorted((i.type, i.location.para_index) for i in issues), [("绝对化用语", 2), ("金额大小写一致", 1)])
+
+
+class TestLocalCheckPersistence(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_client = SQLiteClient(db_path=str(Path(self._tmp.name) / "app.db"))
+        await self.db_client.init_db()
+        self.service = RulesService(RulesRepository(self.db_client))
+
+    async def asyncTearDown(self):
+        await self.db_client.close()
+        self._tmp.cleanup()
+
+    async def test_round_trip_and_validation(self):
+        check = RuleLocalCheck(patterns=[r"\d+个工作日内"], lexicon=["最终解释权"])
+        created = await self.service.create_rule(name="本地", description="d", risk_level="中", local_check=check)
+        self.assertEqual((await self.service.get_rule(created.id)).local_check, check)
+
+        updated = await self.service.update_rule(created.id, {"local_check": {"amount_consistency": True}})
+        self.assertTrue(updated.local_check.amount_consistency)
+        self.assertTrue((await self.service.get_rule(created.id)).local_check.amount_consistency)
+
+        with self.assertRaises(RuleValidationError):
+            await self.service.create_rule(
+                name="坏", description="d", risk_level="中", local_check=RuleLocalCheck(patterns=["(未闭合"])
+            )
+        with self.assertRaises(RuleValidationError):
+            await self.service.update_rule(created.id, {"local_check": {}})
+
+    async def test_patch_null_clears_local_check(self):
+        created = await self.service.create_rule(
+            name="本地", description="d", risk_level="中", local_check=RuleLocalCheck(lexicon=["最终解释权"])
+        )
+        app = FastAPI()
+        app.include_router(rules_router.router)
+        app.dependency_overrides[get_rules_service] = lambda: self.service
+        client = TestClient(app)
+
+        renamed = client.patch(f"/api/v1/rules/{created.id}", json={"name": "改名"}).json()
+        self.assertEqual(renamed["local_check"]["lexicon"], ["最终解释权"])
+        cleared = client.patch(f"/api/v1/rules/{created.id}", json={"local_check": None}).json()
+        self.assertIsNone(cleared["local_check"])
+        self.assertIsNone((await self.service.get_rule(created.id)).local_check)
+
+    def test_fingerprint_unchanged_without_local_check(self):
+        self.assertNotIn("local_check", _canonical_rule_item(LLM_RULE))
+        self.assertNotEqual(
+            compute_review_rule_fingerprint(LLM_RULE),
+            compute_review_rule_fingerprint(LLM_RULE.model_copy(update={"local_check": RuleLocalCheck(lexicon=["x"])})),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
 import sys
+import tempfile
+import threading
 import unittest
 from pathlib import Path
 from unittest.mock import patch
@@ -15,7 +17,9 @@ for p in (API_DIR, ROOT_DIR, APP_DIR):
 import fitz
 
 from services import lc_pipeline as lp
+from services import pdf_session as pdf_session_module
 from services.mineru_client import _table_html_to_plain_text
+from services.pdf_session import PdfDocumentSession
 
 
 class TestLocationAnchors(unittest.IsolatedAsyncioTestCase):
@@ -105,3 +109,122 @@ class TestLocationAnchors(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(page_num, 2)
         self.assertEqual(bbox, [1, 1, 2, 2, 3, 3, 4, 4])
         self.assertIsNone(anchors)
+
+    def test_pdf_session_opens_document_once(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pdf_path = str(Path(tmpdir) / "t.pdf")
+            doc = fitz.open()
+            for i in range(3):
+                page = doc.new_page(width=200, height=300)
+                page.insert_text((20, 40), f"hello page {i + 1}")
+            doc.save(pdf_path)
+            doc.close()
+
+            real_open = fitz.open
+            with patch.object(pdf_session_module.fitz, "open", side_effect=real_open) as opened:
+                with PdfDocumentSession(pdf_path) as session:
+                    sizes = lp._get_pdf_page_sizes(session)
+                    for _ in range(5):
+                        for pn in (1, 2, 3):
+                            rects = lp._find_pdf_rects(session, pn, needle=f"page {pn}", fallback_sentence=None)
+                            self.assertTrue(rects)
+                            self.assertGreater(lp._pdf_text_len(session, pn), 0)
+
+            self.assertEqual(opened.call_count, 1)
+            self.assertEqual(sizes, {1: (200.0, 300.0), 2: (200.0, 300.0), 3: (200.0, 300.0)})
+            self.assertEqual(lp._find_pdf_rects(session, 1, needle="hello", fallback_sentence=None), [])
+
+    def test_fuzzy_search_uses_char_index_across_whitespace(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pdf_path = str(Path(tmpdir) / "t.pdf")
+            doc = fitz.open()
+            page = doc.new_page(width=200, height=300)
+            page.insert_text((20, 40), "alpha beta gamma")
+            doc.save(pdf_path)
+            doc.close()
+
+            with PdfDocumentSession(pdf_path) as session:
+                index = session.char_index(1)
+                self.assertEqual(index.text, "alphabetagamma")
+                self.assertEqual(len(index), 14)
+                x0, y0, x1, y1 = index.box(0)
+                self.assertLess(x0, x1)
+                self.assertLess(y0, y1)
+
+                rects = lp._find_pdf_rects_fuzzy(session, 1, "beta\u3000gam")
+                self.assertEqual(len(rects), 1)
+                self.assertGreater(rects[0].x0, x1)
+                self.assertIs(session.char_index(1), index)
+
+    async def test_batch_locate_runs_pdf_pass_off_event_loop(self):
+        para = {"page_num": 1, "content": "foo", "bbox": [0, 0, 10, 10], "block_type": "text"}
+        page_sizes = {1: (100.0, 100.0)}
+        loop_thread = threading.get_ident()
+        threads: list[int] = []
+        jobs: list[object] = []
+        orig_run = lp._run_anchor_job
+
+        def _fake_find_pdf_rects(_pdf, page_num, *, needle=None, fallback_sentence=None):
+            threads.append(threading.get_ident())
+            return [fitz.Rect(10, 10, 20, 20)] if needle == "hit" else []
+
+        async def _counting_run(fn):
+            jobs.append(fn)
+            return await orig_run(fn)
+
+        with patch.object(lp, "_find_pdf_rects", side_effect=_fake_find_pdf_rects), patch.object(
+            lp, "_find_layout_quadpoints", return_value=None
+        ), patch.object(lp, "_run_anchor_job", side_effect=_counting_run), patch.object(
+            lp.settings, "anchor_worker_threads", 2
+        ):
+            results = await lp._locate_issue_locations(
+                [{"para": para, "para_index": 0, "needle": n} for n in ("hit", "miss", "hit")],
+                pdf_session=PdfDocumentSession("dummy.pdf"),
+                cache_key="dummy",
+                page_sizes=page_sizes,
+                page_bbox_space={},
+                layout=None,
+            )
+
+        self.assertEqual(len(results), 3)
+        self.assertIsNotNone(results[0][2])
+        self.assertIsNone(results[1][2])
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(loop_thread, threads)
+        # One pdf job for the batch plus one layout job for the single unresolved issue.
+        self.assertEqual(len(jobs), 2)
+
+    def test_layout_index_matches_exact_nospace_and_fuzzy(self):
+        layout = {
+            "pdf_info": [
+                {"page_idx": 1, "page_size": [200, 100], "para_blocks": []},
+                {
+                    "page_idx": 0,
+                    "page_size": [200, 100],
+                    "para_blocks": [
+                        {
+                            "bbox": [0, 0, 200, 100],
+                            "lines": [
+                                {"bbox": [10, 10, 110, 20], "spans": [{"content": "甲方应当", "bbox": [10, 10, 50, 20]}, {"content": "按期付款", "bbox": [50, 10, 110, 20]}]},
+                                {"bbox": [10, 30, 110, 40], "spans": [{"content": "违 约 责任", "bbox": [10, 30, 110, 40]}]},
+                            ],
+                        }
+                    ],
+                },
+            ]
+        }
+        index = lp._LayoutIndex(layout)
+        self.assertEqual(sorted(index.pages), [1, 2])
+        page = index.page(1)
+        self.assertEqual(len(page.lines), 2)
+        self.assertEqual(page.candidate_lines(["应当按期"]), [0])
+        self.assertEqual(page.candidate_lines(["违约"]), [1])
+        self.assertEqual(page.candidate_lines(["不存在"]), [])
+
+        kwargs = {"page_size_points": (200.0, 100.0), "fallback_sentence": None, "index": index}
+        cross_span = lp._find_layout_quadpoints(None, 1, needle="应当按期", **kwargs)
+        self.assertEqual(cross_span, lp._find_layout_quadpoints(layout, 1, needle="应当按期", page_size_points=(200.0, 100.0), fallback_sentence=None))
+        self.assertIsNotNone(cross_span)
+        self.assertIsNotNone(lp._find_layout_quadpoints(None, 1, needle="违约责任", **kwargs))
+        self.assertIsNotNone(lp._find_layout_quadpoints(None, 1, needle="甲方应当按期付", **kwargs))
+        self.assertIsNone(lp._find_layout_quadpoints(None, 2, needle="违约", **kwargs))
@@ -0,0 +1,320 @@
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+import httpx
+
+from config.config import settings
+from services.http_client import SharedHttpClient
+from services import mineru_client
+from services.mineru_client import MinerUClient
+
+
+def _result_zip() -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        content = [{"type": "text", "text": "第一条 合同期限", "bbox": [1, 2, 3, 4], "page_idx": 0}]
+        zf.writestr("doc_content_list.json", json.dumps(content, ensure_ascii=False))
+        zf.writestr("doc_middle.json", json.dumps({"pdf_info": [{"page_idx": 0, "page_size": [600, 800]}]}))
+    return buf.getvalue()
+
+
+class _FakeMinerU:
+    """Serves the four MinerU v4 steps and records what each request looked like."""
+
+    def __init__(self, zip_bytes: bytes, *, polls_until_done: int = 2) -> None:
+        self.zip_bytes = zip_bytes
+        self.polls_until_done = polls_until_done
+        self.requests: list[httpx.Request] = []
+        self.batches: dict[str, list[dict]] = {}
+        self.uploaded: dict[str, bytes] = {}
+        self.polls: dict[str, int] = {}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path
+        if path == "/api/v4/file-urls/batch":
+            files = json.loads(request.content)["files"]
+            batch_id = f"b{len(self.batches) + 1}"
+            self.batches[batch_id] = files
+            urls = [f"https://oss.test/up/{f['name']}" for f in files]
+            return httpx.Response(200, json={"code": 0, "data": {"batch_id": batch_id, "file_urls": urls}})
+        if path.startswith("/up/"):
+            body = b""
+            async for chunk in request.stream:
+                body += chunk
+            self.uploaded[path[len("/up/"):]] = body
+            return httpx.Response(200)
+        if path.startswith("/api/v4/extract-results/batch/"):
+            batch_id = path.rsplit("/", 1)[1]
+            self.polls[batch_id] = self.polls.get(batch_id, 0) + 1
+            state = "done" if self.polls[batch_id] >= self.polls_until_done else "running"
+            results = [
+                {
+                    "file_name": f["name"],
+                    "data_id": f["data_id"],
+                    "state": state,
+                    "full_zip_url": f"https://cdn.test/{f['data_id']}.zip",
+                }
+                for f in self.batches[batch_id]
+            ]
+            return httpx.Response(200, json={"code": 0, "data": {"extract_result": results}})
+        if path.endswith(".zip"):
+            chunks = [self.zip_bytes[i : i + 100] for i in range(0, len(self.zip_bytes), 100)]
+            return httpx.Response(200, content=_aiter(chunks))
+        return httpx.Response(404)
+
+
+async def _aiter(chunks):
+    for c in chunks:
+        yield c
+
+
+class TestMinerUClient(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.pdf = self.tmp / "doc.pdf"
+        self.pdf.write_bytes(b"%PDF-1.4\n" + b"x" * (3 * MinerUClient.UPLOAD_CHUNK_BYTES + 17))
+        self.fake = _FakeMinerU(_result_zip())
+        self.http = SharedHttpClient(transport=httpx.MockTransport(self.fake.handler))
+        self._patches = [
+            patch.object(settings, "mineru_api_key", "k"),
+            patch.object(settings, "mineru_base_url", "https://mineru.test"),
+            patch.object(settings, "mineru_poll_interval_sec", 0.0),
+            patch.object(settings, "mineru_cache_dir", str(self.tmp / "cache")),
+            patch.object(settings, "debug", False),
+            patch.object(settings, "mineru_batch_window_sec", 0.0),
+            patch.object(settings, "mineru_poll_rate_per_sec", 0.0),
+        ]
+        for p in self._patches:
+            p.start()
+
+    async def asyncTearDown(self):
+        for p in self._patches:
+            p.stop()
+        await self.http.aclose()
+        self._tmp.cleanup()
+
+    async def test_extract_streams_through_one_shared_client(self):
+        client = MinerUClient(http=self.http)
+        shared = self.http.get()
+        with patch.object(settings, "mineru_cache_artifacts", True):
+            result = await client.extract(self.pdf, data_id="d1", cache_key="ck")
+
+        self.assertIs(self.http.get(), shared)
+        self.assertEqual(self.fake.uploaded["doc.pdf"], self.pdf.read_bytes())
+        put = next(r for r in self.fake.requests if r.method == "PUT")
+        self.assertEqual(put.headers["content-length"], str(self.pdf.stat().st_size))
+        self.assertNotIn("transfer-encoding", put.headers)
+
+        meta = result["meta"]
+        self.assertEqual(meta["zip_path"], str(self.tmp / "cache" / "ck.zip"))
+        self.assertEqual(Path(meta["zip_path"]).read_bytes(), self.fake.zip_bytes)
+        self.assertEqual(meta["page_canvas_sizes"], {"1": [600, 800]})
+        self.assertEqual(result["layout"]["pdf_info"][0]["page_size"], [600, 800])
+        self.assertEqual(result["content"][0]["text"], "第一条 合同期限")
+        self.assertEqual([p.name for p in (self.tmp / "cache").iterdir() if p.suffix == ".part"], [])
+
+    async def test_download_without_artifact_cache_leaves_no_files(self):
+        client = MinerUClient(http=self.http)
+        with patch.object(settings, "mineru_cache_artifacts", False), patch("tempfile.tempdir", str(self.tmp)):
+            content, meta, layout = await client._download_and_parse_zip("https://cdn.test/d1.zip", "ck")
+        self.assertNotIn("zip_path", meta)
+        self.assertEqual(meta["selected_json"], "doc_content_list.json")
+        self.assertEqual(sorted(p.name for p in self.tmp.iterdir()), ["doc.pdf"])
+
+    async def test_download_writes_off_the_event_loop(self):
+        client = MinerUClient(http=self.http)
+        writer_threads: set[int] = set()
+        real_fdopen = os.fdopen
+
+        class _RecordingFile:
+            def __init__(self, f):
+                self._f = f
+
+            def write(self, data):
+                writer_threads.add(threading.get_ident())
+                return self._f.write(data)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return self._f.__exit__(*exc)
+
+        with patch.object(settings, "mineru_cache_artifacts", True), patch.object(
+            mineru_client.os, "fdopen", side_effect=lambda *a, **k: _RecordingFile(real_fdopen(*a, **k))
+        ):
+            zip_path, cached = await client._download_zip("https://cdn.test/d1.zip", "ck")
+
+        self.assertTrue(cached)
+        self.assertEqual(zip_path.read_bytes(), self.fake.zip_bytes)
+        self.assertTrue(writer_threads)
+        self.assertNotIn(threading.get_ident(), writer_threads)
+
+    async def test_concurrent_extracts_are_coalesced_into_one_batch(self):
+        pdfs = []
+        for i in range(3):
+            pdf = self.tmp / f"c{i}.pdf"
+            pdf.write_bytes(b"%PDF-1.4\n" + bytes([65 + i]) * 100)
+            pdfs.append(pdf)
+        with patch.object(settings, "mineru_batch_window_sec", 0.05), patch.object(settings, "mineru_cache_artifacts", False):
+            client = MinerUClient(http=self.http)
+            results = await asyncio.gather(
+                *[client.extract(pdf, data_id=f"d{i}", cache_key=f"k{i}") for i, pdf in enumerate(pdfs)],
+                client.extract(pdfs[0], data_id="d0", cache_key="k0"),
+            )
+
+        self.assertEqual(list(self.fake.batches), ["b1"])
+        self.assertEqual([f["data_id"] for f in self.fake.batches["b1"]], ["d0", "d1", "d2"])
+        self.assertEqual(self.fake.polls, {"b1": 2})
+        self.assertEqual(self.fake.uploaded, {p.name: p.read_bytes() for p in pdfs})
+        self.assertEqual([r["meta"]["zip_url"] for r in results], [f"https://cdn.test/d{i}.zip" for i in (0, 1, 2, 0)])
+
+    async def test_failed_upload_only_fails_its_own_request(self):
+        with patch.object(settings, "mineru_batch_window_sec", 0.05):
+            client = MinerUClient(http=self.http)
+            missing = self.tmp / "gone.pdf"
+            missing.write_bytes(b"%PDF")
+            good = client.batcher.submit(self.pdf, data_id="ok")
+            bad = client.batcher.submit(missing, data_id="bad")
+            missing.unlink()
+            results = await asyncio.gather(good, bad, return_exceptions=True)
+
+        self.assertEqual(results[0], "https://cdn.test/ok.zip")
+        self.assertIsInstance(results[1], FileNotFoundError)
+
+    async def test_known_document_is_served_from_parse_cache(self):
+        with patch.object(settings, "mineru_cache_artifacts", True):
+            first = await MinerUClient(http=self.http).extract(self.pdf, data_id="d1", cache_key="ck")
+            sent = len(self.fake.requests)
+
+            client = MinerUClient(http=self.http)
+            with patch.object(settings, "mineru_api_key", ""):
+                second = await client.extract(self.pdf, data_id="d1", cache_key="ck")
+            self.assertEqual(len(self.fake.requests), sent)
+            self.assertTrue(second["meta"]["parse_cache_hit"])
+            self.assertEqual(second["meta"]["zip_url"], "https://cdn.test/d1.zip")
+            self.assertEqual(second["content"], first["content"])
+
+            # A different MinerU model can't reuse the entry.
+            with patch.object(settings, "mineru_model_version", "pipeline"):
+                await MinerUClient(http=self.http).extract(self.pdf, data_id="d1", cache_key="ck")
+            self.assertGreater(len(self.fake.requests), sent)
+
+    async def test_corrupted_cache_entry_is_discarded(self):
+        with patch.object(settings, "mineru_cache_artifacts", True):
+            await MinerUClient(http=self.http).extract(self.pdf, data_id="d1", cache_key="ck")
+            zip_path = self.tmp / "cache" / "ck.zip"
+            data = bytearray(zip_path.read_bytes())
+            data[40] ^= 0xFF
+            zip_path.write_bytes(bytes(data))
+            sent = len(self.fake.requests)
+
+            client = MinerUClient(http=self.http)
+            result = await client.extract(self.pdf, data_id="d1", cache_key="ck")
+        self.assertEqual(client.parse_cache.stats()["invalid"], 1)
+        self.assertGreater(len(self.fake.requests), sent)
+        self.assertNotIn("parse_cache_hit", result["meta"])
+        self.assertEqual(zip_path.read_bytes(), self.fake.zip_bytes)
+
+    async def test_parse_cache_evicts_least_recently_used(self):
+        with patch.object(settings, "mineru_cache_artifacts", True):
+            client = MinerUClient(http=self.http)
+            await client.extract(self.pdf, data_id="d1", cache_key="k1")
+            entry_bytes = sum(p.stat().st_size for p in (self.tmp / "cache").glob("k1.*"))
+            client.parse_cache.max_bytes = int(entry_bytes * 2.5)
+            await client.extract(self.pdf, data_id="d2", cache_key="k2")
+            await client.extract(self.pdf, data_id="d1", cache_key="k1")  # hit: k1 becomes most recent
+            await client.extract(self.pdf, data_id="d3", cache_key="k3")
+
+        names = sorted(p.name for p in (self.tmp / "cache").iterdir() if not p.name.startswith("index.db"))
+        self.assertEqual(names, ["k1.layout.json", "k1.zip", "k3.layout.json", "k3.zip"])
+        self.assertEqual(client.parse_cache.stats()["evictions"], 1)
+
+    async def test_existing_zip_without_index_entry_is_a_miss(self):
+        cache_dir = self.tmp / "cache"
+        cache_dir.mkdir()
+        (cache_dir / "old.zip").write_bytes(b"stale")
+        with patch.object(settings, "mineru_cache_artifacts", True):
+            client = MinerUClient(http=self.http)
+            result = await client.extract(self.pdf, data_id="d1", cache_key="old")
+        self.assertNotIn("parse_cache_hit", result["meta"])
+        self.assertEqual(len(self.fake.batches), 1)
+        self.assertEqual((cache_dir / "old.zip").read_bytes(), self.fake.zip_bytes)
+
+    async def test_hit_does_not_hash_zip_until_verification_is_due(self):
+        with patch.object(settings, "mineru_cache_artifacts", True):
+            await MinerUClient(http=self.http).extract(self.pdf, data_id="d1", cache_key="ck")
+            client = MinerUClient(http=self.http)
+            with patch("services.mineru_cache._sha256_file", side_effect=AssertionError("hashed on hit")):
+                result = await client.extract(self.pdf, data_id="d1", cache_key="ck")
+            self.assertTrue(result["meta"]["parse_cache_hit"])
+
+            # Same size and mtime but different bytes: caught by the background check once it is due.
+            zip_path = self.tmp / "cache" / "ck.zip"
+            st = zip_path.stat()
+            data = bytearray(zip_path.read_bytes())
+            data[40] ^= 0xFF
+            zip_path.write_bytes(bytes(data))
+            os.utime(zip_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            cache = client.parse_cache
+            cache.verify_interval_sec = 0
+            self.assertIsNotNone(await cache.lookup("ck", model_version=client.model_version, is_ocr=bool(getattr(settings, "mineru_is_ocr", False))))
+            await asyncio.gather(*cache._verify_tasks)
+            self.assertEqual(client.parse_cache.stats()["invalid"], 1)
+            self.assertFalse(zip_path.exists())
+            await client.aclose()
+
+    def test_zip_reader_decodes_layout_once_and_reads_only_needed_images(self):
+        zip_path = self.tmp / "r.zip"
+        png = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + (300).to_bytes(4, "big") + (400).to_bytes(4, "big") + b"\x00" * 8
+        content = [
+            {"type": "text", "text": "a", "bbox": [0, 0, 1, 1], "page_idx": 0},
+            {"type": "text", "text": "b", "bbox": [0, 0, 1, 1], "page_idx": 1},
+        ]
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("x_content_list.json", json.dumps(content))
+            zf.writestr("x_middle.json", json.dumps({"pdf_info": [{"page_idx": 0, "page_size": [600, 800]}]}))
+            zf.writestr("x_model.json", "[]")
+            zf.writestr("layout_extract_result.json", "{not json")
+            for i in range(5):  # page_1..page_5; only page 2 lacks a layout size and is referenced
+                zf.writestr(f"images/page_{i + 1}.png", png)
+
+        opened: list[str] = []
+        real_open = zipfile.ZipFile.open
+
+        def spy(zf, name, *args, **kwargs):
+            opened.append(name if isinstance(name, str) else name.filename)
+            return real_open(zf, name, *args, **kwargs)
+
+        with patch.object(settings, "mineru_cache_artifacts", False), patch.object(zipfile.ZipFile, "open", spy):
+            data, meta, layout = mineru_client._parse_result_zip(zip_path, meta={}, cache_key="ck")
+
+        self.assertEqual(meta["selected_json"], "x_content_list.json")
+        self.assertEqual(data, content)
+        self.assertEqual(layout["pdf_info"][0]["page_size"], [600, 800])
+        self.assertEqual(meta["page_canvas_sizes"], {"1": [600, 800], "2": [300, 400]})
+        self.assertEqual(sorted(opened), ["images/page_2.png", "x_content_list.json", "x_middle.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -35,6 +35,8 @@ class _TimeoutPipeline:
         timestamp_iso: str,
         cache_key: str,
         custom_rules=None,
+        rules_only=False,
+        revision=None,
     ):
         raise TimeoutError("Timed out waiting for MinerU result")
         if False:
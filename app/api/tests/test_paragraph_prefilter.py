@@ -0,0 +1,113 @@
+import sys
+import unittest
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from common.models import DocumentIR, IRParagraph, IRTextRun
+from config.config import settings
+from services.lc_pipeline import LangChainPipeline
+from services.paragraph_prefilter import classify_paragraph, prefilter_paragraphs
+
+
+class TestClassifyParagraph(unittest.TestCase):
+    def test_non_reviewable_lines(self):
+        cases = {
+            "": "empty",
+            "1、": "numbering",
+            "（一）": "numbering",
+            "①": "numbering",
+            "第三条": "numbering",
+            "- 3 -": "numbering",
+            "第 2 页 共 9 页": "numbering",
+            "------": "separator",
+            "□是 □否": "checkbox",
+            "口 同意  口 不同意": "checkbox",
+            "____年__月__日": "placeholder",
+            "    年   月   日": "placeholder",
+            "甲方（盖章）：________": "field",
+            "电话：______ 传真：______": "field",
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(classify_paragraph(text), expected)
+
+    def test_reviewable_lines_are_kept(self):
+        for text in (
+            "1. 本合同自双方签字之日起生效。",
+            "甲方：北京某某有限公司",
+            "口头约定不具有法律效力。",
+            "3天内支付全部款项",
+            "金额：人民币100元",
+            "☑ 乙方同意按照本合同约定履行全部义务",
+            "第一条 合同标的",
+            "2024年1月1日",
+            "1.5年",
+            "12.5",
+            "2024",
+            "签订日期：2024年1月1日",
+        ):
+            with self.subTest(text=text):
+                self.assertIsNone(classify_paragraph(text))
+
+    def test_prefilter_keeps_original_objects_and_counts(self):
+        paras = [{"content": "1、"}, {"content": "正文内容。"}, {"content": "□是 □否"}, {"content": "____年__月__日"}]
+        kept, stats = prefilter_paragraphs(paras)
+        self.assertEqual(kept, [paras[1]])
+        self.assertIs(kept[0], paras[1])
+        self.assertEqual(stats["total"], 4)
+        self.assertEqual(stats["kept"], 1)
+        self.assertEqual(stats["dropped"], 3)
+        self.assertEqual((stats["numbering"], stats["checkbox"], stats["placeholder"]), (1, 1, 1))
+
+
+class _FakeIRPipeline(LangChainPipeline):
+    def __init__(self) -> None:
+        self.llm_cache = None
+        self.chunks = []
+
+    async def _process_ir_chunk(self, *, chunk, chunk_index, user_id, timestamp_iso, doc_id, custom_rules=None, rules_only=False):
+        self.chunks.append(chunk)
+        return []
+
+
+class TestPipelinePrefilter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._orig = (settings.pagination, settings.review_prefilter_enabled)
+        settings.pagination = -1
+
+    def tearDown(self):
+        settings.pagination, settings.review_prefilter_enabled = self._orig
+
+    async def _run(self) -> list:
+        texts = ["（一）", "双方应当遵守本合同。", "____年__月__日", "违约方承担责任。"]
+        ir = DocumentIR(
+            blocks=[IRParagraph(id=f"p{i}", runs=[IRTextRun(id=f"r{i}", text=t)]) for i, t in enumerate(texts)]
+        )
+        pipeline = _FakeIRPipeline()
+        async for _ in pipeline.stream_ir_issues(doc_id="d", ir=ir, user_id="u", timestamp_iso="t"):
+            pass
+        return pipeline.chunks
+
+    async def test_filtered_paragraphs_never_reach_llm(self):
+        settings.review_prefilter_enabled = True
+        chunks = await self._run()
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual([p["node_id"] for p in chunks[0]], ["p1", "p3"])
+        self.assertEqual([p["global_index"] for p in chunks[0]], [1, 3])
+
+    async def test_disabled(self):
+        settings.review_prefilter_enabled = False
+        chunks = await self._run()
+        self.assertEqual(len(chunks[0]), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -41,7 +41,7 @@ from services.storage_provider import LocalStorageProvider
 
 
 class _SlowPipeline:
-    async def stream_issues(self, *, doc_id: str, pdf_path: str, user_id: str, timestamp_iso: str, cache_key: str, custom_rules=None):
+    async def stream_issues(self, *, doc_id: str, pdf_path: str, user_id: str, timestamp_iso: str, cache_key: str, custom_rules=None, rules_only=False, revision=None):
         import asyncio
 
         await asyncio.sleep(0.05)
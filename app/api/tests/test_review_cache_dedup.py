@@ -30,7 +30,7 @@ class _CountingPipeline:
     def __init__(self) -> None:
         self.calls = 0
 
-    async def stream_issues(self, *, doc_id: str, pdf_path: str, user_id: str, timestamp_iso: str, cache_key: str, custom_rules=None):
+    async def stream_issues(self, *, doc_id: str, pdf_path: str, user_id: str, timestamp_iso: str, cache_key: str, custom_rules=None, rules_only=False, revision=None):
         self.calls += 1
         yield [
             Issue(
@@ -0,0 +1,177 @@
+import asyncio
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from uuid import uuid4
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from common.models import Issue, IssueStatusEnum
+from database.analysis_issues_repository import AnalysisIssuesRepository
+from database.analysis_runs_repository import AnalysisRunsRepository
+from database.db_client import SQLiteClient
+from database.documents_repository import DocumentsRepository
+from database.issues_repository import IssuesRepository
+from security.auth import User
+from services.documents_service import DocumentsService
+from services.issues_service import IssuesService
+from services.review_events import ReviewEventBus
+
+
+def _issue(doc_id: str, text: str) -> Issue:
+    return Issue(
+        id=str(uuid4()),
+        doc_id=doc_id,
+        text=text,
+        type="Grammar & Spelling",
+        status=IssueStatusEnum.not_reviewed,
+        suggested_fix="",
+        explanation="",
+        review_initiated_by="u",
+        review_initiated_at_UTC="t",
+    )
+
+
+class _GatedPipeline:
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+
+    async def stream_issues(self, *, doc_id, pdf_path, user_id, timestamp_iso, cache_key, custom_rules=None, rules_only=False, revision=None):
+        yield [_issue(doc_id, "first")]
+        await self.release.wait()
+        yield [_issue(doc_id, "second")]
+
+
+class TestReviewEvents(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_client = SQLiteClient(db_path=str(Path(self._tmp.name) / "app.db"))
+        issues_repo = IssuesRepository(self.db_client)
+        await issues_repo.init()
+        documents_repo = DocumentsRepository(self.db_client)
+        self.documents_service = DocumentsService(documents_repo)
+        self.pipeline = _GatedPipeline()
+        self.service = IssuesService(
+            issues_repo,
+            AnalysisRunsRepository(self.db_client),
+            AnalysisIssuesRepository(self.db_client),
+            documents_repo,
+            self.pipeline,
+        )
+
+    async def asyncTearDown(self):
+        await self.db_client.close()
+        self._tmp.cleanup()
+
+    def test_bus_overflow_flags_subscription(self):
+        bus = ReviewEventBus(max_queue=1)
+        with bus.subscribe("o", "d") as sub:
+            bus.publish_status("o", "d", "running")
+            bus.publish_status("o", "d", "running")
+            self.assertTrue(sub.overflowed)
+            self.assertEqual(bus.subscriber_count("o", "d"), 1)
+        self.assertEqual(bus.subscriber_count("o", "d"), 0)
+
+    async def test_watch_review_is_pushed_without_polling(self):
+        doc_id = str(uuid4())
+        await self.documents_service.create_document(
+            owner_id="local-user",
+            original_filename="test.pdf",
+            display_name="test.pdf",
+            subtype_id="subtype_labor_contract",
+            storage_provider="local",
+            storage_key=f"objects/{doc_id}.pdf",
+            mime_type="application/pdf",
+            size_bytes=1,
+            sha256="0" * 64,
+            created_by="local-user",
+            doc_id=doc_id,
+        )
+        result = await self.service.start_review_in_background(
+            document_id=doc_id,
+            owner_id="local-user",
+            subtype_id="subtype_labor_contract",
+            pdf_path="dummy.pdf",
+            user=User(oid="local-user"),
+            time_stamp="t",
+            rules_snapshot_json="[]",
+            rules_fingerprint="fp",
+            pipeline_version="v",
+            mineru_cache_key=str(uuid4()),
+        )
+        self.assertEqual(result["status"], IssuesService.STATUS_RUNNING)
+
+        events: list[tuple[str, object]] = []
+        started = time.perf_counter()
+        # A very long resync interval: anything after the initial catch-up must come from the bus.
+        async for kind, payload in self.service.watch_review(doc_id, owner_id="local-user", resync_sec=60):
+            events.append((kind, payload))
+            if kind == "issues" and [i.text for i in payload] == ["first"]:
+                self.pipeline.release.set()
+        elapsed = time.perf_counter() - started
+
+        texts = [i.text for kind, payload in events if kind == "issues" for i in payload]
+        self.assertEqual(texts, ["first", "second"])
+        self.assertEqual(events[-1], ("complete", None))
+        self.assertLess(elapsed, 5)
+
+    async def test_watch_review_polls_runs_from_another_process(self):
+        doc_id = str(uuid4())
+        await self.documents_service.create_document(
+            owner_id="local-user",
+            original_filename="test.pdf",
+            display_name="test.pdf",
+            subtype_id="subtype_labor_contract",
+            storage_provider="local",
+            storage_key=f"objects/{doc_id}.pdf",
+            mime_type="application/pdf",
+            size_bytes=1,
+            sha256="0" * 64,
+            created_by="local-user",
+            doc_id=doc_id,
+        )
+        # Same database, separate event bus: the watcher hears nothing from the run.
+        watcher = IssuesService(
+            self.service.issues_repository,
+            self.service.analysis_runs_repository,
+            self.service.analysis_issues_repository,
+            self.service.documents_repository,
+            self.pipeline,
+        )
+        await self.service.start_review_in_background(
+            document_id=doc_id,
+            owner_id="local-user",
+            subtype_id="subtype_labor_contract",
+            pdf_path="dummy.pdf",
+            user=User(oid="local-user"),
+            time_stamp="t",
+            rules_snapshot_json="[]",
+            rules_fingerprint="fp",
+            pipeline_version="v",
+            mineru_cache_key=str(uuid4()),
+        )
+        try:
+            events: list[tuple[str, object]] = []
+            started = time.perf_counter()
+            async for kind, payload in watcher.watch_review(doc_id, owner_id="local-user", resync_sec=60, poll_sec=0.05):
+                events.append((kind, payload))
+                if kind == "issues" and [i.text for i in payload] == ["first"]:
+                    self.pipeline.release.set()
+            elapsed = time.perf_counter() - started
+        finally:
+            await self.service.stop_worker()
+
+        texts = [i.text for kind, payload in events if kind == "issues" for i in payload]
+        self.assertEqual(texts, ["first", "second"])
+        self.assertEqual(events[-1], ("complete", None))
+        self.assertNotIn(("keepalive", None), events)
+        self.assertLess(elapsed, 5)
@@ -0,0 +1,278 @@
+import asyncio
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from common.models import Issue, IssueStatusEnum
+from config.config import settings
+from database.analysis_issues_repository import AnalysisIssuesRepository
+from database.analysis_runs_repository import AnalysisRunsRepository
+from database.db_client import SQLiteClient
+from database.documents_repository import DocumentsRepository
+from database.issues_repository import IssuesRepository
+from database.review_jobs_repository import ReviewJobsRepository
+from security.auth import User
+from services.issues_service import IssuesService
+from services.review_worker import ReviewWorker
+
+
+class _FakeIssuesService:
+    def __init__(self, gate: asyncio.Event | None = None) -> None:
+        self.gate = gate
+        self.ran: list[str] = []
+        self.finished: list[tuple[str, str]] = []
+
+    async def run_review_job(self, job):
+        self.ran.append(job["id"])
+        if self.gate is not None:
+            await self.gate.wait()
+        return ReviewJobsRepository.STATUS_COMPLETED
+
+    async def finish_review_job(self, job, *, status, error_message):
+        self.finished.append((job["id"], status))
+
+
+class TestReviewJobs(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_client = SQLiteClient(db_path=str(Path(self._tmp.name) / "app.db"))
+        self.repo = ReviewJobsRepository(self.db_client)
+        await self.repo.init()
+
+    async def asyncTearDown(self):
+        await self.db_client.close()
+        self._tmp.cleanup()
+
+    async def _enqueue(self, document_id: str = "d1", **kwargs):
+        return await self.repo.enqueue(
+            kind="pdf", owner_id="u1", document_id=document_id, run_id=f"run-{document_id}", payload={"x": 1}, **kwargs
+        )
+
+    async def test_claim_is_exclusive_and_expired_lease_is_recovered(self):
+        job = await self._enqueue()
+        claimed = await self.repo.claim(worker_id="w1", lease_sec=60)
+        self.assertEqual(claimed["id"], job["id"])
+        self.assertEqual(claimed["attempts"], 1)
+        self.assertIsNone(await self.repo.claim(worker_id="w2", lease_sec=60))
+
+        # Simulate w1 crashing: its lease runs out and w2 takes over.
+        await self.db_client.execute_write(
+            "UPDATE review_jobs SET lease_expires_at = ? WHERE id = ?", (time.time() - 1, job["id"])
+        )
+        recovered = await self.repo.claim(worker_id="w2", lease_sec=60)
+        self.assertEqual(recovered["id"], job["id"])
+        self.assertEqual(recovered["attempts"], 2)
+        self.assertIsNone(await self.repo.heartbeat(job["id"], worker_id="w1", lease_sec=60))
+        self.assertFalse(await self.repo.finish(job["id"], worker_id="w1", status="completed"))
+        self.assertTrue(await self.repo.finish(job["id"], worker_id="w2", status="completed"))
+        self.assertEqual((await self.repo.get(job["id"]))["status"], "completed")
+
+    async def test_cancel_queued_and_leased_jobs(self):
+        queued = await self._enqueue("d1")
+        leased = await self._enqueue("d2")
+        await self.repo.claim(worker_id="w1", lease_sec=60)  # oldest first -> d1
+        await self.repo.release(queued["id"], worker_id="w1")
+        self.assertEqual((await self.repo.get(queued["id"]))["attempts"], 0)
+
+        cancelled = await self.repo.request_cancel(owner_id="u1", document_id="d1")
+        self.assertEqual([j["id"] for j in cancelled], [queued["id"]])
+        self.assertEqual((await self.repo.get(queued["id"]))["status"], "cancelled")
+
+        self.assertEqual((await self.repo.claim(worker_id="w1", lease_sec=60))["id"], leased["id"])
+        self.assertFalse(await self.repo.heartbeat(leased["id"], worker_id="w1", lease_sec=60))
+        self.assertEqual(await self.repo.request_cancel(owner_id="u1", document_id="d2"), [])
+        self.assertTrue(await self.repo.heartbeat(leased["id"], worker_id="w1", lease_sec=60))
+
+    async def test_reap_exhausted_fails_job_after_last_attempt(self):
+        job = await self._enqueue(max_attempts=1)
+        await self.repo.claim(worker_id="w1", lease_sec=60)
+        self.assertEqual(await self.repo.reap_exhausted(), [])
+        await self.db_client.execute_write(
+            "UPDATE review_jobs SET lease_expires_at = ? WHERE id = ?", (time.time() - 1, job["id"])
+        )
+        self.assertIsNone(await self.repo.claim(worker_id="w2", lease_sec=60))
+        reaped = await self.repo.reap_exhausted()
+        self.assertEqual([(r["id"], r["status"]) for r in reaped], [(job["id"], "failed")])
+        self.assertEqual((await self.repo.get(job["id"]))["status"], "failed")
+
+    async def test_worker_runs_jobs_and_releases_them_on_shutdown(self):
+        done = await self._enqueue("d1")
+        service = _FakeIssuesService()
+        worker = ReviewWorker(service, self.repo, worker_id="w1", concurrency=2, poll_sec=0.01, heartbeat_sec=0.01)
+        stop = asyncio.Event()
+        runner = asyncio.create_task(worker.run(stop))
+        for _ in range(200):
+            if (await self.repo.get(done["id"]))["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual((await self.repo.get(done["id"]))["status"], "completed")
+
+        service.gate = asyncio.Event()
+        pending = await self._enqueue("d2")
+        worker.wake()
+        for _ in range(200):
+            if pending["id"] in service.ran:
+                break
+            await asyncio.sleep(0.01)
+        self.assertIn(pending["id"], service.ran)
+
+        stop.set()
+        await asyncio.wait_for(runner, timeout=5)
+        row = await self.repo.get(pending["id"])
+        self.assertEqual(row["status"], "queued")
+        self.assertIsNone(row["lease_owner"])
+
+
+class _InterruptiblePipeline:
+    """Yields one issue per paragraph; the first attempt stalls after the first paragraph."""
+
+    def __init__(self) -> None:
+        self.attempts = 0
+        self.stalled = asyncio.Event()
+
+    async def stream_issues(self, *, doc_id, pdf_path, user_id, timestamp_iso, cache_key, custom_rules=None, rules_only=False, revision=None):
+        self.attempts += 1
+        for n in range(2):
+            if n == 1 and self.attempts == 1:
+                self.stalled.set()
+                await asyncio.Event().wait()
+            yield [
+                Issue(
+                    id=f"{self.attempts}-{n}",
+                    doc_id=doc_id,
+                    text=f"p{n}",
+                    type="Grammar & Spelling",
+                    status=IssueStatusEnum.not_reviewed,
+                    suggested_fix="",
+                    explanation="",
+                    review_initiated_by=user_id,
+                    review_initiated_at_UTC=timestamp_iso,
+                )
+            ]
+
+
+class TestResumedReviewJob(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._mode = settings.review_worker_mode
+        settings.review_worker_mode = "external"
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_client = SQLiteClient(db_path=str(Path(self._tmp.name) / "app.db"))
+        await self.db_client.init_db()
+        await self.db_client.store_item(
+            "documents",
+            {
+                "id": "d1",
+                "owner_id": "u1",
+                "original_filename": "a.pdf",
+                "display_name": "a.pdf",
+                "subtype_id": "s1",
+                "storage_provider": "local",
+                "storage_key": "objects/d1.pdf",
+                "mime_type": "application/pdf",
+                "size_bytes": 1,
+                "sha256": "sha",
+                "created_by": "u1",
+                "created_at_utc": "2024-01-01T00:00:00+00:00",
+            },
+        )
+        self.pipeline = _InterruptiblePipeline()
+        self.service = IssuesService(
+            IssuesRepository(self.db_client),
+            AnalysisRunsRepository(self.db_client),
+            AnalysisIssuesRepository(self.db_client),
+            DocumentsRepository(self.db_client),
+            self.pipeline,
+        )
+
+    async def asyncTearDown(self):
+        settings.review_worker_mode = self._mode
+        await self.db_client.close()
+        self._tmp.cleanup()
+
+    async def _run_worker_until(self, worker_id: str, condition) -> None:
+        worker = ReviewWorker(self.service, self.service.review_jobs_repository, worker_id=worker_id, poll_sec=0.01, heartbeat_sec=0.01)
+        stop = asyncio.Event()
+        runner = asyncio.create_task(worker.run(stop))
+        for _ in range(300):
+            if await condition():
+                break
+            await asyncio.sleep(0.01)
+        stop.set()
+        await asyncio.wait_for(runner, timeout=5)
+
+    async def _start_review(self) -> dict:
+        return await self.service.start_review_in_background(
+            document_id="d1",
+            owner_id="u1",
+            subtype_id="s1",
+            pdf_path="unused",
+            user=User(oid="u1"),
+            time_stamp="2024-01-01T00:00:00+00:00",
+            rules_snapshot_json="[]",
+            rules_fingerprint="fp",
+            pipeline_version="pv",
+            mineru_cache_key="sha",
+        )
+
+    async def test_released_job_resumes_without_duplicates(self):
+        started = await self._start_review()
+
+        async def stalled():
+            return self.pipeline.stalled.is_set()
+
+        # The first worker stores one issue, then shuts down mid-review and hands the job back.
+        await self._run_worker_until("w1", stalled)
+        status = await self.service.get_review_status("d1", owner_id="u1")
+        self.assertEqual(status["status"], IssuesService.STATUS_RUNNING)
+        jobs = await self.db_client.execute_query("SELECT status, attempts FROM review_jobs")
+        self.assertEqual([(j["status"], j["attempts"]) for j in jobs], [("queued", 0)])
+
+        async def completed():
+            return (await self.service.get_review_status("d1", owner_id="u1"))["status"] == IssuesService.STATUS_COMPLETED
+
+        await self._run_worker_until("w2", completed)
+        self.assertEqual(self.pipeline.attempts, 2)
+        issues = await self.service.get_issues_data("d1", owner_id="u1")
+        self.assertEqual(sorted(i.id for i in issues), ["2-0", "2-1"])
+        canonical = await self.service.analysis_issues_repository.list_by_run_id(started["run_id"], owner_id="u1")
+        self.assertEqual(len(canonical), 2)
+
+    async def test_started_inline_worker_resumes_released_job(self):
+        await self._start_review()
+
+        async def stalled():
+            return self.pipeline.stalled.is_set()
+
+        # A previous process stops mid-review and hands the job back to the queue.
+        await self._run_worker_until("w1", stalled)
+        jobs = await self.db_client.execute_query("SELECT status FROM review_jobs")
+        self.assertEqual([j["status"] for j in jobs], ["queued"])
+
+        # On startup the inline worker picks it up without anything new being enqueued.
+        settings.review_worker_mode = "inline"
+        self.service.start_worker()
+        try:
+            for _ in range(300):
+                status = await self.service.get_review_status("d1", owner_id="u1")
+                if status["status"] == IssuesService.STATUS_COMPLETED:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await self.service.stop_worker()
+        self.assertEqual(status["status"], IssuesService.STATUS_COMPLETED)
+        self.assertEqual(self.pipeline.attempts, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
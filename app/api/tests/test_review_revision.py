@@ -0,0 +1,288 @@
+import asyncio
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from uuid import uuid4
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+import fitz
+
+from common.models import DocumentIR, IRParagraph, IRTextRun, Issue, IssueStatusEnum, Location
+from config.config import settings
+from database.analysis_issues_repository import AnalysisIssuesRepository
+from database.analysis_runs_repository import AnalysisRunsRepository
+from database.db_client import SQLiteClient
+from database.documents_repository import DocumentsRepository
+from database.issues_repository import IssuesRepository
+from security.auth import User
+from services.issues_service import IssuesService
+from services.lc_pipeline import LangChainPipeline, ReviewIssue
+from services.review_revision import RevisionContext, filename_lineage, paragraph_hash, select_revised_paragraphs
+
+
+def _paras(texts):
+    return [{"content": t, "global_index": i, "node_id": f"p{i}", "path": [f"p{i}"]} for i, t in enumerate(texts)]
+
+
+class TestRevisionDiff(unittest.TestCase):
+    def test_filename_lineage(self):
+        for name in ("劳动合同.pdf", "劳动合同_v2.pdf", "劳动合同（修订版）.pdf", "劳动合同 (1).pdf", "劳动合同-20240501.pdf"):
+            with self.subTest(name=name):
+                self.assertEqual(filename_lineage(name), "劳动合同")
+        self.assertEqual(filename_lineage("Lease Agreement v3.1 final.docx"), "lease agreement")
+        self.assertEqual(filename_lineage("chapter2.pdf"), "chapter2")
+        self.assertNotEqual(filename_lineage("合同2.pdf"), filename_lineage("合同.pdf"))
+
+    def test_paragraph_hash_ignores_whitespace_and_width(self):
+        self.assertEqual(paragraph_hash("甲方 应当  支付１００元"), paragraph_hash("甲方 应当 支付100元\n"))
+        self.assertNotEqual(paragraph_hash("甲方应当支付100元"), paragraph_hash("甲方应当支付200元"))
+
+    def test_select_changed_paragraphs_with_context(self):
+        old = ["第一条 总则。", "第二条 付款。", "第三条 违约。", "第四条 争议。", "第五条 附则。"]
+        new = ["第一条 总则。", "第二条 付款。", "第三条 违约责任加重。", "第四条 争议。", "第五条 附则。", "第六条 新增。"]
+        revision = RevisionContext(
+            base_run_id="r1",
+            base_hashes={paragraph_hash(t) for t in old},
+            base_issues=[
+                {"id": "i1", "text": "总则", "location": {"source_sentence": "第一条 总则。"}},
+                {"id": "i3", "text": "违约", "location": {"source_sentence": "第三条 违约。"}},
+                {"id": "i5", "text": "附则", "location": {"source_sentence": "第五条  附则。"}},
+            ],
+        )
+        to_review, reused = select_revised_paragraphs(_paras(new), revision)
+
+        self.assertEqual([p["global_index"] for p in to_review], [1, 2, 3, 4, 5])
+        self.assertEqual([bool(p.get("context_only")) for p in to_review], [True, False, True, True, False])
+        self.assertEqual(sorted((row["id"], para["global_index"]) for row, para in reused), [("i1", 0), ("i5", 4)])
+        self.assertEqual(revision.stats["changed"], 2)
+        self.assertEqual(revision.stats["dropped_issues"], 1)
+        self.assertEqual(len(revision.paragraph_hashes), 6)
+
+
+class _LLMStubPipeline(LangChainPipeline):
+    """Real IR chunk processing with the LLM replaced: one issue on every paragraph sent."""
+
+    def __init__(self) -> None:
+        self.llm_cache = None
+        self.prepared: list[str] = []
+
+    async def _review_chunk_with_llm(self, *, chunk_index, prepared, system_prompt, guidance):
+        self.prepared.append(prepared)
+        lines = prepared.split("\n")
+        return [
+            ReviewIssue(type="Grammar & Spelling", text=line.split("]", 1)[1][:2], explanation="e", para_index=i)
+            for i, line in enumerate(lines)
+        ]
+
+
+class _FakeMinerU:
+    def __init__(self, texts) -> None:
+        self.texts = texts
+
+    async def extract(self, pdf_path, *, data_id, cache_key):
+        return {"layout": {}}
+
+    def to_paragraphs(self, payload):
+        return [{"content": t, "page_num": 1, "bbox": [0, 0, 10, 10]} for t in self.texts]
+
+
+class _FakePdfPipeline(LangChainPipeline):
+    def __init__(self, texts) -> None:
+        self.llm_cache = None
+        self.mineru = _FakeMinerU(texts)
+
+
+class TestPipelineRevision(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._orig = (settings.pagination, settings.review_prefilter_enabled)
+        settings.pagination = -1
+        settings.review_prefilter_enabled = False
+
+    def tearDown(self):
+        settings.pagination, settings.review_prefilter_enabled = self._orig
+
+    async def test_only_changed_paragraphs_reach_llm(self):
+        tail = ["本合同一式两份。", "双方签字后生效。", "附件为本合同组成部分。"]
+        old = ["甲方负责交付。", "乙方负责付款。", "违约方赔偿损失。", *tail]
+        new = ["前言部分新增。", "甲方负责交付。", "乙方负责付款。", "违约方赔偿全部损失。", *tail]
+        revision = RevisionContext(
+            base_run_id="r1",
+            base_hashes={paragraph_hash(t) for t in old},
+            base_issues=[
+                {"text": "付款", "type": "Definitive Language", "explanation": "x", "risk_level": "高",
+                 "location": {"source_sentence": "乙方负责付款。", "para_index": 1}},
+                {"text": "赔偿", "type": "Definitive Language", "explanation": "x",
+                 "location": {"source_sentence": "违约方赔偿损失。", "para_index": 2}},
+            ],
+        )
+        ir = DocumentIR(
+            blocks=[IRParagraph(id=f"n{i}", runs=[IRTextRun(id=f"r{i}", text=t)]) for i, t in enumerate(new)]
+        )
+        pipeline = _LLMStubPipeline()
+        batches = [b async for b in pipeline.stream_ir_issues(doc_id="d", ir=ir, user_id="u", timestamp_iso="t", revision=revision)]
+
+        reused, reviewed = batches
+        self.assertEqual(len(reused), 1)
+        self.assertEqual(reused[0].type, "Definitive Language")
+        self.assertEqual(reused[0].risk_level, "高")
+        self.assertEqual((reused[0].location.node_id, reused[0].location.para_index), ("n2", 2))
+        self.assertEqual((reused[0].location.start_offset, reused[0].location.end_offset), (4, 6))
+
+        # Changed paragraphs plus one unchanged neighbour each side; issues on neighbours are dropped.
+        self.assertEqual(len(pipeline.prepared), 1)
+        self.assertEqual(pipeline.prepared[0].count("\n") + 1, 5)
+        self.assertEqual(sorted(i.location.node_id for i in reviewed), ["n0", "n3"])
+        self.assertEqual(len(revision.paragraph_hashes), 7)
+
+    async def test_pdf_reused_issue_points_at_new_paragraph(self):
+        old = ["甲方负责交付。", "乙方负责付款。", "违约方赔偿损失。"]
+        new = ["前言部分新增。", *old]
+        revision = RevisionContext(
+            base_run_id="r1",
+            base_hashes={paragraph_hash(t) for t in old},
+            base_issues=[
+                {"text": "付款", "type": "Definitive Language", "explanation": "x",
+                 "location": {"source_sentence": "乙方负责付款。", "para_index": 1}},
+            ],
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pdf_path = str(Path(tmpdir) / "t.pdf")
+            doc = fitz.open()
+            doc.new_page(width=200, height=300)
+            doc.save(pdf_path)
+            doc.close()
+
+            pipeline = _FakePdfPipeline(new)
+            batches = [
+                b
+                async for b in pipeline.stream_issues(
+                    doc_id="d", pdf_path=pdf_path, user_id="u", timestamp_iso="t", cache_key="k",
+                    rules_only=True, revision=revision,
+                )
+            ]
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqual([(i.text, i.location.para_index) for i in batches[0]], [("付款", 2)])
+
+    async def test_without_baseline_records_hashes(self):
+        ir = DocumentIR(blocks=[IRParagraph(id="n0", runs=[IRTextRun(id="r0", text="正文。")])])
+        revision = RevisionContext()
+        async for _ in _LLMStubPipeline().stream_ir_issues(doc_id="d", ir=ir, user_id="u", timestamp_iso="t", revision=revision):
+            pass
+        self.assertEqual(revision.paragraph_hashes, [paragraph_hash("正文。")])
+
+
+class _RevisionRecordingPipeline:
+    def __init__(self) -> None:
+        self.revisions: list[RevisionContext] = []
+
+    async def stream_issues(self, *, doc_id, pdf_path, user_id, timestamp_iso, cache_key, custom_rules=None, rules_only=False, revision=None):
+        self.revisions.append(revision)
+        revision.paragraph_hashes = [paragraph_hash(f"{doc_id}-{i}") for i in range(3)]
+        yield [
+            Issue(
+                id=str(uuid4()),
+                doc_id=doc_id,
+                text="t",
+                type="Grammar & Spelling",
+                status=IssueStatusEnum.not_reviewed,
+                suggested_fix="",
+                explanation="",
+                location=Location(source_sentence=f"{doc_id}-0", page_num=1),
+                review_initiated_by=user_id,
+                review_initiated_at_UTC=timestamp_iso,
+            )
+        ]
+
+
+class TestRevisionBaseline(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_client = SQLiteClient(db_path=str(Path(self._tmp.name) / "app.db"))
+        self.pipeline = _RevisionRecordingPipeline()
+        self.service = IssuesService(
+            IssuesRepository(self.db_client),
+            AnalysisRunsRepository(self.db_client),
+            AnalysisIssuesRepository(self.db_client),
+            DocumentsRepository(self.db_client),
+            self.pipeline,
+        )
+        await self.db_client.init_db()
+        for doc_id, name in (("d1", "租赁合同_v1.pdf"), ("d2", "租赁合同_v2.pdf"), ("d3", "采购合同.pdf")):
+            await self.db_client.store_item(
+                "documents",
+                {
+                    "id": doc_id,
+                    "owner_id": "u1",
+                    "original_filename": name,
+                    "display_name": name,
+                    "subtype_id": "s1",
+                    "storage_provider": "local",
+                    "storage_key": f"objects/{doc_id}.pdf",
+                    "mime_type": "application/pdf",
+                    "size_bytes": 1,
+                    "sha256": f"sha-{doc_id}",
+                    "created_by": "u1",
+                    "created_at_utc": "2024-01-01T00:00:00+00:00",
+                },
+            )
+
+    async def asyncTearDown(self):
+        await self.service.stop_worker()
+        await self.db_client.close()
+        self._tmp.cleanup()
+
+    async def _review(self, doc_id: str, **kwargs) -> dict:
+        status = await self.service.start_review_in_background(
+            document_id=doc_id,
+            owner_id="u1",
+            subtype_id="s1",
+            pdf_path="unused",
+            user=User(oid="u1"),
+            time_stamp="2024-01-01T00:00:00+00:00",
+            rules_snapshot_json=json.dumps([]),
+            rules_fingerprint="fp",
+            pipeline_version="pv",
+            mineru_cache_key=f"sha-{doc_id}",
+            **kwargs,
+        )
+        for _ in range(500):
+            if status["status"] != IssuesService.STATUS_RUNNING:
+                break
+            await asyncio.sleep(0.01)
+            status = await self.service.get_review_status(doc_id, owner_id="u1")
+        self.assertEqual(status["status"], IssuesService.STATUS_COMPLETED)
+        return status
+
+    async def test_new_revision_diffs_against_previous_run(self):
+        first = await self._review("d1")
+        self.assertIsNone(self.pipeline.revisions[0].base_run_id)
+        stored = await self.service.analysis_runs_repository.get_paragraph_hashes(first["run_id"])
+        self.assertEqual(len(stored), 3)
+
+        await self._review("d2")
+        revision = self.pipeline.revisions[1]
+        self.assertEqual(revision.base_run_id, first["run_id"])
+        self.assertEqual(revision.base_hashes, stored)
+        self.assertEqual(revision.context_paragraphs, settings.review_revision_context_paragraphs)
+        self.assertEqual([i["location"]["source_sentence"] for i in revision.base_issues], ["d1-0"])
+
+        # Different lineage, or reuse switched off: full review.
+        await self._review("d3")
+        self.assertIsNone(self.pipeline.revisions[2].base_run_id)
+        await self._review("d2", force=True, incremental=False)
+        self.assertIsNone(self.pipeline.revisions[3].base_run_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import sys
+import unittest
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+from common.models import DocumentIR, IRParagraph, IRTextRun, ReviewRule, RuleExample
+from config.config import settings
+from services.lc_pipeline import LangChainPipeline
+from services.rule_routing import RuleRouter, extract_terms
+
+
+def _rule(rule_id: str, name: str, description: str, examples=(), **kwargs) -> ReviewRule:
+    return ReviewRule(
+        id=rule_id,
+        name=name,
+        description=description,
+        risk_level="中",
+        examples=[RuleExample(text=e, explanation="") for e in examples],
+        created_at="2024-01-01",
+        **kwargs,
+    )
+
+
+RULES = [
+    _rule("probation", "试用期期限", "试用期不得超过法定上限，三年以上固定期限合同试用期不超过六个月", ["试用期为八个月"]),
+    _rule("overtime", "加班费计算", "加班工资应按不低于工资的百分之一百五十支付", ["加班不另行支付报酬"]),
+    _rule("noncompete", "竞业限制补偿", "竞业限制期间用人单位应按月支付经济补偿", ["竞业限制期内不支付补偿"]),
+    _rule("social", "社会保险缴纳", "用人单位应依法为劳动者缴纳社会保险", ["社保由员工自行缴纳"]),
+    _rule("housing", "住房公积金", "用人单位应为劳动者缴存住房公积金"),
+    _rule("universal", "错别字", "文字错误", is_universal=True),
+    _rule("exclude", "签字栏", "签字盖章栏不视为问题", rule_type="exclusion"),
+]
+
+
+class TestRuleRouter(unittest.TestCase):
+    def test_extract_terms(self):
+        terms = extract_terms("乙方试用期 Non-compete period")
+        self.assertIn("试用", terms)
+        self.assertIn("non-compete", terms)
+        self.assertIn("period", terms)
+        self.assertNotIn("是否", extract_terms("是否"))
+
+    def test_selects_matching_rules_and_always_on(self):
+        router = RuleRouter(RULES, top_k=2)
+        self.assertTrue(router.active)
+        selected, matched = router.select(["乙方的试用期为三个月。", "试用期满考核合格的予以转正。"])
+        self.assertEqual([r.id for r in selected], ["probation", "universal", "exclude"])
+        self.assertEqual(matched[0][0], "试用期期限")
+
+        selected, _ = router.select(["竞业限制期内，甲方每月支付补偿金。", "乙方加班的，按照规定支付加班费。"])
+        self.assertEqual([r.id for r in selected], ["overtime", "noncompete", "universal", "exclude"])
+
+    def test_top_k_and_no_match(self):
+        router = RuleRouter(RULES, top_k=1)
+        selected, matched = router.select(["竞业限制期内每月支付补偿，加班费另计。"])
+        self.assertEqual(len(matched), 1)
+        self.assertEqual(len(selected), 3)
+        selected, matched = router.select(["本协议一式两份。"])
+        self.assertEqual([r.id for r in selected], ["universal", "exclude"])
+        self.assertEqual(matched, [])
+
+    def test_inactive_when_few_rules(self):
+        router = RuleRouter(RULES, top_k=5)
+        self.assertFalse(router.active)
+        self.assertEqual(router.select(["任意文本"])[0], RULES)
+
+    def test_budget_rules_bound_selection(self):
+        router = RuleRouter(RULES, top_k=2)
+        budget = router.budget_rules()
+        self.assertEqual(len(budget), 4)
+        self.assertIn(RULES[5], budget)
+        self.assertIn(RULES[6], budget)
+
+
+class _FakeIRPipeline(LangChainPipeline):
+    def __init__(self) -> None:
+        self.llm_cache = None
+        self.calls = []
+
+    async def _process_ir_chunk(self, *, chunk, chunk_index, user_id, timestamp_iso, doc_id, custom_rules=None, rules_only=False):
+        self.calls.append(([p["node_id"] for p in chunk], [r.id for r in custom_rules or []]))
+        return []
+
+
+class TestPipelineRuleRouting(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._orig = (
+            settings.pagination,
+            settings.review_chunk_strategy,
+            settings.review_rule_routing_enabled,
+            settings.review_rule_routing_top_k,
+        )
+        settings.pagination = 1
+        settings.review_chunk_strategy = "paragraphs"
+        settings.review_rule_routing_top_k = 1
+
+    def tearDown(self):
+        (
+            settings.pagination,
+            settings.review_chunk_strategy,
+            settings.review_rule_routing_enabled,
+            settings.review_rule_routing_top_k,
+        ) = self._orig
+
+    async def _run(self, rules, *, rules_only=False) -> list:
+        texts = ["试用期为两个月。", "公司为员工缴纳社会保险。", "本合同一式两份。"]
+        ir = DocumentIR(
+            blocks=[IRParagraph(id=f"p{i}", runs=[IRTextRun(id=f"r{i}", text=t)]) for i, t in enumerate(texts)]
+        )
+        pipeline = _FakeIRPipeline()
+        async for _ in pipeline.stream_ir_issues(
+            doc_id="d", ir=ir, user_id="u", timestamp_iso="t", custom_rules=rules, rules_only=rules_only
+        ):
+            pass
+        return sorted(pipeline.calls)
+
+    async def test_each_chunk_gets_its_rules(self):
+        settings.review_rule_routing_enabled = True
+        self.assertEqual(
+            await self._run(RULES),
+            [
+                (["p0"], ["probation", "universal", "exclude"]),
+                (["p1"], ["social", "universal", "exclude"]),
+                (["p2"], ["universal", "exclude"]),
+            ],
+        )
+
+    async def test_rules_only_skips_chunks_without_rules(self):
+        settings.review_rule_routing_enabled = True
+        calls = await self._run(RULES[:5], rules_only=True)
+        self.assertEqual(calls, [(["p0"], ["probation"]), (["p1"], ["social"])])
+
+    async def test_disabled(self):
+        settings.review_rule_routing_enabled = False
+        calls = await self._run(RULES)
+        self.assertTrue(all(len(rules) == len(RULES) for _, rules in calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+API_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = API_DIR.parent
+ROOT_DIR = APP_DIR.parent
+for p in (API_DIR, ROOT_DIR, APP_DIR):
+    p_str = str(p)
+    if p_str in sys.path:
+        sys.path.remove(p_str)
+    sys.path.insert(0, p_str)
+
+import aiosqlite
+
+from database import sqlite_pool
+from database.db_client import SQLiteClient, _is_read_query
+
+
+class TestSQLitePool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_client = SQLiteClient(db_path=str(Path(self._tmp.name) / "app.db"))
+        await self.db_client.init_db()
+
+    async def asyncTearDown(self):
+        await self.db_client.close()
+        self._tmp.cleanup()
+
+    async def test_wal_mode_and_connection_reuse(self):
+        rows = await self.db_client.execute_query("PRAGMA journal_mode")
+        self.assertEqual(list(rows[0].values())[0], "wal")
+
+        real_connect = aiosqlite.connect
+        with patch.object(sqlite_pool.aiosqlite, "connect", side_effect=real_connect) as connect:
+            for i in range(20):
+                await self.db_client.store_item("document_types", {"id": f"t{i}", "name": f"n{i}"})
+                await self.db_client.retrieve_item_by_id("document_types", f"t{i}")
+        # Writer was opened by init_db and reader by the PRAGMA query; nothing new per call.
+        self.assertEqual(connect.call_count, 0)
+
+    async def test_concurrent_writes_and_reads(self):
+        async def write(i: int) -> None:
+            await self.db_client.store_item("document_types", {"id": f"c{i}", "name": f"name{i}"})
+
+        async def read() -> int:
+            return len(await self.db_client.retrieve_items_by_values("document_types", {}))
+
+        results = await asyncio.gather(*[write(i) for i in range(50)], *[read() for _ in range(20)])
+        self.assertTrue(all(isinstance(r, int) for r in results[50:]))
+        rows = await self.db_client.execute_query("SELECT COUNT(*) AS n FROM document_types WHERE id LIKE 'c%'")
+        self.assertEqual(rows[0]["n"], 50)
+
+    async def test_failed_write_rolls_back(self):
+        with self.assertRaises(RuntimeError):
+            async with self.db_client.pool.write() as db:
+                await db.execute("INSERT INTO document_types (id, name) VALUES ('x', 'x')")
+                raise RuntimeError("boom")
+        self.assertIsNone(await self.db_client.retrieve_item_by_id("document_types", "x"))
+
+    async def test_store_item_groups_is_one_transaction(self):
+        written = await self.db_client.store_item_groups(
+            [
+                ("document_types", [{"id": "g1", "name": "a"}, {"id": "g2", "name": "b"}]),
+                ("document_subtypes", [{"id": "s1", "type_id": "g1", "name": "x"}]),
+            ]
+        )
+        self.assertEqual(written, 3)
+        self.assertIsNotNone(await self.db_client.retrieve_item_by_id("document_subtypes", "s1"))
+
+        with self.assertRaises(Exception):
+            await self.db_client.store_item_groups(
+                [
+                    ("document_types", [{"id": "g3", "name": "c"}]),
+                    ("document_subtypes", [{"id": "s2", "name": "missing type_id"}]),
+                ]
+            )
+        self.assertIsNone(await self.db_client.retrieve_item_by_id("document_types", "g3"))
+
+    def test_statement_routing(self):
+        for query in (
+            "SELECT * FROM rules",
+            "  with t AS (SELECT 1) SELECT * FROM t",
+            "SELECT updated_at FROM documents WHERE name = 'INSERT'",
+            "PRAGMA table_info(rules)",
+            "EXPLAIN QUERY PLAN SELECT 1",
+        ):
+            self.assertTrue(_is_read_query(query), query)
+        for query in (
+            "WITH t AS (SELECT 'a' AS id) INSERT INTO document_types (id, name) SELECT id, id FROM t",
+            "with old AS (SELECT id FROM rules) DELETE FROM rules WHERE id IN old",
+            "PRAGMA journal_mode = WAL",
+            "INSERT INTO rules DEFAULT VALUES",
+            "-- SELECT\nUPDATE rules SET name = 'x'",
+        ):
+            self.assertFalse(_is_read_query(query), query)
+
+    async def test_cte_write_goes_to_writer(self):
+        await self.db_client.execute_query(
+            "WITH t AS (SELECT ? AS id) INSERT INTO document_types (id, name) SELECT id, id FROM t", ("cte",)
+        )
+        self.assertIsNotNone(await self.db_client.retrieve_item_by_id("document_types", "cte"))
+        rows = await self.db_client.execute_query("SELECT COUNT(*) AS n FROM document_types", write=True)
+        self.assertGreaterEqual(rows[0]["n"], 1)
+
+    async def test_nested_write_reuses_transaction(self):
+        async def nested() -> None:
+            async with self.db_client.pool.write() as db:
+                await db.execute("INSERT INTO document_types (id, name) VALUES ('outer', 'o')")
+                await self.db_client.store_item("document_types", {"id": "inner", "name": "i"})
+                with self.assertRaises(RuntimeError):
+                    async with self.db_client.pool.write() as inner:
+                        await inner.execute("INSERT INTO document_types (id, name) VALUES ('undone', 'u')")
+                        raise RuntimeError("boom")
+
+        await asyncio.wait_for(nested(), timeout=5)
+        self.assertIsNotNone(await self.db_client.retrieve_item_by_id("document_types", "outer"))
+        self.assertIsNotNone(await self.db_client.retrieve_item_by_id("document_types", "inner"))
+        self.assertIsNone(await self.db_client.retrieve_item_by_id("document_types", "undone"))
+
+    async def test_nested_write_rolls_back_with_outer(self):
+        with self.assertRaises(RuntimeError):
+            async with self.db_client.pool.write():
+                await self.db_client.store_item("document_types", {"id": "lost", "name": "l"})
+                raise RuntimeError("boom")
+        self.assertIsNone(await self.db_client.retrieve_item_by_id("document_types", "lost"))
@@ -0,0 +1,86 @@
+"""
+JSON encode/decode for hot paths (MinerU artifacts, IR assets, issue rows, SSE payloads).
+
+Uses orjson when installed, then msgspec, otherwise the stdlib; the `JSON_CODEC` environment
+variable can pin one ("auto", "orjson", "msgspec", "stdlib"). All backends produce compact UTF-8 JSON without ASCII
+escaping, so output is interchangeable. Inputs a fast backend rejects (NaN literals, non-string
+keys, integers beyond 64 bits, ...) fall back to the stdlib instead of failing.
+
+Hashing paths that need byte-stable canonical JSON (e.g. `document_ir.canonical_json`) keep using
+the stdlib on purpose: float formatting differs between backends.
+"""
+
+import json
+import os
+from typing import Any, Callable
+
+from common.logger import get_logger
+
+logging = get_logger(__name__)
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+
+
+def _stdlib_loads(data: bytes | bytearray | memoryview | str) -> Any:
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+_Backend = tuple[str, Callable[[Any, bool], bytes], Callable[[bytes | str], Any], tuple[type, ...]]
+
+
+def _select_backend(name: str) -> _Backend:
+    """Returns (name, dumps, loads, errors the fast backend raises that warrant a stdlib retry)."""
+    name = (name or "auto").strip().lower()
+    if name in ("auto", "orjson"):
+        try:
+            import orjson
+
+            def orjson_dumps(obj: Any, sort_keys: bool) -> bytes:
+                return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+
+            return "orjson", orjson_dumps, orjson.loads, (TypeError, ValueError, OverflowError)
+        except ImportError:
+            if name == "orjson":
+                logging.warning("json_codec=orjson but orjson is not installed; using stdlib json")
+    if name in ("auto", "msgspec"):
+        try:
+            import msgspec
+
+            encoder = msgspec.json.Encoder()
+            decoder = msgspec.json.Decoder()
+
+            def msgspec_dumps(obj: Any, sort_keys: bool) -> bytes:
+                # msgspec keeps insertion order; sorted output goes through the stdlib.
+                return _stdlib_dumps(obj, True) if sort_keys else encoder.encode(obj)
+
+            return "msgspec", msgspec_dumps, decoder.decode, (TypeError, ValueError, OverflowError, msgspec.MsgspecError)
+        except ImportError:
+            if name == "msgspec":
+                logging.warning("json_codec=msgspec but msgspec is not installed; using stdlib json")
+    return "stdlib", _stdlib_dumps, _stdlib_loads, ()
+
+
+BACKEND, _dumps, _loads, _FALLBACK_ERRORS = _select_backend(os.environ.get("JSON_CODEC", "auto"))
+
+
+def dumps_bytes(obj: Any, *, sort_keys: bool = False) -> bytes:
+    """Compact UTF-8 JSON bytes."""
+    try:
+        return _dumps(obj, sort_keys)
+    except _FALLBACK_ERRORS:
+        return _stdlib_dumps(obj, sort_keys)
+
+
+def dumps(obj: Any, *, sort_keys: bool = False) -> str:
+    """Compact JSON text (non-ASCII characters are not escaped)."""
+    return dumps_bytes(obj, sort_keys=sort_keys).decode("utf-8")
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    """Parse JSON from bytes (preferred; avoids a decode step) or text."""
+    try:
+        return _loads(data)
+    except _FALLBACK_ERRORS:
+        return _stdlib_loads(data)
@@ -84,6 +84,19 @@ class RuleExample(BaseModel):
     explanation: str
 
 
+# ========== Rule Local Check (本地确定性检查) ==========
+class RuleLocalCheck(BaseModel):
+    """
+    Machine-checkable form of a rule, evaluated locally instead of by the LLM.
+    A paragraph violates the rule if it matches any regex in `patterns`, contains a term of
+    `lexicon` (case-insensitive), or, with `amount_consistency`, states an amount in Chinese
+    capitals (壹万元整) that none of the figures in the same paragraph agree with.
+    """
+    patterns: list[str] = []
+    lexicon: list[str] = []
+    amount_consistency: bool = False
+
+
 # ========== Review Rule ==========
 class ReviewRule(BaseModel):
     id: str
@@ -95,6 +108,7 @@ class ReviewRule(BaseModel):
     source: RuleSourceEnum = RuleSourceEnum.custom     # 规则来源：内置/自定义
     status: RuleStatusEnum = RuleStatusEnum.active
     is_universal: bool = False
+    local_check: Optional[RuleLocalCheck] = None  # 设置后由本地规则引擎检查，不再发送给 LLM
     created_at: str
     updated_at: Optional[str] = None
     type_ids: list[str] = []